@@ -0,0 +1,246 @@
+"""
+On-demand (socket-activated) model servers.
+
+Cortex listens on the server's public port itself and only launches the real
+backend (``mlx_lm.server`` or ``ollama serve``) on an internal port when the
+first connection arrives. That connection is held until the backend answers
+its readiness probe and is then proxied through byte for byte. Once no
+connection has been open for the idle timeout the backend is stopped,
+returning the model's memory to the system until the next request.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .readiness import DEFAULT_STARTUP_TIMEOUT, wait_until_ready
+
+logger = logging.getLogger(__name__)
+
+# Stop the backend after this many seconds without connections
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+# How often the idle monitor looks at the backend
+IDLE_CHECK_INTERVAL = 5.0
+
+# Seconds a backend gets to exit after SIGTERM before it is killed
+STOP_GRACE_PERIOD = 10.0
+
+PIPE_CHUNK_SIZE = 64 * 1024
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """Return a port that is currently free on ``host``."""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class OnDemandServer:
+    """Proxy that starts a backend server on first use and stops it when idle."""
+
+    def __init__(
+        self,
+        command: List[str],
+        listen_port: int,
+        backend_port: Optional[int] = None,
+        ready_path: str = "/v1/models",
+        host: str = "127.0.0.1",
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        startup_timeout: float = DEFAULT_STARTUP_TIMEOUT,
+        env: Optional[Dict[str, str]] = None,
+        log_file: Optional[Path] = None,
+        ready_pattern: Optional[str] = None,
+    ):
+        """Initialize the proxy.
+
+        ``{port}`` in ``command`` arguments and ``env`` values is replaced by
+        the backend's internal port.
+        """
+        self.host = host
+        self.listen_port = listen_port
+        self.backend_port = backend_port or free_port(host)
+        self.command = [arg.format(port=self.backend_port) for arg in command]
+        self.env = {k: v.format(port=self.backend_port) for k, v in (env or {}).items()}
+        self.ready_url = f"http://{host}:{self.backend_port}{ready_path}"
+        self.idle_timeout = idle_timeout
+        self.startup_timeout = startup_timeout
+        self.log_file = log_file
+        self.ready_pattern = ready_pattern
+
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.active_connections = 0
+        self.last_activity = time.monotonic()
+        self.starts = 0
+        self.last_time_to_ready: Optional[float] = None
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    @property
+    def backend_running(self) -> bool:
+        """Whether the backend process is alive."""
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """Start listening; the backend is not launched until a client connects."""
+        self._lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.listen_port)
+        self._monitor = asyncio.create_task(self._idle_monitor())
+        logger.info(
+            f"Listening on {self.host}:{self.listen_port} "
+            f"(backend on port {self.backend_port} starts on demand)"
+        )
+
+    async def serve_forever(self) -> None:
+        """Run until request_stop() is called, then shut everything down."""
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.stop()
+
+    def request_stop(self) -> None:
+        """Ask serve_forever() to return (safe to call from a signal handler)."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def stop(self) -> None:
+        """Stop listening and shut the backend down."""
+        if self._monitor:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self._stop_backend()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Hold a client connection until the backend is ready, then proxy it."""
+        self.active_connections += 1
+        self._touch()
+        backend_writer = None
+        try:
+            if not await self._ensure_backend():
+                return
+
+            try:
+                backend_reader, backend_writer = await asyncio.open_connection(
+                    self.host, self.backend_port
+                )
+            except OSError as e:
+                logger.error(f"Could not connect to backend on port {self.backend_port}: {e}")
+                return
+
+            await asyncio.gather(
+                self._pipe(reader, backend_writer), self._pipe(backend_reader, writer)
+            )
+        finally:
+            self.active_connections -= 1
+            self._touch()
+            for stream in (backend_writer, writer):
+                if stream is not None:
+                    stream.close()
+
+    async def _pipe(self, src: asyncio.StreamReader, dst: asyncio.StreamWriter) -> None:
+        """Copy one direction of a proxied connection until EOF."""
+        try:
+            while True:
+                data = await src.read(PIPE_CHUNK_SIZE)
+                if not data:
+                    break
+                dst.write(data)
+                await dst.drain()
+                self._touch()
+            if dst.can_write_eof():
+                dst.write_eof()
+        except (ConnectionError, OSError):
+            dst.close()
+
+    def _touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    async def _ensure_backend(self) -> bool:
+        """Launch the backend if needed and wait until it accepts requests."""
+        async with self._lock:
+            if self.backend_running:
+                return True
+
+            logger.info(f"Starting backend: {' '.join(self.command)}")
+            log = open(self.log_file, "a") if self.log_file else None
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    *self.command,
+                    stdout=log or asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.STDOUT,
+                    env={**os.environ, **self.env},
+                    start_new_session=True,
+                )
+            except OSError as e:
+                logger.error(f"Failed to start backend: {e}")
+                return False
+            finally:
+                if log:
+                    log.close()
+
+            process = self.process
+            readiness = await wait_until_ready(
+                self.ready_url,
+                timeout=self.startup_timeout,
+                is_alive=lambda: process.returncode is None,
+                log_file=self.log_file,
+                ready_pattern=self.ready_pattern,
+            )
+            if not readiness:
+                logger.error(f"Backend failed to start: {readiness.reason}")
+                await self._stop_backend()
+                return False
+
+            self.starts += 1
+            self.last_time_to_ready = readiness.elapsed
+            logger.info(f"Backend ready in {readiness.elapsed:.2f}s (PID: {process.pid})")
+            return True
+
+    async def _stop_backend(self) -> None:
+        """Terminate the backend, killing it if it ignores SIGTERM."""
+        process, self.process = self.process, None
+        if process is None or process.returncode is not None:
+            return
+
+        process.terminate()
+        try:
+            await asyncio.wait_for(process.wait(), STOP_GRACE_PERIOD)
+        except asyncio.TimeoutError:
+            logger.warning(f"Backend (PID: {process.pid}) ignored SIGTERM, killing it")
+            process.kill()
+            await process.wait()
+
+    async def _idle_monitor(self) -> None:
+        """Stop the backend once it has been idle for idle_timeout seconds."""
+        while True:
+            await asyncio.sleep(min(IDLE_CHECK_INTERVAL, self.idle_timeout))
+            if self.process is not None and self.process.returncode is not None:
+                logger.warning(f"Backend exited with code {self.process.returncode}")
+                self.process = None
+                continue
+
+            idle_for = time.monotonic() - self.last_activity
+            if self.backend_running and not self.active_connections:
+                if idle_for >= self.idle_timeout:
+                    async with self._lock:
+                        # A client may have arrived while waiting for the lock
+                        if not self.active_connections:
+                            logger.info(f"Backend idle for {idle_for:.0f}s, stopping it")
+                            await self._stop_backend()
@@ -0,0 +1,349 @@
+"""
+Reproducible throughput benchmarks for models on this machine.
+
+``cortex bench`` drives a model through its provider's streaming API with a
+fixed suite of prompt and output lengths and records load time,
+time-to-first-token, prefill and decode speed, and the peak RSS of the
+serving process tree. Reports are stored per hardware fingerprint, so
+numbers from different machines are never compared with each other.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import aiohttp
+
+from .cache import load_json, save_json
+from .canary import CanaryError, CanaryResult, probe_ollama, probe_openai_compatible, timed_result
+from .system_utils import SystemInfo
+from .telemetry import TelemetrySampler
+
+logger = logging.getLogger(__name__)
+
+# Use DOTFILES environment variable if set, otherwise fall back to default
+DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
+BENCH_FILE = DOTFILES / "config" / "cortex" / "stats" / "bench.json"
+
+# Approximate prompt sizes (tokens) and generation lengths of the suite
+PROMPT_LENGTHS = (32, 512, 2048)
+OUTPUT_LENGTHS = (64, 256)
+
+# Generous enough for a long prompt on a slow model
+BENCH_TIMEOUT = 300
+
+# Seconds between RSS samples of the server while a run streams
+RSS_SAMPLE_INTERVAL = 0.1
+
+# Reports kept per machine
+MAX_REPORTS = 200
+
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Filler for prompts; roughly 4/3 tokens per word in common tokenizers
+PASSAGE = (
+    "The lighthouse keeper climbed the spiral stairs each evening to light the lamp. "
+    "Ships passing the rocky headland relied on its steady beam to find the harbour. "
+    "In winter the storms grew fierce and the keeper logged every vessel he saw, "
+    "noting its flag, its heading and the state of the sea around it."
+).split()
+
+Probe = Callable[[str, int], Awaitable[CanaryResult]]
+
+
+@dataclass
+class BenchCase:
+    """One prompt length and output length of the suite."""
+
+    prompt_tokens: int
+    max_tokens: int
+
+    @property
+    def name(self) -> str:
+        """Short label, e.g. ``p512/o256``."""
+        return f"p{self.prompt_tokens}/o{self.max_tokens}"
+
+
+@dataclass
+class BenchRun:
+    """Measurements from one generation of a case."""
+
+    case: str
+    ttft: float
+    prompt_tokens: int
+    prefill_tokens_per_second: float
+    output_tokens: int
+    decode_tokens_per_second: float
+    total_latency: float
+
+
+@dataclass
+class BenchReport:
+    """A model's results over the whole suite."""
+
+    model: str
+    provider: str
+    timestamp: float
+    fingerprint: str = ""
+    load_seconds: Optional[float] = None
+    peak_rss_bytes: Optional[int] = None
+    runs: List[BenchRun] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def median(self, metric: str) -> Optional[float]:
+        """Median of a BenchRun field over runs that measured it."""
+        values = [getattr(run, metric) for run in self.runs if getattr(run, metric)]
+        return statistics.median(values) if values else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BenchReport":
+        """Rebuild a stored report."""
+        data = dict(data)
+        data["runs"] = [BenchRun(**run) for run in data.get("runs", [])]
+        return cls(**data)
+
+
+def default_suite(
+    prompt_lengths: Sequence[int] = PROMPT_LENGTHS,
+    output_lengths: Sequence[int] = OUTPUT_LENGTHS,
+) -> List[BenchCase]:
+    """Every prompt length with every output length, shortest first."""
+    return [BenchCase(p, o) for p in sorted(prompt_lengths) for o in sorted(output_lengths)]
+
+
+def build_prompt(case: BenchCase, nonce: str) -> str:
+    """A deterministic prompt of about ``case.prompt_tokens`` tokens.
+
+    The nonce leads the prompt so servers can't reuse a cached prefix
+    from an earlier run, which would make prefill look free.
+    """
+    words = max(case.prompt_tokens * 3 // 4, 1)
+    filler = [PASSAGE[i % len(PASSAGE)] for i in range(words)]
+    return f"[{nonce}] Continue this story:\n\n" + " ".join(filler)
+
+
+def hardware_fingerprint(info: SystemInfo) -> str:
+    """Stable ID of the hardware, unlike the per-boot cache fingerprint."""
+    parts = [info.os_type.value, info.cpu_model, str(info.cpu_cores), f"{info.ram_gb:.0f}"]
+    parts.append(info.gpu_info)
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+
+def hardware_summary(info: SystemInfo) -> Dict[str, Any]:
+    """Human-readable description stored alongside the fingerprint."""
+    return {
+        "os": info.os_type.value,
+        "cpu": info.cpu_model,
+        "cores": info.cpu_cores,
+        "ram_gb": round(info.ram_gb),
+        "gpu": info.gpu_info,
+    }
+
+
+async def probe_anthropic(
+    base_url: str,
+    model: str,
+    prompt: str,
+    max_tokens: int,
+    api_key: str,
+    timeout: float = BENCH_TIMEOUT,
+) -> CanaryResult:
+    """Stream a prompt through Anthropic's ``/v1/messages``."""
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": 0.0,
+        "stream": True,
+    }
+    headers = {"x-api-key": api_key, "anthropic-version": ANTHROPIC_VERSION}
+    start = time.perf_counter()
+    first = None
+    deltas = 0
+    usage: Dict[str, int] = {}
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=client_timeout, headers=headers) as session:
+            async with session.post(f"{base_url}/v1/messages", json=payload) as response:
+                if response.status != 200:
+                    raise CanaryError(f"HTTP {response.status}")
+                async for raw in response.content:
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[len("data:") :])
+                    if "message" in event:
+                        usage.update(event["message"].get("usage", {}))
+                    usage.update(event.get("usage", {}))
+                    if event.get("delta", {}).get("text"):
+                        deltas += 1
+                        if first is None:
+                            first = time.perf_counter()
+    except (aiohttp.ClientError, ValueError) as e:
+        raise CanaryError(str(e)) from e
+
+    end = time.perf_counter()
+    # Deltas carry several tokens each; the final usage has the real count
+    tokens = usage.get("output_tokens") or deltas
+    result = timed_result("claude", model, start, first, tokens, end)
+    if usage.get("input_tokens"):
+        result.prompt_tokens = usage["input_tokens"]
+        result.prefill_tokens_per_second = result.prompt_tokens / result.ttft
+    return result
+
+
+def make_probe(
+    provider: str,
+    model: str,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> Probe:
+    """The streaming call used to benchmark ``model`` on ``provider``."""
+    if provider == "mlx":
+        url = base_url or "http://localhost:8080"
+        return lambda prompt, max_tokens: probe_openai_compatible(
+            url, model, prompt, max_tokens, timeout=BENCH_TIMEOUT
+        )
+    if provider == "ollama":
+        url = base_url or "http://localhost:11434/api"
+        return lambda prompt, max_tokens: probe_ollama(
+            url, model, prompt, max_tokens, timeout=BENCH_TIMEOUT
+        )
+    if provider in ("openai", "gemini"):
+        if provider == "openai":
+            url, path = base_url or "https://api.openai.com", "/v1/chat/completions"
+        else:
+            url = base_url or "https://generativelanguage.googleapis.com"
+            path = "/v1beta/openai/chat/completions"
+        headers = {"Authorization": f"Bearer {api_key}"}
+        return lambda prompt, max_tokens: probe_openai_compatible(
+            url, model, prompt, max_tokens, provider, path, headers, BENCH_TIMEOUT
+        )
+    if provider == "claude":
+        url = base_url or "https://api.anthropic.com"
+        return lambda prompt, max_tokens: probe_anthropic(
+            url, model, prompt, max_tokens, api_key or ""
+        )
+    raise ValueError(f"Benchmarking is not supported for provider '{provider}'")
+
+
+async def _sample_peak_rss(pid: int, stop: asyncio.Event, peak: List[int]) -> None:
+    """Track the largest RSS of a process tree until ``stop`` is set."""
+    sampler = TelemetrySampler()
+    while not stop.is_set():
+        sample = sampler.sample_tree(pid)
+        if sample:
+            peak[0] = max(peak[0], sample.rss_bytes)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_bench(
+    model: str,
+    provider: str,
+    probe: Probe,
+    suite: Optional[List[BenchCase]] = None,
+    repeat: int = 1,
+    server_pid: Optional[int] = None,
+    load_seconds: Optional[float] = None,
+    on_run: Optional[Callable[[BenchRun], None]] = None,
+) -> BenchReport:
+    """Run every case ``repeat`` times and collect a report.
+
+    ``server_pid`` is the local server whose process tree is watched for
+    peak RSS. Without ``load_seconds``, Ollama's reported load time of the
+    first run is used.
+    """
+    report = BenchReport(model=model, provider=provider, timestamp=time.time())
+    stop = asyncio.Event()
+    peak = [0]
+    sampler = None
+    if server_pid is not None:
+        sampler = asyncio.ensure_future(_sample_peak_rss(server_pid, stop, peak))
+
+    try:
+        for case in suite or default_suite():
+            for i in range(repeat):
+                prompt = build_prompt(case, f"{case.name}#{i}@{report.timestamp:.0f}")
+                try:
+                    result = await probe(prompt, case.max_tokens)
+                except CanaryError as e:
+                    report.errors.append(f"{case.name}: {e}")
+                    continue
+                if load_seconds is None and result.load_seconds:
+                    load_seconds = result.load_seconds
+                run = BenchRun(
+                    case=case.name,
+                    ttft=result.ttft,
+                    prompt_tokens=result.prompt_tokens,
+                    prefill_tokens_per_second=result.prefill_tokens_per_second,
+                    output_tokens=result.tokens,
+                    decode_tokens_per_second=result.tokens_per_second,
+                    total_latency=result.total_latency,
+                )
+                report.runs.append(run)
+                if on_run:
+                    on_run(run)
+    finally:
+        stop.set()
+        if sampler:
+            await sampler
+
+    report.load_seconds = load_seconds
+    report.peak_rss_bytes = peak[0] or None
+    return report
+
+
+class BenchStore:
+    """Benchmark reports grouped by hardware fingerprint."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize with the JSON file reports are kept in."""
+        self.path = path or BENCH_FILE
+
+    def _load(self) -> Dict[str, Any]:
+        data = load_json(self.path)
+        return data if isinstance(data, dict) else {}
+
+    def add(self, fingerprint: str, hardware: Dict[str, Any], report: BenchReport) -> bool:
+        """Append a report for this machine, keeping the newest MAX_REPORTS."""
+        data = self._load()
+        report.fingerprint = fingerprint
+        entry = data.setdefault(fingerprint, {"hardware": hardware, "reports": []})
+        entry["hardware"] = hardware
+        entry["reports"] = (entry["reports"] + [report.to_dict()])[-MAX_REPORTS:]
+        return save_json(self.path, data)
+
+    def hardware(self) -> Dict[str, Dict[str, Any]]:
+        """Fingerprint -> hardware summary of every benchmarked machine."""
+        return {fp: entry.get("hardware", {}) for fp, entry in self._load().items()}
+
+    def reports(
+        self, fingerprint: Optional[str] = None, models: Optional[Sequence[str]] = None
+    ) -> List[BenchReport]:
+        """Stored reports, oldest first, optionally for one machine and some models."""
+        reports = []
+        for fp, entry in self._load().items():
+            if fingerprint is not None and fp != fingerprint:
+                continue
+            for data in entry.get("reports", []):
+                if models and data.get("model") not in models:
+                    continue
+                try:
+                    reports.append(BenchReport.from_dict(data))
+                except TypeError:
+                    continue
+        return sorted(reports, key=lambda r: r.timestamp)
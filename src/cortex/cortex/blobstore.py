@@ -0,0 +1,286 @@
+"""
+Content-addressed store for model weights.
+
+The same shard often sits in the HuggingFace cache, in ``~/.cache/mlx`` and
+in a second copy from a re-download. With the store enabled (``blob_store:
+true`` in a provider's config) each file is kept once under its SHA-256 and
+hardlinked, or reflinked where the filesystem can't hardlink, into every
+layout that needs it. A model sharing shards with one already on disk
+"downloads" those shards instantly and takes no extra space for them.
+
+Hardlinked blobs are referenced for as long as their link count is above
+one; reflinks share no inode, so they are recorded in ``refs.json``. Blobs
+nothing references any more are reclaimed by ``cortex gc``.
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .cache import load_json, save_json
+from .verify import sha256_file
+
+logger = logging.getLogger(__name__)
+
+# Beside ~/.cache/mlx and ~/.cache/huggingface, so hardlinks between them work
+BLOB_DIR = Path.home() / ".cache" / "cortex" / "blobs"
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Linux ioctl that shares a file's extents (btrfs, XFS)
+FICLONE = 0x40049409
+
+
+@dataclass
+class GCResult:
+    """What a garbage collection removed, or would remove."""
+
+    blobs: int = 0
+    bytes: int = 0
+
+
+def _clone(src: Path, dst: Path) -> bool:
+    """Reflink ``src`` to ``dst`` copy-on-write, if the filesystem supports it."""
+    if sys.platform == "darwin":
+        # APFS clonefile(2); fails rather than copying when it can't clone
+        result = subprocess.run(["cp", "-c", str(src), str(dst)], capture_output=True)
+        return result.returncode == 0
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        try:
+            dst.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def _share(src: Path, dst: Path) -> Optional[str]:
+    """Make ``dst`` share ``src``'s data: "hardlink", "clone", or None if neither works."""
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        pass
+    return "clone" if _clone(src, dst) else None
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def disk_usage(paths: Iterable[Path]) -> int:
+    """Bytes the files at or under ``paths`` take, counting hardlinked files once.
+
+    Symlinks are followed, so HuggingFace snapshot links to blobs don't count
+    their blob a second time either.
+    """
+    seen = set()
+    total = 0
+    for root in paths:
+        if root.is_file():
+            files: Iterable[str] = [str(root)]
+        else:
+            files = (
+                os.path.join(dirpath, filename)
+                for dirpath, _, filenames in os.walk(root)
+                for filename in filenames
+            )
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            key = (stat.st_dev, stat.st_ino)
+            if key not in seen:
+                seen.add(key)
+                total += stat.st_size
+    return total
+
+
+class BlobStore:
+    """Model files stored once by SHA-256 and linked into provider layouts."""
+
+    def __init__(self, root: Optional[Path] = None):
+        """Initialize with the store directory, ``~/.cache/cortex/blobs`` by default."""
+        self.root = root or BLOB_DIR
+        self.refs_path = self.root / "refs.json"
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str) -> Path:
+        """Where the blob with a digest is stored."""
+        return self.root / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        """Whether the store holds a blob."""
+        return bool(DIGEST_PATTERN.match(digest)) and self.blob_path(digest).is_file()
+
+    def blobs(self) -> Iterator[Path]:
+        """Every blob in the store."""
+        if self.root.exists():
+            for path in self.root.glob("??/*"):
+                if DIGEST_PATTERN.match(path.name):
+                    yield path
+
+    def link(self, digest: str, target: Path) -> bool:
+        """Put the blob with a digest at ``target``.
+
+        Falls back to copying when the store is on another filesystem.
+
+        Returns:
+            False if the store doesn't hold the blob.
+        """
+        if not self.has(digest):
+            return False
+        blob = self.blob_path(digest)
+        if _same_file(blob, target):
+            return True
+        target.parent.mkdir(parents=True, exist_ok=True)
+        staged = target.with_name(target.name + ".linking")
+        try:
+            staged.unlink()
+        except OSError:
+            pass
+        how = _share(blob, staged)
+        if how is None:
+            shutil.copyfile(blob, staged)
+        os.replace(staged, target)
+        if how == "clone":
+            self._add_ref(digest, target)
+        logger.debug(f"Linked blob {digest[:12]} to {target} ({how or 'copy'})")
+        return True
+
+    def add(self, path: Path, digest: str, verify: bool = False) -> bool:
+        """Store a file under its digest, or swap it for a link if already stored.
+
+        Args:
+            path: File to store; it stays in place, sharing the blob's data
+            digest: Its SHA-256
+            verify: Hash the file first rather than trusting ``digest``, so a
+                corrupt download never reaches other models through the store
+
+        Returns:
+            Whether the file now shares its data with the store.
+        """
+        if not DIGEST_PATTERN.match(digest) or not path.is_file():
+            return False
+        if verify and sha256_file(path) != digest:
+            logger.warning(f"Not storing {path}: contents don't match sha256 {digest}")
+            return False
+        if self.has(digest):
+            return self.link(digest, path)
+
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        staged = blob.with_name(f"{digest}.{os.getpid()}.tmp")
+        how = _share(path, staged)
+        if how is None:
+            return False  # Copying into the store would double the space, not save it
+        os.replace(staged, blob)
+        if how == "clone":
+            self._add_ref(digest, path)
+        return True
+
+    def adopt(self, directory: Path) -> int:
+        """Store every file in a directory named by its SHA-256, as cache blobs are.
+
+        The HuggingFace cache keeps LFS files under ``blobs/<sha256>`` and
+        Ollama under ``blobs/sha256-<sha256>``; adopting them lets downloads of
+        the same shards link them instead of fetching them again.
+
+        Returns:
+            The number of files adopted.
+        """
+        if not directory.is_dir():
+            return 0
+        adopted = 0
+        for path in directory.iterdir():
+            digest = path.name.rpartition("sha256-")[2]
+            if DIGEST_PATTERN.match(digest) and self.add(path, digest):
+                adopted += 1
+        return adopted
+
+    def referenced(self, blob: Path) -> bool:
+        """Whether a model still uses a blob."""
+        try:
+            stat = blob.stat()
+        except OSError:
+            return False
+        if stat.st_nlink > 1:
+            return True
+        refs = self._load_refs().get(blob.name, [])
+        return any(self._clone_alive(Path(ref), stat.st_size) for ref in refs)
+
+    def gc(self, dry_run: bool = False) -> GCResult:
+        """Remove blobs no model uses any more.
+
+        Args:
+            dry_run: Only report what would be removed
+        """
+        result = GCResult()
+        for blob in list(self.blobs()):
+            if self.referenced(blob):
+                continue
+            size = blob.stat().st_size
+            if not dry_run:
+                try:
+                    blob.unlink()
+                except OSError as e:
+                    logger.warning(f"Could not remove blob {blob}: {e}")
+                    continue
+            result.blobs += 1
+            result.bytes += size
+        if not dry_run:
+            self._prune_refs()
+        return result
+
+    @staticmethod
+    def _clone_alive(path: Path, size: int) -> bool:
+        # A clone shares no inode; a file of the same size still there is taken as it
+        try:
+            return path.stat().st_size == size
+        except OSError:
+            return False
+
+    def _load_refs(self) -> Dict[str, List[str]]:
+        data = load_json(self.refs_path)
+        return data if isinstance(data, dict) else {}
+
+    def _add_ref(self, digest: str, path: Path) -> None:
+        with self._lock:
+            refs = self._load_refs()
+            paths = refs.setdefault(digest, [])
+            if str(path) not in paths:
+                paths.append(str(path))
+                save_json(self.refs_path, refs)
+
+    def _prune_refs(self) -> None:
+        with self._lock:
+            refs = self._load_refs()
+            pruned = {}
+            for digest, paths in refs.items():
+                blob = self.blob_path(digest)
+                if not blob.exists():
+                    continue
+                size = blob.stat().st_size
+                alive = [p for p in paths if self._clone_alive(Path(p), size)]
+                if alive:
+                    pruned[digest] = alive
+            if pruned != refs:
+                save_json(self.refs_path, pruned)
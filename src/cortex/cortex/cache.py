@@ -0,0 +1,54 @@
+"""
+On-disk cache helpers for Cortex.
+
+Small JSON documents (hardware profiles, parsed model headers, discovery
+results) live under ``config/cortex/cache`` next to the other Cortex state.
+Writes are atomic so a killed process never leaves a truncated cache behind.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Use DOTFILES environment variable if set, otherwise fall back to default
+DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
+CACHE_DIR = DOTFILES / "config" / "cortex" / "cache"
+
+
+def cache_path(name: str) -> Path:
+    """Return the path of a named cache file inside the cache directory."""
+    return CACHE_DIR / name
+
+
+def load_json(path: Path) -> Optional[Any]:
+    """Load a JSON cache file, returning None if it is missing or unreadable."""
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Ignoring unreadable cache {path}: {e}")
+        return None
+
+
+def save_json(path: Path, data: Any) -> bool:
+    """Atomically write a JSON cache file. Returns False on failure."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Failed to write cache {path}: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
@@ -0,0 +1,292 @@
+"""
+Canary inference probes for local model servers.
+
+A server can answer ``/v1/models`` and still be unusable -- swapping, or
+serving the wrong model. A canary sends a tiny fixed prompt through the
+streaming generation API and measures time-to-first-token, decode speed and
+total latency. Each result is compared with a per-model baseline learned
+from earlier healthy probes, and flagged when it is far off.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import aiohttp
+
+from .cache import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+# Use DOTFILES environment variable if set, otherwise fall back to default
+DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
+BASELINE_FILE = DOTFILES / "config" / "cortex" / "stats" / "canary_baselines.json"
+
+# Fixed, short and deterministic so runs are comparable
+CANARY_PROMPT = "Count from 1 to 20, separated by spaces."
+CANARY_MAX_TOKENS = 32
+CANARY_TIMEOUT = 60
+
+# Probes needed before a baseline is trusted
+MIN_BASELINE_SAMPLES = 3
+
+# Weight of the newest healthy probe in the moving baseline
+BASELINE_SMOOTHING = 0.2
+
+# Degraded when decode speed falls below this fraction of the baseline,
+# or time-to-first-token exceeds this multiple of it
+DEGRADED_SPEED_FRACTION = 0.5
+DEGRADED_TTFT_FACTOR = 3.0
+
+
+@dataclass
+class CanaryResult:
+    """Measurements from one canary generation."""
+
+    provider: str
+    model: str
+    ttft: float
+    tokens: int
+    tokens_per_second: float
+    total_latency: float
+    prompt_tokens: int = 0
+    prefill_tokens_per_second: float = 0.0
+    load_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form."""
+        return asdict(self)
+
+
+class CanaryError(Exception):
+    """A canary generation failed."""
+
+
+def parse_expires_at(expires_at: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an Ollama ``/api/ps`` ``expires_at``, or None if unparseable."""
+    if not expires_at:
+        return None
+    # Ollama writes nanoseconds and "Z", neither of which fromisoformat takes before 3.11
+    text = re.sub(r"(\.\d{6})\d+", r"\1", expires_at.replace("Z", "+00:00"))
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+def remaining_keep_alive(expires_at: Optional[str]) -> Optional[int]:
+    """Seconds an Ollama model has left before it unloads, as a ``keep_alive``.
+
+    Sending it with a request leaves ``expires_at`` where it was, so probing a
+    model doesn't count as using it. None when unknown, for Ollama's default.
+    """
+    expiry = parse_expires_at(expires_at)
+    if expiry is None:
+        return None
+    return max(int(expiry - time.time()), 1)
+
+
+async def probe_openai_compatible(
+    base_url: str,
+    model: str,
+    prompt: str = CANARY_PROMPT,
+    max_tokens: int = CANARY_MAX_TOKENS,
+    provider: str = "mlx",
+    path: str = "/v1/chat/completions",
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = CANARY_TIMEOUT,
+) -> CanaryResult:
+    """Stream a prompt through an OpenAI-style chat endpoint (mlx_lm.server by default)."""
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": 0.0,
+        "seed": 0,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    usage: Dict[str, Any] = {}
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=client_timeout, headers=headers) as session:
+            async with session.post(f"{base_url}{path}", json=payload) as response:
+                if response.status != 200:
+                    raise CanaryError(f"HTTP {response.status}")
+                async for raw in response.content:
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    choices = chunk.get("choices") or [{}]
+                    if choices[0].get("delta", {}).get("content"):
+                        # Servers stream one token per chunk
+                        tokens += 1
+                        if first is None:
+                            first = time.perf_counter()
+    except (aiohttp.ClientError, ValueError) as e:
+        raise CanaryError(str(e)) from e
+
+    # Hosted APIs may pack several tokens into a chunk; usage has the real count
+    tokens = usage.get("completion_tokens") or tokens
+    result = timed_result(provider, model, start, first, tokens, time.perf_counter())
+    if usage.get("prompt_tokens"):
+        # The first token waits on the whole prefill
+        result.prompt_tokens = usage["prompt_tokens"]
+        result.prefill_tokens_per_second = result.prompt_tokens / result.ttft
+    return result
+
+
+async def probe_ollama(
+    api_url: str,
+    model: str,
+    prompt: str = CANARY_PROMPT,
+    max_tokens: int = CANARY_MAX_TOKENS,
+    timeout: float = CANARY_TIMEOUT,
+    keep_alive: Optional[Union[str, int]] = None,
+) -> CanaryResult:
+    """Stream a prompt through Ollama's ``/api/generate``.
+
+    ``keep_alive`` is how long the model stays loaded afterwards; None leaves
+    it to Ollama's default.
+    """
+    payload: Dict[str, Any] = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True,
+        "options": {"num_predict": max_tokens, "temperature": 0, "seed": 0},
+    }
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    final: Dict[str, Any] = {}
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=client_timeout) as session:
+            async with session.post(f"{api_url}/generate", json=payload) as response:
+                if response.status != 200:
+                    raise CanaryError(f"HTTP {response.status}")
+                async for raw in response.content:
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise CanaryError(chunk["error"])
+                    if chunk.get("response"):
+                        tokens += 1
+                        if first is None:
+                            first = time.perf_counter()
+                    if chunk.get("done"):
+                        final = chunk
+                        break
+    except (aiohttp.ClientError, ValueError) as e:
+        raise CanaryError(str(e)) from e
+
+    result = timed_result("ollama", model, start, first, tokens, time.perf_counter())
+    # Ollama reports its own decode timing, free of HTTP overhead
+    if final.get("eval_count") and final.get("eval_duration"):
+        result.tokens = final["eval_count"]
+        result.tokens_per_second = final["eval_count"] / (final["eval_duration"] / 1e9)
+    if final.get("prompt_eval_count") and final.get("prompt_eval_duration"):
+        result.prompt_tokens = final["prompt_eval_count"]
+        result.prefill_tokens_per_second = final["prompt_eval_count"] / (
+            final["prompt_eval_duration"] / 1e9
+        )
+    result.load_seconds = final.get("load_duration", 0) / 1e9
+    return result
+
+
+def timed_result(
+    provider: str, model: str, start: float, first: Optional[float], tokens: int, end: float
+) -> CanaryResult:
+    """Build a result from stream timestamps (``perf_counter`` seconds)."""
+    if first is None:
+        raise CanaryError("no tokens generated")
+    # Decode speed excludes the first token, which also pays for the prompt
+    decode_time = end - first
+    speed = (tokens - 1) / decode_time if tokens > 1 and decode_time > 0 else 0.0
+    return CanaryResult(
+        provider=provider,
+        model=model,
+        ttft=first - start,
+        tokens=tokens,
+        tokens_per_second=speed,
+        total_latency=end - start,
+    )
+
+
+class BaselineStore:
+    """Per-model moving baselines of canary results."""
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize with the JSON file baselines are kept in."""
+        self.path = path or BASELINE_FILE
+
+    def _load(self) -> Dict[str, Any]:
+        data = load_json(self.path)
+        return data if isinstance(data, dict) else {}
+
+    def get(self, provider: str, model: str) -> Optional[Dict[str, Any]]:
+        """The stored baseline for a model, if any."""
+        return self._load().get(f"{provider}:{model}")
+
+    def evaluate(self, result: CanaryResult) -> Dict[str, Any]:
+        """Compare a result with its baseline and fold it in if healthy.
+
+        Returns ``{"status", "issues", "baseline"}``; status is ``degraded``
+        when the result is far off a trusted baseline, ``learning`` while the
+        baseline is still being built, else ``healthy``.
+        """
+        data = self._load()
+        key = f"{result.provider}:{result.model}"
+        baseline = data.get(key)
+        issues = []
+
+        if baseline and baseline.get("samples", 0) >= MIN_BASELINE_SAMPLES:
+            expected_speed = baseline["tokens_per_second"]
+            expected_ttft = baseline["ttft"]
+            if result.tokens_per_second < expected_speed * DEGRADED_SPEED_FRACTION:
+                issues.append(
+                    f"{result.tokens_per_second:.1f} tok/s vs baseline {expected_speed:.1f}"
+                )
+            if result.ttft > expected_ttft * DEGRADED_TTFT_FACTOR:
+                issues.append(f"TTFT {result.ttft:.2f}s vs baseline {expected_ttft:.2f}s")
+            status = "degraded" if issues else "healthy"
+        else:
+            status = "learning"
+
+        # Only healthy probes move the baseline, so a slow spell can't become normal
+        if not issues:
+            if baseline:
+                alpha = max(BASELINE_SMOOTHING, 1 / (baseline["samples"] + 1))
+                for field in ("ttft", "tokens_per_second", "total_latency"):
+                    baseline[field] += alpha * (getattr(result, field) - baseline[field])
+                baseline["samples"] += 1
+            else:
+                baseline = {
+                    "ttft": result.ttft,
+                    "tokens_per_second": result.tokens_per_second,
+                    "total_latency": result.total_latency,
+                    "samples": 1,
+                }
+            baseline["updated"] = time.time()
+            data[key] = baseline
+            save_json(self.path, data)
+
+        return {"status": status, "issues": issues, "baseline": baseline}
@@ -8,14 +8,18 @@ import asyncio
 import json
 import logging
 import os
+import signal
 import subprocess
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 import click
 from rich import box
-from rich.console import Console
+from rich.console import Console, Group
+from rich.live import Live
 from rich.panel import Panel
 from rich.progress import (
     BarColumn,
@@ -24,14 +28,46 @@ from rich.progress import (
     SpinnerColumn,
     TextColumn,
     TimeRemainingColumn,
+    TransferSpeedColumn,
 )
 from rich.prompt import Confirm
 from rich.syntax import Syntax
 from rich.table import Table
 
+from .activation import DEFAULT_IDLE_TIMEOUT, OnDemandServer
+from .bench import (
+    OUTPUT_LENGTHS,
+    PROMPT_LENGTHS,
+    BenchStore,
+    default_suite,
+    hardware_fingerprint,
+    hardware_summary,
+    make_probe,
+    run_bench,
+)
+from .blobstore import BlobStore
 from .config import Config
-from .providers import ModelCapability, ModelInfo, registry
+from .coresidency import DEFAULT_ROLES, ROLE_CONTEXT_LENGTHS
+from .downloads import DEFAULT_PARALLEL, DOWNLOAD_PROVIDERS, DownloadManager, resolve_provider
+from .health import MEMORY_PRESSURE_PERCENT, SWAP_OUT_MB_PER_SECOND, HealthMonitor
+from .memory import MemoryEstimator
+from .model_store import ModelStore, eviction_store
+from .preload import MIN_PROBABILITY, PreloadScheduler, preload_model
+from .prewarm import DEFAULT_WORKERS, Prewarmer
+from .providers import ModelCapability, ModelInfo, infer_provider, registry
+from .providers.mlx import parse_generation_stats
+from .readiness import (
+    DEFAULT_STARTUP_TIMEOUT,
+    MLX_READY_PATTERN,
+    OLLAMA_READY_PATTERN,
+    wait_until_ready,
+)
+from .scheduler import MemoryBudgetScheduler
+from .statistics import StatisticsTracker
 from .system_utils import ModelRecommender, SystemDetector
+from .telemetry import DEFAULT_WATCH_INTERVAL, TelemetrySampler
+from .variants import collapse_variants
+from .watchdog import DEFAULT_IDLE_SECONDS, DEFAULT_INTERVAL, MemoryWatchdog
 
 # Extended commands are now integrated directly into cli.py
 
@@ -47,6 +83,9 @@ logger = logging.getLogger(__name__)
 # Rich console for beautiful output
 console = Console()
 
+# Local models quick-benchmarked by `model --recommend --calibrate`
+CALIBRATION_MODELS = 3
+
 
 @click.group()
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
@@ -82,14 +121,39 @@ def cli(ctx, verbose, config):
     help="Filter by capability",
 )
 @click.option("--max-ram", type=float, help="Maximum RAM usage in GB")
+@click.option(
+    "--context",
+    "context_length",
+    type=int,
+    help="Context length (tokens) to size the KV cache for in RAM estimates",
+)
+@click.option(
+    "--concurrency", type=int, default=1, help="Parallel sequences to size the KV cache for"
+)
 @click.option(
     "--recommended", "-r", is_flag=True, help="Show only recommended models for your system"
 )
+@click.option(
+    "--all-variants", is_flag=True, help="List every quantization variant, not just the best"
+)
 @click.option("--detailed", "-d", is_flag=True, help="Show detailed information")
 @click.option("--summary", "-s", is_flag=True, help="Show summary with counts by provider")
 @click.option("--export", type=click.Choice(["json", "csv"]), help="Export results to file")
 @click.pass_context
-def list(ctx, category, provider, capability, max_ram, recommended, detailed, summary, export):
+def list(
+    ctx,
+    category,
+    provider,
+    capability,
+    max_ram,
+    context_length,
+    concurrency,
+    recommended,
+    all_variants,
+    detailed,
+    summary,
+    export,
+):
     """List all available AI models with smart categorization and recommendations."""
 
     async def _list_models():
@@ -107,7 +171,7 @@ def list(ctx, category, provider, capability, max_ram, recommended, detailed, su
             progress.update(task, description="Analyzing system capabilities...")
 
             # Detect system info
-            system_info = SystemDetector.detect_system()
+            system_info = await SystemDetector.detect_system_async()
 
             progress.update(task, description="Processing models...")
 
@@ -125,12 +189,30 @@ def list(ctx, category, provider, capability, max_ram, recommended, detailed, su
             filtered_models = [m for m in filtered_models if cap_enum in m.capabilities]
 
         if max_ram:
-            filtered_models = [m for m in filtered_models if m.ram_gb <= max_ram]
+            estimator = MemoryEstimator()
+            filtered_models = [
+                m
+                for m in filtered_models
+                if estimator.estimate_model(m, context_length, concurrency).total_gb <= max_ram
+            ]
+
+        # One row per base model, showing the variant that suits this machine
+        if not all_variants:
+            filtered_models = collapse_variants(
+                filtered_models, system_info, context_length, concurrency
+            )
 
         # Get recommendations if requested
         if recommended:
+            # Already collapsed above, or the user asked to see every variant
             filtered_models = ModelRecommender.recommend_models(
-                system_info, filtered_models, max_recommendations=10
+                system_info,
+                filtered_models,
+                max_recommendations=10,
+                context_length=context_length,
+                concurrency=concurrency,
+                measurements=StatisticsTracker().throughput_summary(),
+                collapse_variants=False,
             )
 
         # Display system info panel
@@ -142,7 +224,7 @@ def list(ctx, category, provider, capability, max_ram, recommended, detailed, su
         elif detailed:
             _display_models_detailed(filtered_models, system_info)
         else:
-            _display_models_table(filtered_models, system_info, recommended)
+            _display_models_table(filtered_models, system_info, recommended, not all_variants)
 
         # Export if requested
         if export:
@@ -161,13 +243,17 @@ def list(ctx, category, provider, capability, max_ram, recommended, detailed, su
 @click.option("--current", "-c", is_flag=True, help="Show current model configuration")
 @click.option("--env", "-e", is_flag=True, help="Output environment variables for shell eval")
 @click.option("--validate", "-v", is_flag=True, help="Validate model exists before setting")
+@click.option(
+    "--calibrate", is_flag=True, help="With --recommend, benchmark unmeasured local picks first"
+)
 @click.pass_context
-def model(ctx, model_id, provider, recommend, current, env, validate):
+def model(ctx, model_id, provider, recommend, current, env, validate, calibrate):
     """Set or display the global AI model configuration.
 
     Examples:
         cortex model                                    # Show current model
         cortex model --recommend                        # Show recommended model
+        cortex model --recommend --calibrate            # Measure local picks, then rank
         cortex model mlx-community/Qwen2.5-Coder-7B-4bit  # Set specific model
         cortex model gpt-4o --provider openai          # Set with provider hint
         cortex model --env                             # Output env vars for eval
@@ -188,7 +274,7 @@ def model(ctx, model_id, provider, recommend, current, env, validate):
 
         # Show recommended model
         if recommend:
-            await _show_recommended_model(config)
+            await _show_recommended_model(config, calibrate)
             return
 
         # Set new model
@@ -327,10 +413,29 @@ def _output_env_vars(config):
         print(f'export AVANTE_GEMINI_MODEL="{model_id}"')
 
 
-async def _show_recommended_model(config):
+async def _calibrate(recommendations, tracker, count=CALIBRATION_MODELS):
+    """Quick-benchmark the top unmeasured local models that are installed."""
+    measured = tracker.throughput_summary()
+    calibrated = 0
+    for model in recommendations:
+        if calibrated >= count:
+            break
+        if model.online or f"{model.provider}:{model.id}" in measured:
+            continue
+        provider_obj = registry.get_provider(model.provider)
+        if provider_obj is None or not await provider_obj.is_model_available(model.id):
+            continue
+        suite = default_suite(PROMPT_LENGTHS[:1], OUTPUT_LENGTHS[:1])
+        report = await _bench_model(model.id, model.provider, suite, 1, cold=False)
+        if report is not None and _record_bench_throughput(tracker, report):
+            calibrated += 1
+    return calibrated
+
+
+async def _show_recommended_model(config, calibrate=False):
     """Show recommended model based on system capabilities."""
     # Detect system
-    system_info = SystemDetector.detect_system()
+    system_info = await SystemDetector.detect_system_async()
 
     # Fetch all models
     with Progress(
@@ -346,10 +451,19 @@ async def _show_recommended_model(config):
     for provider_models in all_models_dict.values():
         all_models.extend(provider_models)
 
-    # Get recommendations
+    # Get recommendations, ranked by measured or predicted speed
+    tracker = StatisticsTracker()
     recommendations = ModelRecommender.recommend_models(
-        system_info, all_models, max_recommendations=5
+        system_info, all_models, max_recommendations=5, measurements=tracker.throughput_summary()
     )
+    if calibrate and recommendations:
+        if await _calibrate(recommendations, tracker):
+            recommendations = ModelRecommender.recommend_models(
+                system_info,
+                all_models,
+                max_recommendations=5,
+                measurements=tracker.throughput_summary(),
+            )
 
     if not recommendations:
         console.print("[yellow]No suitable models found for your system.[/yellow]")
@@ -382,6 +496,8 @@ async def _show_recommended_model(config):
             f"[bold]Fitness Score:[/bold] {model.metadata.get('fitness_score', 0):.1f}/100",
             f"[bold]System Fit:[/bold] {fit_emoji} {fit_text}",
         ]
+        if model.metadata.get("speed"):
+            info_lines.append(f"[bold]Speed:[/bold] {model.metadata['speed']}")
 
         if model.description:
             info_lines.append(f"\n[dim]{model.description[:100]}...[/dim]")
@@ -449,18 +565,8 @@ async def _set_model(config, model_id, provider_hint, validate):
     else:
         # Set without validation (user knows what they're doing)
         if not provider_hint:
-            # Try to infer provider from model_id
-            if "mlx-community/" in model_id:
-                provider_hint = "mlx"
-            elif "claude" in model_id.lower():
-                provider_hint = "claude"
-            elif "gpt" in model_id.lower() or "o1" in model_id.lower():
-                provider_hint = "openai"
-            elif "gemini" in model_id.lower():
-                provider_hint = "gemini"
-            elif ":" in model_id:  # Ollama style
-                provider_hint = "ollama"
-            else:
+            provider_hint = infer_provider(model_id, registry)
+            if provider_hint is None:
                 console.print(
                     "[yellow]Warning: Could not infer provider. "
                     "Please specify with --provider[/yellow]"
@@ -497,39 +603,137 @@ async def _set_model(config, model_id, provider_hint, validate):
         )
 
 
+def _plan_table(plan, index: int) -> Table:
+    """One co-residency plan as a table of role assignments."""
+    title = "Best plan" if index == 1 else f"Runner-up #{index - 1}"
+    table = Table(
+        title=f"{title} — {plan.ram_gb:.1f}/{plan.budget_gb:.1f}GB, fitness {plan.fitness:.0f}",
+        box=box.ROUNDED,
+    )
+    table.add_column("Role", style="bold")
+    table.add_column("Model", style="cyan")
+    table.add_column("Provider", style="dim")
+    table.add_column("RAM", justify="right")
+    table.add_column("Fitness", justify="right", style="green")
+
+    counted = set()
+    for role, model in plan.assignments.items():
+        fitness = plan.fitness_by_role[role]
+        key = f"{model.provider}:{model.id}"
+        # A model filling several roles is loaded (and counted) once
+        ram = "shared" if key in counted else f"{plan.footprints[key]:.1f}GB"
+        counted.add(key)
+        table.add_row(role, model.id, model.provider, ram, f"{fitness:.0f}")
+    return table
+
+
+@cli.command()
+@click.argument("roles", nargs=-1, type=click.Choice(sorted(ROLE_CONTEXT_LENGTHS)))
+@click.option("--budget", type=float, help="RAM (GB) the models may use together")
+@click.option(
+    "--context",
+    "contexts",
+    multiple=True,
+    help="Context a role needs, as ROLE=TOKENS (e.g. code=65536)",
+)
+@click.option(
+    "--alternatives", type=int, default=2, show_default=True, help="Runner-up plans to show"
+)
+def plan(roles, budget, contexts, alternatives):
+    """Plan local models to keep loaded together, one per role.
+
+    Defaults to code, chat and embedding within the RAM available now.
+    """
+    context_lengths = {}
+    for item in contexts:
+        role, _, tokens = item.partition("=")
+        if role not in ROLE_CONTEXT_LENGTHS or not tokens.isdigit():
+            raise click.BadParameter(f"expected ROLE=TOKENS, got '{item}'", param_hint="--context")
+        context_lengths[role] = int(tokens)
+
+    async def _plan():
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            progress.add_task("Analyzing models...", total=None)
+            system_info = await SystemDetector.detect_system_async()
+            all_models_dict = await registry.fetch_all_models()
+
+        all_models = [m for provider_models in all_models_dict.values() for m in provider_models]
+        plans = ModelRecommender.plan_coresidency(
+            system_info,
+            all_models,
+            roles or DEFAULT_ROLES,
+            budget_gb=budget,
+            context_lengths=context_lengths,
+            max_plans=1 + max(alternatives, 0),
+            measurements=StatisticsTracker().throughput_summary(),
+        )
+        if not plans:
+            budget_gb = system_info.ram_available_gb if budget is None else budget
+            console.print(
+                f"[yellow]No combination of local models fills every role "
+                f"within {budget_gb:.1f}GB.[/yellow]"
+            )
+            return
+
+        for i, option in enumerate(plans, 1):
+            console.print(_plan_table(option, i))
+
+    asyncio.run(_plan())
+
+
 @cli.command()
+@click.argument("models", nargs=-1)
 @click.option("--model", "-m", help="Model to download (uses current if not specified)")
 @click.option("--force", "-f", is_flag=True, help="Force re-download even if exists")
 @click.option("--no-progress", is_flag=True, help="Disable progress bar")
 @click.option("--validate", "-v", is_flag=True, help="Validate download after completion")
+@click.option(
+    "--parallel",
+    "-j",
+    type=click.IntRange(min=1),
+    default=DEFAULT_PARALLEL,
+    show_default=True,
+    help="Models to download at once",
+)
+@click.option("--limit-rate", help="Bandwidth cap for MLX downloads in bytes/s, e.g. 20M")
 @click.pass_context
-def download(ctx, model, force, no_progress, validate):
-    """Download the currently configured model or a specific model.
+def download(ctx, models, model, force, no_progress, validate, parallel, limit_rate):
+    """Download the currently configured model or specific models.
+
+    Several models download in parallel. Downloads an earlier session left
+    unfinished are picked up again along with them.
 
     Examples:
         cortex download                    # Download current model
         cortex download --model llama3.2   # Download specific model
+        cortex download llama3.2:3b mlx-community/Qwen2.5-7B-Instruct-4bit
         cortex download --force            # Re-download even if exists
     """
+    rate_limit = _parse_rate(limit_rate) if limit_rate else None
 
     async def _download_command():
         config = ctx.obj["config"]
-
-        # Get model to download
-        if model:
-            # Parse model ID and provider
-            if "/" in model and "mlx" in model:
-                provider = "mlx"
-                model_id = model
-            elif ":" in model:
-                provider = "ollama"
-                model_id = model
-            else:
-                # Use current model's provider
-                current = config.data.get("current_model", {})
-                provider = current.get("provider", "mlx")
-                model_id = model
-        else:
+        manager = DownloadManager(
+            registry,
+            max_parallel=parallel,
+            rate_limit=rate_limit,
+            store=eviction_store(registry, config.data),
+        )
+        resumed = manager.pending()
+
+        # Get models to download
+        requested = models + ((model,) if model else ())
+        targets = []
+        if requested:
+            # Models no catalog lists and no ID shape tells use the current provider
+            current_provider = config.data.get("current_model", {}).get("provider", "mlx")
+            for model_id in requested:
+                targets.append((model_id, resolve_provider(model_id, registry) or current_provider))
+        elif not resumed:
             # Use current model
             current = config.data.get("current_model", {})
             if not current:
@@ -541,35 +745,48 @@ def download(ctx, model, force, no_progress, validate):
             if not provider or not model_id:
                 console.print("[red]Invalid model configuration.[/red]")
                 return
+            targets.append((model_id, provider))
 
-        # Check if provider supports downloading
-        if provider not in ["mlx", "ollama"]:
-            console.print(
-                f"[yellow]Provider '{provider}' doesn't require downloading (cloud-based).[/yellow]"
-            )
-            return
+        jobs = []
+        for model_id, provider in targets:
+            # Check if provider supports downloading
+            if provider not in DOWNLOAD_PROVIDERS:
+                console.print(
+                    f"[yellow]Provider '{provider}' doesn't require downloading "
+                    "(cloud-based).[/yellow]"
+                )
+                continue
 
-        # Get the provider
-        provider_obj = registry.get_provider(provider)
-        if not provider_obj:
-            console.print(f"[red]Provider '{provider}' not found.[/red]")
-            return
+            provider_obj = registry.get_provider(provider)
+            if not provider_obj:
+                console.print(f"[red]Provider '{provider}' not found.[/red]")
+                continue
 
-        # Check if already downloaded
-        if not force:
-            is_available = await provider_obj.is_model_available(model_id)
-            if is_available:
+            # Check if already downloaded
+            if not force and await provider_obj.is_model_available(model_id):
                 console.print(f"[yellow]Model '{model_id}' is already downloaded.[/yellow]")
                 if not Confirm.ask("Do you want to re-download it?"):
-                    return
+                    continue
 
-        # Download the model
-        console.print(f"\n[cyan]Downloading model: {model_id}[/cyan]")
-        console.print(f"Provider: {provider}\n")
+            job = manager.enqueue(model_id, provider)
+            if job not in jobs:
+                jobs.append(job)
 
-        # Create progress tracking
-        download_start = datetime.now()
+        if resumed:
+            console.print(
+                f"[cyan]Resuming {len(resumed)} unfinished download(s) "
+                "from an earlier session[/cyan]"
+            )
+            jobs.extend(job for job in resumed if job not in jobs)
+        if not jobs:
+            return
 
+        for job in jobs:
+            console.print(f"\n[cyan]Downloading model: {job.model_id}[/cyan]")
+            console.print(f"Provider: {job.provider}")
+        console.print()
+
+        download_start = datetime.now()
         if not no_progress:
             with Progress(
                 SpinnerColumn(),
@@ -579,50 +796,259 @@ def download(ctx, model, force, no_progress, validate):
                 TextColumn("•"),
                 DownloadColumn(),
                 TextColumn("•"),
+                TransferSpeedColumn(),
+                TextColumn("•"),
                 TimeRemainingColumn(),
                 console=console,
             ) as progress:
-                task = progress.add_task(f"Downloading {model_id}", total=100)
-
-                def progress_callback(current, total):
-                    if total > 0:
-                        percentage = (current / total) * 100
-                        progress.update(task, completed=percentage)
+                tasks = {job.key: progress.add_task(job.model_id, total=None) for job in jobs}
+                overall = progress.add_task("[bold]Total", total=None) if len(jobs) > 1 else None
+
+                def on_progress(job):
+                    if job.key not in tasks:
+                        return
+                    progress.update(
+                        tasks[job.key], completed=job.bytes_done, total=job.bytes_total or None
+                    )
+                    if overall is not None:
+                        total = sum(j.bytes_total for j in jobs)
+                        progress.update(
+                            overall,
+                            completed=sum(j.bytes_done for j in jobs),
+                            total=total or None,
+                        )
 
-                success = await provider_obj.download_model(model_id, progress_callback)
+                manager.listeners.append(on_progress)
+                results = await manager.run()
         else:
-            success = await provider_obj.download_model(model_id, None)
+            results = await manager.run()
 
-        download_end = datetime.now()
-        download_time = (download_end - download_start).total_seconds()
+        download_time = (datetime.now() - download_start).total_seconds()
 
-        if success:
-            console.print(f"\n[green]✓[/green] Successfully downloaded {model_id}")
-            console.print(f"  Download time: {download_time:.1f} seconds")
+        for job in jobs:
+            if results.get(job.key, False):
+                console.print(f"\n[green]✓[/green] Successfully downloaded {job.model_id}")
+                console.print(f"  Download time: {download_time:.1f} seconds")
 
-            # Validate if requested
-            if validate:
-                console.print("\n[cyan]Validating download...[/cyan]")
-                is_valid = await provider_obj.is_model_available(model_id)
-                if is_valid:
-                    console.print("[green]✓[/green] Download validated successfully")
-                else:
-                    console.print("[red]✗[/red] Download validation failed")
+                # Validate if requested
+                if validate:
+                    console.print("\n[cyan]Validating download...[/cyan]")
+                    await _verify_model(registry.get_provider(job.provider), job.model_id)
 
-            # Log statistics
-            _log_download_stats(config, model_id, provider, download_time, success)
+                # Log statistics
+                _log_download_stats(config, job.model_id, job.provider, download_time, True)
 
-            # Update current model if this was a new model
-            if model and model != config.data.get("current_model", {}).get("id"):
-                console.print("\n[dim]To use this model:[/dim]")
-                console.print(f"[cyan]cortex model {model_id}[/cyan]")
-        else:
-            console.print(f"\n[red]✗[/red] Failed to download {model_id}")
-            _log_download_stats(config, model_id, provider, download_time, False)
+                # Point at a newly downloaded model
+                if job.model_id != config.data.get("current_model", {}).get("id"):
+                    console.print("\n[dim]To use this model:[/dim]")
+                    console.print(f"[cyan]cortex model {job.model_id}[/cyan]")
+            else:
+                reason = f": {job.error}" if job.error else ""
+                console.print(f"\n[red]✗[/red] Failed to download {job.model_id}{reason}")
+                _log_download_stats(config, job.model_id, job.provider, download_time, False)
 
     asyncio.run(_download_command())
 
 
+@cli.command()
+@click.argument("models", nargs=-1)
+@click.pass_context
+def verify(ctx, models):
+    """Verify downloaded models against their published SHA-256 digests.
+
+    Checks the current model when none are given. Files unchanged since
+    their last check are not hashed again.
+
+    Examples:
+        cortex verify                                   # Verify current model
+        cortex verify llama3.2:3b mlx-community/Qwen2.5-7B-Instruct-4bit
+    """
+
+    async def _verify_command():
+        config = ctx.obj["config"]
+        current = config.data.get("current_model", {})
+        targets = [(m, resolve_provider(m, registry) or current.get("provider")) for m in models]
+        if not targets:
+            if not current.get("id"):
+                console.print("[red]No model configured. Run 'cortex model' first.[/red]")
+                return False
+            targets = [(current["id"], current.get("provider"))]
+
+        all_ok = True
+        for model_id, provider in targets:
+            provider_obj = registry.get_provider(provider) if provider else None
+            if provider not in DOWNLOAD_PROVIDERS or not provider_obj:
+                console.print(f"[yellow]{model_id} is not a local model.[/yellow]")
+                continue
+            if await _verify_model(provider_obj, model_id) is False:
+                all_ok = False
+        return all_ok
+
+    if not asyncio.run(_verify_command()):
+        ctx.exit(1)
+
+
+@cli.command()
+@click.option("--dry-run", is_flag=True, help="Show what would be removed without removing it")
+def gc(dry_run):
+    """Reclaim blob-store space no downloaded model uses any more.
+
+    Blobs are shared between models when a provider has ``blob_store``
+    enabled; deleting a model leaves its blobs behind until this runs.
+
+    Examples:
+        cortex gc --dry-run       # Preview what would be reclaimed
+        cortex gc                 # Remove unreferenced blobs
+    """
+    result = BlobStore().gc(dry_run=dry_run)
+    if not result.blobs:
+        console.print("[green]✓[/green] Nothing to reclaim")
+        return
+    size = f"{result.bytes / 1024**3:.2f}GB"
+    if dry_run:
+        console.print(f"Would remove {result.blobs} unreferenced blobs, freeing {size}")
+    else:
+        console.print(f"[green]✓[/green] Removed {result.blobs} unreferenced blobs, freed {size}")
+
+
+@cli.command()
+@click.option("--quota", help="Disk quota for local models, e.g. 200G (default: storage.quota_gb)")
+@click.option("--dry-run", is_flag=True, help="Show what would be evicted without deleting it")
+@click.pass_context
+def evict(ctx, quota, dry_run):
+    """Evict the least recently used local models until the rest fit the quota.
+
+    The current model and pinned models are never evicted. Downloads that
+    wouldn't fit evict the same way on their own once a quota is set.
+
+    Examples:
+        cortex evict --dry-run              # Preview against storage.quota_gb
+        cortex evict --quota 200G           # Evict down to 200GB
+    """
+    config = ctx.obj["config"]
+    overrides = {"quota_bytes": int(_parse_size(quota))} if quota else {}
+    store = ModelStore.from_config(registry, config.data, StatisticsTracker(), **overrides)
+    if store.quota_bytes is None:
+        console.print(
+            "[yellow]No quota set. Pass --quota or set storage.quota_gb in the config.[/yellow]"
+        )
+        return
+
+    async def _evict():
+        plan = store.plan(await store.inventory())
+        console.print(_store_table(plan, store.quota_bytes))
+        freed = f"{plan.freed_bytes / 1024**3:.1f}GB"
+        if not plan.evict:
+            console.print("[green]✓[/green] Local models fit within the quota")
+        elif dry_run:
+            console.print(f"Would evict {len(plan.evict)} models, freeing {freed}")
+        else:
+            evicted = await store.evict(plan)
+            freed = f"{sum(m.size_bytes for m in evicted) / 1024**3:.1f}GB"
+            console.print(f"[green]✓[/green] Evicted {len(evicted)} models, freed {freed}")
+        if not plan.fits:
+            console.print("[yellow]The current and pinned models alone exceed the quota.[/yellow]")
+
+    asyncio.run(_evict())
+
+
+def _store_table(plan, quota_bytes) -> Table:
+    """Local models, least recently used first, marked with what eviction does."""
+    table = Table(
+        title=f"Local models — {plan.total_bytes / 1024**3:.1f}/{quota_bytes / 1024**3:.1f}GB",
+        box=box.ROUNDED,
+    )
+    table.add_column("Model", style="cyan")
+    table.add_column("Provider", style="dim")
+    table.add_column("Size", justify="right")
+    table.add_column("Last used")
+    table.add_column("Status")
+
+    evicted = {m.key for m in plan.evict}
+    for model in plan.models:
+        if model.key in evicted:
+            status = "[red]evict[/red]"
+        else:
+            status = f"[green]{model.protected}[/green]" if model.protected else "keep"
+        table.add_row(
+            model.model_id,
+            model.provider,
+            f"{model.size_bytes / 1024**3:.1f}GB",
+            datetime.fromtimestamp(model.last_used).strftime("%Y-%m-%d %H:%M"),
+            status,
+        )
+    return table
+
+
+@cli.command()
+@click.argument("models", nargs=-1, required=True)
+@click.option("--remove", is_flag=True, help="Unpin the models instead")
+@click.pass_context
+def pin(ctx, models, remove):
+    """Keep local models from being evicted to fit the disk quota.
+
+    Examples:
+        cortex pin llama3.2:3b
+        cortex pin --remove llama3.2:3b
+    """
+    config = ctx.obj["config"]
+    storage = config.data.setdefault("storage", {})
+    pinned = [m for m in storage.get("pinned") or [] if not (remove and m in models)]
+    if not remove:
+        pinned += [m for m in models if m not in pinned]
+    storage["pinned"] = pinned
+    config.save()
+    action = "Unpinned" if remove else "Pinned"
+    console.print(f"[green]✓[/green] {action} {', '.join(models)}")
+
+
+async def _verify_model(provider_obj, model_id):
+    """Hash a local model against its published digests and print the outcome.
+
+    Returns None when there was nothing to check against.
+    """
+    result = await provider_obj.verify_model(model_id)
+    if not result.files:
+        console.print(f"[yellow]No published digests to verify {model_id} against.[/yellow]")
+        return None
+
+    if result.ok:
+        console.print(
+            f"[green]✓[/green] Verified {len(result.files)} files of {model_id}: "
+            f"{result.bytes_hashed / 1024**3:.2f}GB hashed at {result.gb_per_second:.2f} GB/s, "
+            f"{result.bytes_cached / 1024**3:.2f}GB unchanged since last check"
+        )
+        return True
+
+    console.print(
+        f"[red]✗[/red] {len(result.failures)} of {len(result.files)} files of {model_id} "
+        "failed verification:"
+    )
+    for check in result.failures:
+        console.print(f"  {check.path.name}: {check.error or 'SHA-256 mismatch'}")
+    return False
+
+
+def _parse_rate(value):
+    """Bytes per second from a rate such as ``500K``, ``20M`` or ``1G``."""
+    return _parse_size(value, "--limit-rate", "a rate like 20M", suffix="B/S")
+
+
+def _parse_size(value, param_hint="--quota", example="a size like 200G", suffix="B"):
+    """Bytes from a size such as ``500K``, ``20M``, ``1G`` or ``2T``."""
+    units = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    number, unit = value.upper().rstrip(suffix), ""
+    if number and number[-1] in units:
+        number, unit = number[:-1], number[-1]
+    try:
+        size = float(number) * units[unit]
+    except ValueError:
+        raise click.BadParameter(f"expected {example}, got '{value}'", param_hint=param_hint)
+    if size <= 0:
+        raise click.BadParameter("must be positive", param_hint=param_hint)
+    return size
+
+
 def _log_download_stats(config, model_id, provider, download_time, success):
     """Log download statistics."""
     stats = config.data.get("download_stats", [])
@@ -771,7 +1197,9 @@ def _get_capability_color(capabilities: list) -> str:
         return "green"  # Basic chat
 
 
-def _display_models_table(models: list[ModelInfo], system_info, show_recommendations: bool):
+def _display_models_table(
+    models: list[ModelInfo], system_info, show_recommendations: bool, show_variants: bool = True
+):
     """Display models in a formatted table, grouped by provider."""
     if not models:
         console.print("[yellow]No models found matching your criteria.[/yellow]")
@@ -881,6 +1309,9 @@ def _display_models_table(models: list[ModelInfo], system_info, show_recommendat
 
             # Add status to the beginning of model display
             model_name = f"{status} {model_display}"
+            other_variants = len(model.metadata.get("variants", [])) - 1
+            if show_variants and other_variants > 0:
+                model_name += f"\n  +{other_variants} more variants"
 
             # Format capabilities with color
             caps = ", ".join([c.value for c in model.capabilities])
@@ -1147,27 +1578,164 @@ def _export_models(models: list[ModelInfo], format: str):
     console.print(f"[green]✓[/green] Exported {len(models)} models to {filename}")
 
 
+HEALTH_STATUS_EMOJI = {
+    "healthy": "✅",
+    "warning": "⚠️",
+    "critical": "🔴",
+    "degraded": "⚡",
+    "error": "❌",
+    "offline": "🔌",
+    "timeout": "⏱️",
+    "idle": "💤",
+}
+
+
+def _health_details(check_name: str, result: dict) -> str:
+    """One-line details of a health check result."""
+    details = []
+    if check_name == "system":
+        details.append(f"CPU: {result.get('cpu_percent', 0):.1f}%")
+        details.append(f"RAM: {result.get('memory_percent', 0):.1f}%")
+        details.append(f"Disk: {result.get('disk_percent', 0):.1f}%")
+    elif check_name == "memory_pressure":
+        details.append(f"RAM: {result.get('memory_percent', 0):.1f}%")
+        details.append(f"Swap out: {result.get('swap_out_mb_per_s', 0):.1f} MB/s")
+    elif check_name == "api_keys":
+        details.append(f"{result.get('configured', 0)}/{result.get('total', 0)} configured")
+    elif check_name in ["mlx_server", "ollama_server"]:
+        if result.get("running"):
+            details.append(f"Port: {result.get('port', 'N/A')}")
+            details.append(f"Models: {result.get('models', 0)}")
+        else:
+            details.append("Not running")
+    elif check_name in ["mlx_inference", "ollama_inference"]:
+        for model in result.get("models", []):
+            if model.get("canary") == "failed":
+                details.append(f"{model['model']}: failed ({model['error']})")
+                continue
+            learning = " (learning)" if model.get("canary") == "learning" else ""
+            details.append(
+                f"{model['model']}: {model['tokens_per_second']:.1f} tok/s, "
+                f"TTFT {model['ttft'] * 1000:.0f}ms{learning}"
+            )
+        if not details and not result.get("running", True):
+            details.append("Not running")
+    elif check_name == "network":
+        details.append(f"Connectivity: {result.get('connectivity', 0):.0f}%")
+    elif check_name == "disk_space":
+        details.append(f"Free: {result.get('free_space_gb', 0):.1f} GB")
+        details.append(f"Cache: {result.get('model_cache_gb', 0):.1f} GB")
+    elif check_name == "model_cache":
+        details.append(f"MLX: {result.get('mlx_models', 0)}")
+        details.append(f"Ollama: {result.get('ollama_models', 0)}")
+    return ", ".join(details) if details else result.get("message", "")
+
+
+def _health_trend(monitor, check_name: str) -> str:
+    """Trend summary from a check's sample history."""
+    if check_name == "disk_space":
+        slope = monitor.trend("disk_space", "free_space_gb")
+        if slope is None:
+            return ""
+        hours = monitor.hours_until_disk_full()
+        full = f", full in {hours:.0f}h" if hours is not None else ""
+        return f"{slope:+.2f} GB/h{full}"
+    if check_name in ("system", "memory_pressure"):
+        slope = monitor.trend(check_name, "memory_percent", window=600)
+        return f"RAM {slope:+.1f}%/h" if slope is not None else ""
+    if check_name in ("mlx_server", "ollama_server"):
+        flaps = monitor.flaps(check_name)
+        return f"{flaps} flaps/10m" if flaps else ""
+    return ""
+
+
+def _health_watch_view(monitor) -> Table:
+    """Table of the latest result, sample count and trend for every check."""
+    table = Table(title="🏥 Health (watching)", box=box.ROUNDED)
+    table.add_column("Check", style="dim")
+    table.add_column("Status")
+    table.add_column("Details")
+    table.add_column("Samples", justify="right")
+    table.add_column("Trend")
+    table.add_column("Age", justify="right", style="dim")
+    now = time.time()
+    for check_name in monitor.checks:
+        result = monitor.status.get(check_name)
+        if result is None:
+            table.add_row(check_name.replace("_", " ").title(), "…", "", "0", "", "")
+            continue
+        status = result.get("status", "unknown")
+        table.add_row(
+            check_name.replace("_", " ").title(),
+            f"{HEALTH_STATUS_EMOJI.get(status, '❓')} {status}",
+            _health_details(check_name, result),
+            str(len(monitor.history.get(check_name, ()))),
+            _health_trend(monitor, check_name),
+            f"{now - monitor.last_check.get(check_name, now):.0f}s",
+        )
+    return table
+
+
+async def _watch_health(monitor) -> None:
+    """Run checks on their own intervals, refreshing the table and printing alerts."""
+    with Live(_health_watch_view(monitor), console=console, refresh_per_second=2) as live:
+
+        def on_update(results, alerts):
+            for alert in alerts:
+                live.console.print(f"[red]🔔 {alert.message}[/red]")
+            live.update(_health_watch_view(monitor))
+
+        await monitor.watch(on_update=on_update)
+
+
 # Extended Commands
 @cli.command()
 @click.option("--verbose", "-v", is_flag=True, help="Show detailed health information")
 @click.option("--check", "-c", multiple=True, help="Specific checks to run")
+@click.option(
+    "--watch", "-w", is_flag=True, help="Keep checking on per-check intervals with trends/alerts"
+)
+@click.option(
+    "--deep", is_flag=True, help="Also time a canary generation on each running local server"
+)
+@click.option("--fresh", is_flag=True, help="Run every check now instead of reusing recent results")
 @click.pass_context
-def health(ctx, verbose, check):
+def health(ctx, verbose, check, watch, deep, fresh):
     """Run system health checks.
 
     Available checks:
     - system: System resources (CPU, RAM, disk)
+    - memory_pressure: RAM usage and swap activity
     - mlx_server: MLX server status
     - ollama_server: Ollama server status
     - api_keys: API key configuration
     - network: Network connectivity
     - disk_space: Model cache disk space
     - model_cache: Model cache status
+
+    Deep checks (with --deep, or by name with --check):
+    - mlx_inference: Canary tokens/s and TTFT on the MLX server
+    - ollama_inference: Canary tokens/s and TTFT on loaded Ollama models
     """
+    from .health import health_monitor
+
+    ollama = registry.get_provider("ollama")
+    if ollama:
+        health_monitor.ports["ollama"] = ollama.port
+
+    if watch:
+        if deep:
+            health_monitor.checks.update(health_monitor.deep_checks)
+        if check:
+            available = {**health_monitor.checks, **health_monitor.deep_checks}
+            health_monitor.checks = {name: fn for name, fn in available.items() if name in check}
+        try:
+            asyncio.run(_watch_health(health_monitor))
+        except KeyboardInterrupt:
+            pass
+        return
 
     async def _run_health_checks():
-        from .health import health_monitor
-
         # Run health checks
         checks_to_run = list(check) if check else None
         with Progress(
@@ -1176,21 +1744,15 @@ def health(ctx, verbose, check):
             console=console,
         ) as progress:
             progress.add_task("Running health checks...", total=None)
-            results = await health_monitor.run_health_checks(checks_to_run)
+            results = await health_monitor.run_health_checks(
+                checks_to_run, max_age=None if fresh else health_monitor.intervals, deep=deep
+            )
 
         # Get summary
         summary = health_monitor.get_summary()
 
         # Display results
-        status_emoji = {
-            "healthy": "✅",
-            "warning": "⚠️",
-            "critical": "🔴",
-            "degraded": "⚡",
-            "error": "❌",
-            "offline": "🔌",
-            "timeout": "⏱️",
-        }
+        status_emoji = HEALTH_STATUS_EMOJI
 
         # Overall status panel
         overall_color = {
@@ -1222,36 +1784,8 @@ def health(ctx, verbose, check):
                 status = result.get("status", "unknown")
                 emoji = status_emoji.get(status, "❓")
 
-                # Format details based on check type
-                details = []
-                if check_name == "system":
-                    details.append(f"CPU: {result.get('cpu_percent', 0):.1f}%")
-                    details.append(f"RAM: {result.get('memory_percent', 0):.1f}%")
-                    details.append(f"Disk: {result.get('disk_percent', 0):.1f}%")
-                elif check_name == "api_keys":
-                    details.append(
-                        f"{result.get('configured', 0)}/{result.get('total', 0)} configured"
-                    )
-                elif check_name in ["mlx_server", "ollama_server"]:
-                    if result.get("running"):
-                        details.append(f"Port: {result.get('port', 'N/A')}")
-                        details.append(f"Models: {result.get('models', 0)}")
-                    else:
-                        details.append("Not running")
-                elif check_name == "network":
-                    details.append(f"Connectivity: {result.get('connectivity', 0):.0f}%")
-                elif check_name == "disk_space":
-                    details.append(f"Free: {result.get('free_space_gb', 0):.1f} GB")
-                    details.append(f"Cache: {result.get('model_cache_gb', 0):.1f} GB")
-                elif check_name == "model_cache":
-                    details.append(f"MLX: {result.get('mlx_models', 0)}")
-                    details.append(f"Ollama: {result.get('ollama_models', 0)}")
-
-                table.add_row(
-                    check_name.replace("_", " ").title(),
-                    f"{emoji} {status}",
-                    ", ".join(details) if details else result.get("message", ""),
-                )
+                details = _health_details(check_name, result)
+                table.add_row(check_name.replace("_", " ").title(), f"{emoji} {status}", details)
 
             console.print(table)
 
@@ -1268,8 +1802,24 @@ def health(ctx, verbose, check):
 @click.option("--model", "-m", help="Model to start server for (uses current if not specified)")
 @click.option("--port", "-p", type=int, default=8080, help="Port to run server on")
 @click.option("--background", "-b", is_flag=True, help="Run server in background")
+@click.option(
+    "--timeout",
+    "-t",
+    type=float,
+    help="Seconds to wait for the server to accept requests (default: provider config)",
+)
+@click.option(
+    "--on-demand",
+    is_flag=True,
+    help="Listen on the port and only start the server when a request arrives",
+)
+@click.option(
+    "--idle-timeout",
+    type=float,
+    help="With --on-demand, stop the server after this many idle seconds",
+)
 @click.pass_context
-def start(ctx, model, port, background):
+def start(ctx, model, port, background, timeout, on_demand, idle_timeout):
     """Start the AI model server (MLX or Ollama)."""
 
     async def _start_server():
@@ -1278,11 +1828,7 @@ def start(ctx, model, port, background):
         # Get model to start
         if model:
             model_id = model
-            # Determine provider from model ID
-            if "mlx" in model.lower() or "/" in model:
-                provider = "mlx"
-            else:
-                provider = "ollama"
+            provider = "mlx" if infer_provider(model, registry) == "mlx" else "ollama"
         else:
             current = config.data.get("current_model", {})
             if not current:
@@ -1295,6 +1841,43 @@ def start(ctx, model, port, background):
             Panel(f"[cyan]Starting {provider.upper()} server for model: {model_id}[/cyan]")
         )
 
+        provider_config = config.data.get("providers", {}).get(provider, {})
+        startup_timeout = timeout or provider_config.get("startup_timeout", DEFAULT_STARTUP_TIMEOUT)
+
+        async def _wait_ready(url, process, log_file, pattern):
+            with console.status(f"[cyan]Waiting for {provider.upper()} server...[/cyan]"):
+                readiness = await wait_until_ready(
+                    url,
+                    timeout=startup_timeout,
+                    is_alive=lambda: process.poll() is None,
+                    log_file=log_file,
+                    ready_pattern=pattern,
+                )
+            if readiness:
+                console.print(f"[green]✓[/green] Server ready in {readiness.elapsed:.2f}s")
+            else:
+                console.print(f"[red]Server not ready: {readiness.reason}[/red]")
+            return readiness
+
+        # An on-demand server exists to free memory while idle; warming its
+        # weights now would hold gigabytes of page cache before any request
+        if provider_config.get("prewarm", True) and not on_demand:
+            provider_obj = registry.get_provider(provider)
+            if provider_obj:
+                await _warm_model(provider_obj, model_id)
+
+        if on_demand:
+            await _start_on_demand(
+                config,
+                provider,
+                model_id,
+                port,
+                background,
+                startup_timeout,
+                idle_timeout or provider_config.get("idle_timeout", DEFAULT_IDLE_TIMEOUT),
+            )
+            return
+
         if provider == "mlx":
             # Start MLX server
             server_cmd = [
@@ -1326,6 +1909,12 @@ def start(ctx, model, port, background):
                     f"[green]✓[/green] MLX server started in background (PID: {process.pid})"
                 )
                 console.print(f"[dim]Logs: {log_file}[/dim]")
+
+                readiness = await _wait_ready(
+                    f"http://localhost:{port}/v1/models", process, log_file, MLX_READY_PATTERN
+                )
+                if not readiness:
+                    return
             else:
                 # Run in foreground
                 console.print(
@@ -1352,10 +1941,19 @@ def start(ctx, model, port, background):
                 pid_file = DOTFILES / "config/cortex/ollama_server.pid"
                 pid_file.write_text(str(process.pid))
 
-                await asyncio.sleep(2)
                 console.print(f"[green]✓[/green] Ollama server started (PID: {process.pid})")
                 console.print(f"[dim]Logs: {log_file}[/dim]")
 
+                ollama_port = provider_config.get("port", 11434)
+                readiness = await _wait_ready(
+                    f"http://localhost:{ollama_port}/api/tags",
+                    process,
+                    log_file,
+                    OLLAMA_READY_PATTERN,
+                )
+                if not readiness:
+                    return
+
         # Update server status in config
         config.data["server_status"] = {
             "provider": provider,
@@ -1369,6 +1967,326 @@ def start(ctx, model, port, background):
     asyncio.run(_start_server())
 
 
+async def _start_on_demand(
+    config, provider, model_id, port, background, startup_timeout, idle_timeout
+):
+    """Serve a model through an OnDemandServer that starts/stops the backend as needed."""
+    pid_file = DOTFILES / f"config/cortex/{provider}_server.pid"
+    log_file = DOTFILES / f"config/cortex/logs/{provider}_server.log"
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    if provider == "mlx":
+        listen_port = port
+        command = [
+            sys.executable,
+            "-m",
+            "mlx_lm.server",
+            "--model",
+            model_id,
+            "--port",
+            "{port}",
+            "--trust-remote-code",
+        ]
+        env = {}
+        ready_path, ready_pattern = "/v1/models", MLX_READY_PATTERN
+    else:
+        listen_port = config.data.get("providers", {}).get("ollama", {}).get("port", 11434)
+        command = ["ollama", "serve"]
+        env = {"OLLAMA_HOST": "127.0.0.1:{port}"}
+        ready_path, ready_pattern = "/api/tags", OLLAMA_READY_PATTERN
+
+    if background:
+        # Re-run ourselves detached, in the foreground mode below
+        proxy_cmd = [
+            sys.executable,
+            "-m",
+            "cortex.cli",
+            "start",
+            "--on-demand",
+            "--model",
+            model_id,
+            "--port",
+            str(port),
+            "--timeout",
+            str(startup_timeout),
+            "--idle-timeout",
+            str(idle_timeout),
+        ]
+        with open(log_file, "a") as log:
+            process = subprocess.Popen(proxy_cmd, stdout=log, stderr=log, start_new_session=True)
+        pid_file.write_text(str(process.pid))
+        console.print(
+            f"[green]✓[/green] On-demand {provider.upper()} server listening on port "
+            f"{listen_port} (PID: {process.pid})"
+        )
+        console.print(f"[dim]Logs: {log_file}[/dim]")
+        return
+
+    server = OnDemandServer(
+        command,
+        listen_port,
+        ready_path=ready_path,
+        idle_timeout=idle_timeout,
+        startup_timeout=startup_timeout,
+        env=env,
+        log_file=log_file,
+        ready_pattern=ready_pattern,
+    )
+
+    # `cortex stop` sends SIGTERM to the PID file, which also stops the backend
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, server.request_stop)
+    pid_file.write_text(str(os.getpid()))
+
+    config.data["server_status"] = {
+        "provider": provider,
+        "model": model_id,
+        "port": listen_port,
+        "started_at": datetime.now().isoformat(),
+        "running": True,
+        "on_demand": True,
+        "idle_timeout": idle_timeout,
+    }
+    config.save()
+
+    console.print(
+        f"[green]✓[/green] Listening on port {listen_port}; the {provider.upper()} server "
+        f"starts on the first request and stops after {idle_timeout:.0f}s idle."
+    )
+    console.print("[yellow]Press Ctrl+C to stop.[/yellow]")
+    try:
+        await server.serve_forever()
+    finally:
+        pid_file.unlink(missing_ok=True)
+        config.data["server_status"]["running"] = False
+        config.save()
+        console.print(f"[green]✓[/green] On-demand server stopped ({server.starts} backend starts)")
+
+
+async def _warm_model(provider_obj, model_id, workers=DEFAULT_WORKERS):
+    """Read a model's weights into the page cache, showing MB/s progress."""
+    files = provider_obj.local_model_files(model_id)
+    if not files:
+        return None
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        DownloadColumn(),
+        TextColumn("•"),
+        TransferSpeedColumn(),
+        console=console,
+        transient=True,
+    ) as progress:
+        task = progress.add_task(f"Warming {model_id}", total=None)
+
+        def progress_callback(done, total):
+            progress.update(task, completed=done, total=total)
+
+        result = await asyncio.to_thread(Prewarmer(workers).warm, files, progress_callback)
+
+    if result.bytes_read:
+        console.print(
+            f"[green]✓[/green] Warmed {result.bytes_read / (1024**3):.1f} GB in "
+            f"{result.seconds:.1f}s ({result.mb_per_second:.0f} MB/s)"
+        )
+    if result.files_skipped:
+        console.print(
+            f"[dim]{result.files_skipped} file(s), {result.bytes_skipped / (1024**3):.1f} GB "
+            f"already in memory[/dim]"
+        )
+    return result
+
+
+@cli.command()
+@click.argument("model_id")
+@click.option("--provider", "-p", help="Provider of the model (inferred if not given)")
+@click.option(
+    "--workers", "-w", type=int, default=DEFAULT_WORKERS, help="Parallel readers", show_default=True
+)
+def warm(model_id, provider, workers):
+    """Read a model's weights into the OS page cache ahead of loading it.
+
+    Files already resident in memory are skipped.
+    """
+    provider_obj = registry.get_provider(provider or infer_provider(model_id, registry) or "ollama")
+    if provider_obj is None:
+        console.print(f"[red]Unknown provider for {model_id}[/red]")
+        return
+
+    if not provider_obj.local_model_files(model_id):
+        console.print(f"[yellow]No local weights found for {model_id}[/yellow]")
+        return
+
+    asyncio.run(_warm_model(provider_obj, model_id, workers))
+
+
+async def _bench_model(model_id, provider, suite, repeat, cold):
+    """Benchmark one model, starting or unloading its server as needed."""
+    provider_obj = registry.get_provider(provider)
+    if provider_obj is None:
+        console.print(f"[red]Provider {provider} is not available for {model_id}[/red]")
+        return None
+
+    load_seconds = None
+    server_pid = None
+    if provider == "mlx":
+        # Serving the model is its load, so the server is (re)started and timed
+        start = time.perf_counter()
+        if not await provider_obj.start_server(model_id):
+            console.print(f"[red]MLX server failed to start with {model_id}[/red]")
+            return None
+        load_seconds = time.perf_counter() - start
+        server_pid = provider_obj.server_process.pid
+    elif provider == "ollama":
+        if cold:
+            await provider_obj.unload_model(model_id)
+        server_pid = TelemetrySampler().server_pid("ollama")
+
+    try:
+        probe = make_probe(provider, model_id, api_key=getattr(provider_obj, "api_key", None))
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        return None
+
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}/{task.total}"),
+        console=console,
+        transient=True,
+    ) as progress:
+        task = progress.add_task(f"Benchmarking {model_id}", total=len(suite) * repeat)
+        return await run_bench(
+            model_id,
+            provider,
+            probe,
+            suite,
+            repeat,
+            server_pid=server_pid,
+            load_seconds=load_seconds,
+            on_run=lambda run: progress.advance(task),
+        )
+
+
+def _record_bench_throughput(tracker, report) -> bool:
+    """Feed a benchmark's median speeds to the recommender's measurements."""
+    decode = report.median("decode_tokens_per_second")
+    if not decode:
+        return False
+    prompt_tokens = report.median("prompt_tokens")
+    tracker.record_throughput(
+        report.model,
+        report.provider,
+        decode,
+        report.median("prefill_tokens_per_second"),
+        int(prompt_tokens) if prompt_tokens else None,
+        source="bench",
+    )
+    return True
+
+
+def _bench_table(reports, hardware, show_machine=False) -> Table:
+    """Comparison table of stored benchmark reports."""
+    title = "⏱️ Benchmarks"
+    if not show_machine and reports:
+        machine = hardware.get(reports[0].fingerprint, {})
+        title += f" — {machine.get('cpu', '?')}, {machine.get('ram_gb', '?')}GB"
+    table = Table(title=title, box=box.ROUNDED)
+    table.add_column("Model", style="cyan")
+    table.add_column("Provider", style="dim")
+    if show_machine:
+        table.add_column("Machine", style="dim")
+    table.add_column("Date", style="dim")
+    table.add_column("Load", justify="right")
+    table.add_column("TTFT", justify="right")
+    table.add_column("Prefill tok/s", justify="right")
+    table.add_column("Decode tok/s", justify="right", style="green")
+    table.add_column("Peak RSS", justify="right")
+    table.add_column("Runs", justify="right", style="dim")
+
+    def fmt(value, pattern):
+        return pattern.format(value) if value is not None else "-"
+
+    for report in reports:
+        row = [report.model, report.provider]
+        if show_machine:
+            machine = hardware.get(report.fingerprint, {})
+            row.append(f"{machine.get('cpu', '?')}, {machine.get('ram_gb', '?')}GB")
+        ttft = report.median("ttft")
+        rss = report.peak_rss_bytes / (1024**3) if report.peak_rss_bytes else None
+        row += [
+            datetime.fromtimestamp(report.timestamp).strftime("%m-%d %H:%M"),
+            fmt(report.load_seconds, "{:.1f}s"),
+            fmt(ttft * 1000 if ttft is not None else None, "{:.0f}ms"),
+            fmt(report.median("prefill_tokens_per_second"), "{:.0f}"),
+            fmt(report.median("decode_tokens_per_second"), "{:.1f}"),
+            fmt(rss, "{:.1f} GB"),
+            str(len(report.runs)),
+        ]
+        table.add_row(*row)
+    return table
+
+
+@cli.command()
+@click.argument("models", nargs=-1)
+@click.option("--provider", "-p", help="Provider of the models (inferred if not given)")
+@click.option(
+    "--repeat", "-r", type=int, default=1, show_default=True, help="Runs per prompt/output length"
+)
+@click.option("--quick", is_flag=True, help="Only the shortest prompt and output lengths")
+@click.option("--cold", is_flag=True, help="Unload Ollama models first so load time is measured")
+@click.option("--all-hardware", is_flag=True, help="Include results from other machines")
+@click.option("--json", "as_json", is_flag=True, help="Print reports as JSON")
+def bench(models, provider, repeat, quick, cold, all_hardware, as_json):
+    """Benchmark model throughput on this machine.
+
+    Each model runs a fixed suite of prompt lengths (about 32, 512 and 2048
+    tokens) and output lengths (64 and 256 tokens) at temperature 0,
+    recording load time, time-to-first-token, prefill and decode tokens/s
+    and peak server RSS. Results are stored per hardware fingerprint; with
+    no models, the stored results for this machine are shown.
+
+    MLX models are (re)started so their load time is measured, and stay
+    served afterwards.
+
+    Examples:
+        cortex bench llama3.2:3b qwen2.5:7b     # Compare two Ollama models
+        cortex bench mlx-community/Qwen2.5-7B-Instruct-4bit --repeat 3
+        cortex bench                            # Show stored results
+    """
+    info = SystemDetector.detect_system()
+    fingerprint = hardware_fingerprint(info)
+    store = BenchStore()
+    tracker = StatisticsTracker()
+    if quick:
+        suite = default_suite(PROMPT_LENGTHS[:1], OUTPUT_LENGTHS[:1])
+    else:
+        suite = default_suite()
+
+    for model_id in models:
+        model_provider = provider or infer_provider(model_id, registry) or "ollama"
+        report = asyncio.run(_bench_model(model_id, model_provider, suite, repeat, cold))
+        if report is None:
+            continue
+        store.add(fingerprint, hardware_summary(info), report)
+        _record_bench_throughput(tracker, report)
+        for error in report.errors:
+            console.print(f"[yellow]{model_id}: {error}[/yellow]")
+
+    reports = store.reports(None if all_hardware else fingerprint, models or None)
+    if as_json:
+        print(json.dumps([report.to_dict() for report in reports], indent=2))
+        return
+    if not reports:
+        console.print("[dim]No benchmarks for this machine yet. Run 'cortex bench <model>'.[/dim]")
+        return
+    console.print(_bench_table(reports, store.hardware(), show_machine=all_hardware))
+
+
 @cli.command()
 @click.option("--provider", "-p", help="Provider to stop (auto-detect if not specified)")
 @click.pass_context
@@ -1434,12 +2352,30 @@ def stop(ctx, provider):
 
 
 @cli.command()
+@click.option("--watch", "-w", is_flag=True, help="Keep sampling server telemetry until Ctrl+C")
+@click.option(
+    "--interval",
+    "-i",
+    type=float,
+    default=DEFAULT_WATCH_INTERVAL,
+    help="Seconds between telemetry samples",
+)
+@click.option(
+    "--json", "as_json", is_flag=True, help="Print telemetry as JSON (one line per sample)"
+)
 @click.pass_context
-def status(ctx):
+def status(ctx, watch, interval, as_json):
     """Show the status of Cortex system and servers."""
 
     config = ctx.obj["config"]
 
+    if watch or as_json:
+        try:
+            asyncio.run(_watch_telemetry(watch, interval, as_json))
+        except KeyboardInterrupt:
+            pass
+        return
+
     # System info
     from .system_utils import SystemDetector
 
@@ -1478,20 +2414,26 @@ def status(ctx):
 
         # Check if server is actually responding
         if server_status.get("provider") == "mlx":
-            import requests
-
-            try:
-                port = server_status.get("port", 8080)
-                response = requests.get(f"http://localhost:{port}/v1/models", timeout=2)
-                if response.status_code == 200:
-                    console.print("[green]✓[/green] Server is responding")
-                else:
-                    console.print("[yellow]⚠[/yellow] Server not responding properly")
-            except (ConnectionError, OSError):
+            from .health import health_monitor
+
+            # Always fresh: a cached result may predate the server starting
+            health_monitor.ports["mlx"] = server_status.get("port", 8080)
+            results = asyncio.run(health_monitor.run_health_checks(["mlx_server"]))
+            check = results.get("mlx_server") or {}
+            if check.get("running"):
+                console.print("[green]✓[/green] Server is responding")
+            elif check.get("status") == "timeout":
+                console.print("[yellow]⚠[/yellow] Server not responding properly")
+            else:
                 console.print("[red]✗[/red] Cannot connect to server")
     else:
         console.print(Panel("[yellow]No server running[/yellow]", border_style="yellow"))
 
+    # What each local server process tree actually costs
+    sampler = asyncio.run(_sample_telemetry())
+    if any(sample.running for sample in (sampler.latest(p) for p in ("mlx", "ollama"))):
+        console.print(_telemetry_view(sampler))
+
     # System resources
     table = Table(show_header=False, box=None)
     table.add_column("Resource", style="dim")
@@ -1507,6 +2449,104 @@ def status(ctx):
     console.print(Panel(table, title="[blue]System Resources[/blue]", border_style="blue"))
 
 
+async def _sample_telemetry(sampler: Optional[TelemetrySampler] = None) -> TelemetrySampler:
+    """Take two samples half a second apart so CPU usage has a window."""
+    sampler = sampler or TelemetrySampler()
+    ollama = registry.get_provider("ollama")
+    await sampler.sample(ollama=ollama)
+    await asyncio.sleep(0.5)
+    await sampler.sample(ollama=ollama)
+    return sampler
+
+
+def _format_uptime(seconds: float) -> str:
+    """Compact uptime, e.g. 2h05m or 3m12s."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+def _telemetry_view(sampler: TelemetrySampler) -> Group:
+    """Render the latest per-server samples and Ollama's resident models."""
+    gb = 1024**3
+    table = Table(title="Server Processes", box=box.ROUNDED)
+    table.add_column("Server", style="cyan")
+    table.add_column("PID", justify="right")
+    table.add_column("Procs", justify="right")
+    table.add_column("RSS", justify="right")
+    table.add_column("RSS range", justify="right", style="dim")
+    table.add_column("CPU", justify="right")
+    table.add_column("Threads", justify="right")
+    table.add_column("FDs", justify="right")
+    table.add_column("Uptime", justify="right")
+
+    loaded = []
+    for provider in ("mlx", "ollama"):
+        sample = sampler.latest(provider)
+        if sample is None or not sample.running:
+            table.add_row(provider, "[dim]not running[/dim]", "", "", "", "", "", "", "")
+            continue
+        process = sample.process
+        low, high = sampler.rss_range(provider)
+        table.add_row(
+            provider,
+            str(process.pid),
+            str(process.processes),
+            f"{process.rss_bytes / gb:.2f} GB",
+            f"{low / gb:.2f}-{high / gb:.2f} GB",
+            f"{process.cpu_percent:.0f}%",
+            str(process.threads),
+            str(process.open_fds) if process.open_fds is not None else "-",
+            _format_uptime(process.uptime_seconds),
+        )
+        loaded.extend(sample.loaded_models)
+
+    if not loaded:
+        return Group(table)
+
+    models = Table(title="Resident Models", box=box.ROUNDED)
+    models.add_column("Model", style="green")
+    models.add_column("Size", justify="right")
+    models.add_column("VRAM", justify="right")
+    models.add_column("RAM", justify="right")
+    models.add_column("Expires", style="dim")
+    for model in loaded:
+        models.add_row(
+            model.name,
+            f"{model.size_bytes / gb:.2f} GB",
+            f"{model.vram_bytes / gb:.2f} GB",
+            f"{max(model.size_bytes - model.vram_bytes, 0) / gb:.2f} GB",
+            model.expires_at or "",
+        )
+    return Group(table, models)
+
+
+async def _watch_telemetry(watch: bool, interval: float, as_json: bool) -> None:
+    """Print telemetry once or every ``interval`` seconds, as a table or JSON."""
+    sampler = await _sample_telemetry()
+    ollama = registry.get_provider("ollama")
+
+    def snapshot():
+        return {
+            provider: sampler.latest(provider).to_dict() for provider in sorted(sampler.history)
+        }
+
+    if as_json:
+        if not watch:
+            click.echo(json.dumps(snapshot(), indent=2))
+            return
+        while True:
+            click.echo(json.dumps(snapshot()), nl=True)
+            await asyncio.sleep(interval)
+            await sampler.sample(ollama=ollama)
+
+    with Live(_telemetry_view(sampler), console=console, refresh_per_second=4) as live:
+        while True:
+            await asyncio.sleep(interval)
+            await sampler.sample(ollama=ollama)
+            live.update(_telemetry_view(sampler))
+
+
 @cli.command()
 @click.option("--tail", "-t", type=int, help="Number of lines to show")
 @click.option("--follow", "-f", is_flag=True, help="Follow log output")
@@ -1586,6 +2626,8 @@ def chat(ctx, message, model, ensemble, system, temperature, max_tokens, stream)
 
     config = ctx.obj["config"]
 
+    current = config.data.get("current_model", {})
+
     # Determine models to use
     if ensemble:
         models = list(ensemble)
@@ -1593,40 +2635,47 @@ def chat(ctx, message, model, ensemble, system, temperature, max_tokens, stream)
     elif model:
         models = [model]
     else:
-        current = config.data.get("current_model", {})
         if not current:
             console.print("[red]No model configured. Run 'cortex model' first.[/red]")
             return
         models = [current.get("id")]
 
+    # The configured provider is authoritative for the current model
+    model_providers = {
+        model_id: (
+            current.get("provider")
+            if current and model_id == current.get("id") and current.get("provider")
+            else infer_provider(model_id, registry) or "ollama"
+        )
+        for model_id in models
+    }
+
     # Start chat session
     chat_start = datetime.now()
     total_tokens = 0
     responses = {}
 
+    # Score any pending preload against the model actually used
+    tracker = StatisticsTracker()
+    PreloadScheduler.from_tracker(tracker).record_uses(
+        (model_providers[model_id], model_id) for model_id in models
+    )
+
     async def _run_chat():
         nonlocal total_tokens, responses
 
         if len(models) > 1:
-            # Ensemble mode - run models in parallel
+            # Ensemble mode - run models in parallel while local ones fit in RAM together
             console.print(
                 Panel(f"[cyan]Running ensemble chat with {len(models)} models in parallel[/cyan]")
             )
+            scheduler = MemoryBudgetScheduler.from_available_memory()
+            console.print(f"[dim]Local model RAM budget: {scheduler.budget_gb:.1f}GB[/dim]")
 
             async def run_model(model_id):
                 """Run a single model asynchronously."""
                 try:
-                    # Determine provider
-                    if "claude" in model_id.lower():
-                        provider = "claude"
-                    elif "gpt" in model_id.lower() or "o1" in model_id.lower():
-                        provider = "openai"
-                    elif "gemini" in model_id.lower():
-                        provider = "gemini"
-                    elif "mlx" in model_id.lower() or "/" in model_id:
-                        provider = "mlx"
-                    else:
-                        provider = "ollama"
+                    provider = model_providers[model_id]
 
                     if provider in ["claude", "openai", "gemini"]:
                         # Use API for online models
@@ -1635,7 +2684,11 @@ def chat(ctx, message, model, ensemble, system, temperature, max_tokens, stream)
                         )
                         responses[model_id] = result
                     elif provider == "mlx":
-                        # Use subprocess for MLX
+                        # Use subprocess for MLX; each one loads the full weights
+                        provider_obj = registry.get_provider("mlx")
+                        ram_gb = (
+                            provider_obj.estimate_footprint_gb(model_id) if provider_obj else None
+                        )
                         cmd = [
                             sys.executable,
                             "-m",
@@ -1650,11 +2703,30 @@ def chat(ctx, message, model, ensemble, system, temperature, max_tokens, stream)
                         if max_tokens:
                             cmd.extend(["--max-tokens", str(max_tokens)])
 
-                        process = await asyncio.create_subprocess_exec(
-                            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-                        )
-                        stdout, stderr = await process.communicate()
-                        responses[model_id] = stdout.decode()
+                        async with scheduler.reserve(model_id, ram_gb) as reservation:
+                            if reservation.waited >= 1:
+                                console.print(
+                                    f"[dim]{model_id} waited {reservation.waited:.0f}s "
+                                    "for memory[/dim]"
+                                )
+                            process = await asyncio.create_subprocess_exec(
+                                *cmd,
+                                stdout=asyncio.subprocess.PIPE,
+                                stderr=asyncio.subprocess.PIPE,
+                            )
+                            stdout, stderr = await process.communicate()
+                        output = stdout.decode()
+                        responses[model_id] = output
+                        # mlx_lm reports its own speeds; keep them for recommendations
+                        generation = parse_generation_stats(output)
+                        if generation.get("decode_tokens_per_second"):
+                            tracker.record_throughput(
+                                model_id,
+                                "mlx",
+                                generation["decode_tokens_per_second"],
+                                generation.get("prefill_tokens_per_second"),
+                                generation.get("prompt_tokens"),
+                            )
                     else:
                         responses[model_id] = f"Provider {provider} not implemented for ensemble"
                 except Exception as e:
@@ -1673,14 +2745,7 @@ def chat(ctx, message, model, ensemble, system, temperature, max_tokens, stream)
         else:
             # Single model mode
             model_id = models[0]
-
-            # Determine provider
-            if "mlx" in model_id.lower() or "/" in model_id:
-                provider = "mlx"
-            elif any(x in model_id.lower() for x in ["gpt", "claude", "gemini"]):
-                provider = "api"
-            else:
-                provider = "ollama"
+            provider = model_providers[model_id]
 
             if provider == "mlx":
                 # Use mlx_lm chat
@@ -1758,10 +2823,138 @@ def chat(ctx, message, model, ensemble, system, temperature, max_tokens, stream)
     existing_stats.append(stats)
     stats_file.write_text(json.dumps(existing_stats, indent=2))
 
+    # Session history feeds the preload scheduler
+    for model_id in models:
+        tracker.start_session(
+            model_id,
+            model_providers[model_id],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            ensemble=len(models) > 1,
+            ensemble_models=models if len(models) > 1 else None,
+        )
+        tracker.current_session.start_time = chat_start.timestamp()
+        tracker.update_session(output_tokens=total_tokens // len(models), messages=1)
+        tracker.end_session()
+
     # Display session summary
     console.print(f"\n[dim]Chat duration: {duration:.1f}s | Estimated tokens: {total_tokens}[/dim]")
 
 
+@cli.command()
+@click.option("--dry-run", is_flag=True, help="Show predictions without loading anything")
+@click.option("--force", is_flag=True, help="Preload even if the machine is busy or low on RAM")
+@click.option("--stats", "show_stats", is_flag=True, help="Show the preload hit rate")
+@click.pass_context
+def preload(ctx, dry_run, force, show_stats):
+    """Warm the model you are most likely to use next.
+
+    Predictions come from chat history (time of day and recency). Meant to be
+    run periodically, e.g. from cron or launchd.
+    """
+    config = ctx.obj["config"]
+    scheduler = PreloadScheduler.from_tracker(StatisticsTracker())
+
+    if show_stats:
+        stats = scheduler.hit_rate()
+        rate = stats["hit_rate"]
+        console.print(
+            f"Preloads: {stats['preloads']} | Hits: {stats['hits']} | "
+            f"Misses: {stats['misses']} | Hit rate: {f'{rate:.0%}' if rate is not None else 'n/a'}"
+        )
+        return
+
+    predictions = scheduler.predict()
+    if not predictions:
+        console.print("[yellow]No chat history yet; nothing to predict.[/yellow]")
+        return
+
+    table = Table(title="Likely Next Models", box=box.ROUNDED)
+    table.add_column("Provider", style="cyan")
+    table.add_column("Model", style="green")
+    table.add_column("Probability", justify="right")
+    for prediction in predictions:
+        table.add_row(prediction.provider, prediction.model, f"{prediction.probability:.0%}")
+    console.print(table)
+
+    top = predictions[0]
+    if dry_run:
+        return
+    if top.probability < MIN_PROBABILITY:
+        console.print("[dim]No model is likely enough to be worth preloading.[/dim]")
+        return
+
+    async def _preload():
+        provider = registry.get_provider(top.provider)
+        if provider is None or provider.name not in ("ollama", "mlx"):
+            console.print(f"[dim]{top.provider} models don't need preloading.[/dim]")
+            return
+
+        if not force:
+            models = await provider.fetch_models()
+            match = next((m for m in models if m.id == top.model), None)
+            ok, reason = PreloadScheduler.check_resources(match.ram_gb if match else 0.0)
+            if not ok:
+                console.print(f"[yellow]Skipping preload: {reason}[/yellow]")
+                return
+
+        method = await preload_model(provider, top.model, config.data.get("server_status", {}))
+        if method:
+            scheduler.record_preload(top, method)
+            console.print(f"[green]✓[/green] Preloaded {top.key} ({method})")
+        else:
+            console.print(f"[red]Could not preload {top.key}[/red]")
+
+    asyncio.run(_preload())
+
+
+@cli.command()
+@click.option("--threshold", type=float, help="RAM usage (percent) that counts as pressure")
+@click.option("--swap-rate", type=float, help="Swap-out rate (MB/s) that counts as pressure")
+@click.option("--idle", "idle_minutes", type=float, help="Minutes unused before a model may go")
+@click.option("--interval", type=float, help="Seconds between memory samples")
+@click.pass_context
+def watchdog(ctx, threshold, swap_rate, idle_minutes, interval):
+    """Unload idle local models when memory runs short.
+
+    Idle Ollama models are evicted and an idle MLX server is stopped; run MLX
+    with 'start --on-demand' so it comes back on the next request. Defaults
+    come from the 'watchdog' section of the config.
+    """
+    config = ctx.obj["config"]
+    settings = config.data.get("watchdog", {})
+    threshold = threshold or settings.get("memory_threshold_percent", MEMORY_PRESSURE_PERCENT)
+    swap_rate = swap_rate or settings.get("swap_out_mb_per_s", SWAP_OUT_MB_PER_SECOND)
+    idle_minutes = idle_minutes or settings.get("idle_minutes", DEFAULT_IDLE_SECONDS / 60)
+    interval = interval or settings.get("interval", DEFAULT_INTERVAL)
+    server_status = config.data.get("server_status", {})
+
+    dog = MemoryWatchdog(
+        HealthMonitor(memory_threshold_percent=threshold, swap_out_threshold=swap_rate),
+        ollama=registry.get_provider("ollama"),
+        mlx=registry.get_provider("mlx"),
+        idle_seconds=idle_minutes * 60,
+        server_status=server_status,
+    )
+
+    def on_action(action):
+        console.print(f"[yellow]⚠[/yellow] {action.describe()}")
+        if action.provider == "mlx" and not dog.mlx_on_demand and "server_status" in config.data:
+            config.data["server_status"]["running"] = False
+            config.save()
+
+    console.print(
+        f"[cyan]Watching memory every {interval:.0f}s "
+        f"(pressure at {threshold:.0f}% RAM or {swap_rate:.0f} MB/s swap-out, "
+        f"idle after {idle_minutes:.0f} min). Ctrl+C to stop.[/cyan]"
+    )
+    try:
+        asyncio.run(dog.run(interval, on_action=on_action))
+    except KeyboardInterrupt:
+        pass
+    console.print(f"[dim]Watchdog stopped after {len(dog.actions)} unload(s).[/dim]")
+
+
 def main():
     """Main entry point for the CLI."""
     try:
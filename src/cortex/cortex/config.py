@@ -33,12 +33,34 @@ class ConfigDefaults:
     # Ensemble configuration
     ensemble: Dict[str, Any] = None
 
+    # Memory-pressure watchdog
+    watchdog: Dict[str, Any] = None
+
+    # Local model store quota and eviction
+    storage: Dict[str, Any] = None
+
     def __post_init__(self):
         """Initialize default values."""
         if self.providers is None:
             self.providers = {
-                "mlx": {"enabled": True, "models_dir": "~/.cache/mlx_models", "port": 8080},
-                "ollama": {"enabled": True, "models_dir": "~/.ollama/models", "port": 11434},
+                "mlx": {
+                    "enabled": True,
+                    "models_dir": "~/.cache/mlx_models",
+                    "port": 8080,
+                    "startup_timeout": 120,
+                    "idle_timeout": 600,
+                    "prewarm": True,
+                    "blob_store": False,
+                },
+                "ollama": {
+                    "enabled": True,
+                    "models_dir": "~/.ollama/models",
+                    "port": 11434,
+                    "startup_timeout": 120,
+                    "idle_timeout": 600,
+                    "prewarm": True,
+                    "blob_store": False,
+                },
                 "claude": {"enabled": True, "api_key_env": "ANTHROPIC_API_KEY"},
                 "openai": {"enabled": True, "api_key_env": "OPENAI_API_KEY"},
                 "gemini": {"enabled": True, "api_key_env": "GEMINI_API_KEY"},
@@ -53,6 +75,17 @@ class ConfigDefaults:
         if self.ensemble is None:
             self.ensemble = {"enabled": False, "models": []}
 
+        if self.watchdog is None:
+            self.watchdog = {
+                "memory_threshold_percent": 90,
+                "swap_out_mb_per_s": 10,
+                "idle_minutes": 5,
+                "interval": 10,
+            }
+
+        if self.storage is None:
+            self.storage = {"quota_gb": None, "auto_evict": True, "pinned": []}
+
 
 class Config:
     """Configuration manager for Cortex."""
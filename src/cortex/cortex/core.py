@@ -7,6 +7,9 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 from .config import Config
+from .downloads import DownloadManager
+from .memory import MemoryEstimator
+from .model_store import eviction_store
 from .providers import registry
 from .system_utils import ModelRecommender, SystemDetector
 
@@ -34,8 +37,14 @@ class Cortex:
         capability: Optional[str] = None,
         max_ram: Optional[float] = None,
         recommended: bool = False,
+        context_length: Optional[int] = None,
+        concurrency: int = 1,
     ) -> Dict[str, Any]:
-        """List available models with filtering."""
+        """List available models with filtering.
+
+        ``max_ram`` is compared against the estimated footprint at
+        ``context_length`` tokens for ``concurrency`` parallel sequences.
+        """
         # Fetch all models
         all_models = await self.registry.fetch_all_models()
 
@@ -52,12 +61,21 @@ class Cortex:
             filtered = [m for m in filtered if capability in [c.value for c in m.capabilities]]
 
         if max_ram:
-            filtered = [m for m in filtered if m.ram_gb <= max_ram]
+            estimator = MemoryEstimator()
+            filtered = [
+                m
+                for m in filtered
+                if estimator.estimate_model(m, context_length, concurrency).total_gb <= max_ram
+            ]
 
         # Get recommendations if requested
         if recommended:
             filtered = ModelRecommender.recommend_models(
-                self.system_info, filtered, max_recommendations=10
+                self.system_info,
+                filtered,
+                max_recommendations=10,
+                context_length=context_length,
+                concurrency=concurrency,
             )
 
         return {"models": filtered, "system_info": self.system_info, "total_count": len(filtered)}
@@ -103,21 +121,17 @@ class Cortex:
         return True
 
     async def download_model(self, model_id: str, provider: Optional[str] = None) -> bool:
-        """Download a model."""
-        # Find the provider
-        if provider:
-            prov = self.registry.get_provider(provider)
-            if prov:
-                return await prov.download_model(model_id)
-
-        # Try all providers
-        for prov_name in self.registry.list_providers():
-            prov = self.registry.get_provider(prov_name)
-            if await prov.is_model_available(model_id):
-                return await prov.download_model(model_id)
-
-        logger.error(f"Could not find provider for model {model_id}")
-        return False
+        """Download a model through the download queue.
+
+        Without ``provider`` the model's provider is looked up in the fetched
+        catalogs, then told from the ID's shape.
+        """
+        try:
+            store = eviction_store(self.registry, self.config.data)
+            return await DownloadManager(self.registry, store=store).download(model_id, provider)
+        except ValueError as e:
+            logger.error(f"Could not download {model_id}: {e}")
+            return False
 
     async def start_server(self, model_id: Optional[str] = None) -> bool:
         """Start the model server."""
@@ -0,0 +1,284 @@
+"""
+Co-residency planning for local models that stay loaded together.
+
+Keeping, say, a coding, a chat and an embedding model resident at once is
+a multiple-choice knapsack: one model per role slot, maximizing summed
+fitness while the footprints fit a RAM budget. Each candidate's footprint
+is estimated at the context length its role needs. One model may fill
+several slots (a coder that also chats) and is then paid for only once,
+at the largest of its roles' footprints.
+
+Catalogs run to thousands of models, so each slot is first cut down to
+the candidates that could appear in the best few plans: a model is dropped
+once enough cheaper models score at least as well. A depth-first search
+over the survivors, bounded by each remaining slot's best fitness, finds
+the exact top plans; the last slot is resolved by binary search over its
+footprints instead of a scan.
+"""
+
+import bisect
+import heapq
+import itertools
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Collection, Dict, List, Sequence, Tuple
+
+# Slack for comparing summed footprints against the budget
+RAM_EPSILON_GB = 1e-6
+
+# Resolution of the search bound: the budget is split into this many steps
+BOUND_STEPS = 512
+
+NO_PLAN = float("-inf")
+
+# Context each role typically needs; coding works over whole files
+ROLE_CONTEXT_LENGTHS = {"code": 32768, "chat": 8192, "vision": 8192, "embedding": 2048}
+DEFAULT_ROLES = ("code", "chat", "embedding")
+
+
+@dataclass
+class Candidate:
+    """A model able to fill a role, with its footprint at that role's context."""
+
+    role: str
+    model: Any
+    ram_gb: float
+    fitness: float
+    # Identity of the underlying model across roles
+    key: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        """Derive the model key once; the search compares it constantly."""
+        self.key = f"{self.model.provider}:{self.model.id}"
+
+
+@dataclass
+class CoResidencyPlan:
+    """Models to keep loaded together, one per role."""
+
+    assignments: Dict[str, Any]
+    fitness: float
+    ram_gb: float
+    budget_gb: float
+    # Model key -> RAM it takes, at the largest context of its roles
+    footprints: Dict[str, float] = field(default_factory=dict)
+    fitness_by_role: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def models(self) -> List[Any]:
+        """Distinct models of the plan, in role order."""
+        unique: Dict[str, Any] = {}
+        for model in self.assignments.values():
+            unique.setdefault(f"{model.provider}:{model.id}", model)
+        return list(unique.values())
+
+    @property
+    def headroom_gb(self) -> float:
+        """Budget left over once every model is loaded."""
+        return self.budget_gb - self.ram_gb
+
+
+def prune_candidates(
+    candidates: Sequence[Candidate], keep: int, shared: Collection[str] = ()
+) -> List[Candidate]:
+    """Drop candidates beaten by ``keep`` others that are no larger.
+
+    Such a candidate can't be in any of the best ``keep`` plans: swapping in
+    each of those others gives ``keep`` distinct plans that fit and score
+    at least as well. That fails for models in ``shared`` (able to fill
+    another slot for free), which are always kept. The result is sorted
+    by footprint.
+    """
+    ordered = sorted(candidates, key=lambda c: (c.ram_gb, -c.fitness))
+    best: List[float] = []  # Min-heap of the ``keep`` best fitnesses so far
+    kept = []
+    for candidate in ordered:
+        if candidate.key in shared:
+            pass
+        elif len(best) < keep:
+            heapq.heappush(best, candidate.fitness)
+        elif candidate.fitness > best[0]:
+            heapq.heapreplace(best, candidate.fitness)
+        else:
+            continue
+        kept.append(candidate)
+    return kept
+
+
+class _Slot:
+    """A role's surviving candidates, indexed by footprint."""
+
+    def __init__(
+        self, role: str, candidates: Sequence[Candidate], keep: int, shared: Collection[str]
+    ):
+        """Index the candidates that survive pruning."""
+        self.role = role
+        self.candidates = candidates
+        self.members = {c.key: c for c in candidates}
+        self.frontier = prune_candidates(candidates, keep, shared)
+        self.ram = [c.ram_gb for c in self.frontier]
+        # best_below[i]: highest fitness among frontier[:i]
+        self.best_below = list(
+            itertools.accumulate([NO_PLAN] + [c.fitness for c in self.frontier], max)
+        )
+        # top[i]: the ``keep`` fittest among frontier[:i]
+        self.top: List[List[Candidate]] = [[]]
+        for candidate in self.frontier:
+            self.top.append(sorted(self.top[-1] + [candidate], key=lambda c: -c.fitness)[:keep])
+
+    def fitting(self, ram_gb: float) -> List[Candidate]:
+        """The fittest candidates whose full footprint is within ``ram_gb``."""
+        return self.top[bisect.bisect_right(self.ram, ram_gb + RAM_EPSILON_GB)]
+
+    def bound_table(self, step_gb: float, steps: int, share: Dict[str, int]) -> List[float]:
+        """Best fitness by (relaxed) footprint in budget steps, cumulative."""
+        best = [NO_PLAN] * (steps + 1)
+        for c in self.candidates:
+            step = int(c.ram_gb / share[c.key] / step_gb)
+            if step <= steps and c.fitness > best[step]:
+                best[step] = c.fitness
+        return list(itertools.accumulate(best, max))
+
+
+def _combine(first: List[float], rest: List[float]) -> List[float]:
+    """Max-plus convolution: best first + rest within each budget step."""
+    steps = len(first) - 1
+    combined = [NO_PLAN] * (steps + 1)
+    previous = NO_PLAN
+    for step, fitness in enumerate(first):
+        if fitness == previous:
+            continue  # Only where ``first`` improves can the sum improve
+        previous = fitness
+        shifted = [NO_PLAN] * step + [fitness + value for value in rest[: steps + 1 - step]]
+        combined = list(map(max, combined, shifted))
+    return combined
+
+
+def plan_coresidency(
+    slots: Dict[str, Sequence[Candidate]],
+    budget_gb: float,
+    max_plans: int = 3,
+) -> List[CoResidencyPlan]:
+    """Best plans filling every slot within ``budget_gb``, best first.
+
+    Args:
+        slots: Candidates per role; a model may appear under several roles
+        budget_gb: RAM the plan's models may use together
+        max_plans: Number of plans returned, the best plus runner-ups
+
+    Returns:
+        Up to ``max_plans`` plans; empty if no combination fits.
+    """
+    if not slots or max_plans < 1 or any(not candidates for candidates in slots.values()):
+        return []
+
+    share = Counter(c.key for candidates in slots.values() for c in candidates)
+    shared = {key for key, count in share.items() if count > 1}
+    # Room for picks that are already chosen for an earlier slot and so reused
+    keep = max_plans + len(slots)
+    order = [_Slot(role, candidates, keep, shared) for role, candidates in slots.items()]
+    # Search the small slots first; the largest is resolved by binary search
+    order.sort(key=lambda slot: len(slot.frontier))
+
+    # bounds[d][step]: most fitness slots d.. could add within that budget.
+    # A model's footprint is split evenly over the slots it can fill, so
+    # summed splits never exceed what a plan really uses, reuse included.
+    steps = BOUND_STEPS
+    step_gb = max(budget_gb, RAM_EPSILON_GB) / steps
+    bounds = [[0.0] * (steps + 1)]
+    for slot in reversed(order):
+        bounds.insert(0, _combine(slot.bound_table(step_gb, steps, share), bounds[0]))
+
+    plans: List[Tuple[float, int, CoResidencyPlan]] = []  # Min-heap of the best so far
+    counter = itertools.count()
+    chosen: Dict[str, float] = {}  # Model key -> footprint paid so far
+    picks: List[Candidate] = []
+
+    def reuses(slot: _Slot) -> List[Tuple[Candidate, float]]:
+        """Chosen models that can fill ``slot`` too, with their extra footprint."""
+        result = []
+        for key, paid in chosen.items():
+            reused = slot.members.get(key)
+            if reused is not None:
+                result.append((reused, max(reused.ram_gb - paid, 0.0)))
+        return result
+
+    def record(fitness: float, used_gb: float) -> None:
+        footprints: Dict[str, float] = {}
+        for pick in picks:
+            footprints[pick.key] = max(footprints.get(pick.key, 0.0), pick.ram_gb)
+        plan = CoResidencyPlan(
+            assignments={slot.role: pick.model for slot, pick in zip(order, picks)},
+            fitness=fitness,
+            ram_gb=used_gb,
+            budget_gb=budget_gb,
+            footprints=footprints,
+            fitness_by_role={slot.role: pick.fitness for slot, pick in zip(order, picks)},
+        )
+        entry = (fitness, -next(counter), plan)
+        if len(plans) < max_plans:
+            heapq.heappush(plans, entry)
+        else:
+            heapq.heapreplace(plans, entry)
+        if len(plans) >= max_plans:
+            threshold[0] = plans[0][0]
+
+    # Fitness a partial plan must beat to still reach the best plans
+    threshold = [NO_PLAN]
+
+    def bound(depth: int, relaxed_gb: float) -> float:
+        step = int((budget_gb - relaxed_gb + RAM_EPSILON_GB) / step_gb)
+        return bounds[depth][min(step, steps)] if step >= 0 else NO_PLAN
+
+    def descend(
+        depth: int,
+        candidate: Candidate,
+        cost: float,
+        used_gb: float,
+        relaxed_gb: float,
+        fitness: float,
+    ) -> None:
+        relaxed = relaxed_gb + candidate.ram_gb / share[candidate.key]
+        fitness += candidate.fitness
+        if fitness + bound(depth + 1, relaxed) <= threshold[0]:
+            return
+        previous = chosen.get(candidate.key)
+        chosen[candidate.key] = max(previous or 0.0, candidate.ram_gb)
+        picks.append(candidate)
+        search(depth + 1, used_gb + cost, relaxed, fitness)
+        picks.pop()
+        if previous is None:
+            del chosen[candidate.key]
+        else:
+            chosen[candidate.key] = previous
+
+    def search(depth: int, used_gb: float, relaxed_gb: float, fitness: float) -> None:
+        slot = order[depth]
+        remaining = budget_gb - used_gb
+        if depth == len(order) - 1:
+            fresh = [(c, c.ram_gb) for c in slot.fitting(remaining) if c.key not in chosen]
+            for candidate, cost in fresh + reuses(slot):
+                if (
+                    cost <= remaining + RAM_EPSILON_GB
+                    and fitness + candidate.fitness > threshold[0]
+                ):
+                    picks.append(candidate)
+                    record(fitness + candidate.fitness, used_gb + cost)
+                    picks.pop()
+            return
+
+        for candidate, cost in reuses(slot):
+            if cost <= remaining + RAM_EPSILON_GB:
+                descend(depth, candidate, cost, used_gb, relaxed_gb, fitness)
+
+        # Largest fitting first; stop once nothing smaller could do better
+        ceiling = bound(depth + 1, relaxed_gb)
+        for index in range(bisect.bisect_right(slot.ram, remaining + RAM_EPSILON_GB) - 1, -1, -1):
+            if fitness + slot.best_below[index + 1] + ceiling <= threshold[0]:
+                break
+            candidate = slot.frontier[index]
+            if candidate.key not in chosen:
+                descend(depth, candidate, candidate.ram_gb, used_gb, relaxed_gb, fitness)
+
+    search(0, 0.0, 0.0, 0.0)
+    return [plan for _, _, plan in sorted(plans, key=lambda entry: entry[:2], reverse=True)]
@@ -0,0 +1,294 @@
+"""
+Download queue for local models across providers.
+
+Any number of MLX repos and Ollama tags can be queued at once. A request
+for a model that is already downloading joins that download instead of
+starting a second one. A bounded number run in parallel, native downloads
+share an optional bandwidth cap, and each download's size is checked
+against free disk space (less what running downloads still need) before
+it starts; with a model store quota, least recently used models are
+evicted to make room. Unfinished downloads are persisted, so a killed
+session picks them up again; both providers resume partial files rather
+than restart.
+"""
+
+import asyncio
+import logging
+import shutil
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .cache import cache_path, load_json, save_json
+from .hub_download import RateLimiter
+from .providers import infer_provider
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FILE = cache_path("download_queue.json")
+
+# Providers whose models are downloaded to this machine
+DOWNLOAD_PROVIDERS = ("mlx", "ollama")
+DEFAULT_PARALLEL = 2
+
+# Free space required per byte downloaded; quantizing full-precision MLX
+# weights writes up to a third as much again
+DISK_HEADROOM = 1.35
+
+# Seconds between saves of progress while downloads run
+SAVE_INTERVAL = 5.0
+
+# Seconds between progress notifications per download, so progress bars
+# don't redraw for every chunk of a multi-gigabyte download
+NOTIFY_INTERVAL = 0.1
+
+
+class JobStatus(Enum):
+    """Lifecycle of a queued download."""
+
+    QUEUED = "queued"
+    DOWNLOADING = "downloading"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class DownloadJob:
+    """One model to download."""
+
+    model_id: str
+    provider: str
+    status: JobStatus = JobStatus.QUEUED
+    bytes_done: int = 0
+    bytes_total: int = 0
+    error: Optional[str] = None
+    added_at: float = field(default_factory=time.time)
+
+    @property
+    def key(self) -> str:
+        """Identity of the model across requests."""
+        return f"{self.provider}:{self.model_id}"
+
+    @property
+    def unfinished(self) -> bool:
+        """Whether the download still has to run."""
+        return self.status in (JobStatus.QUEUED, JobStatus.DOWNLOADING)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form for the queue file."""
+        return {
+            "model_id": self.model_id,
+            "provider": self.provider,
+            "status": self.status.value,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "added_at": self.added_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DownloadJob":
+        """Rebuild a job from the queue file."""
+        return cls(
+            model_id=data["model_id"],
+            provider=data["provider"],
+            status=JobStatus(data.get("status", "queued")),
+            bytes_done=int(data.get("bytes_done", 0)),
+            bytes_total=int(data.get("bytes_total", 0)),
+            added_at=float(data.get("added_at", time.time())),
+        )
+
+
+def resolve_provider(model_id: str, registry: Any) -> Optional[str]:
+    """The provider a model downloads from, or None for API and unknown models."""
+    provider = infer_provider(model_id, registry)
+    return provider if provider in DOWNLOAD_PROVIDERS else None
+
+
+def free_bytes(path: Path) -> int:
+    """Free space on the filesystem that holds, or will hold, ``path``."""
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return shutil.disk_usage(path).free
+
+
+class DownloadManager:
+    """Runs queued model downloads in parallel with deduplication."""
+
+    def __init__(
+        self,
+        registry: Any,
+        max_parallel: int = DEFAULT_PARALLEL,
+        rate_limit: Optional[float] = None,
+        state_path: Optional[Path] = None,
+        store: Optional[Any] = None,
+    ):
+        """Initialize the manager, restoring downloads an earlier session left unfinished.
+
+        Args:
+            registry: Provider registry the downloads run through
+            max_parallel: Downloads running at once
+            rate_limit: Combined bandwidth cap in bytes/s for native
+                (MLX) downloads; Ollama pulls run inside the Ollama server
+            state_path: Queue file, ``download_queue.json`` in the cache by default
+            store: ModelStore to evict least recently used models through when
+                a download wouldn't fit, None to fail such downloads instead
+        """
+        self.registry = registry
+        self.max_parallel = max_parallel
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.state_path = state_path or QUEUE_FILE
+        self.store = store
+        self.jobs: Dict[str, DownloadJob] = {}
+        # Called with a job whenever its status or progress changes
+        self.listeners: List[Callable[[DownloadJob], None]] = []
+        self._tasks: Dict[str, "asyncio.Future[bool]"] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._saved_at = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        for entry in (load_json(self.state_path) or {}).get("jobs", []):
+            try:
+                job = DownloadJob.from_dict(entry)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.debug(f"Skipping unreadable queue entry {entry}: {e}")
+                continue
+            if job.unfinished:
+                job.status = JobStatus.QUEUED  # Killed mid-download; resume it
+                self.jobs[job.key] = job
+
+    def save(self) -> None:
+        """Persist the unfinished downloads."""
+        jobs = [job.to_dict() for job in self.jobs.values() if job.unfinished]
+        save_json(self.state_path, {"jobs": jobs})
+        self._saved_at = time.monotonic()
+
+    def pending(self) -> List[DownloadJob]:
+        """Downloads that still have to run, in the order they were queued."""
+        return sorted(
+            (job for job in self.jobs.values() if job.unfinished), key=lambda j: j.added_at
+        )
+
+    def enqueue(self, model_id: str, provider: Optional[str] = None) -> DownloadJob:
+        """Queue a model, or return its job if it is already queued.
+
+        Raises:
+            ValueError: If the provider can't be told or doesn't download models.
+        """
+        provider = provider or resolve_provider(model_id, self.registry)
+        if provider is None:
+            raise ValueError(f"Can't tell which provider serves {model_id}")
+        if provider not in DOWNLOAD_PROVIDERS:
+            raise ValueError(f"Provider '{provider}' doesn't download models")
+
+        job = self.jobs.get(f"{provider}:{model_id}")
+        if job is None or not job.unfinished:
+            job = DownloadJob(model_id, provider)
+            self.jobs[job.key] = job
+            self.save()
+        return job
+
+    async def download(self, model_id: str, provider: Optional[str] = None) -> bool:
+        """Download one model, joining a running download of it if there is one."""
+        return await self._start(self.enqueue(model_id, provider))
+
+    async def run(self) -> Dict[str, bool]:
+        """Run every unfinished download, earlier sessions' included.
+
+        Returns:
+            Success per job key.
+        """
+        jobs = self.pending()
+        results = await asyncio.gather(*(self._start(job) for job in jobs))
+        return {job.key: ok for job, ok in zip(jobs, results)}
+
+    async def _start(self, job: DownloadJob) -> bool:
+        task = self._tasks.get(job.key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._run_job(job))
+            self._tasks[job.key] = task
+        # A caller giving up must not cancel the download for the others
+        return await asyncio.shield(task)
+
+    async def _run_job(self, job: DownloadJob) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_parallel)
+        async with self._semaphore:
+            provider = self.registry.get_provider(job.provider)
+            if provider is None:
+                return self._finish(job, False, f"Provider '{job.provider}' is not available")
+            if self.rate_limiter is not None and hasattr(provider, "rate_limiter"):
+                provider.rate_limiter = self.rate_limiter
+
+            error = await self._check_disk_space(job, provider)
+            if error:
+                return self._finish(job, False, error)
+
+            job.status = JobStatus.DOWNLOADING
+            self.save()
+            self._notify(job)
+
+            notified_at = 0.0
+
+            def progress(current: int, total: int) -> None:
+                nonlocal notified_at
+                job.bytes_done, job.bytes_total = int(current), int(total)
+                now = time.monotonic()
+                if now - self._saved_at > SAVE_INTERVAL:
+                    self.save()
+                if now - notified_at >= NOTIFY_INTERVAL or current >= total:
+                    notified_at = now
+                    self._notify(job)
+
+            try:
+                success = await provider.download_model(job.model_id, progress)
+            except Exception as e:
+                logger.error(f"Error downloading {job.model_id}: {e}")
+                success = False
+            return self._finish(job, success)
+
+    async def _check_disk_space(self, job: DownloadJob, provider: Any) -> Optional[str]:
+        """Why the job can't start for lack of disk space, or None if it fits."""
+        size = await provider.download_size(job.model_id)
+        if not size:
+            return None  # Unknown size; the download itself will fail if it must
+        job.bytes_total = size
+        needed = max(size - job.bytes_done, 0) * DISK_HEADROOM
+        # Space the downloads already running will still take
+        reserved = sum(
+            max(other.bytes_total - other.bytes_done, 0) * DISK_HEADROOM
+            for other in self.jobs.values()
+            if other is not job and other.status == JobStatus.DOWNLOADING
+        )
+        available = free_bytes(provider.download_dir()) - reserved
+        if self.store is not None:
+            plan = await self.store.make_room(int(needed), int(available), keep=[job.key])
+            if not plan.fits:
+                return (
+                    f"Not enough space even after evicting: needs "
+                    f"{plan.needed_bytes / 1024**3:.1f}GB more, evicting every unpinned "
+                    f"model frees {plan.freed_bytes / 1024**3:.1f}GB"
+                )
+            if plan.evict:
+                available = free_bytes(provider.download_dir()) - reserved
+        if needed > available:
+            return (
+                f"Not enough disk space: needs {needed / 1024**3:.1f}GB, "
+                f"{max(available, 0) / 1024**3:.1f}GB free"
+            )
+        return None
+
+    def _finish(self, job: DownloadJob, success: bool, error: Optional[str] = None) -> bool:
+        job.status = JobStatus.DONE if success else JobStatus.FAILED
+        job.error = error
+        if error:
+            logger.error(f"Failed to download {job.model_id}: {error}")
+        self.save()
+        self._notify(job)
+        return success
+
+    def _notify(self, job: DownloadJob) -> None:
+        for listener in self.listeners:
+            listener(job)
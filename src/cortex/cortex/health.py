@@ -6,22 +6,128 @@ import asyncio
 import logging
 import os
 import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import aiohttp
 import psutil
 
+from .blobstore import BLOB_DIR, disk_usage
+from .cache import cache_path, load_json, save_json
+from .canary import (
+    BaselineStore,
+    CanaryError,
+    probe_ollama,
+    probe_openai_compatible,
+    remaining_keep_alive,
+)
+from .telemetry import TelemetrySampler
+
 logger = logging.getLogger(__name__)
 
+# Memory pressure: RAM usage (percent) or swap-out rate (MB/s) at which models should yield
+MEMORY_PRESSURE_PERCENT = 90.0
+SWAP_OUT_MB_PER_SECOND = 10.0
+
+# How often each check runs in watch mode; also how long its result is reused
+CHECK_INTERVALS = {
+    "system": 10.0,
+    "memory_pressure": 5.0,
+    "mlx_server": 15.0,
+    "ollama_server": 15.0,
+    "api_keys": 300.0,
+    "network": 60.0,
+    "disk_space": 600.0,
+    "model_cache": 600.0,
+    "mlx_inference": 300.0,
+    "ollama_inference": 300.0,
+}
+DEFAULT_CHECK_INTERVAL = 30.0
+
+# Latest result of each check, so separate CLI runs can reuse them within their intervals
+HEALTH_CACHE = cache_path("health.json")
+
+# Local server ports, unless the provider config says otherwise
+DEFAULT_PORTS = {"mlx": 8080, "ollama": 11434}
+
+# Results kept per check
+HISTORY_SIZE = 360
+
+# A server that goes up/down this often within the window is flapping
+FLAP_THRESHOLD = 3
+FLAP_WINDOW = 600.0
+
+
+@dataclass
+class AlertRule:
+    """Fire when ``condition`` holds for every result of a check over ``sustained`` seconds."""
+
+    name: str
+    check: str
+    condition: Callable[[Dict[str, Any]], bool]
+    sustained: float
+    message: str
+
+
+@dataclass
+class Alert:
+    """A rule whose condition has held for its whole window."""
+
+    name: str
+    check: str
+    message: str
+    since: float
+
+
+DEFAULT_ALERT_RULES = [
+    AlertRule(
+        "memory_pressure",
+        "memory_pressure",
+        lambda r: bool(r.get("under_pressure")),
+        60.0,
+        "Memory pressure for over a minute",
+    ),
+    AlertRule(
+        "high_cpu",
+        "system",
+        lambda r: r.get("cpu_percent", 0) > 90,
+        120.0,
+        "CPU above 90% for two minutes",
+    ),
+    AlertRule(
+        "low_disk",
+        "disk_space",
+        lambda r: r.get("free_space_gb", float("inf")) < 10,
+        0.0,
+        "Less than 10 GB of disk free",
+    ),
+]
+
 
 class HealthMonitor:
     """System health monitoring and checking."""
 
-    def __init__(self):
-        """Initialize health monitor."""
+    def __init__(
+        self,
+        memory_threshold_percent: float = MEMORY_PRESSURE_PERCENT,
+        swap_out_threshold: float = SWAP_OUT_MB_PER_SECOND,
+        ports: Optional[Dict[str, int]] = None,
+        cache_file: Optional[Path] = None,
+    ):
+        """Initialize health monitor.
+
+        Args:
+            memory_threshold_percent: RAM usage that counts as memory pressure
+            swap_out_threshold: Swap-out rate (MB/s) that counts as memory pressure
+            ports: Local server ports by provider, overriding the defaults
+            cache_file: Where the latest results are shared with other
+                processes; None keeps them in this one
+        """
         self.checks = {
             "system": self.check_system_resources,
+            "memory_pressure": self.check_memory_pressure,
             "mlx_server": self.check_mlx_server,
             "ollama_server": self.check_ollama_server,
             "api_keys": self.check_api_keys,
@@ -29,21 +135,54 @@ class HealthMonitor:
             "disk_space": self.check_disk_space,
             "model_cache": self.check_model_cache,
         }
+        # Opt-in: these run real generations on the local servers
+        self.deep_checks = {
+            "mlx_inference": self.check_mlx_inference,
+            "ollama_inference": self.check_ollama_inference,
+        }
+        self.baselines = BaselineStore()
+        self.ports = {**DEFAULT_PORTS, **(ports or {})}
+        self.cache_file = cache_file
         self.last_check = {}
         self.status = {}
-
-    async def run_health_checks(self, checks: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Run specified health checks or all if none specified."""
+        self.memory_threshold_percent = memory_threshold_percent
+        self.swap_out_threshold = swap_out_threshold
+        # (monotonic time, swap-in bytes, swap-out bytes) of the previous sample
+        self._last_swap = None
+        self.intervals = dict(CHECK_INTERVALS)
+        self.history: Dict[str, Deque[Dict[str, Any]]] = {}
+        self.alert_rules: List[AlertRule] = list(DEFAULT_ALERT_RULES)
+        self.active_alerts: Dict[str, Alert] = {}
+
+    async def run_health_checks(
+        self,
+        checks: Optional[List[str]] = None,
+        max_age: Optional[Union[float, Dict[str, float]]] = None,
+        deep: bool = False,
+    ) -> Dict[str, Any]:
+        """Run specified health checks or all if none specified.
+
+        With ``max_age``, in seconds or per check (such as ``self.intervals``),
+        a result younger than that is returned from cache instead of running
+        the check again. ``deep`` adds the canary inference checks to the
+        default set.
+        """
         results = {}
-        checks_to_run = checks or list(self.checks.keys())
+        available = {**self.checks, **self.deep_checks}
+        checks_to_run = checks or list(self.checks) + (list(self.deep_checks) if deep else [])
 
         for check_name in checks_to_run:
-            if check_name in self.checks:
+            if check_name in available:
+                cached = self.cached_result(check_name, max_age)
+                if cached is not None:
+                    results[check_name] = cached
+                    continue
                 try:
-                    result = await self.checks[check_name]()
+                    result = await available[check_name]()
                     results[check_name] = result
                     self.status[check_name] = result
                     self.last_check[check_name] = time.time()
+                    self._record(check_name, result)
                 except Exception as e:
                     logger.error(f"Health check '{check_name}' failed: {e}")
                     results[check_name] = {
@@ -51,9 +190,164 @@ class HealthMonitor:
                         "message": str(e),
                         "timestamp": time.time(),
                     }
+                    # A failing check waits its interval too rather than retrying every tick
+                    self.last_check[check_name] = time.time()
+                    self._record(check_name, results[check_name])
 
+        self._share(results)
         return results
 
+    def cached_result(
+        self, check_name: str, max_age: Optional[Union[float, Dict[str, float]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """The last result of a check, here or in the cache file, if younger than ``max_age``."""
+        if isinstance(max_age, dict):
+            max_age = max_age.get(check_name)
+        if max_age is None:
+            return None
+        history = self.history.get(check_name)
+        latest = history[-1] if history else self._shared().get(check_name)
+        if not isinstance(latest, dict):
+            return None
+        # A server check taken on another port says nothing about this one
+        port = self.ports.get(check_name.split("_")[0])
+        if port is not None and latest.get("port", port) != port:
+            return None
+        return latest if time.time() - latest.get("timestamp", 0) <= max_age else None
+
+    def _shared(self) -> Dict[str, Any]:
+        """Latest results other processes wrote to the cache file."""
+        data = load_json(self.cache_file) if self.cache_file else None
+        return data if isinstance(data, dict) else {}
+
+    def _share(self, results: Dict[str, Any]) -> None:
+        if not self.cache_file or not results:
+            return
+        shared = self._shared()
+        shared.update({name: r for name, r in results.items() if isinstance(r, dict)})
+        save_json(self.cache_file, shared)
+
+    def due_checks(self, now: Optional[float] = None) -> List[str]:
+        """Checks whose interval has elapsed since they last ran."""
+        now = time.time() if now is None else now
+        return [
+            name
+            for name in self.checks
+            if now - self.last_check.get(name, 0)
+            >= self.intervals.get(name, DEFAULT_CHECK_INTERVAL)
+        ]
+
+    def _record(self, check_name: str, result: Any) -> None:
+        if not isinstance(result, dict):
+            return
+        result.setdefault("timestamp", time.time())
+        self.history.setdefault(check_name, deque(maxlen=HISTORY_SIZE)).append(result)
+
+    def samples(self, check_name: str, window: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Buffered results of a check, optionally only the last ``window`` seconds."""
+        history = list(self.history.get(check_name, ()))
+        if window is None:
+            return history
+        cutoff = time.time() - window
+        return [r for r in history if r["timestamp"] >= cutoff]
+
+    def trend(self, check_name: str, field: str, window: Optional[float] = None) -> Optional[float]:
+        """Least-squares slope of a numeric field, in units per hour."""
+        points: List[Tuple[float, float]] = [
+            (r["timestamp"], float(r[field]))
+            for r in self.samples(check_name, window)
+            if isinstance(r.get(field), (int, float))
+        ]
+        if len(points) < 2:
+            return None
+        mean_t = sum(t for t, _ in points) / len(points)
+        mean_v = sum(v for _, v in points) / len(points)
+        spread = sum((t - mean_t) ** 2 for t, _ in points)
+        if not spread:
+            return None
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / spread
+        return slope * 3600
+
+    def hours_until_disk_full(self) -> Optional[float]:
+        """Extrapolate the free-disk trend to zero, if disk is filling up."""
+        slope = self.trend("disk_space", "free_space_gb")
+        latest = self.status.get("disk_space", {}).get("free_space_gb")
+        if slope is None or slope >= 0 or latest is None:
+            return None
+        return latest / -slope
+
+    def flaps(self, check_name: str, window: float = FLAP_WINDOW) -> int:
+        """How many times a server switched between running and not running."""
+        states = [bool(r.get("running")) for r in self.samples(check_name, window)]
+        return sum(1 for a, b in zip(states, states[1:]) if a != b)
+
+    def evaluate_alerts(self, now: Optional[float] = None) -> List[Alert]:
+        """Return alerts that started firing since the last evaluation.
+
+        A rule fires once every result of its check in the trailing window
+        matches, and the buffer reaches back to the start of that window; it
+        re-arms as soon as a result no longer matches.
+        """
+        now = time.time() if now is None else now
+        fired = []
+        conditions = [
+            (rule.name, rule.check, rule.message, self._sustained(rule, now))
+            for rule in self.alert_rules
+        ]
+        for check_name in ("mlx_server", "ollama_server"):
+            flapping = self.flaps(check_name) >= FLAP_THRESHOLD
+            conditions.append(
+                (
+                    f"{check_name}_flapping",
+                    check_name,
+                    f"{check_name} went up and down {self.flaps(check_name)} times "
+                    f"in {FLAP_WINDOW / 60:.0f} minutes",
+                    now if flapping else None,
+                )
+            )
+
+        for name, check_name, message, since in conditions:
+            if since is None:
+                self.active_alerts.pop(name, None)
+            elif name not in self.active_alerts:
+                alert = Alert(name, check_name, message, since)
+                self.active_alerts[name] = alert
+                fired.append(alert)
+                logger.warning(f"Health alert: {message}")
+        return fired
+
+    def _sustained(self, rule: AlertRule, now: float) -> Optional[float]:
+        """Start of the current run of matching results if it spans the window."""
+        history = list(self.history.get(rule.check, ()))
+        since = None
+        for result in reversed(history):
+            if not rule.condition(result):
+                break
+            since = result["timestamp"]
+        if since is None or now - since < rule.sustained:
+            return None
+        return since
+
+    async def watch(
+        self,
+        stop_event: Optional[asyncio.Event] = None,
+        tick: float = 1.0,
+        on_update: Optional[Callable[[Dict[str, Any], List[Alert]], None]] = None,
+    ) -> None:
+        """Run each check on its own interval until ``stop_event`` is set."""
+        stop_event = stop_event or asyncio.Event()
+        while not stop_event.is_set():
+            due = self.due_checks()
+            if due:
+                results = await self.run_health_checks(due)
+                alerts = self.evaluate_alerts()
+                if on_update:
+                    on_update(results, alerts)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=tick)
+            except asyncio.TimeoutError:
+                pass
+
     async def check_system_resources(self) -> Dict[str, Any]:
         """Check system resource availability."""
         try:
@@ -89,8 +383,54 @@ class HealthMonitor:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    async def check_mlx_server(self, port: int = 8080) -> Dict[str, Any]:
+    async def check_memory_pressure(self) -> Dict[str, Any]:
+        """Check RAM usage and swap activity since the previous sample.
+
+        Swap rates are deltas of the cumulative swap-in/out counters, so the
+        first sample always reports zero.
+        """
+        try:
+            memory = psutil.virtual_memory()
+            swap = psutil.swap_memory()
+            now = time.monotonic()
+
+            swap_in_rate = swap_out_rate = 0.0
+            if self._last_swap is not None:
+                then, swapped_in, swapped_out = self._last_swap
+                elapsed = now - then
+                if elapsed > 0:
+                    swap_in_rate = max(swap.sin - swapped_in, 0) / (1024**2) / elapsed
+                    swap_out_rate = max(swap.sout - swapped_out, 0) / (1024**2) / elapsed
+            self._last_swap = (now, swap.sin, swap.sout)
+
+            issues = []
+            if memory.percent >= self.memory_threshold_percent:
+                issues.append(f"Memory usage {memory.percent:.0f}%")
+            if swap_out_rate >= self.swap_out_threshold:
+                issues.append(f"Swapping out {swap_out_rate:.1f} MB/s")
+
+            status = "healthy"
+            if issues:
+                status = "critical" if memory.percent > 95 or len(issues) > 1 else "warning"
+
+            return {
+                "status": status,
+                "under_pressure": bool(issues),
+                "memory_percent": memory.percent,
+                "memory_available_gb": memory.available / (1024**3),
+                "swap_percent": swap.percent,
+                "swap_in_mb_per_s": swap_in_rate,
+                "swap_out_mb_per_s": swap_out_rate,
+                "issues": issues,
+                "message": ", ".join(issues),
+                "timestamp": time.time(),
+            }
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    async def check_mlx_server(self, port: Optional[int] = None) -> Dict[str, Any]:
         """Check if MLX server is running and responsive."""
+        port = port or self.ports["mlx"]
         try:
             async with aiohttp.ClientSession() as session:
                 url = f"http://localhost:{port}/v1/models"
@@ -115,8 +455,9 @@ class HealthMonitor:
         except Exception:
             return {"status": "offline", "running": False, "port": port, "timestamp": time.time()}
 
-    async def check_ollama_server(self, port: int = 11434) -> Dict[str, Any]:
+    async def check_ollama_server(self, port: Optional[int] = None) -> Dict[str, Any]:
         """Check if Ollama server is running."""
+        port = port or self.ports["ollama"]
         try:
             async with aiohttp.ClientSession() as session:
                 url = f"http://localhost:{port}/api/tags"
@@ -133,6 +474,106 @@ class HealthMonitor:
         except (ConnectionError, OSError, asyncio.TimeoutError):
             return {"status": "offline", "running": False, "port": port, "timestamp": time.time()}
 
+    async def check_mlx_inference(self, port: Optional[int] = None) -> Dict[str, Any]:
+        """Time a canary generation on the MLX server's loaded model."""
+        port = port or self.ports["mlx"]
+        server = await self.check_mlx_server(port)
+        if not server or not server.get("running"):
+            server = server or {"status": "offline", "running": False, "port": port}
+            return {**server, "models": [], "timestamp": time.time()}
+
+        # "default_model" makes mlx_lm.server use the model it was started
+        # with rather than loading another; the command line names it
+        model = self._mlx_served_model() or "default_model"
+        try:
+            result = await probe_openai_compatible(f"http://localhost:{port}", "default_model")
+        except CanaryError as e:
+            return self._canary_summary(port, [], {model: e})
+        result.model = model
+        return self._canary_summary(port, [result])
+
+    async def check_ollama_inference(self, port: Optional[int] = None) -> Dict[str, Any]:
+        """Time a canary generation on every model Ollama has loaded.
+
+        Only resident models are probed, so the check never loads one, and
+        each is asked to stay only as long as it already would have, so the
+        canary doesn't keep an idle model resident.
+        """
+        port = port or self.ports["ollama"]
+        api_url = f"http://localhost:{port}/api"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{api_url}/ps", timeout=2) as response:
+                    loaded = (await response.json()).get("models", [])
+        except (aiohttp.ClientError, OSError, asyncio.TimeoutError, ValueError):
+            return {
+                "status": "offline",
+                "running": False,
+                "port": port,
+                "models": [],
+                "timestamp": time.time(),
+            }
+
+        if not loaded:
+            return {
+                "status": "idle",
+                "running": True,
+                "port": port,
+                "models": [],
+                "message": "No models loaded",
+                "timestamp": time.time(),
+            }
+
+        results = []
+        failures = {}
+        for entry in loaded:
+            keep_alive = remaining_keep_alive(entry.get("expires_at"))
+            try:
+                results.append(await probe_ollama(api_url, entry["name"], keep_alive=keep_alive))
+            except CanaryError as e:
+                failures[entry["name"]] = e
+        return self._canary_summary(port, results, failures)
+
+    def _mlx_served_model(self) -> Optional[str]:
+        """The ``--model`` argument of the running mlx_lm.server."""
+        pid = TelemetrySampler().server_pid("mlx")
+        if pid is None:
+            return None
+        try:
+            cmdline = psutil.Process(pid).cmdline()
+        except psutil.Error:
+            return None
+        if "--model" in cmdline[:-1]:
+            return cmdline[cmdline.index("--model") + 1]
+        return None
+
+    def _canary_summary(
+        self, port: int, results: List[Any], failures: Optional[Dict[str, Exception]] = None
+    ) -> Dict[str, Any]:
+        """Compare canary results with their baselines; any failed model is critical."""
+        models = []
+        issues = []
+        for result in results:
+            verdict = self.baselines.evaluate(result)
+            models.append({**result.to_dict(), "canary": verdict["status"]})
+            issues.extend(f"{result.model}: {issue}" for issue in verdict["issues"])
+        for model, error in (failures or {}).items():
+            models.append({"model": model, "canary": "failed", "error": str(error)})
+            issues.append(f"{model}: canary failed ({error})")
+        if failures:
+            status = "critical"
+        else:
+            status = "warning" if issues else "healthy"
+        return {
+            "status": status,
+            "running": True,
+            "port": port,
+            "models": models,
+            "issues": issues,
+            "message": "; ".join(issues),
+            "timestamp": time.time(),
+        }
+
     async def check_api_keys(self) -> Dict[str, Any]:
         """Check if API keys are configured."""
         api_keys = {
@@ -190,15 +631,15 @@ class HealthMonitor:
         """Check available disk space for model storage."""
         try:
             paths = [
+                Path.home() / ".cache" / "mlx",
                 Path.home() / ".cache" / "mlx_models",
                 Path.home() / ".ollama" / "models",
                 Path.home() / ".cache" / "huggingface",
+                BLOB_DIR,
             ]
 
-            total_size = 0
-            for path in paths:
-                if path.exists():
-                    total_size += sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+            # Files linked between stores, or from HF snapshots, count once
+            total_size = await asyncio.to_thread(disk_usage, paths)
 
             disk = psutil.disk_usage(Path.home())
             free_gb = disk.free / (1024**3)
@@ -259,4 +700,4 @@ class HealthMonitor:
 
 
 # Global health monitor instance
-health_monitor = HealthMonitor()
+health_monitor = HealthMonitor(cache_file=HEALTH_CACHE)
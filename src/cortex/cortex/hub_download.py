@@ -0,0 +1,353 @@
+"""
+Parallel, resumable downloads of HuggingFace Hub repositories.
+
+The repo's file list comes from the Hub tree API, which also reports each
+file's size. Files are fetched over one pooled session; large shards are
+split into byte ranges fetched in parallel and written with ``pwrite``
+straight into a preallocated ``.partial`` file. Finished ranges are
+recorded next to it, so an interrupted download resumes with the ranges
+still missing instead of starting over. Progress is reported in real bytes
+across the whole repo.
+"""
+
+import asyncio
+import fnmatch
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+
+from .blobstore import BlobStore
+from .cache import load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+HF_ENDPOINT = os.environ.get("HF_ENDPOINT", "https://huggingface.co")
+
+# Files above one chunk are split into ranges of this size
+CHUNK_SIZE = 64 * 1024 * 1024
+# Concurrent range requests, shared by all files of a download
+MAX_CONNECTIONS = 8
+# Bytes written per pwrite while a range streams in
+READ_SIZE = 1024 * 1024
+
+MAX_RETRIES = 3
+RETRY_DELAY = 1.0
+# Seconds a range may stall between reads; whole ranges may take minutes
+READ_TIMEOUT = 60
+# Seconds a listing on its own (sizing, digests) may take before giving up
+LISTING_TIMEOUT = 30
+
+PARTIAL_SUFFIX = ".partial"
+STATE_SUFFIX = ".partial.json"
+
+# Weight formats MLX never loads; safetensors are fetched instead
+IGNORE_PATTERNS = (
+    "*.bin",
+    "*.pt",
+    "*.pth",
+    "*.ckpt",
+    "*.gguf",
+    "*.onnx",
+    "*.h5",
+    "*.msgpack",
+    "*.ot",
+    "original/*",
+)
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class DownloadError(Exception):
+    """Raised when a repo or one of its files can't be downloaded."""
+
+
+@dataclass
+class RepoFile:
+    """A file of a Hub repo."""
+
+    path: str
+    size: int
+    # SHA-256 of LFS-stored files, as listed by the Hub
+    sha256: Optional[str] = None
+
+
+def chunk_ranges(size: int, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """Half-open byte ranges covering ``size`` bytes in ``chunk_size`` steps."""
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def select_files(
+    files: Sequence[RepoFile], ignore_patterns: Sequence[str] = IGNORE_PATTERNS
+) -> List[RepoFile]:
+    """Files worth downloading, skipping formats matched by ``ignore_patterns``."""
+    return [
+        f for f in files if not any(fnmatch.fnmatch(f.path, pattern) for pattern in ignore_patterns)
+    ]
+
+
+def _raise_first(results: Sequence[object]) -> None:
+    """Re-raise the first exception gathered with ``return_exceptions``."""
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+class RateLimiter:
+    """Token bucket capping the combined rate of every download sharing it."""
+
+    def __init__(self, bytes_per_second: float, burst_seconds: float = 1.0):
+        """Allow ``bytes_per_second`` on average, in bursts of ``burst_seconds``."""
+        self.rate = bytes_per_second
+        self.capacity = bytes_per_second * burst_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def throttle(self, nbytes: int) -> None:
+        """Account for ``nbytes`` just received, sleeping while over the cap."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Going into debt makes later callers wait their share too
+        self.tokens -= nbytes
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class HubDownloader:
+    """Downloads HuggingFace Hub repos in parallel byte ranges."""
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        token: Optional[str] = None,
+        connections: int = MAX_CONNECTIONS,
+        chunk_size: int = CHUNK_SIZE,
+        retry_delay: float = RETRY_DELAY,
+        rate_limiter: Optional[RateLimiter] = None,
+        blob_store: Optional[BlobStore] = None,
+    ):
+        """Initialize a downloader for ``endpoint`` (the public Hub by default).
+
+        With a ``blob_store``, files it already holds are linked rather than
+        fetched, and fetched files are added to it.
+        """
+        self.endpoint = (endpoint or HF_ENDPOINT).rstrip("/")
+        self.token = token if token is not None else os.environ.get("HF_TOKEN")
+        self.connections = connections
+        self.chunk_size = chunk_size
+        self.retry_delay = retry_delay
+        self.rate_limiter = rate_limiter
+        self.blob_store = blob_store
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    def file_url(self, repo_id: str, path: str, revision: str = "main") -> str:
+        """URL serving one file of a repo."""
+        return f"{self.endpoint}/{repo_id}/resolve/{revision}/{path}"
+
+    async def list_files(
+        self, session: aiohttp.ClientSession, repo_id: str, revision: str = "main"
+    ) -> List[RepoFile]:
+        """Every file of a repo with its size, following the API's pagination."""
+        url: Optional[str] = f"{self.endpoint}/api/models/{repo_id}/tree/{revision}"
+        params: Optional[Dict[str, str]] = {"recursive": "true"}
+        files = []
+        while url:
+            async with session.get(url, params=params) as response:
+                if response.status != 200:
+                    raise DownloadError(f"Listing {repo_id} failed: HTTP {response.status}")
+                for entry in await response.json():
+                    if entry.get("type") != "file":
+                        continue
+                    lfs = entry.get("lfs") or {}
+                    files.append(RepoFile(entry["path"], int(entry.get("size", 0)), lfs.get("oid")))
+                next_link = response.links.get("next")
+                url = str(next_link["url"]) if next_link else None
+                params = None
+        return files
+
+    async def repo_files(
+        self,
+        repo_id: str,
+        revision: str = "main",
+        ignore_patterns: Sequence[str] = IGNORE_PATTERNS,
+    ) -> List[RepoFile]:
+        """Files a download of the repo would fetch."""
+        timeout = aiohttp.ClientTimeout(total=LISTING_TIMEOUT)
+        async with aiohttp.ClientSession(headers=self._headers(), timeout=timeout) as session:
+            files = await self.list_files(session, repo_id, revision)
+        return select_files(files, ignore_patterns)
+
+    async def download(
+        self,
+        repo_id: str,
+        dest: Path,
+        revision: str = "main",
+        progress_callback: Optional[ProgressCallback] = None,
+        ignore_patterns: Sequence[str] = IGNORE_PATTERNS,
+        files: Optional[Sequence[RepoFile]] = None,
+    ) -> List[RepoFile]:
+        """Download a repo into ``dest``, resuming any earlier partial download.
+
+        Files already complete in ``dest`` are not fetched again. Progress is
+        reported as ``progress_callback(bytes_done, bytes_total)``. ``files``
+        from an earlier ``repo_files`` call spare listing the repo again.
+
+        Returns:
+            The files of the repo now present in ``dest``.
+
+        Raises:
+            DownloadError: If the listing or any file fails after retries.
+        """
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=READ_TIMEOUT)
+        async with aiohttp.ClientSession(
+            connector=connector, headers=self._headers(), timeout=timeout
+        ) as session:
+            if files is None:
+                files = select_files(
+                    await self.list_files(session, repo_id, revision), ignore_patterns
+                )
+            total = sum(f.size for f in files)
+            done = 0
+
+            def report(nbytes: int) -> None:
+                nonlocal done
+                done += nbytes
+                if progress_callback:
+                    progress_callback(done, total)
+
+            dest.mkdir(parents=True, exist_ok=True)
+            semaphore = asyncio.Semaphore(self.connections)
+            results = await asyncio.gather(
+                *(
+                    self._fetch_file(
+                        session,
+                        self.file_url(repo_id, f.path, revision),
+                        dest / f.path,
+                        f,
+                        semaphore,
+                        report,
+                    )
+                    for f in files
+                ),
+                return_exceptions=True,
+            )
+        _raise_first(results)
+        logger.info(f"Downloaded {repo_id}: {len(files)} files, {total / 1024**3:.2f}GB")
+        return files
+
+    async def _fetch_file(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        target: Path,
+        repo_file: RepoFile,
+        semaphore: asyncio.Semaphore,
+        report: Callable[[int], None],
+    ) -> None:
+        """Fetch one file's missing ranges into its partial file, then rename it."""
+        if target.exists() and target.stat().st_size == repo_file.size:
+            report(repo_file.size)
+            return
+        store = self.blob_store if repo_file.sha256 else None
+        if store and await asyncio.to_thread(store.link, repo_file.sha256, target):
+            report(repo_file.size)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + PARTIAL_SUFFIX)
+        state_path = target.with_name(target.name + STATE_SUFFIX)
+        ranges = chunk_ranges(repo_file.size, self.chunk_size)
+
+        # Ranges on disk count only if the partial file is for this exact file
+        stamp = {"size": repo_file.size, "sha256": repo_file.sha256, "chunk": self.chunk_size}
+        state = load_json(state_path) or {}
+        completed: Set[int] = set()
+        if state.get("stamp") == stamp and partial.exists():
+            completed = set(state.get("completed", [])) & set(range(len(ranges)))
+        if not completed:
+            with open(partial, "wb") as f:
+                f.truncate(repo_file.size)  # Preallocate; ranges land in place
+        elif partial.stat().st_size != repo_file.size:
+            os.truncate(partial, repo_file.size)
+        report(sum(ranges[i][1] - ranges[i][0] for i in completed))
+
+        def mark_done(index: int) -> None:
+            completed.add(index)
+            save_json(state_path, {"stamp": stamp, "completed": sorted(completed)})
+
+        fd = os.open(partial, os.O_WRONLY)
+        try:
+            # Let every range finish even if one fails, so a retry resumes further
+            results = await asyncio.gather(
+                *(
+                    self._fetch_range(
+                        session, url, fd, index, ranges[index], semaphore, report, mark_done
+                    )
+                    for index in range(len(ranges))
+                    if index not in completed
+                ),
+                return_exceptions=True,
+            )
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        _raise_first(results)
+        os.replace(partial, target)
+        try:
+            state_path.unlink()
+        except OSError:
+            pass
+        if store:
+            await asyncio.to_thread(store.add, target, repo_file.sha256, True)
+
+    async def _fetch_range(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        fd: int,
+        index: int,
+        byte_range: Tuple[int, int],
+        semaphore: asyncio.Semaphore,
+        report: Callable[[int], None],
+        mark_done: Callable[[int], None],
+    ) -> None:
+        """Fetch one byte range into place, retrying with backoff."""
+        start, end = byte_range
+        for attempt in range(MAX_RETRIES):
+            written = 0
+            try:
+                async with semaphore:
+                    headers = {"Range": f"bytes={start}-{end - 1}"}
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 200 and start != 0:
+                            raise DownloadError(f"{url} does not support range requests")
+                        if response.status not in (200, 206):
+                            raise DownloadError(f"{url}: HTTP {response.status}")
+                        offset = start
+                        async for piece in response.content.iter_chunked(READ_SIZE):
+                            piece = piece[: end - offset]
+                            os.pwrite(fd, piece, offset)
+                            offset += len(piece)
+                            written += len(piece)
+                            report(len(piece))
+                            if self.rate_limiter:
+                                await self.rate_limiter.throttle(len(piece))
+                            if offset >= end:
+                                break
+                        if offset != end:
+                            raise DownloadError(f"{url}: short read at byte {offset} of {end}")
+                mark_done(index)
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, DownloadError) as e:
+                report(-written)  # The range is fetched again from its start
+                if attempt == MAX_RETRIES - 1:
+                    raise DownloadError(f"Failed to download {url}: {e}") from e
+                logger.debug(f"Retrying bytes {start}-{end} of {url}: {e}")
+                await asyncio.sleep(self.retry_delay * 2**attempt)
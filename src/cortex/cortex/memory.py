@@ -0,0 +1,237 @@
+"""
+Model memory footprint estimation.
+
+A model's resident size is more than its weights: every token of context
+keeps a key and a value vector per layer in the KV cache, and the runtime
+needs compute buffers on top. This module turns architecture parameters
+(from Ollama ``model_info``, an MLX/HuggingFace ``config.json`` or
+safetensors headers) into a weights + KV cache + overhead estimate for a
+given context length and number of concurrent sequences.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024**3
+
+# Context length assumed when the caller doesn't ask for one. Servers allocate
+# the KV cache lazily or default to a few thousand tokens, not the model max.
+DEFAULT_CONTEXT_LENGTH = 8192
+
+# Bytes per KV cache element for the supported cache dtypes
+KV_DTYPE_BYTES = {
+    "f32": 4.0,
+    "f16": 2.0,
+    "bf16": 2.0,
+    "q8_0": 1.0625,  # 8-bit values plus one f16 scale per 32-element block
+    "q4_0": 0.5625,  # 4-bit values plus one f16 scale per 32-element block
+}
+
+# Fixed runtime cost (Metal/CUDA context, tokenizer, server process) and the
+# share of the weights needed again as scratch/compute buffers.
+BASE_OVERHEAD_GB = 0.5
+COMPUTE_OVERHEAD_FRACTION = 0.05
+
+# Safety margin applied when nothing is known but the file size
+LEGACY_RAM_FACTOR = 1.2
+
+# Free RAM kept for the rest of the system when loading models
+RAM_HEADROOM_GB = 2.0
+
+
+@dataclass
+class ModelArchitecture:
+    """Transformer shape parameters that determine the KV cache size."""
+
+    num_layers: int
+    hidden_size: int
+    num_attention_heads: int
+    num_kv_heads: int
+    head_dim: int
+    max_context: int = 0
+    parameter_count: Optional[int] = None
+
+    @classmethod
+    def from_hf_config(cls, config: Dict[str, Any]) -> Optional["ModelArchitecture"]:
+        """Build from a HuggingFace/MLX ``config.json`` dictionary."""
+        # Multimodal checkpoints nest the language model config
+        if "num_hidden_layers" not in config and isinstance(config.get("text_config"), dict):
+            config = {**config, **config["text_config"]}
+
+        try:
+            num_layers = int(config["num_hidden_layers"])
+            hidden_size = int(config["hidden_size"])
+            num_heads = int(config["num_attention_heads"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        if num_layers <= 0 or hidden_size <= 0 or num_heads <= 0:
+            return None
+
+        num_kv_heads = int(config.get("num_key_value_heads") or num_heads)
+        head_dim = int(config.get("head_dim") or hidden_size // num_heads)
+
+        return cls(
+            num_layers=num_layers,
+            hidden_size=hidden_size,
+            num_attention_heads=num_heads,
+            num_kv_heads=num_kv_heads,
+            head_dim=head_dim,
+            max_context=int(config.get("max_position_embeddings") or 0),
+        )
+
+    @classmethod
+    def from_ollama_model_info(cls, model_info: Dict[str, Any]) -> Optional["ModelArchitecture"]:
+        """Build from the ``model_info`` block of Ollama's ``/api/show``."""
+        arch = model_info.get("general.architecture")
+        if not arch:
+            return None
+
+        def field(name: str) -> Any:
+            return model_info.get(f"{arch}.{name}")
+
+        try:
+            num_layers = int(field("block_count"))
+            hidden_size = int(field("embedding_length"))
+            num_heads = int(field("attention.head_count"))
+        except (TypeError, ValueError):
+            return None
+
+        if num_layers <= 0 or hidden_size <= 0 or num_heads <= 0:
+            return None
+
+        num_kv_heads = field("attention.head_count_kv") or num_heads
+        # Some architectures report per-layer head counts as a list
+        if isinstance(num_kv_heads, list):
+            num_kv_heads = max(num_kv_heads) if num_kv_heads else num_heads
+
+        head_dim = field("attention.key_length") or hidden_size // num_heads
+        parameter_count = model_info.get("general.parameter_count")
+
+        return cls(
+            num_layers=num_layers,
+            hidden_size=hidden_size,
+            num_attention_heads=num_heads,
+            num_kv_heads=int(num_kv_heads),
+            head_dim=int(head_dim),
+            max_context=int(field("context_length") or 0),
+            parameter_count=int(parameter_count) if parameter_count else None,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["ModelArchitecture"]:
+        """Rebuild from the dictionary stored in ``ModelInfo.metadata``."""
+        try:
+            return cls(**data)
+        except TypeError:
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for ``ModelInfo.metadata`` / caches."""
+        return asdict(self)
+
+    def kv_bytes_per_token(self, kv_dtype: str = "f16") -> float:
+        """Bytes of KV cache one token of context occupies across all layers."""
+        element_bytes = KV_DTYPE_BYTES.get(kv_dtype, KV_DTYPE_BYTES["f16"])
+        # One key and one value vector per KV head per layer
+        return 2 * self.num_layers * self.num_kv_heads * self.head_dim * element_bytes
+
+
+@dataclass
+class MemoryEstimate:
+    """Breakdown of the RAM a model needs at a given context length."""
+
+    weights_gb: float
+    kv_cache_gb: float
+    overhead_gb: float
+    context_length: int
+    concurrency: int
+    from_architecture: bool
+
+    @property
+    def total_gb(self) -> float:
+        """Total resident memory."""
+        return self.weights_gb + self.kv_cache_gb + self.overhead_gb
+
+
+class MemoryEstimator:
+    """Estimate model RAM from weights, KV cache and runtime overhead."""
+
+    def __init__(self, kv_dtype: str = "f16"):
+        """Initialize with the KV cache element type the runtime uses."""
+        if kv_dtype not in KV_DTYPE_BYTES:
+            raise ValueError(
+                f"Unknown KV cache dtype '{kv_dtype}' "
+                f"(expected one of: {', '.join(KV_DTYPE_BYTES)})"
+            )
+        self.kv_dtype = kv_dtype
+
+    def estimate(
+        self,
+        weights_gb: float,
+        architecture: Optional[ModelArchitecture] = None,
+        context_length: Optional[int] = None,
+        concurrency: int = 1,
+    ) -> MemoryEstimate:
+        """Estimate memory for a model with the given weights size."""
+        concurrency = max(1, concurrency)
+
+        if architecture is None:
+            # Nothing but the file size: keep the old rule of thumb
+            return MemoryEstimate(
+                weights_gb=weights_gb,
+                kv_cache_gb=0.0,
+                overhead_gb=weights_gb * (LEGACY_RAM_FACTOR - 1),
+                context_length=context_length or 0,
+                concurrency=concurrency,
+                from_architecture=False,
+            )
+
+        context = context_length or DEFAULT_CONTEXT_LENGTH
+        if architecture.max_context:
+            context = min(context, architecture.max_context)
+
+        kv_bytes = architecture.kv_bytes_per_token(self.kv_dtype) * context * concurrency
+
+        return MemoryEstimate(
+            weights_gb=weights_gb,
+            kv_cache_gb=kv_bytes / GIB,
+            overhead_gb=BASE_OVERHEAD_GB + weights_gb * COMPUTE_OVERHEAD_FRACTION,
+            context_length=context,
+            concurrency=concurrency,
+            from_architecture=True,
+        )
+
+    def estimate_model(
+        self, model: Any, context_length: Optional[int] = None, concurrency: int = 1
+    ) -> MemoryEstimate:
+        """Estimate memory for a ModelInfo, using its stored architecture if any."""
+        if model.online:
+            return MemoryEstimate(0.0, 0.0, 0.0, context_length or 0, concurrency, False)
+
+        architecture = model_architecture(model)
+        if architecture is None:
+            # Providers already applied the rule of thumb to ram_gb
+            return MemoryEstimate(
+                weights_gb=model.size_gb,
+                kv_cache_gb=0.0,
+                overhead_gb=max(model.ram_gb - model.size_gb, 0.0),
+                context_length=context_length or model.context_window,
+                concurrency=max(1, concurrency),
+                from_architecture=False,
+            )
+
+        return self.estimate(model.size_gb, architecture, context_length, concurrency)
+
+
+def model_architecture(model: Any) -> Optional[ModelArchitecture]:
+    """Return the architecture a provider stored on a ModelInfo, if any."""
+    data = model.metadata.get("architecture") if model.metadata else None
+    if isinstance(data, ModelArchitecture):
+        return data
+    if isinstance(data, dict):
+        return ModelArchitecture.from_dict(data)
+    return None
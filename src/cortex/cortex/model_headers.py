@@ -0,0 +1,484 @@
+"""
+Readers for model weight file headers.
+
+Model files (safetensors shards, GGUF blobs) describe their tensors in a
+small header in front of gigabytes of weights. These readers memory-map the
+file and touch only the header pages, so exact parameter counts, dtypes and
+quantization can be had for a few kilobytes of I/O per file without loading
+any weights. Parsed headers are cached on disk keyed by the file's size and
+mtime, or by content digest for Ollama blobs.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+from math import prod
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .cache import cache_path, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+# Refuse absurd header lengths from corrupt or non-safetensors files
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+
+SAFETENSORS_DTYPE_BYTES = {
+    "F64": 8,
+    "F32": 4,
+    "F16": 2,
+    "BF16": 2,
+    "F8_E4M3": 1,
+    "F8_E5M2": 1,
+    "I64": 8,
+    "I32": 4,
+    "I16": 2,
+    "I8": 1,
+    "U64": 8,
+    "U32": 4,
+    "U16": 2,
+    "U8": 1,
+    "BOOL": 1,
+}
+
+# Bit widths MLX packs into uint32 words
+MLX_QUANT_BITS = (2, 3, 4, 5, 6, 8)
+MLX_DEFAULT_GROUP_SIZE = 64
+
+
+class HeaderError(ValueError):
+    """Raised when a file does not contain a valid header."""
+
+
+class HeaderCache:
+    """Persistent cache of parsed headers, validated by a per-entry stamp."""
+
+    def __init__(self, name: str, path: Optional[Path] = None):
+        """Initialize a cache stored as ``name`` in the Cortex cache directory."""
+        self.path = path or cache_path(name)
+        self._entries: Optional[Dict[str, Any]] = None
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            data = load_json(self.path)
+            self._entries = data if isinstance(data, dict) else {}
+        return self._entries
+
+    def get(self, key: str, stamp: Any) -> Optional[Any]:
+        """Return the cached value if its stamp still matches."""
+        entry = self._load().get(key)
+        if isinstance(entry, dict) and entry.get("stamp") == stamp:
+            return entry.get("value")
+        return None
+
+    def put(self, key: str, stamp: Any, value: Any) -> None:
+        """Store a value; call save() to persist."""
+        self._load()[key] = {"stamp": stamp, "value": value}
+        self._dirty = True
+
+    def save(self) -> None:
+        """Persist pending entries to disk."""
+        if self._dirty and self._entries is not None:
+            save_json(self.path, self._entries)
+            self._dirty = False
+
+
+def file_stamp(path: Path) -> List[int]:
+    """Return the (size, mtime_ns) pair that invalidates a cached header."""
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_safetensors_header(path: Path) -> Dict[str, Any]:
+    """Parse the JSON header of a ``.safetensors`` file via mmap.
+
+    Returns ``{"tensors": {name: {"dtype", "shape"}}, "metadata": {...}}``.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(8)
+        if len(prefix) < 8:
+            raise HeaderError(f"{path} is too small to be a safetensors file")
+
+        (header_len,) = struct.unpack("<Q", prefix)
+        file_size = os.fstat(f.fileno()).st_size
+        if header_len <= 0 or header_len > MAX_HEADER_BYTES or 8 + header_len > file_size:
+            raise HeaderError(f"{path} has an invalid safetensors header length")
+
+        # Map only the header; the weights after it are never touched
+        with mmap.mmap(f.fileno(), 8 + header_len, access=mmap.ACCESS_READ) as mm:
+            raw = mm[8 : 8 + header_len]
+
+    try:
+        header = json.loads(raw)
+    except ValueError as e:
+        raise HeaderError(f"{path} has a malformed safetensors header: {e}") from e
+
+    metadata = header.pop("__metadata__", None) or {}
+    tensors = {}
+    for name, info in header.items():
+        if not isinstance(info, dict) or "dtype" not in info:
+            raise HeaderError(f"{path} has a malformed entry for tensor {name}")
+        tensors[name] = {"dtype": info["dtype"], "shape": list(info.get("shape", []))}
+
+    return {"tensors": tensors, "metadata": metadata}
+
+
+@dataclass
+class WeightsSummary:
+    """Exact facts about a model's weights, aggregated over its shards."""
+
+    parameter_count: int
+    weight_bytes: int
+    tensor_count: int
+    shard_count: int
+    dtype_bytes: Dict[str, int] = field(default_factory=dict)
+    quantization_bits: Optional[int] = None
+    group_size: Optional[int] = None
+
+    @property
+    def bits_per_weight(self) -> float:
+        """Average stored bits per parameter, including scales and biases."""
+        if not self.parameter_count:
+            return 0.0
+        return self.weight_bytes * 8 / self.parameter_count
+
+    @property
+    def quantization(self) -> str:
+        """Human label such as ``4bit`` or ``bf16``."""
+        if self.quantization_bits:
+            return f"{self.quantization_bits}bit"
+        if not self.dtype_bytes:
+            return "unknown"
+        dominant = max(self.dtype_bytes.items(), key=lambda item: item[1])[0]
+        return dominant.lower()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for ModelInfo.metadata."""
+        return {
+            "parameter_count": self.parameter_count,
+            "weight_bytes": self.weight_bytes,
+            "tensor_count": self.tensor_count,
+            "shard_count": self.shard_count,
+            "dtype_bytes": dict(self.dtype_bytes),
+            "quantization": self.quantization,
+            "bits_per_weight": round(self.bits_per_weight, 3),
+        }
+
+
+class SafetensorsReader:
+    """Read and summarize safetensors shards with a per-shard header cache."""
+
+    def __init__(self, cache: Optional[HeaderCache] = None):
+        """Initialize the reader."""
+        self.cache = cache or HeaderCache("safetensors_headers.json")
+
+    def read_header(self, path: Path) -> Dict[str, Any]:
+        """Return the parsed header for one shard, from cache when unchanged."""
+        path = Path(path)
+        key = str(path.resolve())
+        stamp = file_stamp(path)
+
+        header = self.cache.get(key, stamp)
+        if header is None:
+            header = read_safetensors_header(path)
+            self.cache.put(key, stamp, header)
+        return header
+
+    def summarize(
+        self, paths: Iterable[Path], quantization: Optional[Dict[str, Any]] = None
+    ) -> Optional[WeightsSummary]:
+        """Aggregate exact parameter counts over a set of shards.
+
+        ``quantization`` is the ``quantization`` block of an MLX config.json
+        (``{"bits": 4, "group_size": 64}``); without it the bit width of packed
+        MLX weights is inferred from their scales.
+        """
+        tensors: Dict[str, Dict[str, Any]] = {}
+        shard_count = 0
+        for path in sorted(paths):
+            try:
+                tensors.update(self.read_header(path)["tensors"])
+                shard_count += 1
+            except (OSError, HeaderError) as e:
+                logger.debug(f"Skipping unreadable shard {path}: {e}")
+        self.cache.save()
+
+        if not tensors:
+            return None
+
+        quantization = quantization or {}
+        configured_bits = quantization.get("bits")
+        group_size = quantization.get("group_size") or MLX_DEFAULT_GROUP_SIZE
+
+        parameter_count = 0
+        weight_bytes = 0
+        dtype_bytes: Dict[str, int] = {}
+        detected_bits = set()
+
+        for name, info in tensors.items():
+            numel = prod(info["shape"]) if info["shape"] else 1
+            nbytes = numel * SAFETENSORS_DTYPE_BYTES.get(info["dtype"], 0)
+            weight_bytes += nbytes
+            dtype_bytes[info["dtype"]] = dtype_bytes.get(info["dtype"], 0) + nbytes
+
+            # Quantization side tensors don't count as parameters
+            if name.endswith((".scales", ".biases")):
+                continue
+
+            packed_bits = self._packed_bits(name, info, tensors, configured_bits, group_size)
+            if packed_bits:
+                detected_bits.add(packed_bits)
+                parameter_count += numel * 32 // packed_bits
+            else:
+                parameter_count += numel
+
+        return WeightsSummary(
+            parameter_count=parameter_count,
+            weight_bytes=weight_bytes,
+            tensor_count=len(tensors),
+            shard_count=shard_count,
+            dtype_bytes=dtype_bytes,
+            quantization_bits=max(detected_bits) if detected_bits else None,
+            group_size=group_size if detected_bits else None,
+        )
+
+    def summarize_dir(
+        self, model_dir: Path, quantization: Optional[Dict[str, Any]] = None
+    ) -> Optional[WeightsSummary]:
+        """Summarize every ``*.safetensors`` shard in a model directory."""
+        return self.summarize(Path(model_dir).glob("*.safetensors"), quantization)
+
+    @staticmethod
+    def _packed_bits(
+        name: str,
+        info: Dict[str, Any],
+        tensors: Dict[str, Dict[str, Any]],
+        configured_bits: Optional[int],
+        group_size: int,
+    ) -> Optional[int]:
+        """Return the bit width of an MLX-packed uint32 weight, else None."""
+        if info["dtype"] != "U32" or not name.endswith(".weight"):
+            return None
+
+        scales = tensors.get(name[: -len(".weight")] + ".scales")
+        if scales is None:
+            return None
+        if configured_bits:
+            return int(configured_bits)
+
+        # packed_cols * 32 / bits == in_features == scale_cols * group_size
+        packed_cols = info["shape"][-1] if info["shape"] else 0
+        scale_cols = scales["shape"][-1] if scales["shape"] else 0
+        if not packed_cols or not scale_cols:
+            return None
+        bits = packed_cols * 32 / (scale_cols * group_size)
+        return int(bits) if bits in MLX_QUANT_BITS else None
+
+
+# GGUF (llama.cpp / Ollama) -------------------------------------------------
+
+GGUF_MAGIC = b"GGUF"
+
+# Metadata value types with a fixed-width encoding
+GGUF_SCALAR_FORMATS = {
+    0: "<B",  # uint8
+    1: "<b",  # int8
+    2: "<H",  # uint16
+    3: "<h",  # int16
+    4: "<I",  # uint32
+    5: "<i",  # int32
+    6: "<f",  # float32
+    7: "<?",  # bool
+    10: "<Q",  # uint64
+    11: "<q",  # int64
+    12: "<d",  # float64
+}
+GGUF_TYPE_STRING = 8
+GGUF_TYPE_ARRAY = 9
+
+# Arrays longer than this (tokenizer vocabularies, merges) are skipped rather
+# than kept; short ones such as per-layer head counts are preserved
+GGUF_MAX_ARRAY_ITEMS = 256
+
+# llama.cpp ``general.file_type`` values
+GGUF_FILE_TYPES = {
+    0: "F32",
+    1: "F16",
+    2: "Q4_0",
+    3: "Q4_1",
+    7: "Q8_0",
+    8: "Q5_0",
+    9: "Q5_1",
+    10: "Q2_K",
+    11: "Q3_K_S",
+    12: "Q3_K_M",
+    13: "Q3_K_L",
+    14: "Q4_K_S",
+    15: "Q4_K_M",
+    16: "Q5_K_S",
+    17: "Q5_K_M",
+    18: "Q6_K",
+    19: "IQ2_XXS",
+    20: "IQ2_XS",
+    21: "Q2_K_S",
+    22: "IQ3_XS",
+    23: "IQ3_XXS",
+    24: "IQ1_S",
+    25: "IQ4_NL",
+    26: "IQ3_S",
+    27: "IQ3_M",
+    28: "IQ2_S",
+    29: "IQ2_M",
+    30: "IQ4_XS",
+    31: "IQ1_M",
+    32: "BF16",
+}
+
+
+class _GGUFCursor:
+    """Sequential little-endian reader over a memory-mapped GGUF file."""
+
+    def __init__(self, buffer: mmap.mmap, path: Path):
+        self.buffer = buffer
+        self.path = path
+        self.offset = 0
+
+    def unpack(self, fmt: str) -> Any:
+        try:
+            (value,) = struct.unpack_from(fmt, self.buffer, self.offset)
+        except struct.error as e:
+            raise HeaderError(f"{self.path} has a truncated GGUF header") from e
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def skip(self, nbytes: int) -> None:
+        if self.offset + nbytes > len(self.buffer):
+            raise HeaderError(f"{self.path} has a truncated GGUF header")
+        self.offset += nbytes
+
+    def string(self) -> str:
+        length = self.unpack("<Q")
+        end = self.offset + length
+        if end > len(self.buffer):
+            raise HeaderError(f"{self.path} has a truncated GGUF header")
+        value = self.buffer[self.offset : end].decode("utf-8", errors="replace")
+        self.offset = end
+        return value
+
+    def value(self, value_type: int) -> Any:
+        """Read one metadata value; long arrays are skipped and return None."""
+        if value_type in GGUF_SCALAR_FORMATS:
+            return self.unpack(GGUF_SCALAR_FORMATS[value_type])
+        if value_type == GGUF_TYPE_STRING:
+            return self.string()
+        if value_type != GGUF_TYPE_ARRAY:
+            raise HeaderError(f"{self.path} has unknown GGUF value type {value_type}")
+
+        item_type = self.unpack("<I")
+        count = self.unpack("<Q")
+        if count <= GGUF_MAX_ARRAY_ITEMS:
+            return [self.value(item_type) for _ in range(count)]
+
+        # Skip without materializing: fixed-width items in one step, strings
+        # by walking their length prefixes
+        if item_type in GGUF_SCALAR_FORMATS:
+            self.skip(count * struct.calcsize(GGUF_SCALAR_FORMATS[item_type]))
+        else:
+            for _ in range(count):
+                self.value(item_type)
+        return None
+
+
+def read_gguf_header(path: Path) -> Dict[str, Any]:
+    """Parse the metadata and tensor index of a GGUF file via mmap.
+
+    Returns ``{"version", "metadata", "tensor_count", "parameter_count"}``.
+    Metadata keys match Ollama's ``model_info`` (``llama.block_count`` etc.).
+    Only the header pages are touched; tensor data is never read.
+    """
+    with open(path, "rb") as f:
+        if f.read(4) != GGUF_MAGIC:
+            raise HeaderError(f"{path} is not a GGUF file")
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise HeaderError(f"{path} cannot be mapped: {e}") from e
+
+    with mm:
+        cursor = _GGUFCursor(mm, path)
+        cursor.skip(4)
+        version = cursor.unpack("<I")
+        if version < 2:
+            # v1 used 32-bit counts and was superseded before Ollama adopted GGUF
+            raise HeaderError(f"{path} uses unsupported GGUF version {version}")
+
+        tensor_count = cursor.unpack("<Q")
+        kv_count = cursor.unpack("<Q")
+
+        metadata: Dict[str, Any] = {}
+        for _ in range(kv_count):
+            key = cursor.string()
+            value = cursor.value(cursor.unpack("<I"))
+            if value is not None:
+                metadata[key] = value
+
+        # Tensor infos: name, dims, ggml type, data offset
+        parameter_count = 0
+        for _ in range(tensor_count):
+            cursor.string()
+            n_dims = cursor.unpack("<I")
+            numel = 1
+            for _ in range(n_dims):
+                numel *= cursor.unpack("<Q")
+            cursor.skip(4 + 8)
+            parameter_count += numel
+
+    return {
+        "version": version,
+        "metadata": metadata,
+        "tensor_count": tensor_count,
+        "parameter_count": parameter_count,
+    }
+
+
+def gguf_quantization(metadata: Dict[str, Any]) -> str:
+    """Return the quantization label (e.g. ``Q4_K_M``) from GGUF metadata."""
+    file_type = metadata.get("general.file_type")
+    if file_type is None:
+        return ""
+    return GGUF_FILE_TYPES.get(file_type, f"type{file_type}")
+
+
+class GGUFReader:
+    """Read GGUF headers with a persistent cache keyed by blob digest."""
+
+    def __init__(self, cache: Optional[HeaderCache] = None):
+        """Initialize the reader."""
+        self.cache = cache or HeaderCache("gguf_headers.json")
+
+    def read_header(self, path: Path, digest: Optional[str] = None) -> Dict[str, Any]:
+        """Return the parsed header for a GGUF file.
+
+        Content-addressed blobs pass their ``digest``: the entry then stays
+        valid for every tag sharing the blob, stamped only by its size.
+        Other files are keyed by path and invalidated by size and mtime.
+        """
+        path = Path(path)
+        if digest:
+            key, stamp = digest, [path.stat().st_size]
+        else:
+            key, stamp = str(path.resolve()), file_stamp(path)
+
+        header = self.cache.get(key, stamp)
+        if header is None:
+            header = read_gguf_header(path)
+            self.cache.put(key, stamp, header)
+        return header
+
+    def save(self) -> None:
+        """Persist newly parsed headers."""
+        self.cache.save()
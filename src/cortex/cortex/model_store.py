@@ -0,0 +1,239 @@
+"""
+Disk quota for local models, evicting the least recently used.
+
+Downloaded models pile up until the disk runs short. With a quota set
+(``storage.quota_gb`` in the config) every MLX and Ollama model on disk is
+sized, dated by when it was last used (StatisticsTracker sessions, else
+when its files were written) and the least recently used are evicted
+until the rest fit. The current model and pinned models are never evicted.
+A download that wouldn't fit under the quota or in the free disk space
+evicts first, unless ``storage.auto_evict`` is off.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .downloads import DOWNLOAD_PROVIDERS
+from .providers.ollama import tagged_model_id
+from .statistics import StatisticsTracker
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_key(key: str) -> str:
+    """A ``provider:model`` key with Ollama's implied ``:latest`` tag made explicit.
+
+    Installed Ollama models are listed with their tag, while the config and
+    chat sessions keep IDs as typed, e.g. ``llama3.2``.
+    """
+    provider, sep, model_id = key.partition(":")
+    if sep and provider == "ollama":
+        return f"ollama:{tagged_model_id(model_id)}"
+    return key
+
+
+@dataclass
+class StoredModel:
+    """A local model with its size on disk and when it was last used."""
+
+    provider: str
+    model_id: str
+    size_bytes: int
+    last_used: float
+    # Why the model can't be evicted ("current" or "pinned"), if it can't
+    protected: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """The ``provider:model`` key StatisticsTracker uses."""
+        return f"{self.provider}:{self.model_id}"
+
+
+@dataclass
+class EvictionPlan:
+    """Models to evict, least recently used first, to free ``needed_bytes``."""
+
+    models: List[StoredModel] = field(default_factory=list)
+    evict: List[StoredModel] = field(default_factory=list)
+    needed_bytes: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes all local models take."""
+        return sum(m.size_bytes for m in self.models)
+
+    @property
+    def freed_bytes(self) -> int:
+        """Bytes the evictions free."""
+        return sum(m.size_bytes for m in self.evict)
+
+    @property
+    def fits(self) -> bool:
+        """Whether the evictions free enough."""
+        return self.freed_bytes >= self.needed_bytes
+
+
+class ModelStore:
+    """Sizes local models and evicts the least recently used to fit a quota."""
+
+    def __init__(
+        self,
+        registry: Any,
+        last_used: Optional[Dict[str, float]] = None,
+        quota_bytes: Optional[int] = None,
+        pinned: Iterable[str] = (),
+        current: Optional[str] = None,
+    ):
+        """Initialize the store.
+
+        Args:
+            registry: Provider registry the local models are listed through
+            last_used: Last-use time per ``provider:model`` key
+            quota_bytes: Bytes local models may take in total, None for no quota
+            pinned: Model IDs or ``provider:model`` keys never to evict
+            current: ``provider:model`` key of the current model, never evicted
+        """
+        self.registry = registry
+        self.last_used: Dict[str, float] = {}
+        for key, when in (last_used or {}).items():
+            key = _normalize_key(key)
+            self.last_used[key] = max(when or 0, self.last_used.get(key) or 0)
+        self.quota_bytes = quota_bytes
+        # Bare IDs may name an untagged Ollama model, so the tagged form is pinned too
+        self.pinned = {_normalize_key(p) for p in pinned} | {tagged_model_id(p) for p in pinned}
+        self.current = _normalize_key(current) if current else None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_config(
+        cls, registry: Any, config_data: Dict[str, Any], tracker: Optional[Any] = None, **kwargs
+    ) -> "ModelStore":
+        """Build from the ``storage`` config and a StatisticsTracker's model stats."""
+        storage = config_data.get("storage") or {}
+        current = config_data.get("current_model") or {}
+        quota_gb = storage.get("quota_gb")
+        tracker = tracker or StatisticsTracker()
+        options = {
+            "last_used": {key: s.last_used for key, s in tracker.model_stats.items()},
+            "quota_bytes": int(quota_gb * 1024**3) if quota_gb else None,
+            "pinned": storage.get("pinned") or (),
+            "current": f"{current['provider']}:{current['id']}" if current.get("id") else None,
+        }
+        options.update(kwargs)
+        return cls(registry, **options)
+
+    async def inventory(self) -> List[StoredModel]:
+        """Every local model, least recently used first."""
+        models = []
+        for name in DOWNLOAD_PROVIDERS:
+            provider = self.registry.get_provider(name)
+            if provider is None:
+                continue
+            for model_id in await provider.local_models():
+                size, written = await asyncio.to_thread(self._measure, provider, model_id)
+                key = f"{name}:{model_id}"
+                protected = None
+                if key == self.current:
+                    protected = "current"
+                elif key in self.pinned or model_id in self.pinned:
+                    protected = "pinned"
+                models.append(
+                    StoredModel(name, model_id, size, self.last_used.get(key) or written, protected)
+                )
+        models.sort(key=lambda m: m.last_used)
+        return models
+
+    @staticmethod
+    def _measure(provider: Any, model_id: str) -> Tuple[int, float]:
+        """Bytes on disk and when the model's files were last written."""
+        written = 0.0
+        for path in provider.local_model_files(model_id):
+            try:
+                written = max(written, path.stat().st_mtime)
+            except OSError:
+                pass
+        return provider.model_disk_bytes(model_id), written or time.time()
+
+    def plan(
+        self,
+        models: List[StoredModel],
+        incoming_bytes: int = 0,
+        free_bytes: Optional[int] = None,
+        keep: Iterable[str] = (),
+    ) -> EvictionPlan:
+        """Choose models to evict so ``incoming_bytes`` more fit.
+
+        Args:
+            models: Local models, least recently used first
+            incoming_bytes: Bytes about to be added, e.g. by a download
+            free_bytes: Free disk space the incoming bytes must also fit in
+            keep: Keys of further models not to evict
+        """
+        total = sum(m.size_bytes for m in models)
+        needed = 0
+        if self.quota_bytes is not None:
+            needed = total + incoming_bytes - self.quota_bytes
+        if free_bytes is not None:
+            needed = max(needed, incoming_bytes - free_bytes)
+        plan = EvictionPlan(models=models, needed_bytes=max(needed, 0))
+
+        keep = set(keep)
+        for model in models:
+            if plan.fits:
+                break
+            if not model.protected and model.key not in keep:
+                plan.evict.append(model)
+        return plan
+
+    async def evict(self, plan: EvictionPlan) -> List[StoredModel]:
+        """Delete the plan's models. Returns those actually deleted."""
+        evicted = []
+        stores = {}
+        for model in plan.evict:
+            provider = self.registry.get_provider(model.provider)
+            if provider is None or not await provider.delete_model(model.model_id):
+                logger.warning(f"Could not evict {model.key}")
+                continue
+            logger.info(f"Evicted {model.key} ({model.size_bytes / 1024**3:.1f}GB)")
+            evicted.append(model)
+            if provider.blob_store is not None:
+                stores[provider.blob_store.root] = provider.blob_store
+        # Evicted files shared through the blob store are only freed with their blob
+        for store in stores.values():
+            await asyncio.to_thread(store.gc)
+        return evicted
+
+    async def enforce(self, dry_run: bool = False) -> EvictionPlan:
+        """Evict least recently used models until the rest fit under the quota."""
+        plan = self.plan(await self.inventory())
+        if not dry_run:
+            await self.evict(plan)
+        return plan
+
+    async def make_room(
+        self, incoming_bytes: int, free_bytes: Optional[int] = None, keep: Iterable[str] = ()
+    ) -> EvictionPlan:
+        """Evict what a download of ``incoming_bytes`` needs to fit.
+
+        Nothing is evicted unless the evictions free enough: a download that
+        won't fit either way shouldn't cost the models it would have replaced.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Parallel downloads mustn't both pick, and delete, the same models
+        async with self._lock:
+            plan = self.plan(await self.inventory(), incoming_bytes, free_bytes, keep)
+            if plan.evict and plan.fits:
+                await self.evict(plan)
+            return plan
+
+
+def eviction_store(registry: Any, config_data: Dict[str, Any]) -> Optional[ModelStore]:
+    """The store downloads evict through, or None without a quota or with auto-evict off."""
+    storage = config_data.get("storage") or {}
+    if not storage.get("quota_gb") or not storage.get("auto_evict", True):
+        return None
+    return ModelStore.from_config(registry, config_data)
@@ -0,0 +1,253 @@
+"""
+Predictive model preloading.
+
+Learns when each ``provider:model`` pair tends to be used from the
+StatisticsTracker session history and, when the machine is idle and has
+memory to spare, warms the model most likely to be used next so the first
+chat is not a cold load. Every preload is logged so later sessions can be
+scored as hits or misses.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import psutil
+
+from .cache import load_json, save_json
+from .memory import RAM_HEADROOM_GB
+from .prewarm import Prewarmer
+
+logger = logging.getLogger(__name__)
+
+# Use DOTFILES environment variable if set, otherwise fall back to default
+DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
+PRELOAD_LOG = DOTFILES / "config" / "cortex" / "stats" / "preload.json"
+
+# A session from a week ago counts half as much as one from today
+RECENCY_HALF_LIFE_DAYS = 7.0
+
+# Width (hours) of the time-of-day kernel around each past session
+HOUR_BANDWIDTH = 1.0
+
+# Sessions on the other kind of day (weekday vs weekend) count this much
+OTHER_DAY_TYPE_WEIGHT = 0.5
+
+# Predict usage this far ahead of now
+LOOKAHEAD_MINUTES = 30
+
+# Only preload when the prediction is at least this likely
+MIN_PROBABILITY = 0.2
+
+# Idle means CPU below this, and free RAM must cover the model plus RAM_HEADROOM_GB
+IDLE_CPU_PERCENT = 25.0
+
+# A preload is scored against the first session within this window
+PREDICTION_WINDOW_HOURS = 3.0
+
+# How long Ollama keeps a preloaded model resident
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Preloads kept in the log
+MAX_LOG_ENTRIES = 500
+
+
+@dataclass
+class Prediction:
+    """A model the user is likely to use soon."""
+
+    provider: str
+    model: str
+    probability: float
+    score: float
+
+    @property
+    def key(self) -> str:
+        """The ``provider:model`` key StatisticsTracker uses."""
+        return f"{self.provider}:{self.model}"
+
+
+class PreloadScheduler:
+    """Predict the next model from session history and track preload hit rate."""
+
+    def __init__(
+        self,
+        sessions: Iterable[Any],
+        log_file: Optional[Path] = None,
+        half_life_days: float = RECENCY_HALF_LIFE_DAYS,
+        bandwidth_hours: float = HOUR_BANDWIDTH,
+    ):
+        """Initialize from ChatSession records (anything with model/provider/start_time)."""
+        self.sessions = [s for s in sessions if not getattr(s, "error", None)]
+        self.log_file = log_file or PRELOAD_LOG
+        self.half_life_days = half_life_days
+        self.bandwidth_hours = bandwidth_hours
+
+    @classmethod
+    def from_tracker(cls, tracker: Any, **kwargs) -> "PreloadScheduler":
+        """Build from a StatisticsTracker's session history."""
+        return cls(tracker.sessions, **kwargs)
+
+    def predict(self, when: Optional[datetime] = None, top_k: int = 3) -> List[Prediction]:
+        """Rank models by how likely they are to be used around ``when``.
+
+        Each past session votes for its model with weight
+        ``recency * time_of_day_similarity * day_type_similarity``.
+        """
+        when = when or datetime.now() + timedelta(minutes=LOOKAHEAD_MINUTES)
+        now = time.time()
+        target_hour = when.hour + when.minute / 60
+        target_weekend = when.weekday() >= 5
+
+        scores: Dict[Tuple[str, str], float] = {}
+        for session in self.sessions:
+            started = datetime.fromtimestamp(session.start_time)
+            age_days = max(now - session.start_time, 0) / 86400
+            recency = 0.5 ** (age_days / self.half_life_days)
+
+            hour = started.hour + started.minute / 60
+            distance = abs(hour - target_hour)
+            distance = min(distance, 24 - distance)
+            time_of_day = math.exp(-(distance**2) / (2 * self.bandwidth_hours**2))
+
+            same_day_type = (started.weekday() >= 5) == target_weekend
+            day_type = 1.0 if same_day_type else OTHER_DAY_TYPE_WEIGHT
+
+            key = (session.provider, session.model)
+            scores[key] = scores.get(key, 0.0) + recency * time_of_day * day_type
+
+        total = sum(scores.values())
+        if not total:
+            return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            Prediction(provider, model, score / total, score)
+            for (provider, model), score in ranked[:top_k]
+        ]
+
+    @staticmethod
+    def check_resources(ram_needed_gb: float = 0.0) -> Tuple[bool, str]:
+        """Return whether the machine is idle with enough free RAM, and why not."""
+        cpu = psutil.cpu_percent(interval=0.5)
+        if cpu > IDLE_CPU_PERCENT:
+            return False, f"CPU busy ({cpu:.0f}%)"
+
+        available_gb = psutil.virtual_memory().available / (1024**3)
+        if available_gb < ram_needed_gb + RAM_HEADROOM_GB:
+            return False, (
+                f"not enough free RAM ({available_gb:.1f}GB free, "
+                f"{ram_needed_gb + RAM_HEADROOM_GB:.1f}GB needed)"
+            )
+        return True, ""
+
+    def _load_log(self) -> Dict[str, Any]:
+        data = load_json(self.log_file)
+        if not isinstance(data, dict):
+            data = {}
+        data.setdefault("preloads", [])
+        data.setdefault("hits", 0)
+        data.setdefault("misses", 0)
+        return data
+
+    def record_preload(self, prediction: Prediction, method: str) -> None:
+        """Log a preload so the next session can be scored against it."""
+        log = self._load_log()
+        log["preloads"].append(
+            {
+                "key": prediction.key,
+                "probability": round(prediction.probability, 3),
+                "method": method,
+                "time": time.time(),
+                "outcome": None,
+            }
+        )
+        log["preloads"] = log["preloads"][-MAX_LOG_ENTRIES:]
+        save_json(self.log_file, log)
+
+    def record_use(self, provider: str, model: str) -> Optional[bool]:
+        """Score the pending preload against an actual session.
+
+        Returns True for a hit, False for a miss and None when no preload
+        was pending.
+        """
+        return self.record_uses([(provider, model)])
+
+    def record_uses(self, uses: Iterable[Tuple[str, str]]) -> Optional[bool]:
+        """Score the pending preload against a session using several models.
+
+        An ensemble session is a hit when any of its ``(provider, model)``
+        pairs was preloaded.
+        """
+        log = self._load_log()
+        cutoff = time.time() - PREDICTION_WINDOW_HOURS * 3600
+        pending = [
+            entry
+            for entry in log["preloads"]
+            if entry.get("outcome") is None and entry.get("time", 0) >= cutoff
+        ]
+        if not pending:
+            return None
+
+        keys = {f"{provider}:{model}" for provider, model in uses}
+        hit = any(entry["key"] in keys for entry in pending)
+        for entry in pending:
+            entry["outcome"] = "hit" if entry["key"] in keys else "miss"
+        log["hits" if hit else "misses"] += 1
+        save_json(self.log_file, log)
+        return hit
+
+    def hit_rate(self) -> Dict[str, Any]:
+        """Return hit/miss counts and the hit rate of scored preloads."""
+        log = self._load_log()
+        scored = log["hits"] + log["misses"]
+        return {
+            "preloads": len(log["preloads"]),
+            "hits": log["hits"],
+            "misses": log["misses"],
+            "hit_rate": log["hits"] / scored if scored else None,
+        }
+
+
+async def preload_model(provider: Any, model_id: str, server_status: Dict[str, Any]) -> str:
+    """Warm a model with the cheapest mechanism its provider supports.
+
+    Returns the method used (``keep_alive``, ``on_demand``, ``page_cache``)
+    or an empty string if nothing could be done.
+    """
+    if provider.name == "ollama":
+        if not await provider.start_server(model_id):
+            return ""
+        return "keep_alive" if await provider.load_model(model_id, OLLAMA_KEEP_ALIVE) else ""
+
+    if provider.name == "mlx":
+        # An on-demand proxy for this model starts its backend on any request
+        if (
+            server_status.get("on_demand")
+            and server_status.get("running")
+            and server_status.get("provider") == "mlx"
+            and server_status.get("model") == model_id
+        ):
+            url = f"http://localhost:{server_status.get('port', 8080)}/v1/models"
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url) as response:
+                        if response.status < 500:
+                            return "on_demand"
+            except aiohttp.ClientError as e:
+                logger.debug(f"On-demand MLX server did not answer: {e}")
+
+        files = provider.local_model_files(model_id)
+        if files:
+            result = await asyncio.to_thread(Prewarmer().warm, files)
+            if result.files_warmed or result.files_skipped:
+                return "page_cache"
+
+    return ""
@@ -5,11 +5,18 @@ Manages all AI model providers and their dynamic model discovery.
 """
 
 import asyncio
+import json
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..blobstore import BlobStore, disk_usage
+from ..memory import MemoryEstimator, ModelArchitecture
+from ..prewarm import Prewarmer, PrewarmResult, weight_files
+from ..verify import ExpectedFile, Verifier, VerifyResult
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +76,9 @@ class BaseProvider(ABC):
             self.name = self.__class__.__name__.replace("Provider", "").lower()
         self.models_cache: List[ModelInfo] = []
         self.last_fetch = None
+        self.verifier = Verifier()
+        # Shared, deduplicated storage for downloaded files, when enabled
+        self.blob_store = BlobStore() if self.config.get("blob_store") else None
 
     @property
     @abstractmethod
@@ -112,10 +122,109 @@ class BaseProvider(ABC):
         """Get the current server status."""
         pass
 
-    def estimate_ram_usage(self, model_size_gb: float) -> float:
-        """Estimate RAM usage for a model."""
-        # Rule of thumb: quantized models need ~1.2x their size in RAM
-        return model_size_gb * 1.2
+    def local_model_files(self, model_id: str) -> List[Path]:
+        """Return the on-disk weight files/directories of a local model, if any."""
+        return []
+
+    def download_dir(self) -> Path:
+        """Directory downloaded models are stored under."""
+        return Path.home()
+
+    async def local_models(self) -> List[str]:
+        """IDs of the models downloaded to this machine."""
+        return []
+
+    def model_disk_bytes(self, model_id: str) -> int:
+        """Bytes a local model's files take on disk, counting linked files once."""
+        return disk_usage(self.local_model_files(model_id))
+
+    async def delete_model(self, model_id: str) -> bool:
+        """Remove a downloaded model from disk. Returns False if nothing was removed."""
+        return False
+
+    async def download_size(self, model_id: str) -> Optional[int]:
+        """Bytes a download of the model would fetch, or None if unknown.
+
+        Defaults to the size of a previously fetched ModelInfo.
+        """
+        for model in self.models_cache:
+            if model.id == model_id and model.size_gb:
+                return int(model.size_gb * 1024**3)
+        return None
+
+    async def expected_files(self, model_id: str) -> List[ExpectedFile]:
+        """Files a local model should have, with the digests its source publishes."""
+        return []
+
+    async def verify_model(
+        self, model_id: str, progress: Optional[Callable[[int, int], None]] = None
+    ) -> VerifyResult:
+        """Hash a local model's files and compare them with the published digests.
+
+        ``progress(bytes_done, bytes_total)`` is called from hashing threads.
+        """
+        expected = await self.expected_files(model_id)
+        if not expected:
+            return VerifyResult()
+        return await asyncio.to_thread(self.verifier.verify, expected, progress)
+
+    async def prewarm(self, model_id: str) -> Optional[PrewarmResult]:
+        """Read a local model's weights into the page cache before it is loaded.
+
+        Disabled with ``prewarm: false`` in the provider config.
+        """
+        if not self.config.get("prewarm", True):
+            return None
+        files = self.local_model_files(model_id)
+        if not files:
+            return None
+
+        result = await asyncio.to_thread(Prewarmer().warm, files)
+        if result.bytes_read:
+            logger.info(
+                f"Prewarmed {model_id}: {result.bytes_read / (1024**3):.1f}GB "
+                f"in {result.seconds:.1f}s ({result.mb_per_second:.0f} MB/s)"
+            )
+        return result
+
+    def estimate_ram_usage(
+        self,
+        model_size_gb: float,
+        architecture: Optional[ModelArchitecture] = None,
+        context_length: Optional[int] = None,
+    ) -> float:
+        """Estimate RAM usage for a model.
+
+        With known architecture this is weights + KV cache at the given context
+        length + runtime overhead; otherwise the ~1.2x-of-size rule of thumb.
+        """
+        estimate = MemoryEstimator().estimate(model_size_gb, architecture, context_length)
+        return estimate.total_gb
+
+    def estimate_footprint_gb(self, model_id: str) -> Optional[float]:
+        """Estimate the RAM a model will hold once loaded, or None if unknown.
+
+        Prefers the weight files on disk (with a ``config.json`` beside them
+        for the KV cache), then a previously fetched ModelInfo.
+        """
+        # The same shard may sit in several snapshots; count each name once
+        files = {f.name: f for f in weight_files(self.local_model_files(model_id))}
+        if files:
+            weights_gb = sum(f.stat().st_size for f in files.values()) / (1024**3)
+            architecture = None
+            config_path = next(iter(files.values())).parent / "config.json"
+            if config_path.exists():
+                try:
+                    config = json.loads(config_path.read_text())
+                    architecture = ModelArchitecture.from_hf_config(config)
+                except (OSError, ValueError) as e:
+                    logger.debug(f"Ignoring unreadable {config_path}: {e}")
+            return self.estimate_ram_usage(weights_gb, architecture)
+
+        for model in self.models_cache:
+            if model.id == model_id:
+                return MemoryEstimator().estimate_model(model).total_gb
+        return None
 
     def calculate_model_score(self, model: ModelInfo) -> float:
         """Calculate a power/capability score for the model."""
@@ -283,5 +392,31 @@ class ProviderRegistry:
         logger.info("Provider registry initialized")
 
 
+def infer_provider(model_id: str, providers: Optional[ProviderRegistry] = None) -> Optional[str]:
+    """The provider serving ``model_id``: the one listing it, else by ID shape.
+
+    ``name:tag`` IDs are Ollama models, HuggingFace repo IDs (``org/name``)
+    are MLX models, and the API providers are recognized by model family.
+    Returns None when nothing matches.
+    """
+    providers = providers or registry
+    for name in providers.list_providers():
+        provider = providers.get_provider(name)
+        if provider and any(m.id == model_id for m in provider.models_cache):
+            return name
+    lowered = model_id.lower()
+    if ":" in model_id:
+        return "ollama"
+    if "/" in model_id or "mlx" in lowered:
+        return "mlx"
+    if "claude" in lowered:
+        return "claude"
+    if "gpt" in lowered or lowered.startswith(("o1", "o3")):
+        return "openai"
+    if "gemini" in lowered:
+        return "gemini"
+    return None
+
+
 # Global registry instance
 registry = ProviderRegistry()
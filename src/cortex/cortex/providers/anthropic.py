@@ -5,16 +5,57 @@ Provides access to Claude models via Anthropic API.
 """
 
 import asyncio
+import hashlib
 import logging
 import os
+import time
 from typing import Any, Dict, List, Optional
 
 import aiohttp
 
+from ..cache import cache_path, load_json, save_json
 from . import BaseProvider, ModelCapability, ModelInfo, ProviderType
 
 logger = logging.getLogger(__name__)
 
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Discovered models per API key hash; the list changes every few months at most
+DISCOVERY_CACHE = cache_path("anthropic_models.json")
+DISCOVERY_TTL = 24 * 60 * 60
+
+# Largest page the listing endpoint serves
+LIST_PAGE_SIZE = 1000
+REQUEST_TIMEOUT = 5
+
+# Probes in flight at once when the listing endpoint is unavailable
+PROBE_CONCURRENCY = 8
+
+# Base IDs to probe; dated variants are only tried for those that exist
+PROBE_IDS = [
+    "claude-opus-4-1",
+    "claude-opus-4",
+    "claude-sonnet-4",
+    "claude-3-7-sonnet",
+    "claude-3-5-sonnet",
+    "claude-3-5-haiku",
+    "claude-3-opus",
+    "claude-3-sonnet",
+    "claude-3-haiku",
+    "claude-2.1",
+    "claude-2.0",
+    "claude-instant-1.2",
+]
+DATE_PATTERNS = [
+    "20250805",
+    "20250514",
+    "20250219",
+    "20241022",
+    "20240620",
+    "20240307",
+    "20240229",
+]
+
 
 class AnthropicProvider(BaseProvider):
     """Provider for Anthropic Claude models."""
@@ -43,11 +84,24 @@ class AnthropicProvider(BaseProvider):
         self.api_key = os.environ.get("ANTHROPIC_API_KEY") or os.environ.get("CLAUDE_API_KEY") or ""
 
     async def fetch_models(self, force_refresh: bool = False) -> List[ModelInfo]:
-        """Fetch available Claude models."""
-        models = []
+        """Fetch available Claude models.
+
+        With an API key these are the models the key can use, discovered at
+        most once a day; without one, or if discovery finds nothing, the known
+        catalog.
+        """
+        discovered = await self._discover_models(force_refresh) if self._check_api_key() else []
+        if discovered:
+            models = [self._create_model_info(entry["id"], entry) for entry in discovered]
+            logger.info(f"Discovered {len(models)} Claude models")
+            return models
+
+        models = self._get_known_models()
+        logger.info(f"Loaded {len(models)} Claude models")
+        return models
 
-        # Always use the known Claude models list
-        # (Anthropic doesn't have a public models endpoint)
+    def _get_known_models(self) -> List[ModelInfo]:
+        """Get the known Claude models, for when discovery isn't possible."""
         # These are the current Claude models as of January 2025
         known_models = [
             # Claude 3.5 Models
@@ -114,8 +168,8 @@ class AnthropicProvider(BaseProvider):
             },
         ]
 
-        for model_data in known_models:
-            model_info = self._create_model_info(
+        return [
+            self._create_model_info(
                 model_data["id"],
                 {
                     "name": model_data["name"],
@@ -124,114 +178,114 @@ class AnthropicProvider(BaseProvider):
                     "max_output_tokens": model_data["output"],
                 },
             )
-            models.append(model_info)
-
-        logger.info(f"Loaded {len(models)} Claude models")
-        return models
-
-    async def _probe_available_models(self, session, headers) -> List[ModelInfo]:
-        """Probe for available models by testing completions endpoint."""
-        models = []
-
-        # Minimal list of model IDs to probe - these are the known patterns
-        probe_ids = [
-            # Just probe the base names, we'll expand variants if they work
-            "claude-opus-4-1",
-            "claude-opus-4",
-            "claude-sonnet-4",
-            "claude-3-7-sonnet",
-            "claude-3-5-sonnet",
-            "claude-3-5-haiku",
-            "claude-3-opus",
-            "claude-3-sonnet",
-            "claude-3-haiku",
-            "claude-2.1",
-            "claude-2.0",
-            "claude-instant-1.2",
+            for model_data in known_models
         ]
 
-        for model_id in probe_ids:
-            try:
-                # Try a minimal completion to see if model exists
-                payload = {
-                    "model": model_id,
-                    "messages": [{"role": "user", "content": "Hi"}],
-                    "max_tokens": 1,
-                }
-
-                async with session.post(
-                    f"{self.ANTHROPIC_API}/messages",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=5),
-                ) as response:
-                    if response.status in [200, 400]:  # 400 might mean model exists but bad params
-                        models.append(self._create_model_info(model_id, {}))
-
-                        # If base model works, try dated versions
-                        if response.status == 200:
-                            await self._probe_model_variants(session, headers, model_id, models)
-
-            except Exception:
-                pass
-
+    def _key_hash(self) -> str:
+        """Short hash the discovery cache is keyed by, so it never holds the key."""
+        return hashlib.sha256(self.api_key.encode()).hexdigest()[:16]
+
+    async def _discover_models(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Models the API key can use, from the cache if discovered within a day.
+
+        Lists ``/v1/models``; where that endpoint fails, probes known model IDs
+        concurrently through the token-counting endpoint, which, unlike a
+        completion, isn't billed.
+
+        Returns:
+            Entries with an ``id`` and, when listed, ``display_name`` and ``created_at``.
+        """
+        key = self._key_hash()
+        cache = load_json(DISCOVERY_CACHE)
+        cache = cache if isinstance(cache, dict) else {}
+        entry = cache.get(key) if isinstance(cache.get(key), dict) else {}
+        if not force_refresh and time.time() - entry.get("fetched_at", 0) < DISCOVERY_TTL:
+            return entry.get("models") or []
+
+        headers = {"x-api-key": self.api_key, "anthropic-version": ANTHROPIC_VERSION}
+        try:
+            async with aiohttp.ClientSession() as session:
+                models = await self._list_models(session, headers)
+                if models is None:
+                    models = await self._probe_available_models(session, headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Could not discover Claude models: {e}")
+            models = []
+
+        if not models:
+            # Offline or rejected: an expired list still beats the static catalog
+            return entry.get("models") or []
+        cache[key] = {"fetched_at": time.time(), "models": models}
+        save_json(DISCOVERY_CACHE, cache)
         return models
 
-    async def _probe_model_variants(
-        self, session, headers, base_model_id: str, models: List[ModelInfo]
-    ):
-        """Probe for dated variants of a model."""
-        # Common date patterns to try
-        date_patterns = [
-            "20250805",
-            "20250514",
-            "20250219",  # 2025 dates
-            "20241022",
-            "20240620",
-            "20240307",
-            "20240229",  # 2024 dates
-        ]
-
-        for date in date_patterns:
-            variant_id = f"{base_model_id}-{date}"
+    async def _list_models(self, session, headers) -> Optional[List[Dict[str, Any]]]:
+        """Every model the listing endpoint returns, following its pages.
+
+        Returns:
+            None if the endpoint isn't available, or an empty list if it
+            rejected the API key, which probing wouldn't get past either.
+        """
+        models: List[Dict[str, Any]] = []
+        params = {"limit": str(LIST_PAGE_SIZE)}
+        while True:
+            async with session.get(
+                f"{self.ANTHROPIC_API}/models",
+                headers=headers,
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            ) as response:
+                if response.status in (401, 403):
+                    logger.warning(f"Anthropic API rejected the API key (HTTP {response.status})")
+                    return []
+                if response.status != 200:
+                    logger.debug(f"Claude model listing unavailable (HTTP {response.status})")
+                    return None
+                data = await response.json()
+
+            for item in data.get("data", []):
+                if item.get("id"):
+                    models.append(
+                        {field: item.get(field) for field in ("id", "display_name", "created_at")}
+                    )
+            if not data.get("has_more") or not data.get("last_id"):
+                return models
+            params = {"limit": str(LIST_PAGE_SIZE), "after_id": data["last_id"]}
+
+    async def _probe_available_models(self, session, headers) -> List[Dict[str, Any]]:
+        """Probe known model IDs, then dated variants of those that exist."""
+        semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+        found = await self._probe_ids(session, headers, PROBE_IDS, semaphore)
+        variants = [f"{base}-{date}" for base in found for date in DATE_PATTERNS]
+        found += await self._probe_ids(session, headers, variants, semaphore)
+        return [{"id": model_id} for model_id in found]
+
+    async def _probe_ids(
+        self, session, headers, model_ids: List[str], semaphore: asyncio.Semaphore
+    ) -> List[str]:
+        """The model IDs that exist, probed concurrently."""
+        results = await asyncio.gather(
+            *(self._probe_model(session, headers, model_id, semaphore) for model_id in model_ids)
+        )
+        return [model_id for model_id, exists in zip(model_ids, results) if exists]
+
+    async def _probe_model(
+        self, session, headers, model_id: str, semaphore: asyncio.Semaphore
+    ) -> bool:
+        """Whether a model exists, by counting the tokens of a message to it."""
+        payload = {"model": model_id, "messages": [{"role": "user", "content": "Hi"}]}
+        async with semaphore:
             try:
-                payload = {
-                    "model": variant_id,
-                    "messages": [{"role": "user", "content": "Hi"}],
-                    "max_tokens": 1,
-                }
-
                 async with session.post(
-                    f"{self.ANTHROPIC_API}/messages",
+                    f"{self.ANTHROPIC_API}/messages/count_tokens",
                     headers=headers,
                     json=payload,
-                    timeout=aiohttp.ClientTimeout(total=5),
+                    timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
                 ) as response:
-                    if response.status in [200, 400]:
-                        models.append(self._create_model_info(variant_id, {}))
+                    return response.status == 200
             except (aiohttp.ClientError, asyncio.TimeoutError):
                 # Expected errors when model doesn't exist or network issues
-                pass
-
-    def _get_fallback_models(self) -> List[ModelInfo]:
-        """Get minimal fallback list of known models."""
-        # Absolute minimal list - just the main models
-        fallback_ids = [
-            "claude-opus-4-1-20250805",
-            "claude-opus-4-20250514",
-            "claude-sonnet-4-20250514",
-            "claude-3-7-sonnet-20250219",
-            "claude-3-5-sonnet-20241022",
-            "claude-3-5-haiku-20241022",
-            "claude-3-opus-20240229",
-            "claude-3-sonnet-20240229",
-            "claude-3-haiku-20240307",
-            "claude-2.1",
-            "claude-2.0",
-            "claude-instant-1.2",
-        ]
-
-        return [self._create_model_info(model_id, {}) for model_id in fallback_ids]
+                return False
 
     def _create_model_info(self, model_id: str, api_data: Dict[str, Any]) -> ModelInfo:
         """Create ModelInfo using ONLY API data when available."""
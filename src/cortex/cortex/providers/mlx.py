@@ -7,16 +7,53 @@ Provides access to MLX models optimized for Apple Silicon.
 import asyncio
 import json
 import logging
+import os
 import re
+import shutil
+import signal
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import aiohttp
+import psutil
 
+from ..hub_download import DownloadError, HubDownloader, RateLimiter, RepoFile
+from ..memory import ModelArchitecture
+from ..model_headers import SafetensorsReader
+from ..readiness import DEFAULT_STARTUP_TIMEOUT, MLX_READY_PATTERN, wait_until_ready
+from ..verify import ExpectedFile, read_manifest, write_manifest
 from . import BaseProvider, ModelCapability, ModelInfo, ProviderType
 
 logger = logging.getLogger(__name__)
 
+# Use DOTFILES environment variable if set, otherwise fall back to default
+DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
+
+# Summary lines mlx_lm.generate prints, e.g. "Generation: 100 tokens, 41.2 tokens-per-sec"
+GENERATION_STATS_PATTERN = re.compile(
+    r"^(Prompt|Generation): (\d+) tokens, ([\d.]+) tokens-per-sec", re.MULTILINE
+)
+
+# Grace period for a stopped server to exit before it is killed, so a new
+# server's readiness probe can't be answered by the old one on the same port
+STOP_TIMEOUT = 10.0
+
+# Repos published already quantized, e.g. "-4bit" or "-8-bit"
+QUANTIZED_NAME_PATTERN = re.compile(r"-\d+-?bit\b", re.IGNORECASE)
+
+
+def parse_generation_stats(output: str) -> Dict[str, float]:
+    """Token counts and speeds from mlx_lm.generate's output, if it printed them."""
+    stats: Dict[str, float] = {}
+    for phase, tokens, speed in GENERATION_STATS_PATTERN.findall(output):
+        if phase == "Prompt":
+            stats["prompt_tokens"] = int(tokens)
+            stats["prefill_tokens_per_second"] = float(speed)
+        else:
+            stats["output_tokens"] = int(tokens)
+            stats["decode_tokens_per_second"] = float(speed)
+    return stats
+
 
 class MLXProvider(BaseProvider):
     """Provider for MLX models on Apple Silicon."""
@@ -38,7 +75,18 @@ class MLXProvider(BaseProvider):
         """Initialize MLX provider."""
         super().__init__(config)
         self.mlx_path = Path.home() / ".cache" / "mlx"
+        self.hf_cache_path = Path(
+            os.environ.get("HF_HUB_CACHE", str(Path.home() / ".cache" / "huggingface" / "hub"))
+        )
         self.server_process = None
+        # Written by ``cortex start`` for servers this process didn't spawn
+        self.pid_file = DOTFILES / "config/cortex/mlx_server.pid"
+        self.log_file = DOTFILES / "config/cortex/logs/mlx_server.log"
+        self.safetensors = SafetensorsReader()
+        # Shared by downloads that run under one bandwidth cap
+        self.rate_limiter: Optional[RateLimiter] = None
+        # Repo listings fetched for sizing, reused by the download that follows
+        self._listings: Dict[str, List[RepoFile]] = {}
 
     async def fetch_models(self, force_refresh: bool = False) -> List[ModelInfo]:
         """Fetch MLX models from HuggingFace Hub."""
@@ -145,20 +193,22 @@ class MLXProvider(BaseProvider):
             if not description:
                 description = "MLX model optimized for Apple Silicon"
 
+            if size_gb <= 0:
+                size_gb = self._extract_size_from_name(model_name)
+            architecture = ModelArchitecture.from_hf_config(model_details.get("config") or {})
+            ram_gb = self.estimate_ram_usage(size_gb, architecture)
+
             return ModelInfo(
                 id=model_id,
                 name=model_name,
                 provider="mlx",
-                size_gb=size_gb if size_gb > 0 else self._extract_size_from_name(model_name),
-                ram_gb=(size_gb if size_gb > 0 else self._extract_size_from_name(model_name)) * 1.2,
+                size_gb=size_gb,
+                ram_gb=ram_gb,
                 context_window=context,
                 capabilities=capabilities,
                 online=False,
                 open_source=True,
-                recommended_ram=(
-                    size_gb if size_gb > 0 else self._extract_size_from_name(model_name)
-                )
-                * 1.2,
+                recommended_ram=ram_gb,
                 description=description[:200]
                 if description
                 else "MLX model optimized for Apple Silicon",
@@ -171,6 +221,7 @@ class MLXProvider(BaseProvider):
                     "tags": tags,
                     "library": model_details.get("library_name"),
                     "pipeline_tag": model_details.get("pipeline_tag"),
+                    "architecture": architecture.to_dict() if architecture else None,
                 },
             )
         except Exception as e:
@@ -294,10 +345,23 @@ class MLXProvider(BaseProvider):
                         model_id = model_dir.name.replace("_", "/")
                         model_name = model_id.split("/")[-1]
 
-                        # Get actual size on disk
-                        size_gb = sum(
-                            f.stat().st_size for f in model_dir.rglob("*") if f.is_file()
-                        ) / (1024**3)
+                        # Exact parameter count and dtypes from the shard headers;
+                        # fall back to the size on disk if there are no shards
+                        weights = self.safetensors.summarize_dir(
+                            model_dir, config.get("quantization")
+                        )
+                        if weights:
+                            size_gb = weights.weight_bytes / (1024**3)
+                        else:
+                            size_gb = sum(
+                                f.stat().st_size for f in model_dir.rglob("*") if f.is_file()
+                            ) / (1024**3)
+
+                        # Layer/head shapes size the KV cache in the RAM estimate
+                        architecture = ModelArchitecture.from_hf_config(config)
+                        if architecture and weights:
+                            architecture.parameter_count = weights.parameter_count
+                        ram_gb = self.estimate_ram_usage(size_gb, architecture)
 
                         # Extract capabilities from config
                         capabilities = []
@@ -312,12 +376,12 @@ class MLXProvider(BaseProvider):
                             name=model_name,
                             provider="mlx",
                             size_gb=size_gb,
-                            ram_gb=size_gb * 1.2,
+                            ram_gb=ram_gb,
                             context_window=config.get("max_position_embeddings", 8192),
                             capabilities=capabilities,
                             online=False,
                             open_source=True,
-                            recommended_ram=size_gb * 1.2,
+                            recommended_ram=ram_gb,
                             description="Local MLX model",
                             score=70,
                             metadata={
@@ -325,6 +389,10 @@ class MLXProvider(BaseProvider):
                                 "local_path": str(model_dir),
                                 "model_type": config.get("model_type"),
                                 "architectures": architectures,
+                                "architecture": architecture.to_dict() if architecture else None,
+                                "weights": weights.to_dict() if weights else None,
+                                "parameter_count": weights.parameter_count if weights else None,
+                                "quantization": weights.quantization if weights else None,
                             },
                         )
                         models.append(model_info)
@@ -334,128 +402,181 @@ class MLXProvider(BaseProvider):
         return models
 
     async def download_model(self, model_id: str, progress_callback=None) -> bool:
-        """Download an MLX model from HuggingFace."""
-        try:
-            # Check if model is already quantized (has "bit" in name)
-            is_quantized = any(
-                x in model_id.lower() for x in ["-4bit", "-8bit", "-2bit", "-3bit", "-6bit"]
-            )
+        """Download an MLX model from HuggingFace, quantizing it only if needed.
 
-            # Ensure MLX models directory exists
+        Files are fetched natively in parallel byte ranges and an interrupted
+        download resumes where it stopped. Repos that are already quantized
+        land in the model directory as-is; full-precision repos are quantized
+        locally with ``mlx_lm convert`` from the downloaded files.
+        """
+        try:
             self.mlx_path.mkdir(parents=True, exist_ok=True)
             output_path = self.mlx_path / model_id.replace("/", "_")
-
-            # Remove existing model directory if it exists (for re-download)
-            if output_path.exists():
-                import shutil
-
-                shutil.rmtree(output_path)
-                logger.info(f"Removed existing model at {output_path}")
-
-            # Build command - don't quantize already quantized models
-            if is_quantized:
-                # Download without quantization for pre-quantized models
-                cmd = ["mlx_lm", "convert", "--hf-path", model_id, "--mlx-path", str(output_path)]
-            else:
-                # Apply quantization for full precision models
-                cmd = [
-                    "mlx_lm",
-                    "convert",
-                    "--hf-path",
-                    model_id,
-                    "--mlx-path",
-                    str(output_path),
-                    "-q",
-                ]
-
-            # Check if mlx_lm is installed
-            check_cmd = await asyncio.create_subprocess_exec(
-                "which", "mlx_lm", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            # Downloads stay out of the model directory until complete, so an
+            # interrupted one resumes here and never looks like a usable model
+            download_path = self.mlx_path / ".partial" / output_path.name
+
+            if self.blob_store:
+                # Shards already in the HuggingFace cache are linked, not fetched
+                hub_blobs = self.hf_cache_path / f"models--{model_id.replace('/', '--')}" / "blobs"
+                await asyncio.to_thread(self.blob_store.adopt, hub_blobs)
+
+            downloader = HubDownloader(
+                endpoint=self.config.get("hf_endpoint"),
+                rate_limiter=self.rate_limiter,
+                blob_store=self.blob_store,
             )
-            stdout, stderr = await check_cmd.communicate()
-
-            if check_cmd.returncode != 0:
-                # Try using Python module directly
-                if is_quantized:
-                    cmd = [
-                        "python",
-                        "-m",
-                        "mlx_lm.convert",
-                        "--hf-path",
-                        model_id,
-                        "--mlx-path",
-                        str(output_path),
-                    ]
-                else:
-                    cmd = [
-                        "python",
-                        "-m",
-                        "mlx_lm.convert",
-                        "--hf-path",
-                        model_id,
-                        "--mlx-path",
-                        str(output_path),
-                        "-q",
-                    ]
-
-            process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            files = await downloader.download(
+                model_id,
+                download_path,
+                progress_callback=progress_callback,
+                files=self._listings.pop(model_id, None),
             )
 
-            # Monitor output for progress
-            total_size = 0
-            downloaded = 0
-
-            while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-
-                line_text = line.decode().strip()
-
-                # Parse download progress from output
-                if "Downloading" in line_text:
-                    # Extract file size if available
-                    size_match = re.search(r"(\d+\.?\d*)\s*(GB|MB|KB)", line_text)
-                    if size_match:
-                        size = float(size_match.group(1))
-                        unit = size_match.group(2)
-                        if unit == "GB":
-                            total_size = size * 1024 * 1024 * 1024
-                        elif unit == "MB":
-                            total_size = size * 1024 * 1024
-                        elif unit == "KB":
-                            total_size = size * 1024
-
-                # Update progress if callback provided
-                if progress_callback and total_size > 0:
-                    # Estimate progress (simplified)
-                    downloaded += len(line)
-                    progress_callback(downloaded, total_size)
-
-            await process.wait()
-
-            if process.returncode == 0:
+            if self._is_quantized(model_id, download_path):
+                expected = [ExpectedFile(download_path / f.path, f.sha256, f.size) for f in files]
+                write_manifest(download_path, expected, model_id)
+                if output_path.exists():
+                    shutil.rmtree(output_path)
+                os.replace(download_path, output_path)
                 logger.info(f"Successfully downloaded {model_id}")
-
-                # Create marker for downloaded model
-                local_path = self.mlx_path / model_id.replace("/", "_")
-                local_path.mkdir(parents=True, exist_ok=True)
-
                 return True
-            else:
-                stderr_output = await process.stderr.read()
-                logger.error(f"Failed to download {model_id}: {stderr_output.decode()}")
-                return False
 
+            if not await self._quantize(model_id, download_path, output_path):
+                return False
+            shutil.rmtree(download_path, ignore_errors=True)
+            # No published digests for local output; record its own for later checks
+            converted = sorted(p for p in output_path.rglob("*") if p.is_file())
+            digests = await asyncio.to_thread(self.verifier.digests, converted)
+            expected = [ExpectedFile(p, digests.get(p), p.stat().st_size) for p in converted]
+            write_manifest(output_path, expected, model_id)
+            logger.info(f"Successfully downloaded and quantized {model_id}")
+            return True
+
+        except (DownloadError, OSError) as e:
+            logger.error(f"Failed to download {model_id}: {e}")
+            return False
         except Exception as e:
             logger.error(f"Error downloading model {model_id}: {e}")
             return False
 
+    def download_dir(self) -> Path:
+        """MLX models are stored under ``~/.cache/mlx``."""
+        return self.mlx_path
+
+    async def download_size(self, model_id: str) -> Optional[int]:
+        """Bytes of the repo's files, as listed by the Hub.
+
+        The listing is kept for the download that follows, which then doesn't
+        list the repo again.
+        """
+        try:
+            downloader = HubDownloader(endpoint=self.config.get("hf_endpoint"))
+            files = await downloader.repo_files(model_id)
+        except (DownloadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Could not size {model_id}: {e}")
+            return await super().download_size(model_id)
+        self._listings[model_id] = files
+        return sum(f.size for f in files)
+
+    async def expected_files(self, model_id: str) -> List[ExpectedFile]:
+        """Files recorded at download, else the Hub's listing of the repo.
+
+        Models quantized locally before manifests were recorded have no
+        published digests to compare with.
+        """
+        local_path = self.mlx_path / model_id.replace("/", "_")
+        if not local_path.is_dir():
+            return []
+        expected = read_manifest(local_path)
+        if expected or not QUANTIZED_NAME_PATTERN.search(model_id):
+            return expected
+        try:
+            downloader = HubDownloader(endpoint=self.config.get("hf_endpoint"))
+            files = await downloader.repo_files(model_id)
+        except (DownloadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Could not fetch digests for {model_id}: {e}")
+            return []
+        return [ExpectedFile(local_path / f.path, f.sha256, f.size) for f in files]
+
+    @staticmethod
+    def _is_quantized(model_id: str, model_dir: Path) -> bool:
+        """Whether a downloaded repo is already quantized, by config or name."""
+        try:
+            with open(model_dir / "config.json", "r") as f:
+                config = json.load(f)
+            if config.get("quantization") or config.get("quantization_config"):
+                return True
+        except (OSError, ValueError):
+            pass
+        return QUANTIZED_NAME_PATTERN.search(model_id) is not None
+
+    async def _quantize(self, model_id: str, source_path: Path, output_path: Path) -> bool:
+        """Quantize downloaded full-precision weights into ``output_path``."""
+        # mlx_lm refuses to overwrite, so convert aside and swap in on success
+        converted_path = output_path.with_name(output_path.name + ".converting")
+        shutil.rmtree(converted_path, ignore_errors=True)
+
+        check_cmd = await asyncio.create_subprocess_exec(
+            "which", "mlx_lm", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        await check_cmd.communicate()
+        if check_cmd.returncode == 0:
+            prefix = ["mlx_lm", "convert"]
+        else:
+            prefix = ["python", "-m", "mlx_lm.convert"]  # Module installed without the script
+        cmd = prefix + ["--hf-path", str(source_path), "--mlx-path", str(converted_path), "-q"]
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logger.error(f"Failed to quantize {model_id}: {stderr.decode()}")
+            shutil.rmtree(converted_path, ignore_errors=True)
+            return False
+
+        if output_path.exists():
+            shutil.rmtree(output_path)
+        os.replace(converted_path, output_path)
+        return True
+
+    def local_model_files(self, model_id: str) -> List[Path]:
+        """Return the Cortex download dir and/or HuggingFace cache snapshot of a model."""
+        paths = []
+        local_path = self.mlx_path / model_id.replace("/", "_")
+        if local_path.exists():
+            paths.append(local_path)
+
+        # mlx_lm itself loads hub models from the HuggingFace cache
+        hub_dir = self.hf_cache_path / f"models--{model_id.replace('/', '--')}" / "snapshots"
+        if hub_dir.exists():
+            paths.extend(sorted(p for p in hub_dir.iterdir() if p.is_dir()))
+        return paths
+
+    async def local_models(self) -> List[str]:
+        """Models downloaded into ``~/.cache/mlx``."""
+        return [model.id for model in await self._scan_local_models()]
+
+    async def delete_model(self, model_id: str) -> bool:
+        """Delete a model's Cortex copy and its HuggingFace cache entry."""
+        paths = [
+            self.mlx_path / model_id.replace("/", "_"),
+            self.hf_cache_path / f"models--{model_id.replace('/', '--')}",
+        ]
+        removed = False
+        for path in paths:
+            if path.is_dir():
+                await asyncio.to_thread(shutil.rmtree, path, True)
+                removed = True
+        if removed:
+            logger.info(f"Deleted {model_id}")
+        return removed
+
     async def is_model_available(self, model_id: str) -> bool:
         """Check if a model is available locally."""
         local_path = self.mlx_path / model_id.replace("/", "_")
-        return local_path.exists()
+        return (local_path / "config.json").exists()
 
     async def start_server(self, model_id: str, **kwargs) -> bool:
         """Start MLX server with specified model."""
@@ -463,22 +584,38 @@ class MLXProvider(BaseProvider):
             # Stop existing server if running
             await self.stop_server()
 
+            # Load from the page cache rather than disk
+            await self.prewarm(model_id)
+
             cmd = ["mlx_lm.server", "--model", model_id, "--port", str(self.MLX_SERVER_PORT)]
 
-            self.server_process = await asyncio.create_subprocess_exec(
-                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
+            # To a file, not a pipe: nothing reads a pipe while the server
+            # starts, and a full one would stall it before it is ready
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, "a") as log:
+                self.server_process = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=log, stderr=log
+                )
 
-            # Wait a bit for server to start
-            await asyncio.sleep(3)
+            # Return as soon as the server answers rather than after a fixed sleep
+            process = self.server_process
+            readiness = await wait_until_ready(
+                f"http://localhost:{self.MLX_SERVER_PORT}/v1/models",
+                timeout=self.config.get("startup_timeout", DEFAULT_STARTUP_TIMEOUT),
+                is_alive=lambda: process.returncode is None,
+                log_file=self.log_file,
+                ready_pattern=MLX_READY_PATTERN,
+            )
 
-            # Check if server is running
-            if self.server_process.returncode is None:
-                logger.info(f"MLX server started with model {model_id}")
+            if readiness:
+                logger.info(
+                    f"MLX server started with model {model_id} (ready in {readiness.elapsed:.2f}s)"
+                )
                 return True
-            else:
-                logger.error("MLX server failed to start")
-                return False
+
+            logger.error(f"MLX server failed to start: {readiness.reason}")
+            await self.stop_server()
+            return False
 
         except Exception as e:
             logger.error(f"Error starting MLX server: {e}")
@@ -489,13 +626,33 @@ class MLXProvider(BaseProvider):
         if self.server_process:
             try:
                 self.server_process.terminate()
-                await self.server_process.wait()
+                try:
+                    await asyncio.wait_for(self.server_process.wait(), STOP_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("MLX server ignored SIGTERM, killing it")
+                    self.server_process.kill()
+                    await self.server_process.wait()
                 self.server_process = None
                 logger.info("MLX server stopped")
                 return True
             except Exception as e:
                 logger.error(f"Error stopping MLX server: {e}")
                 return False
+        if self.pid_file.exists():
+            try:
+                process = psutil.Process(int(self.pid_file.read_text()))
+                process.send_signal(signal.SIGTERM)
+                # Wait for the port to be released, not just for the signal to be sent
+                try:
+                    await asyncio.to_thread(process.wait, STOP_TIMEOUT)
+                except psutil.TimeoutExpired:
+                    logger.warning("MLX server ignored SIGTERM, killing it")
+                    process.kill()
+                    await asyncio.to_thread(process.wait, STOP_TIMEOUT)
+                logger.info("MLX server stopped")
+            except (OSError, ValueError, psutil.Error):
+                logger.warning("MLX process not found, cleaning up PID file")
+            self.pid_file.unlink(missing_ok=True)
         return True
 
     async def get_server_status(self) -> Dict[str, Any]:
@@ -3,16 +3,24 @@ Ollama Provider for local model hosting.
 """
 
 import asyncio
+import contextlib
+import hashlib
 import json
 import logging
 import os
 import subprocess
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 
 import aiohttp
 
+from ..blobstore import disk_usage
+from ..memory import ModelArchitecture
+from ..model_headers import GGUFReader, HeaderError, gguf_quantization
+from ..readiness import DEFAULT_STARTUP_TIMEOUT, OLLAMA_READY_PATTERN, wait_until_ready
+from ..verify import ExpectedFile
 from . import BaseProvider, ModelCapability, ModelInfo, ProviderType
 
 logger = logging.getLogger(__name__)
@@ -20,6 +28,119 @@ logger = logging.getLogger(__name__)
 # Use DOTFILES environment variable if set, otherwise fall back to default
 DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
 
+# Ollama's default on-disk model store
+OLLAMA_MODELS = Path.home() / ".ollama" / "models"
+OLLAMA_REGISTRY = "registry.ollama.ai"
+OLLAMA_MODEL_MEDIA_TYPE = "application/vnd.ollama.image.model"
+OLLAMA_PROJECTOR_MEDIA_TYPE = "application/vnd.ollama.image.projector"
+OLLAMA_MANIFEST_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+
+# Seconds between progress reports while a pull streams; finished layers always report
+PROGRESS_INTERVAL = 0.1
+# Weight of the newest sample in the smoothed pull rate
+RATE_SMOOTHING = 0.3
+# Seconds a pull may go quiet, e.g. while the server verifies a large blob
+PULL_READ_TIMEOUT = 600
+# Seconds to wait for a registry manifest; it is an optimization and must not stall a pull
+MANIFEST_TIMEOUT = 10
+# Grace period for a server that never became ready to exit before it is killed
+STOP_TIMEOUT = 10.0
+
+
+class PullProgress:
+    """Cumulative bytes of an Ollama pull, aggregated per layer digest.
+
+    ``/api/pull`` reports ``completed``/``total`` for one layer at a time.
+    Keeping the latest figures per digest and summing them gives progress
+    across the whole model that only moves forward; layer sizes from the
+    registry manifest, when known, fix the total from the start.
+    """
+
+    def __init__(
+        self,
+        sizes: Optional[Dict[str, int]] = None,
+        interval: float = PROGRESS_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize with the expected size of each layer by digest, if known."""
+        self.totals: Dict[str, int] = dict(sizes or {})
+        self.completed: Dict[str, int] = {}
+        self.interval = interval
+        # Smoothed bytes per second
+        self.rate = 0.0
+        self._clock = clock
+        self._started = clock()
+        self._sample: Optional[Tuple[float, int]] = None
+        self._reported_at: Optional[float] = None
+
+    @property
+    def completed_bytes(self) -> int:
+        """Bytes pulled so far across all layers."""
+        return sum(self.completed.values())
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes of all layers seen or expected."""
+        return sum(self.totals.values())
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate, None until there is a rate."""
+        if not self.rate:
+            return None
+        return max(self.total_bytes - self.completed_bytes, 0) / self.rate
+
+    @property
+    def average_rate(self) -> float:
+        """Bytes per second since the pull started."""
+        elapsed = self._clock() - self._started
+        return self.completed_bytes / elapsed if elapsed > 0 else 0.0
+
+    def update(self, status: Dict[str, Any]) -> bool:
+        """Fold in one status line. Returns whether progress is due to be reported."""
+        if "total" not in status:
+            return False
+        # Byte progress always names its layer; fall back to the status text
+        layer = status.get("digest") or status.get("status", "")
+        total = int(status["total"])
+        previous = self.completed.get(layer, 0)
+        self.totals[layer] = total
+        self.completed[layer] = max(previous, min(int(status.get("completed", 0)), total))
+
+        now = self._clock()
+        self._update_rate(now)
+        finished_layer = previous < total <= self.completed[layer]
+        if finished_layer:
+            logger.debug(
+                f"Pulled layer {layer}: {self.completed_bytes}/{self.total_bytes} bytes, "
+                f"{self.rate / 1024**2:.1f} MB/s, ETA {self.eta or 0:.0f}s"
+            )
+        if finished_layer or self._reported_at is None or now - self._reported_at >= self.interval:
+            self._reported_at = now
+            return True
+        return False
+
+    def _update_rate(self, now: float) -> None:
+        done = self.completed_bytes
+        if self._sample is None:
+            self._sample = (now, done)
+            return
+        then, done_then = self._sample
+        if now - then < self.interval:
+            return
+        instant = (done - done_then) / (now - then)
+        self.rate = (
+            instant
+            if not self.rate
+            else (RATE_SMOOTHING * instant + (1 - RATE_SMOOTHING) * self.rate)
+        )
+        self._sample = (now, done)
+
+
+def tagged_model_id(model_id: str) -> str:
+    """A model ID with its tag, ``:latest`` if it has none, as Ollama names installed models."""
+    return model_id if ":" in model_id.rsplit("/", 1)[-1] else f"{model_id}:latest"
+
 
 class OllamaProvider(BaseProvider):
     """Provider for Ollama models."""
@@ -41,6 +162,14 @@ class OllamaProvider(BaseProvider):
         super().__init__(config)
         self.port = config.get("port", 11434) if config else 11434
         self.api_url = f"http://localhost:{self.port}/api"
+        # OLLAMA_MODELS wins, as it does for ollama itself
+        models_dir = os.environ.get("OLLAMA_MODELS") or (config or {}).get("models_dir")
+        self.models_path = Path(models_dir).expanduser() if models_dir else OLLAMA_MODELS
+        self.gguf = GGUFReader()
+        # Session shared by concurrent pulls, and how many are using it
+        self._pull_client: Optional[aiohttp.ClientSession] = None
+        self._pull_stack: Optional[contextlib.AsyncExitStack] = None
+        self._pull_users = 0
 
     async def fetch_models(self, force_refresh: bool = False) -> List[ModelInfo]:
         """Fetch available Ollama models from API."""
@@ -65,9 +194,10 @@ class OllamaProvider(BaseProvider):
         except Exception as e:
             logger.warning(f"Failed to fetch Ollama models: {e}")
 
-        # Only use minimal fallback if API is completely unavailable
+        # Server down: read the installed library straight from disk, and
+        # only fall back to the minimal list if nothing is installed
         if not models:
-            models = self._get_minimal_fallback()
+            models = await self._scan_local_models() or self._get_minimal_fallback()
 
         self.models_cache = models
         self.last_fetch = datetime.now()
@@ -104,6 +234,10 @@ class OllamaProvider(BaseProvider):
                     size_bytes = model_data.get("size", 0)
                     size_gb = round(size_bytes / (1024**3), 1) if size_bytes else 1.0
 
+                    # Layer/head shapes size the KV cache in the RAM estimate
+                    architecture = ModelArchitecture.from_ollama_model_info(model_info_data)
+                    ram_gb = self.estimate_ram_usage(size_gb, architecture)
+
                     # Extract capabilities from API response
                     capabilities = self._extract_capabilities_from_api(details, model_name)
 
@@ -124,12 +258,12 @@ class OllamaProvider(BaseProvider):
                         name=model_name.split(":")[0],
                         provider="ollama",
                         size_gb=size_gb,
-                        ram_gb=size_gb * 1.2,  # Estimate RAM
+                        ram_gb=ram_gb,
                         context_window=context,
                         capabilities=capabilities,
                         online=False,
                         open_source=True,
-                        recommended_ram=int(size_gb * 1.5),
+                        recommended_ram=int(max(ram_gb, size_gb * 1.5)),
                         description=description,
                         metadata={
                             "downloaded": True,
@@ -140,6 +274,7 @@ class OllamaProvider(BaseProvider):
                             "parameter_size": param_size,
                             "quantization": quant,
                             "model_info": model_info_data,
+                            "architecture": architecture.to_dict() if architecture else None,
                         },
                     )
         except Exception as e:
@@ -174,6 +309,305 @@ class OllamaProvider(BaseProvider):
 
         return capabilities if capabilities else [ModelCapability.CHAT]
 
+    async def _scan_local_models(self) -> List[ModelInfo]:
+        """List installed models from manifests and GGUF headers, without the server."""
+        try:
+            return await asyncio.to_thread(self._read_local_library)
+        except Exception as e:
+            logger.debug(f"Error scanning local Ollama library: {e}")
+            return []
+
+    def _read_local_library(self) -> List[ModelInfo]:
+        """Walk ``manifests/<host>/<namespace>/<model>/<tag>`` and parse each model blob."""
+        manifests_dir = self.models_path / "manifests"
+        if not manifests_dir.exists():
+            return []
+
+        models = []
+        for manifest_path in sorted(manifests_dir.glob("*/*/*/*")):
+            if not manifest_path.is_file():
+                continue
+            model_info = self._parse_manifest(manifests_dir, manifest_path)
+            if model_info:
+                models.append(model_info)
+
+        self.gguf.save()
+        return models
+
+    def _manifest_path(self, model_id: str) -> Path:
+        """Where the manifest of a model is installed."""
+        name, _, tag = model_id.partition(":")
+        parts = name.split("/")
+        if len(parts) == 1:
+            parts = [OLLAMA_REGISTRY, "library", *parts]
+        elif len(parts) == 2:
+            parts = [OLLAMA_REGISTRY, *parts]
+        return self.models_path.joinpath("manifests", *parts, tag or "latest")
+
+    @staticmethod
+    def _manifest_model_id(manifests_dir: Path, manifest_path: Path) -> str:
+        """The model ID of an installed manifest, named as /api/tags names it."""
+        # Library models drop the registry prefix
+        host, namespace, name, tag = manifest_path.relative_to(manifests_dir).parts
+        if host == OLLAMA_REGISTRY:
+            model_name = name if namespace == "library" else f"{namespace}/{name}"
+        else:
+            model_name = f"{host}/{namespace}/{name}"
+        return f"{model_name}:{tag}"
+
+    def _read_manifest(self, model_id: str) -> Dict[str, Any]:
+        """The installed manifest of a model, empty if it isn't installed."""
+        try:
+            return json.loads(self._manifest_path(model_id).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _installed_manifests(self) -> Dict[str, Path]:
+        """Manifest path of every installed model, by model ID."""
+        manifests_dir = self.models_path / "manifests"
+        if not manifests_dir.exists():
+            return {}
+        return {
+            self._manifest_model_id(manifests_dir, path): path
+            for path in sorted(manifests_dir.glob("*/*/*/*"))
+            if path.is_file()
+        }
+
+    def _manifest_blobs(self, model_id: str) -> List[Path]:
+        """Every blob an installed model's manifest names."""
+        manifest = self._read_manifest(model_id)
+        layers = manifest.get("layers", []) + [manifest.get("config") or {}]
+        return [self._blob_path(layer["digest"]) for layer in layers if layer.get("digest")]
+
+    def _exclusive_blobs(self, model_id: str) -> List[Path]:
+        """Blobs of a model that no other installed model uses."""
+        shared = {
+            blob
+            for other in self._installed_manifests()
+            if other != model_id
+            for blob in self._manifest_blobs(other)
+        }
+        return [blob for blob in self._manifest_blobs(model_id) if blob not in shared]
+
+    def _blob_path(self, digest: str) -> Path:
+        """Where a layer's blob is stored."""
+        return self.models_path / "blobs" / digest.replace(":", "-")
+
+    def local_model_files(self, model_id: str) -> List[Path]:
+        """Return the weight blobs (model and projector layers) of an installed model."""
+        manifest = self._read_manifest(model_id)
+        weight_types = (OLLAMA_MODEL_MEDIA_TYPE, OLLAMA_PROJECTOR_MEDIA_TYPE)
+        blobs = [
+            self._blob_path(layer["digest"])
+            for layer in manifest.get("layers", [])
+            if layer.get("mediaType") in weight_types and layer.get("digest")
+        ]
+        return [blob for blob in blobs if blob.exists()]
+
+    async def expected_files(self, model_id: str) -> List[ExpectedFile]:
+        """Every blob the installed manifest names, with its digest and size."""
+        manifest = self._read_manifest(model_id)
+        layers = manifest.get("layers", []) + [manifest.get("config") or {}]
+        return [
+            ExpectedFile(
+                self._blob_path(layer["digest"]),
+                layer["digest"].partition("sha256:")[2] or None,
+                layer.get("size"),
+            )
+            for layer in layers
+            if layer.get("digest")
+        ]
+
+    def download_dir(self) -> Path:
+        """Ollama stores models under its models directory."""
+        return self.models_path
+
+    async def local_models(self) -> List[str]:
+        """Installed models, from the manifests on disk."""
+        return list(await asyncio.to_thread(self._installed_manifests))
+
+    def model_disk_bytes(self, model_id: str) -> int:
+        """Bytes deleting the model would free: blobs no other tag shares."""
+        return disk_usage(blob for blob in self._exclusive_blobs(model_id) if blob.exists())
+
+    async def delete_model(self, model_id: str) -> bool:
+        """Delete a model through the server, or from disk when it isn't running."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.delete(
+                    f"{self.api_url}/delete", json={"model": model_id}
+                ) as response:
+                    if response.status == 200:
+                        logger.info(f"Deleted {model_id}")
+                        return True
+                    logger.error(f"Failed to delete {model_id}: HTTP {response.status}")
+                    return False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Ollama server unavailable, deleting {model_id} from disk: {e}")
+
+        manifest_path = self._manifest_path(model_id)
+        if not manifest_path.exists():
+            return False
+        blobs = self._exclusive_blobs(model_id)
+        manifest_path.unlink()
+        for blob in blobs:
+            try:
+                blob.unlink()
+            except OSError:
+                pass
+        logger.info(f"Deleted {model_id} from {self.models_path}")
+        return True
+
+    async def _registry_manifest(
+        self, model_id: str, session: Optional[aiohttp.ClientSession] = None
+    ) -> Dict[str, Any]:
+        """A model's manifest as published in the registry, empty if it can't be fetched.
+
+        Models hosted on other registries (``host/namespace/name``) are not
+        looked up.
+        """
+        name, _, tag = model_id.partition(":")
+        if name.count("/") > 1:
+            return {}
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self._registry_manifest(model_id, session)
+
+        if "/" not in name:
+            name = f"library/{name}"
+        registry_url = self.config.get("registry_url", f"https://{OLLAMA_REGISTRY}")
+        url = f"{registry_url}/v2/{name}/manifests/{tag or 'latest'}"
+        headers = {"Accept": OLLAMA_MANIFEST_MEDIA_TYPE}
+        # Bounded on its own: the pull session has no connect limit
+        timeout = aiohttp.ClientTimeout(total=MANIFEST_TIMEOUT)
+        try:
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                if response.status == 200:
+                    manifest = await response.json(content_type=None)
+                    return manifest if isinstance(manifest, dict) else {}
+                logger.debug(f"No registry manifest for {model_id}: HTTP {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"Could not fetch the manifest of {model_id}: {e}")
+        return {}
+
+    async def download_size(self, model_id: str) -> Optional[int]:
+        """Bytes of the model's layers, from its manifest in the registry."""
+        manifest = await self._registry_manifest(model_id)
+        if manifest:
+            layers = manifest.get("layers", []) + [manifest.get("config") or {}]
+            return sum(int(layer.get("size", 0)) for layer in layers)
+        return await super().download_size(model_id)
+
+    async def _link_stored_layers(self, manifest: Dict[str, Any]) -> int:
+        """Link layers the blob store holds into Ollama's blobs, so the pull skips them."""
+        linked = 0
+        for layer in manifest.get("layers", []) + [manifest.get("config") or {}]:
+            digest = layer.get("digest", "").partition("sha256:")[2]
+            if not digest or self._blob_path(layer["digest"]).exists():
+                continue
+            target = self._blob_path(layer["digest"])
+            if await asyncio.to_thread(self.blob_store.link, digest, target):
+                linked += 1
+        return linked
+
+    def _store_layers(self, model_id: str) -> None:
+        """Add an installed model's blobs to the blob store."""
+        manifest = self._read_manifest(model_id)
+        for layer in manifest.get("layers", []) + [manifest.get("config") or {}]:
+            digest = layer.get("digest", "").partition("sha256:")[2]
+            if digest:
+                # Ollama checked the digest as it pulled
+                self.blob_store.add(self._blob_path(layer["digest"]), digest)
+
+    def _parse_manifest(self, manifests_dir: Path, manifest_path: Path) -> Optional[ModelInfo]:
+        """Build a ModelInfo from one manifest and the GGUF header of its model layer."""
+        try:
+            raw = manifest_path.read_bytes()
+            manifest = json.loads(raw)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Skipping unreadable manifest {manifest_path}: {e}")
+            return None
+
+        layers = manifest.get("layers", [])
+        model_layer = next(
+            (layer for layer in layers if layer.get("mediaType") == OLLAMA_MODEL_MEDIA_TYPE), None
+        )
+        if not model_layer or not model_layer.get("digest"):
+            return None
+
+        digest = model_layer["digest"]
+        blob_path = self.models_path / "blobs" / digest.replace(":", "-")
+        try:
+            header = self.gguf.read_header(blob_path, digest=digest)
+        except (OSError, HeaderError) as e:
+            logger.debug(f"Skipping {manifest_path}: {e}")
+            return None
+
+        model_id = self._manifest_model_id(manifests_dir, manifest_path)
+        model_name = model_id.rpartition(":")[0]
+
+        metadata = header["metadata"]
+        parameter_count = metadata.get("general.parameter_count") or header["parameter_count"]
+        architecture = ModelArchitecture.from_ollama_model_info(
+            {**metadata, "general.parameter_count": parameter_count}
+        )
+
+        size_bytes = sum(layer.get("size", 0) for layer in layers)
+        size_gb = round(size_bytes / (1024**3), 1) if size_bytes else 1.0
+        ram_gb = self.estimate_ram_usage(size_gb, architecture)
+
+        family = metadata.get("general.architecture", "")
+        param_size = self._format_parameter_size(parameter_count)
+        quant = gguf_quantization(metadata)
+        has_projector = any(
+            layer.get("mediaType") == OLLAMA_PROJECTOR_MEDIA_TYPE for layer in layers
+        )
+        capabilities = self._extract_capabilities_from_api(
+            {"capabilities": ["completion", "vision"] if has_projector else ["completion"]},
+            model_id,
+        )
+
+        description = f"{family} {param_size} model" if family else f"Ollama model {param_size}"
+        if quant:
+            description += f" ({quant} quantization)"
+
+        return ModelInfo(
+            id=model_id,
+            name=model_name,
+            provider="ollama",
+            size_gb=size_gb,
+            ram_gb=ram_gb,
+            context_window=architecture.max_context
+            if architecture and architecture.max_context
+            else 8192,
+            capabilities=capabilities,
+            online=False,
+            open_source=True,
+            recommended_ram=int(max(ram_gb, size_gb * 1.5)),
+            description=description,
+            metadata={
+                "downloaded": True,
+                "modified_at": datetime.fromtimestamp(manifest_path.stat().st_mtime).isoformat(),
+                "digest": hashlib.sha256(raw).hexdigest(),
+                "format": "gguf",
+                "family": family,
+                "parameter_size": param_size,
+                "parameter_count": parameter_count,
+                "quantization": quant,
+                "architecture": architecture.to_dict() if architecture else None,
+                "source": "manifest",
+            },
+        )
+
+    @staticmethod
+    def _format_parameter_size(parameter_count: int) -> str:
+        """Format a parameter count the way Ollama does (e.g. ``8.0B``)."""
+        if parameter_count >= 1e9:
+            return f"{parameter_count / 1e9:.1f}B"
+        if parameter_count >= 1e6:
+            return f"{parameter_count / 1e6:.0f}M"
+        return str(parameter_count)
+
     def _get_minimal_fallback(self) -> List[ModelInfo]:
         """Minimal fallback when API is unavailable."""
         # Only the most essential models
@@ -238,7 +672,7 @@ class OllamaProvider(BaseProvider):
             name=name.split(":")[0],
             provider="ollama",
             size_gb=size_gb,
-            ram_gb=size_gb * 1.2,
+            ram_gb=self.estimate_ram_usage(size_gb),
             context_window=8192,  # Conservative default
             capabilities=caps,
             online=False,
@@ -257,51 +691,122 @@ class OllamaProvider(BaseProvider):
         )
 
     async def download_model(self, model_id: str, progress_callback=None) -> bool:
-        """Download an Ollama model."""
+        """Pull a model through the Ollama server.
+
+        Progress is cumulative across layers (see PullProgress) and reported
+        at most every ``PROGRESS_INTERVAL`` seconds. Pulls running at once
+        share one connection pool.
+        """
         try:
-            async with aiohttp.ClientSession() as session:
-                data = {"name": model_id, "stream": True}
+            async with self._pull_session() as session:
+                manifest = await self._registry_manifest(model_id, session)
+                if self.blob_store:
+                    linked = await self._link_stored_layers(manifest)
+                    if linked:
+                        logger.info(f"Linked {linked} stored layers of {model_id}")
+                layers = manifest.get("layers", []) + [manifest.get("config") or {}]
+                progress = PullProgress(
+                    {
+                        layer["digest"]: int(layer.get("size", 0))
+                        for layer in layers
+                        if "digest" in layer
+                    }
+                )
 
+                data = {"name": model_id, "stream": True}
                 async with session.post(f"{self.api_url}/pull", json=data) as response:
                     if response.status != 200:
                         logger.error(f"Failed to pull model {model_id}: HTTP {response.status}")
                         return False
 
-                    total_size = 0
-                    completed = 0
-
                     async for line in response.content:
-                        if line:
-                            try:
-                                # Decode and parse the JSON status
-                                status = json.loads(line.decode())
-
-                                # Parse Ollama's pull status which includes total/completed
-                                if "total" in status and "completed" in status:
-                                    total_size = status["total"]
-                                    completed = status["completed"]
-
-                                    if progress_callback and total_size > 0:
-                                        progress_callback(completed, total_size)
-
-                                # Check for completion
-                                if status.get("status") == "success":
-                                    logger.info(f"Successfully downloaded {model_id}")
-                                    return True
-
-                                # Check for errors
-                                if "error" in status:
-                                    logger.error(f"Error downloading {model_id}: {status['error']}")
-                                    return False
-
-                            except (json.JSONDecodeError, UnicodeDecodeError):
-                                pass
+                        if not line:
+                            continue
+                        try:
+                            status = json.loads(line.decode())
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            continue
+
+                        if "error" in status:
+                            logger.error(f"Error downloading {model_id}: {status['error']}")
+                            return False
+
+                        if progress.update(status) and progress_callback:
+                            progress_callback(progress.completed_bytes, progress.total_bytes)
+
+                        if status.get("status") == "success":
+                            if progress_callback and progress.total_bytes:
+                                progress_callback(progress.total_bytes, progress.total_bytes)
+                            logger.info(
+                                f"Successfully downloaded {model_id} "
+                                f"({progress.total_bytes / 1024**3:.2f}GB at "
+                                f"{progress.average_rate / 1024**2:.1f} MB/s)"
+                            )
+                            if self.blob_store:
+                                await asyncio.to_thread(self._store_layers, model_id)
+                            return True
 
             return True
         except Exception as e:
             logger.error(f"Failed to download Ollama model {model_id}: {e}")
             return False
 
+    @contextlib.asynccontextmanager
+    async def _pull_session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """One session for all pulls running at once, closed when the last one ends."""
+        if self._pull_users == 0:
+            # Entering a ClientSession doesn't suspend, so no other pull can
+            # see the count at zero while this one opens the session
+            self._pull_stack = contextlib.AsyncExitStack()
+            timeout = aiohttp.ClientTimeout(total=None, sock_read=PULL_READ_TIMEOUT)
+            self._pull_client = await self._pull_stack.enter_async_context(
+                aiohttp.ClientSession(timeout=timeout)
+            )
+        client, stack = self._pull_client, self._pull_stack
+        self._pull_users += 1
+        try:
+            yield client
+        finally:
+            self._pull_users -= 1
+            if self._pull_users == 0:
+                # Detach before closing: closing suspends, and a pull starting
+                # meanwhile opens a session of its own that must stay put
+                if self._pull_client is client:
+                    self._pull_client = None
+                    self._pull_stack = None
+                await stack.aclose()
+
+    async def load_model(self, model_id: str, keep_alive: Union[str, int] = "5m") -> bool:
+        """Load a model into memory without generating, keeping it for ``keep_alive``."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.api_url}/generate", json={"model": model_id, "keep_alive": keep_alive}
+                ) as response:
+                    if response.status == 200:
+                        logger.info(f"Loaded {model_id} (keep_alive={keep_alive})")
+                        return True
+                    logger.warning(f"Failed to load {model_id}: HTTP {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Failed to load {model_id}: {e}")
+        return False
+
+    async def unload_model(self, model_id: str) -> bool:
+        """Evict a model from memory; Ollama reloads it on the next request."""
+        return await self.load_model(model_id, keep_alive=0)
+
+    async def list_loaded_models(self) -> List[Dict[str, Any]]:
+        """Return the models currently in memory (``/api/ps``)."""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{self.api_url}/ps") as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        return data.get("models", [])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Could not list loaded Ollama models: {e}")
+        return []
+
     async def is_model_available(self, model_id: str) -> bool:
         """Check if a model is available locally."""
         try:
@@ -318,6 +823,9 @@ class OllamaProvider(BaseProvider):
 
     async def start_server(self, model_id: str, **kwargs) -> bool:
         """Start Ollama server on-demand."""
+        # Warm the model's blobs so its first load comes from the page cache
+        await self.prewarm(model_id)
+
         # Check if Ollama is already running
         try:
             async with aiohttp.ClientSession() as session:
@@ -343,9 +851,28 @@ class OllamaProvider(BaseProvider):
             pid_file = DOTFILES / "config/cortex/ollama_server.pid"
             pid_file.write_text(str(process.pid))
 
-            # Wait for server to be ready
-            await asyncio.sleep(2)
-            logger.info(f"Ollama server started (PID: {process.pid})")
+            # Return as soon as the server answers rather than after a fixed sleep
+            readiness = await wait_until_ready(
+                f"{self.api_url}/tags",
+                timeout=self.config.get("startup_timeout", DEFAULT_STARTUP_TIMEOUT),
+                is_alive=lambda: process.poll() is None,
+                log_file=log_file,
+                ready_pattern=OLLAMA_READY_PATTERN,
+            )
+            if not readiness:
+                logger.error(f"Ollama server failed to start: {readiness.reason}")
+                # Don't leave the half-started server running with a PID file pointing at it
+                process.terminate()
+                try:
+                    await asyncio.to_thread(process.wait, STOP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                pid_file.unlink(missing_ok=True)
+                return False
+
+            logger.info(
+                f"Ollama server started (PID: {process.pid}, ready in {readiness.elapsed:.2f}s)"
+            )
             return True
         except FileNotFoundError:
             logger.error("Ollama not found. Install with: brew install ollama")
@@ -0,0 +1,146 @@
+"""
+Server readiness probing for locally started model servers.
+
+Instead of sleeping a fixed time after spawning ``mlx_lm.server`` or
+``ollama serve``, poll the server's HTTP endpoint with exponential backoff
+until it answers or a deadline passes. If the server writes a log file, the
+wait between probes is cut short as soon as its ready line appears, so a
+small model is reported ready within milliseconds of binding its port while
+a large one gets the full deadline to load.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for a server before giving up (providers.<name>.startup_timeout)
+DEFAULT_STARTUP_TIMEOUT = 120.0
+
+# Backoff between probes: 50ms doubling up to 1s
+INITIAL_PROBE_DELAY = 0.05
+MAX_PROBE_DELAY = 1.0
+
+# Per-probe HTTP timeout
+PROBE_TIMEOUT = 2.0
+
+# How often the log file is checked while waiting between probes
+LOG_POLL_INTERVAL = 0.05
+
+# Lines servers print once they accept connections
+MLX_READY_PATTERN = r"Starting httpd"
+OLLAMA_READY_PATTERN = r"Listening on"
+
+
+@dataclass
+class ReadinessResult:
+    """Outcome of waiting for a server."""
+
+    ready: bool
+    elapsed: float
+    attempts: int
+    reason: str = ""
+
+    def __bool__(self) -> bool:
+        return self.ready
+
+
+class _LogWatcher:
+    """Look for a ready line in the part of a log written after startup."""
+
+    def __init__(self, log_file: Path, pattern: str):
+        self.log_file = Path(log_file)
+        self.pattern = re.compile(pattern)
+        try:
+            self.offset = self.log_file.stat().st_size
+        except OSError:
+            self.offset = 0
+
+    def check(self) -> bool:
+        try:
+            with open(self.log_file, "rb") as f:
+                f.seek(self.offset)
+                chunk = f.read()
+        except OSError:
+            return False
+
+        # Only advance past complete lines so a ready line split across
+        # writes is still matched on the next check
+        end = chunk.rfind(b"\n") + 1
+        if end:
+            self.offset += end
+            return bool(self.pattern.search(chunk[:end].decode(errors="replace")))
+        return False
+
+
+async def _probe(session: aiohttp.ClientSession, url: str) -> bool:
+    """Return True if the server answered (any non-5xx status)."""
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT)) as resp:
+            return resp.status < 500
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+        return False
+
+
+async def wait_until_ready(
+    url: str,
+    timeout: float = DEFAULT_STARTUP_TIMEOUT,
+    is_alive: Optional[Callable[[], bool]] = None,
+    log_file: Optional[Path] = None,
+    ready_pattern: Optional[str] = None,
+) -> ReadinessResult:
+    """Poll ``url`` until the server answers, its process dies, or ``timeout`` passes.
+
+    Args:
+        url: Endpoint that answers once the server accepts requests
+            (``/v1/models`` for MLX, ``/api/tags`` for Ollama)
+        timeout: Deadline in seconds
+        is_alive: Returns False once the server process has exited
+        log_file: Server log to watch for ``ready_pattern``
+        ready_pattern: Regex matching the server's ready line
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    watcher = _LogWatcher(log_file, ready_pattern) if log_file and ready_pattern else None
+    delay = INITIAL_PROBE_DELAY
+    attempts = 0
+
+    def result(ready: bool, reason: str = "") -> ReadinessResult:
+        return ReadinessResult(ready, time.monotonic() - start, attempts, reason)
+
+    async with aiohttp.ClientSession() as session:
+        while True:
+            attempts += 1
+            if await _probe(session, url):
+                return result(True)
+
+            if is_alive is not None and not is_alive():
+                return result(False, "server process exited")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return result(False, f"not ready after {timeout:.0f}s")
+
+            # Wait for the next probe, waking early if the log says ready
+            delay = min(delay, remaining)
+            if watcher is None:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_PROBE_DELAY)
+                continue
+
+            wait_until = time.monotonic() + delay
+            delay = min(delay * 2, MAX_PROBE_DELAY)
+            while time.monotonic() < wait_until:
+                if watcher.check():
+                    # Probe right away, then back off from the start again
+                    watcher = None
+                    delay = INITIAL_PROBE_DELAY
+                    break
+                await asyncio.sleep(min(LOG_POLL_INTERVAL, wait_until - time.monotonic()))
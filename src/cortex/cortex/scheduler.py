@@ -0,0 +1,99 @@
+"""
+RAM-budgeted scheduling of local model runs.
+
+Every local run loads its full weights, so starting all ensemble members at
+once only works while they fit in memory together. The scheduler admits
+runs in arrival order for as long as their estimated footprints fit the
+budget and queues the rest; a model too big to share runs alone. An
+oversubscribed ensemble then runs in sequential waves instead of swapping.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, List, Optional
+
+import psutil
+
+from .memory import RAM_HEADROOM_GB
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Reservation:
+    """Memory held by one admitted run."""
+
+    model_id: str
+    ram_gb: float
+    waited: float
+
+
+class MemoryBudgetScheduler:
+    """Admit local model runs only while their footprints fit together.
+
+    Admission is FIFO so a large model queued behind small ones is never
+    starved. A run whose footprint is unknown reserves the whole budget.
+    """
+
+    def __init__(self, budget_gb: float):
+        """Initialize with the RAM (GB) local runs may use together."""
+        self.budget_gb = budget_gb
+        self.in_use_gb = 0.0
+        self.running: List[Reservation] = []
+        self.peak_gb = 0.0
+        self.max_concurrency = 0
+        self._queue: Deque[object] = deque()
+        # Created lazily so it binds to the running event loop
+        self._condition: Optional[asyncio.Condition] = None
+
+    @classmethod
+    def from_available_memory(cls, headroom_gb: float = RAM_HEADROOM_GB) -> "MemoryBudgetScheduler":
+        """Budget the currently available RAM minus headroom for everything else."""
+        available_gb = psutil.virtual_memory().available / (1024**3)
+        return cls(max(available_gb - headroom_gb, 0.0))
+
+    def fits(self, ram_gb: float) -> bool:
+        """Whether a run of ``ram_gb`` could start now; an idle scheduler admits anything."""
+        return not self.running or self.in_use_gb + ram_gb <= self.budget_gb
+
+    @asynccontextmanager
+    async def reserve(self, model_id: str, ram_gb: Optional[float]) -> AsyncIterator[Reservation]:
+        """Wait until ``model_id`` fits, hold its memory for the block, then release it."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        condition = self._condition
+        ram = self.budget_gb if ram_gb is None else ram_gb
+        ticket = object()
+        start = time.monotonic()
+
+        async with condition:
+            self._queue.append(ticket)
+            try:
+                await condition.wait_for(lambda: self._queue[0] is ticket and self.fits(ram))
+            except BaseException:
+                self._queue.remove(ticket)
+                condition.notify_all()
+                raise
+            self._queue.popleft()
+
+            reservation = Reservation(model_id, ram, time.monotonic() - start)
+            self.running.append(reservation)
+            self.in_use_gb += ram
+            self.peak_gb = max(self.peak_gb, self.in_use_gb)
+            self.max_concurrency = max(self.max_concurrency, len(self.running))
+            # The next run in line may fit alongside this one
+            condition.notify_all()
+
+        if reservation.waited >= 0.1:
+            logger.info(f"{model_id} waited {reservation.waited:.1f}s for {ram:.1f}GB of RAM")
+        try:
+            yield reservation
+        finally:
+            async with condition:
+                self.running.remove(reservation)
+                self.in_use_gb -= ram
+                condition.notify_all()
@@ -5,6 +5,7 @@ Statistics tracking and analytics for Cortex.
 import json
 import logging
 import os
+import statistics
 import time
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
@@ -13,6 +14,9 @@ from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Throughput samples kept per model
+THROUGHPUT_HISTORY = 50
+
 # Use DOTFILES environment variable if set, otherwise fall back to default
 DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
 
@@ -66,6 +70,7 @@ class StatisticsTracker:
         self.sessions_file = self.stats_dir / "sessions.json"
         self.models_file = self.stats_dir / "models.json"
         self.daily_file = self.stats_dir / "daily.json"
+        self.throughput_file = self.stats_dir / "throughput.json"
 
         self.current_session = None
         self.sessions = self._load_sessions()
@@ -267,6 +272,67 @@ class StatisticsTracker:
         except Exception as e:
             logger.error(f"Failed to update daily stats: {e}")
 
+    def record_throughput(
+        self,
+        model: str,
+        provider: str,
+        decode_tokens_per_second: float,
+        prefill_tokens_per_second: Optional[float] = None,
+        context_tokens: Optional[int] = None,
+        source: str = "chat",
+    ):
+        """Record a measured generation speed for a model."""
+        if decode_tokens_per_second <= 0:
+            return
+        try:
+            data = {}
+            if self.throughput_file.exists():
+                with open(self.throughput_file) as f:
+                    data = json.load(f)
+
+            samples = data.setdefault(f"{provider}:{model}", [])
+            samples.append(
+                {
+                    "timestamp": time.time(),
+                    "decode_tokens_per_second": decode_tokens_per_second,
+                    "prefill_tokens_per_second": prefill_tokens_per_second,
+                    "context_tokens": context_tokens,
+                    "source": source,
+                }
+            )
+            data[f"{provider}:{model}"] = samples[-THROUGHPUT_HISTORY:]
+
+            with open(self.throughput_file, "w") as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            logger.error(f"Failed to record throughput: {e}")
+
+    def throughput_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Median measured speeds per ``provider:model``."""
+        try:
+            with open(self.throughput_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        summary = {}
+        for model_key, samples in data.items():
+            if not samples:
+                continue
+
+            def median(field):
+                values = [s[field] for s in samples if s.get(field)]
+                return statistics.median(values) if values else None
+
+            summary[model_key] = {
+                "decode_tokens_per_second": median("decode_tokens_per_second"),
+                "prefill_tokens_per_second": median("prefill_tokens_per_second"),
+                "context_tokens": median("context_tokens"),
+                "samples": len(samples),
+                "last_measured": max(s.get("timestamp", 0) for s in samples),
+            }
+        return summary
+
     def estimate_tokens(self, text: str) -> int:
         """Estimate token count for text."""
         # Rough approximation: 1 token ≈ 4 characters or 0.75 words
@@ -2,17 +2,29 @@
 System utilities for detecting hardware capabilities and making recommendations.
 """
 
+import asyncio
+import hashlib
+import heapq
 import logging
 import platform
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 import psutil
 
+from .cache import cache_path, load_json, save_json
+from .coresidency import DEFAULT_ROLES, ROLE_CONTEXT_LENGTHS, Candidate, plan_coresidency
+from .memory import DEFAULT_CONTEXT_LENGTH, MemoryEstimator
+
 logger = logging.getLogger(__name__)
 
+# Size classes recommendations should span before filling purely by rank
+MIN_SIZE_CLASSES = 3
+
 
 class SystemType(Enum):
     """System type classification."""
@@ -53,39 +65,152 @@ class SystemInfo:
 
 
 class SystemDetector:
-    """Detect system capabilities and specifications."""
+    """Detect system capabilities and specifications.
+
+    The static part of the profile (OS, CPU, GPU, total RAM, platform details)
+    is expensive to probe - ``system_profiler`` alone takes seconds on macOS -
+    and never changes between boots, so it is cached on disk keyed by a
+    hardware fingerprint. Only available RAM is sampled on every call.
+    """
+
+    CACHE_FILE = cache_path("hardware.json")
+
+    # In-process copy of the static profile: (fingerprint, profile)
+    _profile_memo: Optional[Tuple[str, Dict[str, Any]]] = None
 
     @staticmethod
-    def detect_system() -> SystemInfo:
+    def detect_system(use_cache: bool = True) -> SystemInfo:
         """Detect and return system information."""
-        os_type = SystemDetector._detect_os_type()
-        cpu_info = SystemDetector._get_cpu_info()
         memory_info = SystemDetector._get_memory_info()
-        gpu_info = SystemDetector._get_gpu_info(os_type)
+        fingerprint = SystemDetector._hardware_fingerprint(memory_info.get("total_bytes"))
+
+        profile = SystemDetector._load_static_profile(fingerprint) if use_cache else None
+        if profile is None:
+            profile = SystemDetector._probe_static_profile(memory_info["ram_gb"])
+            SystemDetector._store_static_profile(fingerprint, profile)
+
+        return SystemDetector._build_system_info(profile, memory_info)
+
+    @staticmethod
+    async def detect_system_async(use_cache: bool = True) -> SystemInfo:
+        """Detect system information without blocking the event loop."""
+        return await asyncio.to_thread(SystemDetector.detect_system, use_cache)
 
-        # Determine performance tier
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget the cached static profile (in memory and on disk)."""
+        SystemDetector._profile_memo = None
+        try:
+            SystemDetector.CACHE_FILE.unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _boot_id() -> str:
+        """Return an identifier that changes on every boot."""
+        try:
+            # Linux exposes a random per-boot UUID
+            with open("/proc/sys/kernel/random/boot_id", "r") as f:
+                return f.read().strip()
+        except OSError:
+            pass
+        try:
+            return str(int(psutil.boot_time()))
+        except Exception:
+            return "unknown"
+
+    @staticmethod
+    def _hardware_fingerprint(total_ram_bytes: Optional[int] = None) -> str:
+        """Fingerprint the machine so a cached profile is never reused elsewhere."""
+        parts = [
+            SystemDetector._boot_id(),
+            platform.system(),
+            platform.machine(),
+            platform.node(),
+            str(psutil.cpu_count() or 0),
+            str(total_ram_bytes or 0),
+        ]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _load_static_profile(fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the cached static profile if it matches this machine and boot."""
+        memo = SystemDetector._profile_memo
+        if memo and memo[0] == fingerprint:
+            return memo[1]
+
+        cached = load_json(SystemDetector.CACHE_FILE)
+        if not isinstance(cached, dict) or cached.get("fingerprint") != fingerprint:
+            return None
+
+        profile = cached.get("profile")
+        if not isinstance(profile, dict):
+            return None
+
+        SystemDetector._profile_memo = (fingerprint, profile)
+        return profile
+
+    @staticmethod
+    def _store_static_profile(fingerprint: str, profile: Dict[str, Any]) -> None:
+        """Persist the static profile for the next process."""
+        SystemDetector._profile_memo = (fingerprint, profile)
+        save_json(
+            SystemDetector.CACHE_FILE,
+            {"fingerprint": fingerprint, "created_at": time.time(), "profile": profile},
+        )
+
+    @staticmethod
+    def _probe_static_profile(ram_gb: float) -> Dict[str, Any]:
+        """Probe the slow, static hardware facts with the subprocess probes in parallel."""
+        os_type = SystemDetector._detect_os_type()
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            cpu_future = executor.submit(SystemDetector._get_cpu_info)
+            gpu_future = executor.submit(SystemDetector._get_gpu_info, os_type, ram_gb)
+            platform_future = executor.submit(platform.platform)
+            cpu_info = cpu_future.result()
+            gpu_info = gpu_future.result()
+            platform_name = platform_future.result()
+
+        return {
+            "os_type": os_type.value,
+            "cpu_model": cpu_info["model"],
+            "cpu_cores": cpu_info["cores"],
+            "ram_gb": ram_gb,
+            "gpu_info": gpu_info.get("name", "Unknown"),
+            "gpu_memory_gb": gpu_info.get("memory_gb"),
+            "has_neural_engine": gpu_info.get("has_neural_engine", False),
+            "has_cuda": gpu_info.get("has_cuda", False),
+            "has_metal": gpu_info.get("has_metal", False),
+            "platform_details": {
+                "platform": platform_name,
+                "processor": platform.processor(),
+                "machine": platform.machine(),
+                "python_version": platform.python_version(),
+            },
+        }
+
+    @staticmethod
+    def _build_system_info(profile: Dict[str, Any], memory_info: Dict[str, Any]) -> SystemInfo:
+        """Combine the static profile with freshly sampled memory figures."""
+        os_type = SystemType(profile["os_type"])
         performance_tier = SystemDetector._calculate_performance_tier(
-            memory_info["ram_gb"], gpu_info.get("memory_gb"), os_type
+            profile["ram_gb"], profile.get("gpu_memory_gb"), os_type
         )
 
         return SystemInfo(
             os_type=os_type,
-            cpu_model=cpu_info["model"],
-            cpu_cores=cpu_info["cores"],
-            ram_gb=memory_info["ram_gb"],
+            cpu_model=profile["cpu_model"],
+            cpu_cores=profile["cpu_cores"],
+            ram_gb=profile["ram_gb"],
             ram_available_gb=memory_info["available_gb"],
-            gpu_info=gpu_info.get("name", "Unknown"),
-            gpu_memory_gb=gpu_info.get("memory_gb"),
+            gpu_info=profile["gpu_info"],
+            gpu_memory_gb=profile.get("gpu_memory_gb"),
             performance_tier=performance_tier,
-            has_neural_engine=gpu_info.get("has_neural_engine", False),
-            has_cuda=gpu_info.get("has_cuda", False),
-            has_metal=gpu_info.get("has_metal", False),
-            platform_details={
-                "platform": platform.platform(),
-                "processor": platform.processor(),
-                "machine": platform.machine(),
-                "python_version": platform.python_version(),
-            },
+            has_neural_engine=profile.get("has_neural_engine", False),
+            has_cuda=profile.get("has_cuda", False),
+            has_metal=profile.get("has_metal", False),
+            platform_details=dict(profile.get("platform_details", {})),
         )
 
     @staticmethod
@@ -157,13 +282,14 @@ class SystemDetector:
                 "available_gb": round(mem.available / (1024**3), 1),
                 "used_gb": round(mem.used / (1024**3), 1),
                 "percent": mem.percent,
+                "total_bytes": mem.total,
             }
         except Exception as e:
             logger.warning(f"Failed to get memory info: {e}")
             return {"ram_gb": 8.0, "available_gb": 4.0, "used_gb": 4.0, "percent": 50}
 
     @staticmethod
-    def _get_gpu_info(os_type: SystemType) -> Dict[str, Any]:
+    def _get_gpu_info(os_type: SystemType, ram_gb: Optional[float] = None) -> Dict[str, Any]:
         """Get GPU information based on OS type."""
         gpu_info = {}
 
@@ -205,8 +331,9 @@ class SystemDetector:
 
                     # For unified memory, GPU memory is shared with system RAM
                     # Estimate available GPU memory as ~75% of total RAM
-                    mem_info = SystemDetector._get_memory_info()
-                    gpu_info["memory_gb"] = round(mem_info["ram_gb"] * 0.75, 1)
+                    if ram_gb is None:
+                        ram_gb = SystemDetector._get_memory_info()["ram_gb"]
+                    gpu_info["memory_gb"] = round(ram_gb * 0.75, 1)
 
                 except (AttributeError, KeyError):
                     pass
@@ -286,6 +413,10 @@ class ModelRecommender:
         max_recommendations: int = 10,
         prefer_local: bool = True,
         capability_filter: Optional[str] = None,
+        context_length: Optional[int] = None,
+        concurrency: int = 1,
+        measurements: Optional[Dict[str, Dict[str, Any]]] = None,
+        collapse_variants: bool = True,
     ) -> List[Any]:
         """Recommend models based on system capabilities.
 
@@ -295,6 +426,13 @@ class ModelRecommender:
             max_recommendations: Maximum number of recommendations
             prefer_local: Prefer local models over cloud models
             capability_filter: Filter by specific capability (code, vision, etc.)
+            context_length: Context length the model must hold (default: 8K)
+            concurrency: Number of sequences served at once
+            measurements: Measured throughput per ``provider:model`` (see
+                ``StatisticsTracker.throughput_summary``). When given, local
+                models are ranked by measured or predicted decode speed.
+            collapse_variants: Consider only the best quantization variant of
+                each base model (see ``variants.collapse_variants``)
 
         Returns:
             List of recommended models sorted by suitability
@@ -302,8 +440,6 @@ class ModelRecommender:
         if not models:
             return []
 
-        recommendations = []
-
         # Apply capability filter if specified
         filtered_models = models
         if capability_filter:
@@ -312,71 +448,186 @@ class ModelRecommender:
             cap_enum = ModelCapability(capability_filter)
             filtered_models = [m for m in models if cap_enum in m.capabilities]
 
+        speed_model = None
+        if measurements is not None:
+            from .throughput import ThroughputModel
+
+            speed_model = ThroughputModel.fit(system_info, filtered_models, measurements)
+        speed_context = context_length or DEFAULT_CONTEXT_LENGTH
+
+        if collapse_variants:
+            from .variants import collapse_variants as collapse
+
+            # Score one variant per base model: the one that suits this machine
+            filtered_models = collapse(
+                filtered_models, system_info, context_length, concurrency, speed_model
+            )
+
         # Filter models that can run on this system
+        estimator = MemoryEstimator()
         viable_models = []
+        online_models = []
         for model in filtered_models:
             # Online models are always viable
             if model.online:
-                if not prefer_local or len(viable_models) < max_recommendations // 2:
-                    fitness_score = ModelRecommender._calculate_fitness_score(
-                        model, system_info, prefer_local
-                    )
-                    model.metadata["fitness_score"] = fitness_score
-                    viable_models.append(model)
+                fitness_score = ModelRecommender._calculate_fitness_score(
+                    model, system_info, prefer_local
+                )
+                model.metadata["fitness_score"] = fitness_score
+                online_models.append(model)
             else:
-                # Check if model can fit in available RAM (with safety margin)
-                required_ram = model.ram_gb * 1.2  # 20% safety margin
+                # Check if model can fit in available RAM
+                required_ram = ModelRecommender.required_ram_gb(
+                    estimator, model, context_length, concurrency
+                )
+                model.metadata["required_ram_gb"] = required_ram
 
                 if required_ram <= system_info.ram_available_gb:
+                    speed = speed_model.predict(model, speed_context) if speed_model else None
+                    if speed is not None:
+                        model.metadata["predicted_tokens_per_second"] = speed.tokens_per_second
+                        model.metadata["speed_measured"] = speed.measured
+                        model.metadata["speed"] = speed.describe()
                     fitness_score = ModelRecommender._calculate_fitness_score(
-                        model, system_info, prefer_local
+                        model, system_info, prefer_local, speed
                     )
                     model.metadata["fitness_score"] = fitness_score
                     viable_models.append(model)
 
-        # Sort by fitness score
-        viable_models.sort(key=lambda m: m.metadata.get("fitness_score", 0), reverse=True)
+        if prefer_local:
+            # Keep at least half the slots for local models
+            online_models = heapq.nsmallest(
+                max_recommendations // 2, online_models, key=ModelRecommender._rank_key
+            )
+        viable_models.extend(online_models)
 
-        # Ensure diversity in recommendations
-        recommendations = ModelRecommender._ensure_diversity(viable_models, max_recommendations)
+        # Best models, ensuring diversity in recommendations
+        return ModelRecommender._ensure_diversity(viable_models, max_recommendations)
 
-        return recommendations
+    @staticmethod
+    def plan_coresidency(
+        system_info: SystemInfo,
+        models: List[Any],  # List of ModelInfo objects
+        roles: Sequence[str] = DEFAULT_ROLES,
+        budget_gb: Optional[float] = None,
+        context_lengths: Optional[Dict[str, int]] = None,
+        max_plans: int = 3,
+        measurements: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[Any]:
+        """Choose local models to keep loaded together, one per role.
+
+        Args:
+            system_info: System information and capabilities
+            models: List of available models
+            roles: Role slots to fill (code, chat, embedding, vision)
+            budget_gb: RAM the models may use together (default: available RAM)
+            context_lengths: Context each role needs, overriding ROLE_CONTEXT_LENGTHS
+            max_plans: Number of plans, the best plus runner-ups
+            measurements: Measured throughput, as for ``recommend_models``
+
+        Returns:
+            CoResidencyPlans sorted by total fitness, empty if nothing fits
+        """
+        from .providers import ModelCapability
+
+        budget = system_info.ram_available_gb if budget_gb is None else budget_gb
+        contexts = {**ROLE_CONTEXT_LENGTHS, **(context_lengths or {})}
+        local = [m for m in models if not m.online]
+
+        speed_model = None
+        if measurements is not None:
+            from .throughput import ThroughputModel
+
+            speed_model = ThroughputModel.fit(system_info, local, measurements)
+
+        estimator = MemoryEstimator()
+        slots: Dict[str, List[Candidate]] = {}
+        for role in roles:
+            accepted = {ModelCapability(role)}
+            if role == ModelCapability.VISION.value:
+                accepted.add(ModelCapability.MULTIMODAL)
+            context = contexts.get(role, DEFAULT_CONTEXT_LENGTH)
+            candidates = []
+            for model in local:
+                if accepted.isdisjoint(model.capabilities):
+                    continue
+                ram = ModelRecommender.required_ram_gb(estimator, model, context)
+                if ram > budget:
+                    continue
+                speed = speed_model.predict(model, context) if speed_model else None
+                fitness = ModelRecommender._calculate_fitness_score(model, system_info, True, speed)
+                candidates.append(Candidate(role, model, ram, fitness))
+            slots[role] = candidates
+
+        return plan_coresidency(slots, budget, max_plans)
+
+    @staticmethod
+    def required_ram_gb(
+        estimator: MemoryEstimator,
+        model: Any,
+        context_length: Optional[int] = None,
+        concurrency: int = 1,
+    ) -> float:
+        """RAM a local model needs at a context length.
+
+        Architecture-based estimates already include KV cache and runtime
+        overhead; bare size-based ones keep a 20% safety margin.
+        """
+        estimate = estimator.estimate_model(model, context_length, concurrency)
+        if estimate.from_architecture:
+            return estimate.total_gb
+        return estimate.total_gb * 1.2
 
     @staticmethod
     def _calculate_fitness_score(
-        model: Any, system_info: SystemInfo, prefer_local: bool = True
+        model: Any, system_info: SystemInfo, prefer_local: bool = True, speed: Any = None
     ) -> float:
-        """Calculate how well a model fits the system."""
+        """Calculate how well a model fits the system.
+
+        ``speed`` is a SpeedPrediction; when known it replaces the size and
+        platform heuristics, which only ever stood in for speed.
+        """
         score = 0.0
 
         # Base score from model capability
         score += model.score
 
-        # Efficiency bonus - prefer models that use resources well
+        # Memory safety holds whether or not speed is known
         ram_utilization = model.ram_gb / system_info.ram_gb
-        if 0.3 <= ram_utilization <= 0.7:
-            score += 20  # Optimal utilization
-        elif ram_utilization < 0.3:
-            score += 10  # Under-utilizing
-        elif ram_utilization > 0.9:
+        if ram_utilization > 0.9:
             score -= 20  # Too close to limits
 
-        # Platform-specific bonuses
-        if system_info.os_type == SystemType.MACOS_APPLE_SILICON:
-            if model.provider == "mlx":
-                score += 30  # MLX is optimized for Apple Silicon
-            elif model.provider == "ollama":
-                score += 10  # Ollama works well too
-
-        # Performance tier adjustments
-        if system_info.performance_tier == PerformanceTier.ULTRA:
-            # Prefer larger, more capable models
-            if model.size_gb >= 30:
-                score += 20
-        elif system_info.performance_tier == PerformanceTier.LOW:
-            # Prefer smaller, efficient models
-            if model.size_gb <= 4:
-                score += 20
+        if speed is not None:
+            from .throughput import INTERACTIVE_TOKENS_PER_SECOND
+
+            # Up to 40 points, full marks at twice reading speed
+            ratio = min(speed.tokens_per_second / INTERACTIVE_TOKENS_PER_SECOND, 2.0)
+            score += 20 * ratio
+            if speed.measured:
+                score += 5  # Known rather than predicted
+        else:
+            # Efficiency bonus - prefer models that use resources well
+            if 0.3 <= ram_utilization <= 0.7:
+                score += 20  # Optimal utilization
+            elif ram_utilization < 0.3:
+                score += 10  # Under-utilizing
+
+            # Platform-specific bonuses
+            if system_info.os_type == SystemType.MACOS_APPLE_SILICON:
+                if model.provider == "mlx":
+                    score += 30  # MLX is optimized for Apple Silicon
+                elif model.provider == "ollama":
+                    score += 10  # Ollama works well too
+
+            # Performance tier adjustments
+            if system_info.performance_tier == PerformanceTier.ULTRA:
+                # Prefer larger, more capable models
+                if model.size_gb >= 30:
+                    score += 20
+            elif system_info.performance_tier == PerformanceTier.LOW:
+                # Prefer smaller, efficient models
+                if model.size_gb <= 4:
+                    score += 20
 
         # Context window bonus for coding
         if "code" in [cap.value for cap in model.capabilities]:
@@ -397,38 +648,67 @@ class ModelRecommender:
 
         return score
 
+    @staticmethod
+    def _rank_key(model: Any) -> Tuple[float, str, str]:
+        """Sort key, fittest first; ties go by provider and ID so order is stable."""
+        return (-model.metadata.get("fitness_score", 0), model.provider, model.id)
+
     @staticmethod
     def _ensure_diversity(models: List[Any], max_count: int) -> List[Any]:
-        """Ensure diversity in model recommendations."""
-        if len(models) <= max_count:
-            return models
+        """Pick up to ``max_count`` models varied by provider and size, best first.
 
-        recommendations = []
-        providers_included = set()
-        sizes_included = set()
+        Each provider's best model goes in first, then the best of each
+        missing size class until MIN_SIZE_CLASSES are covered, then the
+        rest by rank. A single pass finds the only models that can be
+        picked -- group bests and the overall top ``max_count`` -- so the
+        selection never sorts the whole catalog.
+        """
+        if max_count <= 0:
+            return []
+        rank = ModelRecommender._rank_key
+        categorize = ModelRecommender._categorize_size
 
-        # First pass: Include best model from each provider
+        best_by_provider: Dict[str, Any] = {}
+        best_by_size: Dict[str, Any] = {}
         for model in models:
-            if len(recommendations) >= max_count:
+            for groups, group in (
+                (best_by_provider, model.provider),
+                (best_by_size, categorize(model.size_gb)),
+            ):
+                best = groups.get(group)
+                if best is None or rank(model) < rank(best):
+                    groups[group] = model
+        top = heapq.nsmallest(max_count, models, key=rank)
+
+        pool = {id(m): m for m in [*top, *best_by_provider.values(), *best_by_size.values()]}
+        ranked = sorted(pool.values(), key=rank)
+
+        recommendations: List[Any] = []
+        chosen: Set[int] = set()
+        sizes_included: Set[str] = set()
+
+        def take(model: Any) -> None:
+            recommendations.append(model)
+            chosen.add(id(model))
+            sizes_included.add(categorize(model.size_gb))
+
+        # First: the best model from each provider
+        for model in ranked:
+            if len(recommendations) < max_count and best_by_provider[model.provider] is model:
+                take(model)
+        # Then: sizes not yet covered, then whatever ranks highest
+        for model in ranked:
+            if len(recommendations) >= max_count or len(sizes_included) >= MIN_SIZE_CLASSES:
                 break
-
-            if model.provider not in providers_included:
-                recommendations.append(model)
-                providers_included.add(model.provider)
-                sizes_included.add(ModelRecommender._categorize_size(model.size_gb))
-
-        # Second pass: Fill with diverse sizes
-        for model in models:
+            if id(model) not in chosen and categorize(model.size_gb) not in sizes_included:
+                take(model)
+        for model in ranked:
             if len(recommendations) >= max_count:
                 break
+            if id(model) not in chosen:
+                take(model)
 
-            if model not in recommendations:
-                size_cat = ModelRecommender._categorize_size(model.size_gb)
-                if size_cat not in sizes_included or len(sizes_included) >= 3:
-                    recommendations.append(model)
-                    sizes_included.add(size_cat)
-
-        return recommendations
+        return sorted(recommendations, key=rank)
 
     @staticmethod
     def _categorize_size(size_gb: float) -> str:
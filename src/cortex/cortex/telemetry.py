@@ -0,0 +1,188 @@
+"""
+Process telemetry for the local model servers.
+
+Samples each server's whole process tree (the server plus its runners or
+on-demand backend) with psutil -- RSS, CPU, threads, open file descriptors
+and uptime -- and, for Ollama, the models resident according to
+``/api/ps``. Samples are kept per server in a fixed-size ring buffer so
+``cortex status --watch`` can show how much each resident model costs over
+time and ``--json`` can hand the numbers to other tools.
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Use DOTFILES environment variable if set, otherwise fall back to default
+DOTFILES = Path(os.environ.get("DOTFILES", str(Path.home() / ".dotfiles")))
+PID_DIR = DOTFILES / "config" / "cortex"
+
+# Samples kept per server
+SAMPLE_HISTORY = 120
+
+# Seconds between samples in watch mode
+DEFAULT_WATCH_INTERVAL = 2.0
+
+# Command-line fragments identifying servers not started by cortex
+SERVER_COMMANDS = {"mlx": "mlx_lm.server", "ollama": "ollama serve"}
+
+
+@dataclass
+class ProcessSample:
+    """Resource use of a server's process tree, summed over all processes."""
+
+    pid: int
+    processes: int
+    rss_bytes: int
+    cpu_percent: float
+    threads: int
+    open_fds: Optional[int]
+    uptime_seconds: float
+
+
+@dataclass
+class LoadedModel:
+    """A model resident in a server, as Ollama's ``/api/ps`` reports it."""
+
+    name: str
+    size_bytes: int
+    vram_bytes: int
+    expires_at: Optional[str] = None
+
+
+@dataclass
+class ServerSample:
+    """One telemetry sample of a server."""
+
+    provider: str
+    timestamp: float
+    process: Optional[ProcessSample] = None
+    loaded_models: List[LoadedModel] = field(default_factory=list)
+
+    @property
+    def running(self) -> bool:
+        """Whether a server process was found."""
+        return self.process is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form."""
+        data = asdict(self)
+        data["running"] = self.running
+        return data
+
+
+class TelemetrySampler:
+    """Sample model server process trees into per-server ring buffers."""
+
+    def __init__(self, history: int = SAMPLE_HISTORY, pid_dir: Optional[Path] = None):
+        """Initialize with the number of samples kept per server."""
+        self.pid_dir = pid_dir or PID_DIR
+        self.history: Dict[str, Deque[ServerSample]] = {}
+        self._history_size = history
+        # psutil measures CPU between calls on the same Process object, so
+        # each tree's Process objects are kept (root PID -> PID -> Process)
+        self._trees: Dict[int, Dict[int, psutil.Process]] = {}
+
+    def server_pid(self, provider: str) -> Optional[int]:
+        """PID from the server's PID file, else a matching running process."""
+        pid_file = self.pid_dir / f"{provider}_server.pid"
+        try:
+            pid = int(pid_file.read_text())
+            if psutil.pid_exists(pid):
+                return pid
+        except (OSError, ValueError):
+            pass
+
+        command = SERVER_COMMANDS.get(provider)
+        if not command:
+            return None
+        for process in psutil.process_iter(["pid", "cmdline"]):
+            cmdline = " ".join(process.info.get("cmdline") or [])
+            if command in cmdline:
+                return process.info["pid"]
+        return None
+
+    def sample_tree(self, pid: int) -> Optional[ProcessSample]:
+        """Sum resource use over a process and all its descendants."""
+        known = self._trees.get(pid, {})
+        try:
+            root = known.get(pid) or psutil.Process(pid)
+            tree = [root] + root.children(recursive=True)
+            uptime = time.time() - root.create_time()
+        except psutil.Error:
+            self._trees.pop(pid, None)
+            return None
+
+        rss = threads = fds = 0
+        cpu = 0.0
+        fds_known = True
+        alive: Dict[int, psutil.Process] = {}
+        for process in tree:
+            process = known.get(process.pid, process)
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    cpu += process.cpu_percent(None)
+                    threads += process.num_threads()
+                    if hasattr(process, "num_fds"):
+                        fds += process.num_fds()
+                    else:
+                        fds_known = False
+            except psutil.AccessDenied:
+                fds_known = False
+            except psutil.NoSuchProcess:
+                continue
+            alive[process.pid] = process
+        self._trees[pid] = alive
+
+        return ProcessSample(
+            pid=pid,
+            processes=len(alive),
+            rss_bytes=rss,
+            cpu_percent=cpu,
+            threads=threads,
+            open_fds=fds if fds_known else None,
+            uptime_seconds=uptime,
+        )
+
+    async def sample(
+        self, providers: Iterable[str] = ("mlx", "ollama"), ollama: Optional[Any] = None
+    ) -> Dict[str, ServerSample]:
+        """Take one sample of each server; ``ollama`` supplies ``/api/ps``."""
+        samples = {}
+        for provider in providers:
+            sample = ServerSample(provider=provider, timestamp=time.time())
+            pid = self.server_pid(provider)
+            if pid is not None:
+                sample.process = self.sample_tree(pid)
+            if provider == "ollama" and ollama is not None and sample.running:
+                sample.loaded_models = [
+                    LoadedModel(
+                        name=model.get("name", ""),
+                        size_bytes=model.get("size", 0),
+                        vram_bytes=model.get("size_vram", 0),
+                        expires_at=model.get("expires_at"),
+                    )
+                    for model in await ollama.list_loaded_models()
+                ]
+            self.history.setdefault(provider, deque(maxlen=self._history_size)).append(sample)
+            samples[provider] = sample
+        return samples
+
+    def latest(self, provider: str) -> Optional[ServerSample]:
+        """Most recent sample of a server."""
+        history = self.history.get(provider)
+        return history[-1] if history else None
+
+    def rss_range(self, provider: str) -> Optional[Tuple[int, int]]:
+        """(min, max) RSS over the buffered samples of a running server."""
+        values = [s.process.rss_bytes for s in self.history.get(provider, ()) if s.process]
+        return (min(values), max(values)) if values else None
@@ -0,0 +1,209 @@
+"""
+Decode throughput prediction for local models.
+
+Generating a token streams every weight (and the KV cache so far) through
+the processor once, so decode speed on a given machine is close to memory
+bandwidth divided by the bytes read per token. Bytes per token follow from
+parameter count and quantization (or the size on disk) plus the KV cache at
+the target context; bandwidth comes from the hardware profile. What the
+runtime achieves of that bandwidth -- its efficiency -- is fitted from
+models measured on this machine, so one benchmark calibrates predictions
+for every model not yet measured.
+"""
+
+import logging
+import re
+import statistics
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .memory import MemoryEstimator, model_architecture
+from .system_utils import SystemInfo, SystemType
+
+logger = logging.getLogger(__name__)
+
+# Unified memory bandwidth (GB/s) by chip; longest matching name wins
+MEMORY_BANDWIDTH_GBPS = {
+    "M1": 68.0,
+    "M1 Pro": 200.0,
+    "M1 Max": 400.0,
+    "M1 Ultra": 800.0,
+    "M2": 100.0,
+    "M2 Pro": 200.0,
+    "M2 Max": 400.0,
+    "M2 Ultra": 800.0,
+    "M3": 100.0,
+    "M3 Pro": 150.0,
+    "M3 Max": 400.0,
+    "M3 Ultra": 800.0,
+    "M4": 120.0,
+    "M4 Pro": 273.0,
+    "M4 Max": 546.0,
+}
+
+# Fallbacks when the chip is unknown
+APPLE_SILICON_BANDWIDTH_GBPS = 100.0
+CUDA_BANDWIDTH_GBPS = 400.0
+CPU_BANDWIDTH_GBPS = 50.0
+
+# Share of peak bandwidth a runtime achieves before any measurement
+DEFAULT_EFFICIENCY = 0.6
+MIN_EFFICIENCY = 0.05
+MAX_EFFICIENCY = 1.0
+
+# Speed at which output keeps up with reading; faster adds little
+INTERACTIVE_TOKENS_PER_SECOND = 20.0
+
+GIB = 1024**3
+
+
+def memory_bandwidth_gbps(system_info: SystemInfo) -> float:
+    """Peak memory bandwidth of this machine, from its chip name if known."""
+    names = f"{system_info.cpu_model} {system_info.gpu_info}"
+    matches = [chip for chip in MEMORY_BANDWIDTH_GBPS if re.search(rf"\b{chip}\b", names)]
+    if matches:
+        return MEMORY_BANDWIDTH_GBPS[max(matches, key=len)]
+    if system_info.os_type == SystemType.MACOS_APPLE_SILICON:
+        return APPLE_SILICON_BANDWIDTH_GBPS
+    if system_info.has_cuda and system_info.gpu_memory_gb:
+        return CUDA_BANDWIDTH_GBPS
+    return CPU_BANDWIDTH_GBPS
+
+
+def quantization_bits(quantization: Optional[str]) -> Optional[float]:
+    """Bits per weight of a quantization label (``4bit``, ``Q4_K_M``, ``F16``...)."""
+    if not quantization:
+        return None
+    label = str(quantization).lower()
+    match = re.search(r"(\d+)\s*-?bit", label)
+    if match:
+        return float(match.group(1))
+    match = re.search(r"\bi?q(\d+)", label)
+    if match:
+        # GGUF block quants store a scale (and min) per block of weights
+        return int(match.group(1)) + 0.5
+    match = re.search(r"\b(?:b?f|fp)(16|32)\b", label)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def weights_gb(model: Any) -> Optional[float]:
+    """Size of the weights read per token: on disk if known, else params x bits."""
+    if model.size_gb:
+        return model.size_gb
+    metadata = model.metadata or {}
+    parameter_count = metadata.get("parameter_count")
+    bits = quantization_bits(metadata.get("quantization"))
+    if parameter_count and bits:
+        return parameter_count * bits / 8 / GIB
+    return None
+
+
+def gb_per_token(model: Any, context_length: Optional[int] = None) -> Optional[float]:
+    """Bytes (GB) read to generate one token at ``context_length``."""
+    weights = weights_gb(model)
+    if weights is None:
+        return None
+    kv_gb = 0.0
+    architecture = model_architecture(model)
+    if architecture is not None and context_length:
+        kv_gb = MemoryEstimator().estimate(weights, architecture, context_length).kv_cache_gb
+    return weights + kv_gb
+
+
+@dataclass
+class SpeedPrediction:
+    """Expected decode speed of a model on this machine."""
+
+    tokens_per_second: float
+    context_length: int
+    measured: bool
+    samples: int = 0
+
+    def describe(self) -> str:
+        """E.g. ``≈42 tok/s at 8k context (measured)``."""
+        context = f"{self.context_length // 1024}k" if self.context_length >= 1024 else "short"
+        source = "measured" if self.measured else "estimated"
+        return f"≈{self.tokens_per_second:.0f} tok/s at {context} context ({source})"
+
+
+class ThroughputModel:
+    """Bandwidth-bound decode speed model, calibrated by measurements.
+
+    ``measurements`` maps ``provider:model_id`` to a throughput summary as
+    returned by ``StatisticsTracker.throughput_summary``.
+    """
+
+    def __init__(
+        self,
+        system_info: SystemInfo,
+        measurements: Optional[Dict[str, Dict[str, Any]]] = None,
+        efficiency: float = DEFAULT_EFFICIENCY,
+    ):
+        """Initialize for a machine with any measured throughput."""
+        self.bandwidth_gbps = memory_bandwidth_gbps(system_info)
+        self.measurements = measurements or {}
+        self.efficiency = efficiency
+
+    @classmethod
+    def fit(
+        cls,
+        system_info: SystemInfo,
+        models: Iterable[Any],
+        measurements: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> "ThroughputModel":
+        """Fit efficiency to the measured models among ``models``.
+
+        Each measured model gives one estimate of achieved/peak bandwidth;
+        the median resists a single outlier run.
+        """
+        model = cls(system_info, measurements)
+        estimates = []
+        for info, measured in model._measured(models):
+            per_token = gb_per_token(info, measured.get("context_tokens"))
+            if per_token:
+                speed = measured["decode_tokens_per_second"]
+                estimates.append(speed * per_token / model.bandwidth_gbps)
+        if estimates:
+            fitted = statistics.median(estimates)
+            model.efficiency = min(max(fitted, MIN_EFFICIENCY), MAX_EFFICIENCY)
+            logger.debug(
+                f"Fitted efficiency {model.efficiency:.2f} from {len(estimates)} measured models"
+            )
+        return model
+
+    def _measured(self, models: Iterable[Any]) -> Iterable[Tuple[Any, Dict[str, Any]]]:
+        for info in models:
+            measured = self.measurements.get(f"{info.provider}:{info.id}")
+            if measured and measured.get("decode_tokens_per_second"):
+                yield info, measured
+
+    def estimate(self, model: Any, context_length: Optional[int] = None) -> Optional[float]:
+        """Decode tokens/s from bandwidth alone, ignoring any measurement."""
+        per_token = gb_per_token(model, context_length)
+        if not per_token:
+            return None
+        return self.efficiency * self.bandwidth_gbps / per_token
+
+    def predict(self, model: Any, context_length: int) -> Optional[SpeedPrediction]:
+        """Expected decode speed at ``context_length``, preferring measurements.
+
+        A measurement taken at another context is rescaled by the model's
+        own ratio of per-token bytes at the two lengths.
+        """
+        if model.online:
+            return None
+        measured = self.measurements.get(f"{model.provider}:{model.id}")
+        if measured and measured.get("decode_tokens_per_second"):
+            speed = measured["decode_tokens_per_second"]
+            at_measure = gb_per_token(model, measured.get("context_tokens"))
+            at_target = gb_per_token(model, context_length)
+            if at_measure and at_target:
+                speed *= at_measure / at_target
+            return SpeedPrediction(speed, context_length, True, measured.get("samples", 0))
+
+        speed = self.estimate(model, context_length)
+        if speed is None:
+            return None
+        return SpeedPrediction(speed, context_length, False)
@@ -0,0 +1,210 @@
+"""
+Grouping of quantization variants under one base model.
+
+Catalogs list the same weights many times over: mlx-community publishes
+``-4bit``, ``-8bit`` and ``-bf16`` conversions (plus dated re-releases),
+and Ollama tags each quantization separately. Variants are grouped by a
+normalized name, split by parameter count when the config or weight
+headers know it, and each group is represented by the variant that suits
+this machine best: the highest expected quality that fits in RAM and
+decodes at interactive speed.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .memory import MemoryEstimator, model_architecture
+from .system_utils import ModelRecommender, SystemInfo
+from .throughput import INTERACTIVE_TOKENS_PER_SECOND, ThroughputModel, quantization_bits
+
+logger = logging.getLogger(__name__)
+
+# Quantization and format markers that distinguish variants of one model
+QUANT_PATTERN = re.compile(
+    r"(?:^|[-_.])(?:\d+[-_]?bits?|b?f16|fp16|f32|fp32|fp8|int[48]|[mn][xv]fp4"
+    r"|i?q\d(?:_k)?(?:_[a-z0-9]+)*|dwq|awq|gptq|gguf|mlx|quantized)(?=$|[-_.])",
+    re.IGNORECASE,
+)
+
+# Release dates: 2024-07-18, 20240718, or YYMM such as Qwen's -2507
+DATE_PATTERN = re.compile(
+    r"[-_](?:20\d{2}[-_]?\d{2}(?:[-_]?\d{2})?|2[3-9](?:0[1-9]|1[0-2]))(?=$|[-_])"
+)
+
+# Share of full-precision quality kept at a bit width (perplexity-based rule of thumb)
+QUALITY_BY_BITS = ((16, 1.0), (8, 0.995), (6, 0.99), (5, 0.98), (4, 0.95), (3, 0.88), (2, 0.7))
+
+# Parameter counts within this ratio are the same model
+PARAMETER_TOLERANCE = 0.1
+
+
+@dataclass
+class VariantGroup:
+    """Variants of one base model."""
+
+    key: str
+    variants: List[Any] = field(default_factory=list)
+
+    @property
+    def base_name(self) -> str:
+        """Normalized name shared by the variants."""
+        return self.key.split(":", 1)[1].split("#", 1)[0]
+
+
+def normalize_name(model_id: str) -> str:
+    """Model ID without quantization, format and date markers.
+
+    ``mlx-community/Llama-3.2-3B-Instruct-4bit`` -> ``llama-3.2-3b-instruct``;
+    ``llama3:8b-instruct-q4_K_M`` -> ``llama3:8b-instruct``.
+    """
+    name, sep, tag = model_id.lower().partition(":")
+    if sep:
+        tag = QUANT_PATTERN.sub("", tag).strip("-_.")
+        return f"{name}:{tag}" if tag and tag != "latest" else name
+    name = name.rsplit("/", 1)[-1]
+    return DATE_PATTERN.sub("", QUANT_PATTERN.sub("", name)).strip("-_.")
+
+
+def variant_bits(model: Any) -> Optional[float]:
+    """Bits per weight from header data, else from the name."""
+    bits = quantization_bits((model.metadata or {}).get("quantization"))
+    if bits is not None:
+        return bits
+    for match in QUANT_PATTERN.finditer(model.id):
+        bits = quantization_bits(match.group(0).strip("-_."))
+        if bits is not None:
+            return bits
+    return None
+
+
+def parameter_count(model: Any) -> Optional[float]:
+    """Parameters from weight headers, config or Ollama's reported size."""
+    metadata = model.metadata or {}
+    count = metadata.get("parameter_count")
+    if not count:
+        architecture = model_architecture(model)
+        count = architecture.parameter_count if architecture else None
+    if not count:
+        match = re.match(r"([\d.]+)\s*([bm])", str(metadata.get("parameter_size", "")), re.I)
+        if match:
+            count = float(match.group(1)) * (1e9 if match.group(2).lower() == "b" else 1e6)
+    return float(count) if count else None
+
+
+def expected_quality(bits: Optional[float]) -> float:
+    """Share of full-precision quality kept at ``bits`` per weight."""
+    if bits is None:
+        return QUALITY_BY_BITS[0][1]  # Unmarked weights are usually unquantized
+    for threshold, quality in QUALITY_BY_BITS:
+        if bits >= threshold:
+            return quality
+    return QUALITY_BY_BITS[-1][1]
+
+
+def group_variants(models: List[Any]) -> List[VariantGroup]:
+    """Group local models that are variants of one another, in first-seen order.
+
+    Online models are never grouped. Within a name, variants whose known
+    parameter counts differ are split; variants of unknown size join the
+    group when it is the only one.
+    """
+    by_name: Dict[str, List[Any]] = {}
+    order: List[str] = []
+    for model in models:
+        if model.online:
+            key = f"{model.provider}:{model.id}"
+        else:
+            key = f"{model.provider}:{normalize_name(model.id)}"
+        if key not in by_name:
+            by_name[key] = []
+            order.append(key)
+        by_name[key].append(model)
+
+    groups: List[VariantGroup] = []
+    for key in order:
+        sized: List[VariantGroup] = []
+        unsized = VariantGroup(key)
+        for model in by_name[key]:
+            count = parameter_count(model)
+            if count is None:
+                unsized.variants.append(model)
+                continue
+            for group in sized:
+                reference = parameter_count(group.variants[0])
+                if abs(count - reference) <= PARAMETER_TOLERANCE * reference:
+                    group.variants.append(model)
+                    break
+            else:
+                sized.append(VariantGroup(f"{key}#{count / 1e9:.1f}b", [model]))
+        if len(sized) == 1:
+            sized[0].key = key
+            sized[0].variants.extend(unsized.variants)
+        elif unsized.variants:
+            sized.append(unsized)
+        groups.extend(sized or [unsized])
+    return groups
+
+
+def choose_variant(
+    group: VariantGroup,
+    system_info: SystemInfo,
+    context_length: Optional[int] = None,
+    concurrency: int = 1,
+    speed_model: Optional[ThroughputModel] = None,
+) -> Any:
+    """The variant that suits this machine best.
+
+    Among variants that fit available RAM, the score is expected quality
+    scaled down when decode speed falls short of interactive; ties go to
+    the smaller variant. If nothing fits, the smallest is returned.
+    """
+    if len(group.variants) == 1:
+        return group.variants[0]
+    estimator = MemoryEstimator()
+    speed_model = speed_model or ThroughputModel(system_info)
+
+    footprints = {
+        id(model): ModelRecommender.required_ram_gb(estimator, model, context_length, concurrency)
+        for model in group.variants
+    }
+    fitting = [m for m in group.variants if footprints[id(m)] <= system_info.ram_available_gb]
+    if not fitting:
+        return min(group.variants, key=lambda m: (footprints[id(m)], m.id))
+
+    def score(model: Any) -> float:
+        quality = expected_quality(variant_bits(model))
+        speed = speed_model.estimate(model, context_length)
+        if speed is not None:
+            quality *= min(speed / INTERACTIVE_TOKENS_PER_SECOND, 1.0)
+        return quality
+
+    return max(fitting, key=lambda m: (score(m), -footprints[id(m)], m.id))
+
+
+def collapse_variants(
+    models: List[Any],
+    system_info: SystemInfo,
+    context_length: Optional[int] = None,
+    concurrency: int = 1,
+    speed_model: Optional[ThroughputModel] = None,
+) -> List[Any]:
+    """One model per variant group, annotated with its siblings.
+
+    The chosen variant's metadata gets ``base_model`` and ``variants``
+    (every variant ID of the group, the chosen one first).
+    """
+    speed_model = speed_model or ThroughputModel(system_info)
+    collapsed = []
+    for group in group_variants(models):
+        best = choose_variant(group, system_info, context_length, concurrency, speed_model)
+        if len(group.variants) > 1:
+            best.metadata["base_model"] = group.base_name
+            best.metadata["variants"] = [best.id] + sorted(
+                m.id for m in group.variants if m is not best
+            )
+        collapsed.append(best)
+    if len(collapsed) < len(models):
+        logger.debug(f"Collapsed {len(models)} models into {len(collapsed)} variant groups")
+    return collapsed
@@ -0,0 +1,212 @@
+"""
+SHA-256 verification of downloaded model files.
+
+Files are hashed in worker threads (hashlib drops the GIL while hashing
+large buffers, so files hash in parallel) with large unbuffered reads into
+a reused buffer, and each digest is compared with the one its source
+publishes: the LFS object ID the Hub lists for a shard, or the digest an
+Ollama manifest names for a layer. Digests are cached by path, size and
+mtime, so verifying unchanged files again costs one stat each.
+
+MLX downloads record what they expect in a small manifest beside the
+weights; models quantized locally record the digests of the converted
+output, so they can be checked later too.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .cache import load_json, save_json
+from .model_headers import HeaderCache, file_stamp
+
+logger = logging.getLogger(__name__)
+
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+READ_SIZE = 8 * 1024 * 1024
+
+# Written into an MLX model directory with the files it should hold
+MANIFEST_NAME = ".cortex-manifest.json"
+
+
+@dataclass
+class ExpectedFile:
+    """A file a model should have, with its published digest and size if known."""
+
+    path: Path
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+
+
+@dataclass
+class FileCheck:
+    """Outcome of verifying one file."""
+
+    path: Path
+    expected: Optional[str]
+    actual: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file is present, complete and matches its digest when known."""
+        return self.error is None and (self.expected is None or self.actual == self.expected)
+
+
+@dataclass
+class VerifyResult:
+    """What a verification pass found."""
+
+    files: List[FileCheck] = field(default_factory=list)
+    bytes_hashed: int = 0
+    bytes_cached: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether there was something to check and all of it checked out."""
+        return bool(self.files) and all(check.ok for check in self.files)
+
+    @property
+    def failures(self) -> List[FileCheck]:
+        """Files that are missing, incomplete or corrupt."""
+        return [check for check in self.files if not check.ok]
+
+    @property
+    def gb_per_second(self) -> float:
+        """Hashing throughput."""
+        return self.bytes_hashed / (1024**3) / self.seconds if self.seconds else 0.0
+
+
+def sha256_file(
+    path: Path, read_size: int = READ_SIZE, report: Optional[Callable[[int], None]] = None
+) -> str:
+    """SHA-256 of a file, read sequentially into one reused buffer."""
+    digest = hashlib.sha256()
+    buffer = bytearray(read_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+            if report:
+                report(n)
+    return digest.hexdigest()
+
+
+def read_manifest(model_dir: Path) -> List[ExpectedFile]:
+    """Files recorded in a model directory's manifest, empty if there is none."""
+    data = load_json(model_dir / MANIFEST_NAME)
+    if not isinstance(data, dict):
+        return []
+    return [
+        ExpectedFile(model_dir / name, entry.get("sha256"), entry.get("size"))
+        for name, entry in sorted(data.get("files", {}).items())
+    ]
+
+
+def write_manifest(model_dir: Path, files: List[ExpectedFile], source: str) -> bool:
+    """Record the files a model directory should hold."""
+    entries = {
+        str(f.path.relative_to(model_dir)): {"sha256": f.sha256, "size": f.size} for f in files
+    }
+    return save_json(model_dir / MANIFEST_NAME, {"source": source, "files": entries})
+
+
+class Verifier:
+    """Hash files in parallel and compare them with their expected digests."""
+
+    def __init__(self, workers: int = HASH_WORKERS, cache: Optional[HeaderCache] = None):
+        """Initialize with the number of hashing threads and the digest cache."""
+        self.workers = max(1, workers)
+        self.cache = cache or HeaderCache("digests.json")
+
+    def digests(
+        self, paths: List[Path], progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[Path, str]:
+        """SHA-256 of each file, hashing only those changed since last time."""
+        result = self.verify([ExpectedFile(path) for path in paths], progress)
+        return {check.path: check.actual for check in result.files if check.actual}
+
+    def verify(
+        self,
+        expected: List[ExpectedFile],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> VerifyResult:
+        """Check every expected file.
+
+        ``progress(bytes_done, bytes_total)`` is called from hashing threads
+        and counts only files that actually need hashing.
+        """
+        start = time.monotonic()
+        checks: Dict[Path, FileCheck] = {}
+        to_hash = []
+        cached_bytes = 0
+
+        for item in expected:
+            check = FileCheck(item.path, item.sha256)
+            checks[item.path] = check
+            try:
+                stamp = file_stamp(item.path)
+            except OSError:
+                check.error = "missing"
+                continue
+            if item.size is not None and stamp[0] != item.size:
+                check.error = f"size {stamp[0]} bytes, expected {item.size}"
+                continue
+            digest = self.cache.get(str(item.path), stamp)
+            if digest:
+                check.actual, check.cached = digest, True
+                cached_bytes += stamp[0]
+            else:
+                to_hash.append((item.path, stamp))
+
+        total = sum(stamp[0] for _, stamp in to_hash)
+        done = 0
+        lock = threading.Lock()
+
+        def report(nbytes: int) -> None:
+            nonlocal done
+            with lock:
+                done += nbytes
+                current = done
+            if progress:
+                progress(current, total)
+
+        def hash_one(path: Path) -> Optional[str]:
+            try:
+                return sha256_file(path, report=report)
+            except OSError as e:
+                checks[path].error = str(e)
+                return None
+
+        if to_hash:
+            # Largest first, so one big shard doesn't start last
+            to_hash.sort(key=lambda item: -item[1][0])
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(to_hash))) as pool:
+                digests = list(pool.map(hash_one, [path for path, _ in to_hash]))
+            for (path, stamp), digest in zip(to_hash, digests):
+                if digest:
+                    checks[path].actual = digest
+                    self.cache.put(str(path), stamp, digest)
+            self.cache.save()
+
+        result = VerifyResult(
+            files=list(checks.values()),
+            bytes_hashed=done,
+            bytes_cached=cached_bytes,
+            seconds=time.monotonic() - start,
+        )
+        for check in result.failures:
+            reason = check.error or f"sha256 {check.actual} != {check.expected}"
+            logger.warning(f"Verification failed for {check.path}: {reason}")
+        return result
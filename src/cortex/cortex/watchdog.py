@@ -0,0 +1,284 @@
+"""
+Memory-pressure watchdog for local models.
+
+A local model and the editor share one pool of RAM; once it runs out macOS
+starts swapping and everything stalls. The watchdog samples memory through
+HealthMonitor and, under pressure, gives memory back from models that are
+not being used: idle Ollama models are evicted with ``keep_alive: 0`` and an
+idle MLX server is stopped. Both come back lazily -- Ollama reloads a model
+on its next request, and an on-demand MLX proxy restarts its backend on the
+next connection.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from .canary import parse_expires_at
+from .health import HealthMonitor
+
+logger = logging.getLogger(__name__)
+
+# Seconds between memory samples
+DEFAULT_INTERVAL = 10.0
+
+# A model unused for this long may be unloaded
+DEFAULT_IDLE_SECONDS = 300.0
+
+# An Ollama expires_at moving less than this is not use: a health canary
+# re-sends the model's time left, which lands within a second or two of it
+EXPIRY_SLACK = 5.0
+
+# An MLX server using less CPU than this between samples is not serving
+IDLE_CPU_SECONDS = 0.5
+
+# How long to wait for freed memory to show up as available
+RECLAIM_TIMEOUT = 5.0
+RECLAIM_POLL_INTERVAL = 0.25
+
+# Grace period for an on-demand MLX backend to exit before it is killed
+STOP_GRACE_PERIOD = 10.0
+
+
+@dataclass
+class WatchdogAction:
+    """A model unloaded to relieve memory pressure."""
+
+    provider: str
+    model: str
+    resident_bytes: int
+    available_before: int
+    available_after: int
+    timestamp: float
+
+    @property
+    def freed_bytes(self) -> int:
+        """Increase in available memory after the unload."""
+        return max(self.available_after - self.available_before, 0)
+
+    def describe(self) -> str:
+        """One-line summary for logs and the console."""
+        gb = 1024**3
+        return (
+            f"Unloaded {self.provider} model {self.model} "
+            f"({self.resident_bytes / gb:.1f}GB resident): available "
+            f"{self.available_before / gb:.1f}GB -> {self.available_after / gb:.1f}GB, "
+            f"freed {self.freed_bytes / gb:.1f}GB"
+        )
+
+
+class MemoryWatchdog:
+    """Unload idle local models when the machine runs short of memory.
+
+    Idleness is learned by watching between samples: an Ollama model is in
+    use when its ``expires_at`` moves by more than a few seconds (every
+    request resets it), and the
+    MLX server is in use when it burns CPU. Models seen for the first time
+    count as just used, so nothing is unloaded before it has been watched
+    for ``idle_seconds``.
+    """
+
+    def __init__(
+        self,
+        monitor: Optional[HealthMonitor] = None,
+        ollama: Optional[Any] = None,
+        mlx: Optional[Any] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        server_status: Optional[Dict[str, Any]] = None,
+    ):
+        """Initialize with the providers to police; either may be None."""
+        self.monitor = monitor or HealthMonitor()
+        self.ollama = ollama
+        self.mlx = mlx
+        self.idle_seconds = idle_seconds
+        self.server_status = server_status or {}
+        self.actions: List[WatchdogAction] = []
+        # Ollama model name -> (expires_at, monotonic time it last moved)
+        self._ollama_activity: Dict[str, Tuple[str, float]] = {}
+        # (pid, CPU seconds, monotonic time of last activity) of the MLX server
+        self._mlx_activity: Optional[Tuple[int, float, float]] = None
+
+    @property
+    def mlx_on_demand(self) -> bool:
+        """Whether the MLX PID file belongs to an on-demand proxy."""
+        return bool(
+            self.server_status.get("on_demand") and self.server_status.get("provider") == "mlx"
+        )
+
+    async def check_once(self) -> List[WatchdogAction]:
+        """Sample memory, track model activity and unload idle models if needed."""
+        results = await self.monitor.run_health_checks(["memory_pressure"])
+        sample = results.get("memory_pressure", {})
+
+        # Activity is tracked on every sample so idleness is known when pressure hits
+        loaded = await self.ollama.list_loaded_models() if self.ollama else []
+        now = time.monotonic()
+        self._observe_ollama(loaded, now)
+        mlx_process = self._mlx_process()
+        self._observe_mlx(mlx_process, now)
+
+        if not sample.get("under_pressure"):
+            return []
+
+        logger.warning(f"Memory pressure: {sample.get('message')}")
+        actions = []
+        idle_models = [m for m in loaded if self._ollama_idle(m, now)]
+        for model in sorted(idle_models, key=lambda m: -m.get("size", 0)):
+            action = await self._unload_ollama(model)
+            if action:
+                actions.append(action)
+                if not self._still_under_pressure():
+                    break
+        else:
+            # Only reached when unloading Ollama models didn't relieve the pressure
+            if mlx_process and self._mlx_idle(now):
+                action = await self._stop_mlx(mlx_process)
+                if action:
+                    actions.append(action)
+
+        if not actions:
+            logger.warning("Memory pressure, but no idle local model to unload")
+        self.actions.extend(actions)
+        return actions
+
+    async def run(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        stop_event: Optional[asyncio.Event] = None,
+        on_action: Optional[Callable[[WatchdogAction], None]] = None,
+    ) -> None:
+        """Check every ``interval`` seconds until ``stop_event`` is set."""
+        stop_event = stop_event or asyncio.Event()
+        while not stop_event.is_set():
+            try:
+                for action in await self.check_once():
+                    if on_action:
+                        on_action(action)
+            except Exception as e:
+                logger.error(f"Watchdog check failed: {e}")
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _still_under_pressure(self) -> bool:
+        return psutil.virtual_memory().percent >= self.monitor.memory_threshold_percent
+
+    def _observe_ollama(self, loaded: List[Dict[str, Any]], now: float) -> None:
+        seen = {}
+        for model in loaded:
+            name = model.get("name", "")
+            expires_at = model.get("expires_at", "")
+            previous = self._ollama_activity.get(name)
+            if previous and self._same_expiry(previous[0], expires_at):
+                # Health canaries re-send the time left, nudging expires_at by a second
+                seen[name] = (expires_at, previous[1])
+            else:
+                seen[name] = (expires_at, now)
+        self._ollama_activity = seen
+
+    @staticmethod
+    def _same_expiry(previous: str, current: str) -> bool:
+        if previous == current:
+            return True
+        before, after = parse_expires_at(previous), parse_expires_at(current)
+        return before is not None and after is not None and abs(after - before) <= EXPIRY_SLACK
+
+    def _ollama_idle(self, model: Dict[str, Any], now: float) -> bool:
+        activity = self._ollama_activity.get(model.get("name", ""))
+        return activity is not None and now - activity[1] >= self.idle_seconds
+
+    async def _unload_ollama(self, model: Dict[str, Any]) -> Optional[WatchdogAction]:
+        name = model.get("name", "")
+        before = psutil.virtual_memory().available
+        if not await self.ollama.unload_model(name):
+            return None
+        resident = model.get("size", 0)
+        action = WatchdogAction(
+            provider="ollama",
+            model=name,
+            resident_bytes=resident,
+            available_before=before,
+            available_after=await self._wait_for_reclaim(before, resident),
+            timestamp=time.time(),
+        )
+        self._ollama_activity.pop(name, None)
+        logger.info(action.describe())
+        return action
+
+    def _mlx_process(self) -> Optional[psutil.Process]:
+        """The MLX server process, or an on-demand proxy's running backend."""
+        if self.mlx is None or not self.mlx.pid_file.exists():
+            return None
+        try:
+            process = psutil.Process(int(self.mlx.pid_file.read_text()))
+            if self.mlx_on_demand:
+                children = process.children()
+                return children[0] if children else None
+            return process
+        except (ValueError, psutil.Error):
+            return None
+
+    def _observe_mlx(self, process: Optional[psutil.Process], now: float) -> None:
+        if process is None:
+            self._mlx_activity = None
+            return
+        try:
+            times = process.cpu_times()
+        except psutil.Error:
+            self._mlx_activity = None
+            return
+        cpu = times.user + times.system
+        previous = self._mlx_activity
+        if previous and previous[0] == process.pid and cpu - previous[1] < IDLE_CPU_SECONDS:
+            self._mlx_activity = (process.pid, cpu, previous[2])
+        else:
+            self._mlx_activity = (process.pid, cpu, now)
+
+    def _mlx_idle(self, now: float) -> bool:
+        return self._mlx_activity is not None and now - self._mlx_activity[2] >= self.idle_seconds
+
+    async def _stop_mlx(self, process: psutil.Process) -> Optional[WatchdogAction]:
+        try:
+            resident = process.memory_info().rss
+        except psutil.Error:
+            return None
+        before = psutil.virtual_memory().available
+
+        if self.mlx_on_demand:
+            # Stop only the backend; the proxy starts a new one on the next request
+            try:
+                process.terminate()
+                await asyncio.to_thread(process.wait, STOP_GRACE_PERIOD)
+            except psutil.TimeoutExpired:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        elif not await self.mlx.stop_server():
+            return None
+
+        action = WatchdogAction(
+            provider="mlx",
+            model=self.server_status.get("model", "server"),
+            resident_bytes=resident,
+            available_before=before,
+            available_after=await self._wait_for_reclaim(before, resident),
+            timestamp=time.time(),
+        )
+        self._mlx_activity = None
+        logger.info(action.describe())
+        return action
+
+    @staticmethod
+    async def _wait_for_reclaim(before: int, expected: int) -> int:
+        """Wait until about half of ``expected`` bytes show up as available."""
+        deadline = time.monotonic() + RECLAIM_TIMEOUT
+        available = psutil.virtual_memory().available
+        while available - before < expected / 2 and time.monotonic() < deadline:
+            await asyncio.sleep(RECLAIM_POLL_INTERVAL)
+            available = psutil.virtual_memory().available
+        return available
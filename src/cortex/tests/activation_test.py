@@ -0,0 +1,113 @@
+"""
+Tests for activation.py module.
+
+The backend is a real ``python -m http.server`` subprocess, so these tests
+exercise process start, readiness, proxying and idle shutdown end to end.
+"""
+
+import asyncio
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import aiohttp
+from cortex.activation import OnDemandServer, free_port
+
+HTTP_BACKEND = [sys.executable, "-m", "http.server", "{port}", "--bind", "127.0.0.1"]
+
+
+class TestOnDemandServer(unittest.TestCase):
+    """Test socket-activated backend lifecycle."""
+
+    def setUp(self):
+        """Serve a temp directory through the proxy."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        (self.temp_dir / "v1").mkdir()
+        (self.temp_dir / "v1" / "models").write_text('{"data": []}')
+        self.listen_port = free_port()
+
+    def make_server(self, command=None, **kwargs):
+        """Build a proxy around the http.server backend."""
+        kwargs.setdefault("startup_timeout", 10)
+        return OnDemandServer(
+            (command or HTTP_BACKEND) + ["--directory", str(self.temp_dir)],
+            self.listen_port,
+            **kwargs,
+        )
+
+    async def fetch(self, path="/v1/models"):
+        """GET a path through the proxy."""
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{self.listen_port}{path}") as resp:
+                return resp.status, await resp.text()
+
+    def test_backend_starts_on_first_request(self):
+        """Test that nothing runs until a client connects, then it is proxied."""
+
+        async def run():
+            server = self.make_server()
+            await server.start()
+            try:
+                running_before = server.backend_running
+                status, body = await self.fetch()
+                return running_before, server.backend_running, server, status, body
+            finally:
+                await server.stop()
+
+        before, after, server, status, body = asyncio.run(run())
+
+        self.assertFalse(before)
+        self.assertTrue(after)
+        self.assertEqual(status, 200)
+        self.assertEqual(body, '{"data": []}')
+        self.assertEqual(server.starts, 1)
+        self.assertIsNotNone(server.last_time_to_ready)
+        self.assertFalse(server.backend_running)
+
+    def test_idle_backend_is_stopped_and_restarted(self):
+        """Test idle shutdown and restart on the next request."""
+
+        async def run():
+            server = self.make_server(idle_timeout=0.2)
+            await server.start()
+            try:
+                await self.fetch()
+                await asyncio.sleep(0.8)
+                stopped = not server.backend_running
+                status, _ = await self.fetch()
+                return server, stopped, status
+            finally:
+                await server.stop()
+
+        with patch("cortex.activation.IDLE_CHECK_INTERVAL", 0.05):
+            server, stopped, status = asyncio.run(run())
+
+        self.assertTrue(stopped)
+        self.assertEqual(status, 200)
+        self.assertEqual(server.starts, 2)
+
+    def test_backend_that_fails_to_start(self):
+        """Test that a crashing backend closes the client connection."""
+
+        async def run():
+            server = self.make_server(command=[sys.executable, "-c", "raise SystemExit(1)"])
+            await server.start()
+            try:
+                with self.assertRaises(aiohttp.ClientError):
+                    await self.fetch()
+                return server
+            finally:
+                await server.stop()
+
+        server = asyncio.run(run())
+
+        self.assertEqual(server.starts, 0)
+        self.assertFalse(server.backend_running)
+
+
+if __name__ == "__main__":
+    unittest.main()
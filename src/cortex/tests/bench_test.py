@@ -0,0 +1,157 @@
+"""
+Tests for bench.py module.
+
+The suite runs end to end against FakeInferenceServer on localhost, in each
+provider dialect, so no real model or GPU is needed.
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+
+from cortex.bench import (
+    BenchCase,
+    BenchStore,
+    build_prompt,
+    default_suite,
+    hardware_fingerprint,
+    make_probe,
+    run_bench,
+)
+
+from tests.fakes import FakeInferenceServer, make_system_info
+
+SMALL_SUITE = [BenchCase(32, 4), BenchCase(256, 8)]
+
+
+class TestSuite(unittest.TestCase):
+    """Test prompt construction and hardware fingerprints."""
+
+    def test_suite_covers_every_length_pair(self):
+        """Test the default suite crosses prompt and output lengths, shortest first."""
+        suite = default_suite((512, 32), (256, 64))
+
+        self.assertEqual([c.name for c in suite], ["p32/o64", "p32/o256", "p512/o64", "p512/o256"])
+
+    def test_prompts_are_deterministic_and_sized(self):
+        """Test prompts repeat exactly for a nonce and grow with the case."""
+        short = build_prompt(BenchCase(32, 64), "a")
+        long = build_prompt(BenchCase(2048, 64), "a")
+
+        self.assertEqual(short, build_prompt(BenchCase(32, 64), "a"))
+        self.assertNotEqual(short, build_prompt(BenchCase(32, 64), "b"))
+        self.assertGreater(len(long.split()), 1500)
+
+    def test_fingerprint_ignores_available_ram_only(self):
+        """Test the fingerprint tracks hardware, not momentary state."""
+        info = make_system_info()
+
+        self.assertEqual(
+            hardware_fingerprint(info), hardware_fingerprint(replace(info, ram_available_gb=1.0))
+        )
+        self.assertNotEqual(
+            hardware_fingerprint(info), hardware_fingerprint(replace(info, ram_gb=32))
+        )
+
+
+class TestRunBench(unittest.TestCase):
+    """Test the harness against local fake servers."""
+
+    def bench(self, provider, path="", repeat=1, **server_kwargs):
+        """Benchmark against a fake server and return (report, server)."""
+
+        async def run():
+            async with FakeInferenceServer(**server_kwargs) as server:
+                probe = make_probe(provider, "fake-model", server.url + path, api_key="key")
+                report = await run_bench(
+                    "fake-model", provider, probe, SMALL_SUITE, repeat, server_pid=os.getpid()
+                )
+                return report, server
+
+        return asyncio.run(run())
+
+    def test_ollama_bench(self):
+        """Test Ollama runs record prefill, decode, load time and peak RSS."""
+        report, server = self.bench("ollama", "/api", repeat=2, tokens=8, delay=0.01)
+
+        self.assertEqual(len(report.runs), 4)
+        self.assertEqual(report.errors, [])
+        self.assertEqual([r.output_tokens for r in report.runs], [4, 4, 8, 8])
+        self.assertAlmostEqual(report.median("prefill_tokens_per_second"), 1000.0, places=0)
+        self.assertAlmostEqual(report.median("decode_tokens_per_second"), 100.0, places=0)
+        self.assertAlmostEqual(report.load_seconds, 0.5)
+        self.assertGreater(report.peak_rss_bytes, 0)
+        # Every run gets a distinct prompt so no prefix cache is reused
+        prompts = [request["prompt"] for request in server.requests]
+        self.assertEqual(len(set(prompts)), 4)
+        self.assertEqual(server.requests[0]["options"]["temperature"], 0)
+
+    def test_openai_compatible_bench(self):
+        """Test prefill speed is derived from reported prompt tokens and TTFT."""
+        report, _ = self.bench("mlx", tokens=8, delay=0.01, prefill_rate=2000)
+
+        long_run = report.runs[-1]
+        self.assertGreater(long_run.prompt_tokens, 150)
+        self.assertLess(long_run.prefill_tokens_per_second, 2000)
+        self.assertGreater(long_run.decode_tokens_per_second, 30)
+        self.assertIsNone(report.load_seconds)
+
+    def test_anthropic_bench_uses_reported_usage(self):
+        """Test Anthropic token counts come from the usage events."""
+        report, server = self.bench("claude", tokens=8, delay=0.01)
+
+        self.assertEqual([r.output_tokens for r in report.runs], [4, 8])
+        self.assertGreater(report.runs[0].prompt_tokens, 0)
+        self.assertEqual(server.requests[0]["max_tokens"], 4)
+
+    def test_failed_runs_are_reported(self):
+        """Test a case that generates nothing is recorded as an error, not a run."""
+        report, _ = self.bench("ollama", "/api", tokens=0)
+
+        self.assertEqual(report.runs, [])
+        self.assertEqual(len(report.errors), 2)
+
+    def test_unsupported_provider(self):
+        """Test providers without a streaming API are rejected."""
+        with self.assertRaises(ValueError):
+            make_probe("huggingface", "model")
+
+
+class TestBenchStore(unittest.TestCase):
+    """Test report storage keyed by hardware fingerprint."""
+
+    def setUp(self):
+        """Use an isolated store."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.store = BenchStore(self.temp_dir / "bench.json")
+
+    def test_reports_are_grouped_by_machine(self):
+        """Test reports from other hardware stay out of this machine's comparisons."""
+
+        async def run(model):
+            async with FakeInferenceServer(tokens=2) as server:
+                probe = make_probe("ollama", model, f"{server.url}/api")
+                return await run_bench(model, "ollama", probe, SMALL_SUITE[:1])
+
+        laptop = asyncio.run(run("a"))
+        desktop = asyncio.run(run("b"))
+        self.store.add("laptop", {"cpu": "M1"}, laptop)
+        self.store.add("desktop", {"cpu": "M2 Ultra"}, desktop)
+        self.store.add("laptop", {"cpu": "M1"}, asyncio.run(run("c")))
+
+        self.assertEqual([r.model for r in self.store.reports("laptop")], ["a", "c"])
+        self.assertEqual([r.model for r in self.store.reports(models=["b"])], ["b"])
+        self.assertEqual(len(self.store.reports()), 3)
+        self.assertEqual(self.store.hardware()["desktop"]["cpu"], "M2 Ultra")
+        stored = self.store.reports("desktop")[0]
+        self.assertEqual(stored.fingerprint, "desktop")
+        self.assertEqual(stored.runs[0].case, "p32/o4")
+
+
+if __name__ == "__main__":
+    unittest.main()
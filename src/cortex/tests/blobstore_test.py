@@ -0,0 +1,99 @@
+"""
+Tests for blobstore.py module.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from cortex.blobstore import BlobStore, disk_usage
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+class TestBlobStore(unittest.TestCase):
+    """Test storing, linking and collecting blobs."""
+
+    def setUp(self):
+        """An empty store in a temporary directory."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.store = BlobStore(self.temp_dir / "blobs")
+
+    def test_duplicate_files_share_one_blob(self):
+        """Test a second copy of a stored file becomes a link to the same data."""
+        first = self.temp_dir / "mlx" / "a" / "model.safetensors"
+        second = self.temp_dir / "mlx" / "b" / "model.safetensors"
+        digest = _write(first, b"w" * 1000)
+        _write(second, b"w" * 1000)
+
+        self.assertTrue(self.store.add(first, digest))
+        self.assertTrue(self.store.add(second, digest))
+
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertTrue(os.path.samefile(first, self.store.blob_path(digest)))
+        self.assertEqual(disk_usage([self.temp_dir]), 1000)
+
+    def test_link_places_stored_blob(self):
+        """Test a stored blob appears at a new path without copying."""
+        source = self.temp_dir / "hub" / "shard"
+        digest = _write(source, b"x" * 100)
+        self.store.add(source, digest)
+        target = self.temp_dir / "ollama" / "blobs" / f"sha256-{digest}"
+
+        self.assertTrue(self.store.link(digest, target))
+        self.assertFalse(self.store.link("0" * 64, self.temp_dir / "other"))
+
+        self.assertTrue(os.path.samefile(source, target))
+
+    def test_verify_refuses_mismatched_contents(self):
+        """Test a file whose contents don't hash to its digest is not stored."""
+        path = self.temp_dir / "shard"
+        _write(path, b"corrupt")
+
+        self.assertFalse(self.store.add(path, "a" * 64, verify=True))
+        self.assertFalse(self.store.has("a" * 64))
+
+    def test_adopt_cache_blobs(self):
+        """Test files named by their digest are stored; other files are left alone."""
+        blobs = self.temp_dir / "models--org--model" / "blobs"
+        hub_digest = _write(blobs / "placeholder", b"shard")
+        os.replace(blobs / "placeholder", blobs / hub_digest)
+        ollama_digest = hashlib.sha256(b"layer").hexdigest()
+        _write(blobs / f"sha256-{ollama_digest}", b"layer")
+        _write(blobs / "0123abcd", b"small git file")
+
+        self.assertEqual(self.store.adopt(blobs), 2)
+
+        self.assertTrue(self.store.has(hub_digest))
+        self.assertTrue(self.store.has(ollama_digest))
+
+    def test_gc_removes_only_unreferenced_blobs(self):
+        """Test blobs no model links to are reclaimed, with a dry run first."""
+        kept = self.temp_dir / "mlx" / "kept"
+        dropped = self.temp_dir / "mlx" / "dropped"
+        kept_digest = _write(kept, b"k" * 10)
+        dropped_digest = _write(dropped, b"d" * 20)
+        self.store.add(kept, kept_digest)
+        self.store.add(dropped, dropped_digest)
+        dropped.unlink()
+
+        preview = self.store.gc(dry_run=True)
+        self.assertEqual((preview.blobs, preview.bytes), (1, 20))
+        self.assertTrue(self.store.has(dropped_digest))
+
+        result = self.store.gc()
+        self.assertEqual((result.blobs, result.bytes), (1, 20))
+        self.assertFalse(self.store.has(dropped_digest))
+        self.assertTrue(self.store.has(kept_digest))
+
+
+if __name__ == "__main__":
+    unittest.main()
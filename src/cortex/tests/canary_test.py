@@ -0,0 +1,232 @@
+"""
+Tests for canary.py module.
+
+Probes run against FakeInferenceServer, which streams like mlx_lm.server
+(OpenAI SSE) and Ollama (NDJSON) with a real delay per token, so speed
+changes are real.
+"""
+
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cortex.canary import (
+    MIN_BASELINE_SAMPLES,
+    BaselineStore,
+    CanaryError,
+    CanaryResult,
+    probe_ollama,
+    probe_openai_compatible,
+)
+from cortex.health import HealthMonitor
+
+from tests.fakes import FakeInferenceServer
+
+
+def make_result(tokens_per_second, ttft=0.1):
+    """A canary result with the given speed."""
+    return CanaryResult("ollama", "llama3:8b", ttft, 16, tokens_per_second, 1.0)
+
+
+class TestProbes(unittest.TestCase):
+    """Test timing of streamed canary generations."""
+
+    def test_openai_compatible_probe(self):
+        """Test TTFT, token count, tok/s and prefill from an SSE stream."""
+
+        async def run():
+            async with FakeInferenceServer(tokens=10, delay=0.01, prefill_rate=400) as server:
+                result = await probe_openai_compatible(server.url, "m")
+                return result, server.requests[0]
+
+        result, request = asyncio.run(run())
+
+        self.assertEqual(result.tokens, 10)
+        # The canary prompt is 8 words, prefilled at 400 words/s
+        self.assertEqual(result.prompt_tokens, 8)
+        self.assertGreaterEqual(result.ttft, 0.02)
+        self.assertLess(result.prefill_tokens_per_second, 400)
+        self.assertGreater(result.total_latency, result.ttft)
+        # Nine gaps of ~10ms between ten tokens
+        self.assertGreater(result.tokens_per_second, 20)
+        self.assertLess(result.tokens_per_second, 110)
+        self.assertTrue(request["stream"])
+        self.assertEqual(request["temperature"], 0.0)
+
+    def test_ollama_probe_uses_reported_eval_timing(self):
+        """Test Ollama's own eval and prompt-eval timings set the speeds."""
+
+        async def run():
+            async with FakeInferenceServer(tokens=5, delay=0.02) as server:
+                return await probe_ollama(f"{server.url}/api", "llama3:8b")
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result.provider, "ollama")
+        self.assertEqual(result.tokens, 5)
+        self.assertAlmostEqual(result.tokens_per_second, 50.0, places=3)
+        self.assertAlmostEqual(result.prefill_tokens_per_second, 1000.0, places=0)
+        self.assertAlmostEqual(result.load_seconds, 0.5)
+
+    def test_probe_without_tokens_fails(self):
+        """Test an empty generation is a failure, not infinitely fast."""
+
+        async def run():
+            async with FakeInferenceServer(tokens=0) as server:
+                await probe_openai_compatible(server.url, "m")
+
+        with self.assertRaises(CanaryError):
+            asyncio.run(run())
+
+
+class TestBaselineStore(unittest.TestCase):
+    """Test per-model baselines and degradation flags."""
+
+    def setUp(self):
+        """Use an isolated baseline file."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.store = BaselineStore(self.temp_dir / "baselines.json")
+
+    def test_learns_then_flags_slowdown(self):
+        """Test no flags while learning, then a halved speed is degraded."""
+        for _ in range(MIN_BASELINE_SAMPLES):
+            self.assertEqual(self.store.evaluate(make_result(40.0))["status"], "learning")
+
+        self.assertEqual(self.store.evaluate(make_result(38.0))["status"], "healthy")
+        verdict = self.store.evaluate(make_result(10.0))
+
+        self.assertEqual(verdict["status"], "degraded")
+        self.assertIn("tok/s", verdict["issues"][0])
+
+    def test_degraded_runs_do_not_move_baseline(self):
+        """Test a slow spell can't become the new normal."""
+        for _ in range(MIN_BASELINE_SAMPLES):
+            self.store.evaluate(make_result(40.0))
+        for _ in range(5):
+            self.store.evaluate(make_result(5.0, ttft=2.0))
+
+        baseline = self.store.get("ollama", "llama3:8b")
+        self.assertAlmostEqual(baseline["tokens_per_second"], 40.0)
+        self.assertEqual(baseline["samples"], MIN_BASELINE_SAMPLES)
+
+    def test_baselines_persist(self):
+        """Test baselines survive a new store on the same file."""
+        self.store.evaluate(make_result(40.0))
+
+        reloaded = BaselineStore(self.store.path)
+
+        self.assertEqual(reloaded.get("ollama", "llama3:8b")["samples"], 1)
+        self.assertIsNone(reloaded.get("mlx", "llama3:8b"))
+
+
+class TestDeepHealthChecks(unittest.TestCase):
+    """Test the canary checks wired into HealthMonitor."""
+
+    def setUp(self):
+        """Use an isolated baseline file."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.monitor = HealthMonitor()
+        self.monitor.baselines = BaselineStore(self.temp_dir / "baselines.json")
+
+    def test_ollama_inference_flags_degraded_model(self):
+        """Test a model that slows down turns the check to a warning."""
+
+        async def run():
+            async with FakeInferenceServer(tokens=8, delay=0.01) as server:
+                for _ in range(MIN_BASELINE_SAMPLES):
+                    await self.monitor.check_ollama_inference(server.port)
+                server.delay = 0.05
+                return await self.monitor.check_ollama_inference(server.port)
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result["status"], "warning")
+        self.assertEqual(result["models"][0]["canary"], "degraded")
+        self.assertIn("llama3:8b", result["message"])
+
+    def test_ollama_inference_skips_unloaded_models(self):
+        """Test nothing is generated when no model is resident."""
+
+        async def run():
+            async with FakeInferenceServer(loaded=()) as server:
+                return await self.monitor.check_ollama_inference(server.port), server
+
+        result, server = asyncio.run(run())
+
+        self.assertEqual(result["status"], "idle")
+        self.assertEqual(server.requests, [])
+
+    def test_ollama_canary_keeps_the_models_expiry(self):
+        """Test the canary asks to stay loaded only as long as the model already would."""
+        expires_at = datetime.fromtimestamp(time.time() + 120, timezone.utc).isoformat(
+            timespec="microseconds"
+        )
+
+        async def run():
+            async with FakeInferenceServer() as server:
+                server.expires_at["llama3:8b"] = expires_at.replace("+00:00", "123Z")
+                await self.monitor.check_ollama_inference(server.port)
+                return server
+
+        server = asyncio.run(run())
+
+        self.assertAlmostEqual(server.requests[0]["keep_alive"], 120, delta=2)
+
+    def test_ollama_inference_reports_every_failed_model(self):
+        """Test one failing model doesn't hide the results of the others."""
+        monitor = HealthMonitor()
+        monitor.baselines = self.monitor.baselines
+
+        async def run():
+            async with FakeInferenceServer(loaded=("a:1", "b:2", "c:3")) as server:
+                server.broken = {"a:1", "c:3"}
+                # The port comes from the provider config rather than the default
+                monitor.ports["ollama"] = server.port
+                return await monitor.check_ollama_inference()
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result["status"], "critical")
+        canaries = {m["model"]: m["canary"] for m in result["models"]}
+        self.assertEqual(canaries, {"b:2": "learning", "a:1": "failed", "c:3": "failed"})
+        self.assertEqual(len(result["issues"]), 2)
+
+    def test_mlx_inference_uses_served_model(self):
+        """Test the MLX canary asks for the model the server already has."""
+
+        async def run():
+            async with FakeInferenceServer() as server:
+                return await self.monitor.check_mlx_inference(server.port), server
+
+        result, server = asyncio.run(run())
+
+        self.assertEqual(result["status"], "healthy")
+        self.assertEqual(server.requests[0]["model"], "default_model")
+        self.assertEqual(result["models"][0]["canary"], "learning")
+
+    def test_deep_checks_are_opt_in(self):
+        """Test deep checks only run with ``deep`` or by name."""
+        ran = []
+
+        async def check():
+            ran.append(True)
+            return {"status": "healthy"}
+
+        self.monitor.checks = {}
+        self.monitor.deep_checks = {"ollama_inference": check}
+
+        asyncio.run(self.monitor.run_health_checks())
+        self.assertEqual(ran, [])
+        asyncio.run(self.monitor.run_health_checks(deep=True))
+        asyncio.run(self.monitor.run_health_checks(["ollama_inference"]))
+        self.assertEqual(len(ran), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,13 +3,19 @@ Tests for cli.py module.
 """
 
 import glob
+import hashlib
 import json
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from click.testing import CliRunner
+from cortex.blobstore import BlobStore
 from cortex.cli import cli
 from cortex.providers import ModelCapability, ProviderRegistry
+from cortex.verify import FileCheck, VerifyResult
 
 from tests.fakes import FakeProvider, make_model, make_system_info
 
@@ -61,6 +67,14 @@ class CLITestBase(unittest.TestCase):
         registry_patcher.start()
         self.addCleanup(registry_patcher.stop)
 
+        # Download queue state stays out of the real cache
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.queue_file = Path(self.temp_dir) / "download_queue.json"
+        queue_patcher = patch("cortex.downloads.QUEUE_FILE", self.queue_file)
+        queue_patcher.start()
+        self.addCleanup(queue_patcher.stop)
+
         # System detection must not shell out during tests
         detector_patcher = patch(
             "cortex.system_utils.SystemDetector.detect_system", return_value=make_system_info()
@@ -130,6 +144,33 @@ class TestListCommand(CLITestBase):
         self.assertIn("tiny-llama:latest", result.output)  # 3.0 GB
         self.assertNotIn("mlx-coder", result.output)  # 8.0 GB
 
+    def test_list_collapses_variants(self):
+        """Test quantization variants share one row unless --all-variants is given."""
+        self.mlx_provider._models.append(make_model("mlx-chat-8bit", "mlx", ram_gb=4.0))
+
+        collapsed = self.runner.invoke(cli, ["list", "--provider", "mlx"])
+        expanded = self.runner.invoke(cli, ["list", "--provider", "mlx", "--all-variants"])
+
+        self.assertEqual(collapsed.exit_code, 0)
+        self.assertIn("+1 more variants", collapsed.output)
+        self.assertEqual(collapsed.output.count("mlx-chat"), 1)
+        self.assertIn("mlx-chat-8bit", expanded.output)
+        self.assertNotIn("more variants", expanded.output)
+
+    def test_list_recommended_keeps_variant_hint(self):
+        """Test --recommended neither collapses twice nor ignores --all-variants."""
+        self.mlx_provider._models.append(make_model("mlx-chat-8bit", "mlx", ram_gb=4.0))
+
+        collapsed = self.runner.invoke(cli, ["list", "--provider", "mlx", "--recommended"])
+        expanded = self.runner.invoke(
+            cli, ["list", "--provider", "mlx", "--recommended", "--all-variants"]
+        )
+
+        self.assertEqual(collapsed.exit_code, 0, collapsed.output)
+        self.assertIn("+1 more variants", collapsed.output)
+        self.assertIn("mlx-chat-8bit", expanded.output)
+        self.assertEqual(expanded.output.count("mlx-chat"), 2)
+
     def test_list_summary(self):
         """Test list command summary mode."""
         result = self.runner.invoke(cli, ["list", "--summary"])
@@ -241,6 +282,33 @@ class TestModelCommand(CLITestBase):
         self.mock_config.update_current_model.assert_not_called()
 
 
+class TestPlanCommand(CLITestBase):
+    """Test the plan command."""
+
+    def test_plan_shares_one_model_across_roles(self):
+        """Test a model with both capabilities fills code and chat once."""
+        result = self.runner.invoke(cli, ["plan", "code", "chat", "--budget", "12"])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Best plan", result.output)
+        self.assertIn("mlx-coder", result.output)
+        self.assertIn("shared", result.output)
+
+    def test_plan_nothing_fits(self):
+        """Test a budget too small for any coding model is reported."""
+        result = self.runner.invoke(cli, ["plan", "code", "--budget", "4"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("No combination", result.output)
+
+    def test_plan_rejects_bad_context(self):
+        """Test --context must be ROLE=TOKENS."""
+        result = self.runner.invoke(cli, ["plan", "--context", "code=lots"])
+
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("ROLE=TOKENS", result.output)
+
+
 class TestDownloadCommand(CLITestBase):
     """Test the download command."""
 
@@ -291,6 +359,38 @@ class TestDownloadCommand(CLITestBase):
         self.assertEqual(len(self.mock_config.data["download_stats"]), 1)
         self.assertFalse(self.mock_config.data["download_stats"][0]["success"])
 
+    def test_download_many_models(self):
+        """Test several models download in one run, each through its provider."""
+        result = self.runner.invoke(
+            cli, ["download", "new-model:latest", "org/new-model", "--no-progress", "-j", "2"]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self.ollama_provider.download_calls, ["new-model:latest"])
+        self.assertEqual(self.mlx_provider.download_calls, ["org/new-model"])
+        self.assertEqual(result.output.count("Successfully downloaded"), 2)
+
+    def test_download_resumes_unfinished_queue(self):
+        """Test downloads left by a killed session run without naming them again."""
+        self.queue_file.write_text(
+            json.dumps({"jobs": [{"model_id": "left:over", "provider": "ollama"}]})
+        )
+
+        result = self.runner.invoke(cli, ["download"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Resuming 1 unfinished download", result.output)
+        self.assertEqual(self.ollama_provider.download_calls, ["left:over"])
+        self.assertEqual(json.loads(self.queue_file.read_text()), {"jobs": []})
+
+    def test_download_rejects_bad_rate(self):
+        """Test --limit-rate needs a size per second."""
+        result = self.runner.invoke(cli, ["download", "x:y", "--limit-rate", "fast"])
+
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("expected a rate", result.output)
+        self.assertEqual(self.ollama_provider.download_calls, [])
+
     def test_download_no_progress(self):
         """Test download with the progress bar disabled."""
         result = self.runner.invoke(
@@ -301,5 +401,143 @@ class TestDownloadCommand(CLITestBase):
         self.assertIn("Successfully downloaded", result.output)
 
 
+class TestVerifyCommand(CLITestBase):
+    """Test the verify command."""
+
+    def test_verify_passes(self):
+        """Test a verified model reports its hashing throughput."""
+        result = VerifyResult(
+            files=[FileCheck(Path("blob"), "ab", "ab")], bytes_hashed=2 * 1024**3, seconds=1.0
+        )
+        self.ollama_provider.verify_model = AsyncMock(return_value=result)
+
+        output = self.runner.invoke(cli, ["verify", "tiny-llama:latest"])
+
+        self.assertEqual(output.exit_code, 0)
+        self.assertIn("Verified 1 files of tiny-llama:latest", output.output)
+        self.assertIn("2.00 GB/s", output.output)
+
+    def test_verify_reports_corrupt_files(self):
+        """Test a digest mismatch fails the command and names the file."""
+        result = VerifyResult(files=[FileCheck(Path("model.safetensors"), "ab", "cd")])
+        self.mlx_provider.verify_model = AsyncMock(return_value=result)
+
+        output = self.runner.invoke(cli, ["verify", "org/model"])
+
+        self.assertEqual(output.exit_code, 1)
+        self.assertIn("failed verification", output.output)
+        self.assertIn("model.safetensors: SHA-256 mismatch", output.output)
+
+    def test_verify_without_digests(self):
+        """Test a model with nothing to compare against is reported, not failed."""
+        output = self.runner.invoke(cli, ["verify", "tiny-llama:latest"])
+
+        self.assertEqual(output.exit_code, 0)
+        self.assertIn("No published digests", output.output)
+
+
+class TestGCCommand(CLITestBase):
+    """Test the gc command."""
+
+    def test_gc_previews_then_removes(self):
+        """Test a dry run reports unreferenced blobs and a real run removes them."""
+        store = BlobStore(Path(self.temp_dir) / "blobs")
+        shard = Path(self.temp_dir) / "shard"
+        shard.write_bytes(b"w" * 1024)
+        store.add(shard, hashlib.sha256(b"w" * 1024).hexdigest())
+        shard.unlink()
+
+        with patch("cortex.blobstore.BLOB_DIR", store.root):
+            preview = self.runner.invoke(cli, ["gc", "--dry-run"])
+            self.assertIn("Would remove 1 unreferenced blobs", preview.output)
+            self.assertEqual(len(list(store.blobs())), 1)
+
+            output = self.runner.invoke(cli, ["gc"])
+            self.assertIn("Removed 1 unreferenced blobs", output.output)
+            self.assertEqual(list(store.blobs()), [])
+
+            again = self.runner.invoke(cli, ["gc"])
+            self.assertIn("Nothing to reclaim", again.output)
+
+
+class TestEvictCommand(CLITestBase):
+    """Test the evict and pin commands."""
+
+    def setUp(self):
+        """Two downloaded MLX models, org/old used longest ago."""
+        super().setUp()
+        self.mlx_provider.local_models = AsyncMock(return_value=["org/old", "org/new"])
+        self.mlx_provider.model_disk_bytes = lambda model_id: 10 * 1024**3
+        self.mlx_provider.delete_model = AsyncMock(return_value=True)
+        tracker = MagicMock()
+        tracker.model_stats = {
+            "mlx:org/old": MagicMock(last_used=1000.0),
+            "mlx:org/new": MagicMock(last_used=2000.0),
+        }
+        patcher = patch("cortex.cli.StatisticsTracker", return_value=tracker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_evict_dry_run(self):
+        """Test a dry run shows the plan and deletes nothing."""
+        result = self.runner.invoke(cli, ["evict", "--quota", "15G", "--dry-run"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Would evict 1 models, freeing 10.0GB", result.output)
+        self.mlx_provider.delete_model.assert_not_called()
+
+    def test_evict_skips_pinned_models(self):
+        """Test a pinned model survives and the next oldest goes instead."""
+        self.mock_config.data["storage"] = {"quota_gb": 15, "pinned": ["org/old"]}
+
+        result = self.runner.invoke(cli, ["evict"])
+
+        self.assertIn("Evicted 1 models", result.output)
+        self.mlx_provider.delete_model.assert_awaited_once_with("org/new")
+
+    def test_evict_without_quota(self):
+        """Test evict asks for a quota when none is configured."""
+        result = self.runner.invoke(cli, ["evict"])
+
+        self.assertIn("No quota set", result.output)
+
+    def test_pin_and_unpin(self):
+        """Test pinning saves the model in the storage config."""
+        self.runner.invoke(cli, ["pin", "org/old", "org/new"])
+        self.assertEqual(self.mock_config.data["storage"]["pinned"], ["org/old", "org/new"])
+
+        self.runner.invoke(cli, ["pin", "--remove", "org/old"])
+        self.assertEqual(self.mock_config.data["storage"]["pinned"], ["org/new"])
+        self.mock_config.save.assert_called()
+
+
+class TestChatCommand(CLITestBase):
+    """Test provider selection in the chat command."""
+
+    def setUp(self):
+        super().setUp()
+        self.tracker = MagicMock()
+        # Session history and chat stats stay out of the real dotfiles
+        for patcher in (
+            patch("cortex.cli.StatisticsTracker", return_value=self.tracker),
+            patch("cortex.cli.PreloadScheduler"),
+            patch("cortex.cli.DOTFILES", Path(self.temp_dir)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch("cortex.cli.subprocess")
+    def test_chat_uses_configured_provider(self, mock_subprocess):
+        """Test the current model's configured provider beats the ID shape."""
+        self.mock_config.data["current_model"] = {"id": "qwen-local", "provider": "mlx"}
+        mock_subprocess.Popen.return_value.communicate.return_value = ("hello", "")
+
+        result = self.runner.invoke(cli, ["chat", "hi"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("mlx_lm.chat", mock_subprocess.Popen.call_args[0][0])
+        self.assertEqual(self.tracker.start_session.call_args[0][:2], ("qwen-local", "mlx"))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,11 +2,17 @@
 Tests for extended CLI commands in cli.py module.
 """
 
+import json
+import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from click.testing import CliRunner
 from cortex.cli import cli
+from cortex.telemetry import TelemetrySampler
 
 
 class TestExtendedCLICommands(unittest.TestCase):
@@ -31,6 +37,21 @@ class TestExtendedCLICommands(unittest.TestCase):
         # Command should complete
         self.assertIn(result.exit_code, [0, 1])  # May exit with 1 if async issues
 
+    @patch("cortex.cli._start_on_demand", new_callable=AsyncMock)
+    @patch("cortex.cli._warm_model", new_callable=AsyncMock)
+    @patch("cortex.cli.Config")
+    def test_start_on_demand_skips_prewarm(self, mock_config_class, mock_warm, mock_on_demand):
+        """Test an on-demand server doesn't pin its weights in the page cache up front."""
+        mock_config = MagicMock()
+        mock_config_class.return_value = mock_config
+        mock_config.data = {"providers": {"mlx": {"enabled": True, "prewarm": True}}}
+
+        result = self.runner.invoke(cli, ["start", "--model", "mlx-community/test", "--on-demand"])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        mock_on_demand.assert_awaited_once()
+        mock_warm.assert_not_awaited()
+
     @patch("subprocess.run")
     @patch("cortex.cli.Config")
     def test_stop_command(self, mock_config_class, mock_subprocess):
@@ -71,6 +92,23 @@ class TestExtendedCLICommands(unittest.TestCase):
             # Command should complete successfully
             self.assertEqual(result.exit_code, 0)
 
+    @patch("cortex.cli.Config")
+    def test_status_json(self, mock_config_class):
+        """Test machine-readable server telemetry."""
+        mock_config_class.return_value = MagicMock(data={"providers": {}})
+        pid_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, pid_dir)
+        (pid_dir / "mlx_server.pid").write_text(str(os.getpid()))
+
+        with patch("cortex.cli.TelemetrySampler", lambda: TelemetrySampler(pid_dir=pid_dir)):
+            result = self.runner.invoke(cli, ["status", "--json"])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        data = json.loads(result.output)
+        self.assertTrue(data["mlx"]["running"])
+        self.assertEqual(data["mlx"]["process"]["pid"], os.getpid())
+        self.assertGreater(data["mlx"]["process"]["rss_bytes"], 0)
+
     @patch("cortex.cli.HealthMonitor")
     def test_health_command(self, mock_health_class):
         """Test health command."""
@@ -3,7 +3,10 @@ Tests for core.py module.
 """
 
 import asyncio
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from cortex.core import Cortex
@@ -29,6 +32,12 @@ class TestCortex(unittest.TestCase):
 
         config_patcher.start()
         mock_detector = detector_patcher.start()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        queue_patcher = patch("cortex.downloads.QUEUE_FILE", Path(self.temp_dir) / "queue.json")
+        queue_patcher.start()
+        self.addCleanup(queue_patcher.stop)
         mock_detector.detect_system.return_value = make_system_info()
 
         self.cortex = Cortex()
@@ -132,7 +141,7 @@ class TestCortex(unittest.TestCase):
         self.assertEqual(self.mlx_provider.download_calls, ["mlx-community/chat-model"])
 
     def test_download_model_finds_provider(self):
-        """Test downloading resolves the provider by model availability."""
+        """Test downloading resolves the provider from the model ID."""
         result = asyncio.run(self.cortex.download_model("llama3.2:latest"))
 
         self.assertTrue(result)
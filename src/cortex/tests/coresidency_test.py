@@ -0,0 +1,166 @@
+"""
+Tests for coresidency.py module.
+"""
+
+import itertools
+import random
+import unittest
+
+from cortex.coresidency import Candidate, plan_coresidency, prune_candidates
+from cortex.providers import ModelCapability
+from cortex.system_utils import ModelRecommender
+
+from tests.fakes import make_model, make_system_info
+
+
+def candidate(role, name, ram_gb, fitness):
+    """A candidate for a local test model."""
+    return Candidate(role, make_model(name, "ollama"), ram_gb, fitness)
+
+
+def brute_force(slots, budget_gb, max_plans):
+    """Fitness of the best plans by trying every combination."""
+    fitnesses = []
+    for combo in itertools.product(*slots.values()):
+        footprints = {}
+        for pick in combo:
+            footprints[pick.key] = max(footprints.get(pick.key, 0.0), pick.ram_gb)
+        if sum(footprints.values()) <= budget_gb + 1e-9:
+            fitnesses.append(round(sum(pick.fitness for pick in combo), 6))
+    return sorted(fitnesses, reverse=True)[:max_plans]
+
+
+class TestPlanCoresidency(unittest.TestCase):
+    """Test the knapsack search."""
+
+    def test_best_combination_within_budget(self):
+        """Test the plan trades a weaker model in one slot for a stronger one elsewhere."""
+        slots = {
+            "code": [candidate("code", "coder-33b", 20, 90), candidate("code", "coder-7b", 5, 60)],
+            "chat": [candidate("chat", "chat-70b", 40, 95), candidate("chat", "chat-8b", 6, 70)],
+            "embedding": [candidate("embedding", "embed", 1, 30)],
+        }
+
+        plans = plan_coresidency(slots, budget_gb=28)
+
+        best = plans[0]
+        self.assertEqual(
+            {role: model.id for role, model in best.assignments.items()},
+            {"code": "coder-33b", "chat": "chat-8b", "embedding": "embed"},
+        )
+        self.assertEqual(best.fitness, 190)
+        self.assertEqual(best.ram_gb, 27)
+        self.assertEqual(best.headroom_gb, 1)
+        self.assertEqual([p.fitness for p in plans], [190, 160])
+
+    def test_shared_model_is_loaded_once(self):
+        """Test a model filling two roles counts its largest footprint once."""
+        slots = {
+            "code": [candidate("code", "qwen-coder", 10, 80), candidate("code", "small", 3, 40)],
+            "chat": [candidate("chat", "qwen-coder", 8, 70), candidate("chat", "chat", 6, 75)],
+        }
+
+        best = plan_coresidency(slots, budget_gb=12)[0]
+
+        self.assertEqual(len(best.models), 1)
+        self.assertEqual(best.ram_gb, 10)
+        self.assertEqual(best.fitness, 150)
+
+    def test_nothing_fits(self):
+        """Test an empty result when a slot can't be filled within budget."""
+        slots = {"code": [candidate("code", "big", 30, 90)], "chat": []}
+
+        self.assertEqual(plan_coresidency(slots, budget_gb=64), [])
+        self.assertEqual(plan_coresidency({"code": slots["code"]}, budget_gb=16), [])
+
+    def test_pruning_keeps_enough_runner_ups(self):
+        """Test candidates beaten by max_plans smaller ones are dropped."""
+        candidates = [
+            candidate("chat", f"m{i}", ram, fit)
+            for i, (ram, fit) in enumerate([(1, 50), (2, 40), (3, 60), (4, 55), (5, 45)])
+        ]
+
+        kept = prune_candidates(candidates, keep=2)
+
+        self.assertEqual([c.model.id for c in kept], ["m0", "m1", "m2", "m3"])
+
+    def test_matches_brute_force(self):
+        """Test the top plans equal exhaustive search on random catalogs."""
+        rng = random.Random(7)
+        for _ in range(150):
+            names = [f"m{i}" for i in range(rng.randint(3, 9))]
+            roles = ["code", "chat", "embedding", "vision"][: rng.randint(1, 4)]
+            correlated = rng.random() < 0.5
+            slots = {role: [] for role in roles}
+            for name in names:
+                for role in roles:
+                    if rng.random() < 0.5:
+                        ram = rng.choice([1, 2, 4, 8]) * rng.uniform(0.9, 1.1)
+                        fit = ram * 10 + rng.uniform(0, 3) if correlated else rng.uniform(0, 50)
+                        slots[role].append(candidate(role, name, ram, fit))
+            budget, max_plans = rng.uniform(2, 20), rng.randint(1, 4)
+
+            plans = plan_coresidency(slots, budget, max_plans)
+
+            self.assertEqual(
+                [round(p.fitness, 6) for p in plans], brute_force(slots, budget, max_plans)
+            )
+
+
+class TestRecommenderPlan(unittest.TestCase):
+    """Test planning from ModelInfo catalogs."""
+
+    def setUp(self):
+        """A coder, a chat model and an embedding model on a 30GB-free machine."""
+        self.system_info = make_system_info()
+        self.coder = make_model("coder", "mlx", [ModelCapability.CODE], ram_gb=12.0)
+        self.chat = make_model("chat", "ollama", [ModelCapability.CHAT], ram_gb=9.0)
+        self.embed = make_model("embed", "ollama", [ModelCapability.EMBEDDING], ram_gb=0.5)
+        self.cloud = make_model("gpt-4o", "openai", [ModelCapability.CHAT], online=True)
+        for model, score in ((self.coder, 70), (self.chat, 60), (self.embed, 20)):
+            model.score = score
+
+    def test_plan_fills_roles_with_local_models(self):
+        """Test online models never take a slot and footprints include the safety margin."""
+        plans = ModelRecommender.plan_coresidency(
+            self.system_info, [self.coder, self.chat, self.embed, self.cloud]
+        )
+
+        best = plans[0]
+        self.assertEqual(best.assignments["chat"], self.chat)
+        self.assertEqual(set(best.assignments), {"code", "chat", "embedding"})
+        self.assertAlmostEqual(best.ram_gb, (12.0 + 9.0 + 0.5) * 1.2)
+
+    def test_context_length_grows_footprint(self):
+        """Test a role's context length is charged to its model's KV cache."""
+        self.coder.metadata["architecture"] = {
+            "num_layers": 32,
+            "hidden_size": 4096,
+            "num_attention_heads": 32,
+            "num_kv_heads": 8,
+            "head_dim": 128,
+            "max_context": 131072,
+        }
+        models = [self.coder, self.chat, self.embed]
+
+        short = ModelRecommender.plan_coresidency(
+            self.system_info, models, ["code"], context_lengths={"code": 4096}
+        )
+        long = ModelRecommender.plan_coresidency(
+            self.system_info, models, ["code"], context_lengths={"code": 131072}
+        )
+
+        # 128KB of KV cache per token
+        self.assertAlmostEqual(long[0].ram_gb - short[0].ram_gb, 124 * 1024 * 128 / 1024**2)
+
+    def test_budget_limits_plan(self):
+        """Test an explicit budget below the combined footprint finds nothing."""
+        plans = ModelRecommender.plan_coresidency(
+            self.system_info, [self.coder, self.chat, self.embed], budget_gb=20
+        )
+
+        self.assertEqual(plans, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Tests for downloads.py module.
+"""
+
+import asyncio
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from cortex.downloads import DownloadManager, JobStatus, resolve_provider
+from cortex.providers import ProviderRegistry, infer_provider
+
+from tests.fakes import FakeProvider, make_model
+
+
+class SlowProvider(FakeProvider):
+    """Fake provider whose downloads take a while and report progress."""
+
+    def __init__(self, name, models=()):
+        super().__init__(name, list(models))
+        self.running = 0
+        self.peak = 0
+
+    async def download_model(self, model_id, progress_callback=None):
+        self.download_calls.append(model_id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        for done in (50, 100):
+            await asyncio.sleep(0.01)
+            if progress_callback:
+                progress_callback(done, 100)
+        self.running -= 1
+        return self.download_result
+
+
+class TestDownloadManager(unittest.TestCase):
+    """Test queueing, deduplication and persistence."""
+
+    def setUp(self):
+        """A registry of slow MLX and Ollama fakes and an isolated queue file."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.state_path = Path(self.temp_dir) / "queue.json"
+        self.mlx = SlowProvider("mlx")
+        self.ollama = SlowProvider("ollama")
+        self.registry = ProviderRegistry()
+        self.registry.register(self.mlx)
+        self.registry.register(self.ollama)
+
+    def manager(self, **kwargs):
+        return DownloadManager(self.registry, state_path=self.state_path, **kwargs)
+
+    def test_resolve_provider(self):
+        """Test catalogs win over the ID shape."""
+        self.ollama.models_cache = [make_model("qwen2.5", "ollama")]
+
+        self.assertEqual(resolve_provider("mlx-community/Qwen-4bit", self.registry), "mlx")
+        self.assertEqual(resolve_provider("llama3:8b", self.registry), "ollama")
+        self.assertEqual(resolve_provider("qwen2.5", self.registry), "ollama")
+        self.assertIsNone(resolve_provider("mystery", self.registry))
+        # API models are inferred but never downloaded
+        self.assertEqual(infer_provider("claude-3-opus", self.registry), "claude")
+        self.assertIsNone(resolve_provider("claude-3-opus", self.registry))
+
+    def test_infer_provider_by_id_shape(self):
+        """Test the ID-shape rules shared by every command."""
+        self.assertEqual(infer_provider("lmstudio-community/Qwen-4bit", self.registry), "mlx")
+        self.assertEqual(infer_provider("mlx-community/gpt-oss-20b", self.registry), "mlx")
+        self.assertEqual(infer_provider("gpt-4o", self.registry), "openai")
+        self.assertEqual(infer_provider("o3-mini", self.registry), "openai")
+        self.assertEqual(infer_provider("gemini-1.5-pro", self.registry), "gemini")
+        self.assertEqual(infer_provider("qwen2.5:7b", self.registry), "ollama")
+
+    def test_concurrent_requests_share_one_download(self):
+        """Test asking for a model that is downloading joins it."""
+        manager = self.manager()
+
+        async def run():
+            return await asyncio.gather(
+                manager.download("llama3:8b"), manager.download("llama3:8b", "ollama")
+            )
+
+        self.assertEqual(asyncio.run(run()), [True, True])
+        self.assertEqual(self.ollama.download_calls, ["llama3:8b"])
+
+    def test_parallel_downloads_are_bounded(self):
+        """Test no more than max_parallel downloads run at once."""
+        manager = self.manager(max_parallel=2)
+        for i in range(3):
+            manager.enqueue(f"model{i}:latest")
+            manager.enqueue(f"org/model{i}")
+        progress = []
+        manager.listeners.append(lambda job: progress.append((job.key, job.bytes_done)))
+
+        results = asyncio.run(manager.run())
+
+        self.assertTrue(all(results.values()))
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.mlx.peak + self.ollama.peak, 2)
+        self.assertIn(("mlx:org/model0", 100), progress)
+
+    def test_insufficient_disk_space_fails_before_downloading(self):
+        """Test a model larger than the free space never starts."""
+        self.mlx.download_size = AsyncMock(return_value=1024**6)
+        manager = self.manager()
+
+        self.assertFalse(asyncio.run(manager.download("org/huge")))
+
+        self.assertEqual(self.mlx.download_calls, [])
+        job = manager.jobs["mlx:org/huge"]
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIn("Not enough disk space", job.error)
+
+    def test_download_that_does_not_fit_evicts_first(self):
+        """Test the model store makes room before a download too large for the disk."""
+        self.mlx.download_size = AsyncMock(return_value=10 * 1024**3)
+        store = MagicMock()
+        store.make_room = AsyncMock(return_value=MagicMock(evict=["mlx:org/old"]))
+        manager = self.manager(store=store)
+
+        with patch("cortex.downloads.free_bytes", side_effect=[1024**3, 100 * 1024**3]):
+            self.assertTrue(asyncio.run(manager.download("org/new")))
+
+        self.assertEqual(self.mlx.download_calls, ["org/new"])
+        needed, available = store.make_room.call_args[0]
+        self.assertEqual(available, 1024**3)
+        self.assertGreater(needed, 10 * 1024**3)
+        self.assertEqual(store.make_room.call_args[1]["keep"], ["mlx:org/new"])
+
+    def test_download_that_cannot_fit_fails_without_evicting(self):
+        """Test a download eviction can't make room for fails with the plan's shortfall."""
+        self.mlx.download_size = AsyncMock(return_value=200 * 1024**3)
+        store = MagicMock()
+        plan = MagicMock(evict=["mlx:org/old"], fits=False, needed_bytes=150 * 1024**3)
+        plan.freed_bytes = 20 * 1024**3
+        store.make_room = AsyncMock(return_value=plan)
+        manager = self.manager(store=store)
+
+        with patch("cortex.downloads.free_bytes", return_value=1024**4):
+            self.assertFalse(asyncio.run(manager.download("org/huge")))
+
+        self.assertEqual(self.mlx.download_calls, [])
+        error = manager.jobs["mlx:org/huge"].error
+        self.assertIn("even after evicting", error)
+        self.assertIn("150.0GB more", error)
+        self.assertIn("frees 20.0GB", error)
+
+    def test_unfinished_downloads_survive_a_restart(self):
+        """Test a new session picks up queued and interrupted downloads."""
+        first = self.manager()
+        first.enqueue("llama3:8b")
+        first.enqueue("org/model").status = JobStatus.DOWNLOADING
+        first.save()
+
+        second = self.manager()
+
+        self.assertEqual([j.key for j in second.pending()], ["ollama:llama3:8b", "mlx:org/model"])
+        self.assertTrue(all(j.status == JobStatus.QUEUED for j in second.pending()))
+        asyncio.run(second.run())
+        self.assertEqual(self.manager().pending(), [])
+
+    def test_cloud_provider_rejected(self):
+        """Test only local providers download."""
+        with self.assertRaises(ValueError):
+            self.manager().enqueue("claude-3-opus", "claude")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,17 @@
 Shared offline test doubles for the cortex test suite.
 
 No test in this suite may touch the network: providers are faked in-memory and
-aiohttp sessions are replaced with canned responses.
+aiohttp sessions are replaced with canned responses. Code that times real
+streams runs against FakeInferenceServer on localhost instead.
 """
 
+import asyncio
+import hashlib
+import json
+import re
 from unittest.mock import AsyncMock, MagicMock
 
+from aiohttp import web
 from cortex.providers import BaseProvider, ModelCapability, ModelInfo, ProviderType
 from cortex.system_utils import PerformanceTier, SystemInfo, SystemType
 
@@ -122,3 +128,205 @@ class FakeStreamContent:
         if not self._lines:
             raise StopAsyncIteration
         return self._lines.pop(0)
+
+
+class FakeInferenceServer:
+    """Local server streaming ``tokens`` tokens, ``delay`` seconds apart.
+
+    Speaks the OpenAI chat (mlx_lm.server), Ollama and Anthropic streaming
+    dialects. Prompt size is reported as one token per word, prefilled at
+    ``prefill_rate`` tokens/s.
+    """
+
+    def __init__(self, tokens=8, delay=0.005, loaded=("llama3:8b",), prefill_rate=1000.0):
+        self.tokens = tokens
+        self.delay = delay
+        self.loaded = list(loaded)
+        self.prefill_rate = prefill_rate
+        self.requests = []
+        # Ollama model -> expires_at reported by /api/ps; models whose generations fail
+        self.expires_at = {}
+        self.broken = set()
+        self.app = web.Application()
+        self.app.router.add_post("/v1/chat/completions", self.chat)
+        self.app.router.add_get("/v1/models", self.models)
+        self.app.router.add_post("/v1/messages", self.messages)
+        self.app.router.add_post("/api/generate", self.generate)
+        self.app.router.add_get("/api/ps", self.ps)
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "localhost", 0)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+        self.url = f"http://localhost:{self.port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+    def max_tokens(self, body):
+        limit = body.get("max_tokens") or body.get("options", {}).get("num_predict")
+        return min(self.tokens, limit) if limit else self.tokens
+
+    async def prefill(self, prompt):
+        """Sleep for the prompt's prefill and return its token count."""
+        prompt_tokens = len(prompt.split())
+        await asyncio.sleep(prompt_tokens / self.prefill_rate)
+        return prompt_tokens
+
+    async def models(self, request):
+        return web.json_response({"data": [{"id": "default_model"}]})
+
+    async def ps(self, request):
+        models = [{"name": name} for name in self.loaded]
+        for model in models:
+            if model["name"] in self.expires_at:
+                model["expires_at"] = self.expires_at[model["name"]]
+        return web.json_response({"models": models})
+
+    async def chat(self, request):
+        body = await request.json()
+        self.requests.append(body)
+        prompt_tokens = await self.prefill(body["messages"][-1]["content"])
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n')
+        count = self.max_tokens(body)
+        for i in range(count):
+            if i:
+                await asyncio.sleep(self.delay)
+            chunk = {"choices": [{"delta": {"content": f"{i + 1} "}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        usage = {
+            "choices": [],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": count},
+        }
+        await response.write(f"data: {json.dumps(usage)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def messages(self, request):
+        body = await request.json()
+        self.requests.append(body)
+        prompt_tokens = await self.prefill(body["messages"][-1]["content"])
+        response = web.StreamResponse()
+        await response.prepare(request)
+
+        async def event(name, data):
+            await response.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+
+        await event("message_start", {"message": {"usage": {"input_tokens": prompt_tokens}}})
+        count = self.max_tokens(body)
+        for i in range(count):
+            if i:
+                await asyncio.sleep(self.delay)
+            await event("content_block_delta", {"delta": {"type": "text_delta", "text": f"{i} "}})
+        await event("message_delta", {"usage": {"output_tokens": count}})
+        await event("message_stop", {})
+        return response
+
+    async def generate(self, request):
+        body = await request.json()
+        self.requests.append(body)
+        if body["model"] in self.broken:
+            return web.json_response({"error": "model failed"}, status=500)
+        prompt_tokens = await self.prefill(body["prompt"])
+        response = web.StreamResponse()
+        await response.prepare(request)
+        count = self.max_tokens(body)
+        for i in range(count):
+            if i:
+                await asyncio.sleep(self.delay)
+            line = {"model": body["model"], "response": f"{i + 1} ", "done": False}
+            await response.write((json.dumps(line) + "\n").encode())
+        final = {
+            "done": True,
+            "eval_count": count,
+            "eval_duration": int(count * self.delay * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_tokens / self.prefill_rate * 1e9),
+            "load_duration": int(0.5e9),
+        }
+        await response.write((json.dumps(final) + "\n").encode())
+        return response
+
+
+class FakeHubServer:
+    """Local stand-in for the HuggingFace Hub serving ``repos`` of in-memory files.
+
+    Serves the tree listing (``page_size`` entries per page, linked like the
+    Hub) and ``resolve`` downloads honouring single byte ranges. Each entry
+    of ``fail`` (path, range start) breaks one response for that range
+    midway; list a range several times to break it repeatedly.
+    """
+
+    def __init__(self, repos, page_size=None, fail=()):
+        self.repos = repos
+        self.page_size = page_size
+        self.fail = list(fail)
+        self.ranges = []
+        self.listings = 0
+        self.app = web.Application()
+        self.app.router.add_get("/api/models/{org}/{name}/tree/{revision}", self.tree)
+        self.app.router.add_get("/{org}/{name}/resolve/{revision}/{path:.+}", self.resolve)
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "localhost", 0)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+        self.url = f"http://localhost:{self.port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+    def files(self, request):
+        repo = self.repos.get(f"{request.match_info['org']}/{request.match_info['name']}")
+        if repo is None:
+            raise web.HTTPNotFound()
+        return repo
+
+    async def tree(self, request):
+        self.listings += 1
+        entries = [
+            {
+                "type": "file",
+                "path": path,
+                "size": len(data),
+                "lfs": {"oid": hashlib.sha256(data).hexdigest(), "size": len(data)},
+            }
+            for path, data in sorted(self.files(request).items())
+        ]
+        offset = int(request.query.get("cursor", 0))
+        size = self.page_size or len(entries)
+        response = web.json_response(entries[offset : offset + size])
+        if offset + size < len(entries):
+            url = request.url.with_query(cursor=str(offset + size))
+            response.headers["Link"] = f'<{url}>; rel="next"'
+        return response
+
+    async def resolve(self, request):
+        data = self.files(request).get(request.match_info["path"])
+        if data is None:
+            raise web.HTTPNotFound()
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", request.headers.get("Range", ""))
+        if not match:
+            return web.Response(body=data)
+        start, end = int(match.group(1)), int(match.group(2)) + 1
+        self.ranges.append((request.match_info["path"], start, end))
+        response = web.StreamResponse(status=206)
+        response.content_length = end - start
+        response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(data)}"
+        await response.prepare(request)
+        key = (request.match_info["path"], start)
+        if key in self.fail:
+            self.fail.remove(key)
+            await response.write(data[start : start + (end - start) // 2])
+            request.transport.close()
+            return response
+        await response.write(data[start:end])
+        return response
@@ -3,8 +3,12 @@ Tests for health.py module.
 """
 
 import asyncio
+import os
+import shutil
+import tempfile
 import time
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from cortex.health import HealthMonitor
@@ -100,6 +104,38 @@ class TestHealthMonitor(unittest.TestCase):
         self.assertEqual(result["status"], "critical")
         self.assertGreater(len(result["issues"]), 0)
 
+    @patch("psutil.swap_memory")
+    @patch("psutil.virtual_memory")
+    def test_check_memory_pressure_swap_rate(self, mock_memory, mock_swap):
+        """Test that swap activity is measured between samples."""
+        mock_memory.return_value = MagicMock(percent=70.0, available=8 * 1024**3)
+        mock_swap.return_value = MagicMock(percent=12.0, sin=0, sout=500 * 1024**2)
+
+        first = asyncio.run(self.monitor.check_memory_pressure())
+        # Pretend the previous sample was taken 10s ago with nothing swapped out
+        self.monitor._last_swap = (time.monotonic() - 10, 0, 0)
+        second = asyncio.run(self.monitor.check_memory_pressure())
+
+        self.assertEqual(first["swap_out_mb_per_s"], 0.0)
+        self.assertFalse(first["under_pressure"])
+        self.assertAlmostEqual(second["swap_out_mb_per_s"], 50.0, delta=1.0)
+        self.assertTrue(second["under_pressure"])
+        self.assertEqual(second["status"], "warning")
+
+    @patch("psutil.swap_memory")
+    @patch("psutil.virtual_memory")
+    def test_check_memory_pressure_threshold(self, mock_memory, mock_swap):
+        """Test the configurable RAM threshold."""
+        mock_memory.return_value = MagicMock(percent=82.0, available=3 * 1024**3)
+        mock_swap.return_value = MagicMock(percent=0.0, sin=0, sout=0)
+
+        relaxed = asyncio.run(self.monitor.check_memory_pressure())
+        strict = asyncio.run(HealthMonitor(memory_threshold_percent=80.0).check_memory_pressure())
+
+        self.assertFalse(relaxed["under_pressure"])
+        self.assertTrue(strict["under_pressure"])
+        self.assertIn("Memory usage 82%", strict["message"])
+
     def test_check_mlx_server_running(self):
         """Test MLX server check when running."""
         response = make_response(200, {"data": [{"id": "model1"}, {"id": "model2"}]})
@@ -183,35 +219,36 @@ class TestHealthMonitor(unittest.TestCase):
         self.assertGreater(result["connectivity"], 50)
         self.assertLess(result["connectivity"], 100)
 
-    @patch("pathlib.Path.exists")
-    @patch("pathlib.Path.rglob")
     @patch("psutil.disk_usage")
-    def test_check_disk_space(self, mock_disk_usage, mock_rglob, mock_exists):
-        """Test disk space check."""
-        mock_exists.return_value = True
-
-        # Mock file sizes
-        mock_file1 = MagicMock()
-        mock_file1.is_file.return_value = True
-        mock_file1.stat.return_value.st_size = 1 * (1024**3)  # 1 GB
-
-        mock_file2 = MagicMock()
-        mock_file2.is_file.return_value = True
-        mock_file2.stat.return_value.st_size = 2 * (1024**3)  # 2 GB
-
-        mock_rglob.return_value = [mock_file1, mock_file2]
+    def test_check_disk_space(self, mock_disk_usage):
+        """Test disk space check counts files linked between stores once."""
+        home = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, home)
+        shard = home / ".cache" / "huggingface" / "hub" / "blobs" / "abc"
+        shard.parent.mkdir(parents=True)
+        shard.write_bytes(b"w" * 3000)
+        snapshot = home / ".cache" / "huggingface" / "hub" / "snapshots" / "model.safetensors"
+        snapshot.parent.mkdir(parents=True)
+        snapshot.symlink_to(shard)
+        model_dir = home / ".cache" / "mlx" / "org_model"
+        model_dir.mkdir(parents=True)
+        os.link(shard, model_dir / "model.safetensors")
+        (model_dir / "config.json").write_bytes(b"{}")
 
         mock_disk = MagicMock()
         mock_disk.free = 50 * (1024**3)  # 50 GB free
         mock_disk.total = 500 * (1024**3)  # 500 GB total
         mock_disk_usage.return_value = mock_disk
 
-        result = asyncio.run(self.monitor.check_disk_space())
+        with (
+            patch("pathlib.Path.home", return_value=home),
+            patch("cortex.health.BLOB_DIR", home / ".cache" / "cortex" / "blobs"),
+        ):
+            result = asyncio.run(self.monitor.check_disk_space())
 
         self.assertEqual(result["status"], "healthy")
         self.assertAlmostEqual(result["free_space_gb"], 50.0, places=1)
-        # 3 paths * 3GB = 9GB total
-        self.assertAlmostEqual(result["model_cache_gb"], 9.0, places=1)
+        self.assertEqual(result["model_cache_gb"] * 1024**3, 3002)
 
     @patch("pathlib.Path.exists")
     @patch("pathlib.Path.glob")
@@ -312,5 +349,124 @@ class TestHealthMonitor(unittest.TestCase):
         self.assertIsNone(summary["last_update"])
 
 
+class TestHealthHistory(unittest.TestCase):
+    """Test sample history, caching, trends and sustained alerts."""
+
+    def setUp(self):
+        """Monitor with a single counting check."""
+        self.monitor = HealthMonitor()
+        self.calls = 0
+
+        async def counting_check():
+            self.calls += 1
+            return {"status": "healthy", "value": self.calls, "timestamp": time.time()}
+
+        self.monitor.checks = {"counter": counting_check}
+        self.monitor.intervals = {"counter": 60.0}
+
+    def feed(self, check_name, results, start, step):
+        """Append results to a check's history at ``step``-second spacing."""
+        for i, result in enumerate(results):
+            self.monitor._record(check_name, {**result, "timestamp": start + i * step})
+
+    def test_cached_results_within_ttl(self):
+        """Test repeated callers get the cached result instead of a new run."""
+        first = asyncio.run(self.monitor.run_health_checks(["counter"], max_age=30))
+        second = asyncio.run(self.monitor.run_health_checks(["counter"], max_age=30))
+        fresh = asyncio.run(self.monitor.run_health_checks(["counter"]))
+
+        self.assertEqual(first["counter"]["value"], 1)
+        self.assertEqual(second["counter"]["value"], 1)
+        self.assertEqual(fresh["counter"]["value"], 2)
+        self.assertEqual(len(self.monitor.history["counter"]), 2)
+
+    def test_cached_results_shared_between_processes(self):
+        """Test a result another process cached is reused within its check's interval."""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        cache_file = Path(temp_dir) / "health.json"
+        writer = HealthMonitor(cache_file=cache_file)
+        writer.checks = self.monitor.checks
+        asyncio.run(writer.run_health_checks(["counter"]))
+
+        reader = HealthMonitor(cache_file=cache_file)
+        reader.checks = self.monitor.checks
+        reader.intervals = {"counter": 60.0}
+        cached = asyncio.run(reader.run_health_checks(["counter"], max_age=reader.intervals))
+        stale = asyncio.run(reader.run_health_checks(["counter"], max_age={"counter": 0}))
+
+        self.assertEqual(cached["counter"]["value"], 1)
+        self.assertEqual(stale["counter"]["value"], 2)
+
+    def test_cached_server_result_from_another_port_is_ignored(self):
+        """Test a server check cached on one port isn't served for another."""
+        self.monitor._record("mlx_server", {"status": "offline", "running": False, "port": 8080})
+
+        self.assertIsNotNone(self.monitor.cached_result("mlx_server", 60))
+        self.monitor.ports["mlx"] = 8081
+        self.assertIsNone(self.monitor.cached_result("mlx_server", 60))
+
+    def test_due_checks_follow_intervals(self):
+        """Test that a check is only due again after its interval."""
+        self.assertEqual(self.monitor.due_checks(), ["counter"])
+        asyncio.run(self.monitor.run_health_checks(["counter"]))
+
+        self.assertEqual(self.monitor.due_checks(), [])
+        self.assertEqual(self.monitor.due_checks(now=time.time() + 61), ["counter"])
+
+    def test_disk_trend_and_time_to_full(self):
+        """Test the free-disk slope and its extrapolation."""
+        now = time.time()
+        frees = [{"free_space_gb": 50 - i} for i in range(5)]
+        self.feed("disk_space", frees, now - 4 * 3600, 3600)
+        self.monitor.status["disk_space"] = {"free_space_gb": 46}
+
+        self.assertAlmostEqual(self.monitor.trend("disk_space", "free_space_gb"), -1.0)
+        self.assertAlmostEqual(self.monitor.hours_until_disk_full(), 46.0)
+
+    def test_server_flaps(self):
+        """Test counting up/down transitions within the window."""
+        states = [{"running": r} for r in (True, False, True, False, True)]
+        self.feed("ollama_server", states, time.time() - 50, 10)
+
+        self.assertEqual(self.monitor.flaps("ollama_server"), 4)
+        alerts = self.monitor.evaluate_alerts()
+        self.assertIn("ollama_server_flapping", [a.name for a in alerts])
+
+    def test_alert_fires_only_when_sustained(self):
+        """Test an alert needs its condition over the whole window, and fires once."""
+        now = time.time()
+        self.feed("memory_pressure", [{"under_pressure": True}] * 3, now - 20, 10)
+        self.assertEqual(self.monitor.evaluate_alerts(), [])
+
+        self.monitor.history.clear()
+        self.feed("memory_pressure", [{"under_pressure": True}] * 10, now - 90, 10)
+        fired = self.monitor.evaluate_alerts()
+        self.assertEqual([a.name for a in fired], ["memory_pressure"])
+        self.assertEqual(self.monitor.evaluate_alerts(), [])
+
+        self.monitor._record("memory_pressure", {"under_pressure": False, "timestamp": now})
+        self.monitor.evaluate_alerts()
+        self.assertNotIn("memory_pressure", self.monitor.active_alerts)
+
+    def test_watch_runs_due_checks(self):
+        """Test the watch loop runs checks and reports updates until stopped."""
+        updates = []
+
+        async def run():
+            stop = asyncio.Event()
+
+            def on_update(results, alerts):
+                updates.append(results)
+                stop.set()
+
+            await self.monitor.watch(stop_event=stop, tick=0.01, on_update=on_update)
+
+        asyncio.run(run())
+
+        self.assertEqual(list(updates[0]), ["counter"])
+        self.assertEqual(self.calls, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
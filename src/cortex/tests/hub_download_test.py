@@ -0,0 +1,144 @@
+"""
+Tests for hub_download.py module.
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from cortex.blobstore import BlobStore
+from cortex.hub_download import DownloadError, HubDownloader, RateLimiter, chunk_ranges
+
+from tests.fakes import FakeHubServer
+
+REPO = "mlx-community/tiny-4bit"
+
+
+class TestHubDownloader(unittest.TestCase):
+    """Test downloads from a local Hub stand-in."""
+
+    def setUp(self):
+        """A repo with a three-chunk shard, a config and a PyTorch copy."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.dest = Path(self.temp_dir) / "model"
+        self.files = {
+            "model.safetensors": os.urandom(10_000),
+            "config.json": b'{"quantization": {"bits": 4, "group_size": 64}}',
+            "pytorch_model.bin": os.urandom(100),
+        }
+        self.progress = []
+
+    def run_download(self, blob_store=None, **server_options):
+        """Download the repo, returning the server for inspection."""
+
+        async def run():
+            async with FakeHubServer({REPO: self.files}, **server_options) as server:
+                downloader = HubDownloader(
+                    endpoint=server.url, chunk_size=4096, retry_delay=0, blob_store=blob_store
+                )
+                await downloader.download(
+                    REPO, self.dest, progress_callback=lambda *p: self.progress.append(p)
+                )
+            return server
+
+        return asyncio.run(run())
+
+    def assert_complete(self):
+        """Test the repo's files, less the PyTorch copy, are in place."""
+        self.assertEqual(
+            (self.dest / "model.safetensors").read_bytes(), self.files["model.safetensors"]
+        )
+        self.assertEqual((self.dest / "config.json").read_bytes(), self.files["config.json"])
+        self.assertEqual(
+            sorted(p.name for p in self.dest.iterdir()), ["config.json", "model.safetensors"]
+        )
+
+    def test_chunk_ranges(self):
+        """Test ranges cover the file with a short last chunk."""
+        self.assertEqual(chunk_ranges(10, 4), [(0, 4), (4, 8), (8, 10)])
+        self.assertEqual(chunk_ranges(0, 4), [])
+
+    def test_downloads_shards_in_ranges(self):
+        """Test large files arrive in parallel ranges with byte progress."""
+        server = self.run_download(page_size=1)
+
+        self.assert_complete()
+        shard_ranges = sorted(r[1:] for r in server.ranges if r[0] == "model.safetensors")
+        self.assertEqual(shard_ranges, [(0, 4096), (4096, 8192), (8192, 10_000)])
+        total = 10_000 + len(self.files["config.json"])
+        self.assertEqual(self.progress[-1], (total, total))
+        self.assertTrue(all(done <= total for done, _ in self.progress))
+
+    def test_retries_broken_range(self):
+        """Test a range cut off midway is fetched again and progress rolls back."""
+        self.run_download(fail=[("model.safetensors", 4096)])
+
+        self.assert_complete()
+        done = [d for d, _ in self.progress]
+        self.assertTrue(any(later < earlier for earlier, later in zip(done, done[1:])))
+
+    def test_resumes_partial_download(self):
+        """Test a failed download resumes with only the missing range."""
+        with self.assertRaises(DownloadError):
+            self.run_download(fail=[("model.safetensors", 8192)] * 3)
+        self.assertTrue((self.dest / "model.safetensors.partial").exists())
+
+        server = self.run_download()
+
+        self.assert_complete()
+        self.assertEqual(server.ranges, [("model.safetensors", 8192, 10_000)])
+
+    def test_complete_files_are_skipped(self):
+        """Test downloading a complete repo again fetches nothing."""
+        self.run_download()
+        self.progress.clear()
+
+        server = self.run_download()
+
+        self.assertEqual(server.ranges, [])
+        self.assertEqual(self.progress[-1][0], self.progress[-1][1])
+
+    def test_stored_blobs_are_linked_not_fetched(self):
+        """Test a second copy of a repo links the first one's blobs."""
+        store = BlobStore(Path(self.temp_dir) / "blobs")
+        self.run_download(blob_store=store)
+        first = self.dest
+        self.dest = Path(self.temp_dir) / "copy"
+        self.progress.clear()
+
+        server = self.run_download(blob_store=store)
+
+        self.assert_complete()
+        self.assertEqual(server.ranges, [])
+        self.assertEqual(self.progress[-1][0], self.progress[-1][1])
+        shard = "model.safetensors"
+        self.assertTrue(os.path.samefile(first / shard, self.dest / shard))
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test the shared bandwidth cap."""
+
+    def test_callers_share_the_rate(self):
+        """Test concurrent readers together stay under the cap after the burst."""
+        limiter = RateLimiter(100_000, burst_seconds=0.1)
+
+        async def reader():
+            for _ in range(5):
+                await limiter.throttle(10_000)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(reader(), reader())
+            return time.monotonic() - start
+
+        # 100KB at 100KB/s, less the 10KB burst
+        self.assertGreater(asyncio.run(run()), 0.85)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Tests for memory.py module.
+"""
+
+import unittest
+
+from cortex.memory import MemoryEstimator, ModelArchitecture, model_architecture
+from cortex.system_utils import ModelRecommender
+
+from tests.fakes import make_model, make_system_info
+
+# Llama-3-8B: 32 layers, GQA with 8 KV heads of dim 128, 8K native context
+LLAMA3_8B_CONFIG = {
+    "architectures": ["LlamaForCausalLM"],
+    "num_hidden_layers": 32,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "num_key_value_heads": 8,
+    "max_position_embeddings": 131072,
+}
+
+LLAMA3_8B_MODEL_INFO = {
+    "general.architecture": "llama",
+    "general.parameter_count": 8030261248,
+    "llama.block_count": 32,
+    "llama.embedding_length": 4096,
+    "llama.attention.head_count": 32,
+    "llama.attention.head_count_kv": 8,
+    "llama.context_length": 131072,
+}
+
+
+class TestModelArchitecture(unittest.TestCase):
+    """Test ModelArchitecture parsing."""
+
+    def test_from_hf_config(self):
+        """Test parsing a HuggingFace config with grouped-query attention."""
+        arch = ModelArchitecture.from_hf_config(LLAMA3_8B_CONFIG)
+
+        self.assertEqual(arch.num_layers, 32)
+        self.assertEqual(arch.num_kv_heads, 8)
+        self.assertEqual(arch.head_dim, 128)
+        self.assertEqual(arch.max_context, 131072)
+
+    def test_from_hf_config_defaults_kv_heads(self):
+        """Test that configs without GQA use one KV head per attention head."""
+        config = dict(LLAMA3_8B_CONFIG)
+        del config["num_key_value_heads"]
+
+        arch = ModelArchitecture.from_hf_config(config)
+
+        self.assertEqual(arch.num_kv_heads, 32)
+
+    def test_from_hf_config_nested_text_config(self):
+        """Test multimodal configs that nest the language model parameters."""
+        arch = ModelArchitecture.from_hf_config(
+            {"model_type": "llava", "text_config": LLAMA3_8B_CONFIG}
+        )
+
+        self.assertEqual(arch.num_layers, 32)
+
+    def test_from_hf_config_incomplete(self):
+        """Test that hub stub configs without shapes yield no architecture."""
+        self.assertIsNone(ModelArchitecture.from_hf_config({"model_type": "llama"}))
+
+    def test_from_ollama_model_info(self):
+        """Test parsing Ollama /api/show model_info."""
+        arch = ModelArchitecture.from_ollama_model_info(LLAMA3_8B_MODEL_INFO)
+
+        self.assertEqual(arch.num_layers, 32)
+        self.assertEqual(arch.num_kv_heads, 8)
+        self.assertEqual(arch.head_dim, 128)
+        self.assertEqual(arch.parameter_count, 8030261248)
+
+    def test_from_ollama_model_info_missing_arch(self):
+        """Test that model_info without general.architecture is rejected."""
+        self.assertIsNone(ModelArchitecture.from_ollama_model_info({}))
+
+    def test_round_trip(self):
+        """Test serialization through ModelInfo.metadata."""
+        arch = ModelArchitecture.from_hf_config(LLAMA3_8B_CONFIG)
+
+        self.assertEqual(ModelArchitecture.from_dict(arch.to_dict()), arch)
+
+
+class TestMemoryEstimator(unittest.TestCase):
+    """Test MemoryEstimator."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.arch = ModelArchitecture.from_hf_config(LLAMA3_8B_CONFIG)
+        self.estimator = MemoryEstimator()
+
+    def test_kv_cache_size(self):
+        """Test KV cache math: 128 KiB per token in f16 for Llama-3-8B."""
+        self.assertEqual(self.arch.kv_bytes_per_token("f16"), 128 * 1024)
+
+        estimate = self.estimator.estimate(4.5, self.arch, context_length=8192)
+
+        self.assertAlmostEqual(estimate.kv_cache_gb, 1.0)
+        self.assertTrue(estimate.from_architecture)
+        self.assertGreater(estimate.total_gb, 4.5 + 1.0)
+
+    def test_kv_cache_scales_with_context_and_concurrency(self):
+        """Test that long contexts and parallel sequences grow the estimate."""
+        short = self.estimator.estimate(4.5, self.arch, context_length=8192)
+        long = self.estimator.estimate(4.5, self.arch, context_length=65536, concurrency=2)
+
+        self.assertAlmostEqual(long.kv_cache_gb, short.kv_cache_gb * 16)
+
+    def test_context_clamped_to_model_max(self):
+        """Test that requests beyond the model's context are clamped."""
+        self.arch.max_context = 4096
+
+        estimate = self.estimator.estimate(4.5, self.arch, context_length=32768)
+
+        self.assertEqual(estimate.context_length, 4096)
+
+    def test_quantized_kv_cache(self):
+        """Test that a q8_0 cache roughly halves the f16 size."""
+        q8 = MemoryEstimator(kv_dtype="q8_0").estimate(4.5, self.arch, context_length=8192)
+
+        self.assertLess(q8.kv_cache_gb, 0.6)
+
+    def test_unknown_kv_dtype(self):
+        """Test that an unsupported cache dtype is rejected."""
+        with self.assertRaises(ValueError):
+            MemoryEstimator(kv_dtype="q3")
+
+    def test_without_architecture_uses_rule_of_thumb(self):
+        """Test the size-only fallback."""
+        estimate = self.estimator.estimate(10.0)
+
+        self.assertFalse(estimate.from_architecture)
+        self.assertAlmostEqual(estimate.total_gb, 12.0)
+
+    def test_estimate_model(self):
+        """Test estimation from a ModelInfo carrying an architecture."""
+        model = make_model("llama3:8b", "ollama", ram_gb=6.0)
+        model.metadata["architecture"] = self.arch.to_dict()
+
+        self.assertIs(type(model_architecture(model)), ModelArchitecture)
+        estimate = self.estimator.estimate_model(model, context_length=8192)
+
+        self.assertAlmostEqual(estimate.kv_cache_gb, 1.0)
+
+    def test_estimate_model_online(self):
+        """Test that cloud models need no local memory."""
+        model = make_model("gpt-4o", "openai", ram_gb=0.0, online=True)
+
+        self.assertEqual(self.estimator.estimate_model(model).total_gb, 0.0)
+
+
+class TestRecommenderUsesEstimator(unittest.TestCase):
+    """Test that recommendations account for the KV cache."""
+
+    def test_long_context_excludes_model(self):
+        """Test that a model which fits at 8K is rejected at 2x128K context."""
+        model = make_model("llama3:8b", "ollama", ram_gb=6.0)
+        model.metadata["architecture"] = ModelArchitecture.from_hf_config(
+            LLAMA3_8B_CONFIG
+        ).to_dict()
+        system_info = make_system_info()
+
+        fits = ModelRecommender.recommend_models(system_info, [model], context_length=8192)
+        too_big = ModelRecommender.recommend_models(
+            system_info, [model], context_length=131072, concurrency=2
+        )
+
+        self.assertEqual([m.id for m in fits], ["llama3:8b"])
+        self.assertEqual(too_big, [])
+        self.assertGreater(model.metadata["required_ram_gb"], 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+"""
+Tests for model_headers.py module.
+"""
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from cortex.model_headers import (
+    GGUF_MAGIC,
+    GGUFReader,
+    HeaderCache,
+    HeaderError,
+    SafetensorsReader,
+    gguf_quantization,
+    read_gguf_header,
+    read_safetensors_header,
+)
+
+from cortex import model_headers
+
+
+def write_safetensors(path, tensors, metadata=None):
+    """Write a minimal safetensors file: header + zero-filled tensor data."""
+    header = {}
+    offset = 0
+    for name, (dtype, shape) in tensors.items():
+        numel = 1
+        for dim in shape:
+            numel *= dim
+        nbytes = numel * model_headers.SAFETENSORS_DTYPE_BYTES[dtype]
+        header[name] = {"dtype": dtype, "shape": shape, "data_offsets": [offset, offset + nbytes]}
+        offset += nbytes
+    if metadata:
+        header["__metadata__"] = metadata
+
+    raw = json.dumps(header).encode()
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(raw)))
+        f.write(raw)
+        f.write(b"\0" * offset)
+
+
+def _gguf_string(value):
+    raw = value.encode()
+    return struct.pack("<Q", len(raw)) + raw
+
+
+def _gguf_value(value):
+    """Encode a metadata value as (type, payload)."""
+    if isinstance(value, bool):
+        return 7, struct.pack("<?", value)
+    if isinstance(value, int):
+        return 4, struct.pack("<I", value)
+    if isinstance(value, float):
+        return 6, struct.pack("<f", value)
+    if isinstance(value, str):
+        return 8, _gguf_string(value)
+    item_type, _ = _gguf_value(value[0])
+    payload = b"".join(_gguf_value(item)[1] for item in value)
+    return 9, struct.pack("<IQ", item_type, len(value)) + payload
+
+
+def write_gguf(path, metadata, tensors):
+    """Write a minimal GGUF v3 file: metadata, tensor infos and no tensor data."""
+    out = GGUF_MAGIC + struct.pack("<IQQ", 3, len(tensors), len(metadata))
+    for key, value in metadata.items():
+        value_type, payload = _gguf_value(value)
+        out += _gguf_string(key) + struct.pack("<I", value_type) + payload
+    for name, shape in tensors.items():
+        out += _gguf_string(name) + struct.pack("<I", len(shape))
+        out += b"".join(struct.pack("<Q", dim) for dim in shape)
+        out += struct.pack("<IQ", 0, 0)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+LLAMA_GGUF_METADATA = {
+    "general.architecture": "llama",
+    "general.file_type": 15,
+    "llama.block_count": 2,
+    "llama.embedding_length": 64,
+    "llama.attention.head_count": 4,
+    "llama.attention.head_count_kv": 2,
+    "llama.context_length": 4096,
+    "tokenizer.ggml.tokens": [f"tok{i}" for i in range(1000)],
+}
+
+
+class TestReadSafetensorsHeader(unittest.TestCase):
+    """Test the raw header parser."""
+
+    def setUp(self):
+        """Create a temp directory for shard files."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def test_reads_shapes_and_dtypes(self):
+        """Test that tensor shapes/dtypes and metadata are returned."""
+        path = self.temp_dir / "model.safetensors"
+        write_safetensors(
+            path,
+            {"embed.weight": ("BF16", [16, 8]), "norm.weight": ("F32", [8])},
+            metadata={"format": "mlx"},
+        )
+
+        header = read_safetensors_header(path)
+
+        self.assertEqual(header["tensors"]["embed.weight"], {"dtype": "BF16", "shape": [16, 8]})
+        self.assertEqual(header["metadata"], {"format": "mlx"})
+
+    def test_rejects_truncated_file(self):
+        """Test that a file shorter than its declared header is rejected."""
+        path = self.temp_dir / "bad.safetensors"
+        path.write_bytes(struct.pack("<Q", 10_000) + b"{}")
+
+        with self.assertRaises(HeaderError):
+            read_safetensors_header(path)
+
+    def test_rejects_non_json_header(self):
+        """Test that garbage headers are rejected."""
+        path = self.temp_dir / "bad.safetensors"
+        path.write_bytes(struct.pack("<Q", 4) + b"nope")
+
+        with self.assertRaises(HeaderError):
+            read_safetensors_header(path)
+
+
+class TestSafetensorsReader(unittest.TestCase):
+    """Test shard summarization and caching."""
+
+    def setUp(self):
+        """Create a temp model directory and an isolated header cache."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.cache_file = self.temp_dir / "headers.json"
+        self.reader = SafetensorsReader(HeaderCache("headers.json", path=self.cache_file))
+
+    def test_summarize_unquantized(self):
+        """Test exact parameter counts across multiple shards."""
+        write_safetensors(
+            self.temp_dir / "model-00001-of-00002.safetensors", {"a.weight": ("BF16", [64, 32])}
+        )
+        write_safetensors(
+            self.temp_dir / "model-00002-of-00002.safetensors", {"b.weight": ("BF16", [32])}
+        )
+
+        summary = self.reader.summarize_dir(self.temp_dir)
+
+        self.assertEqual(summary.parameter_count, 64 * 32 + 32)
+        self.assertEqual(summary.shard_count, 2)
+        self.assertEqual(summary.weight_bytes, (64 * 32 + 32) * 2)
+        self.assertEqual(summary.quantization, "bf16")
+        self.assertAlmostEqual(summary.bits_per_weight, 16.0)
+
+    def test_summarize_mlx_4bit_inferred(self):
+        """Test that packed uint32 MLX weights are unpacked using their scales."""
+        # in_features=512, 4-bit: 512*4/32 = 64 packed columns, 512/64 = 8 groups
+        write_safetensors(
+            self.temp_dir / "model.safetensors",
+            {
+                "proj.weight": ("U32", [256, 64]),
+                "proj.scales": ("F16", [256, 8]),
+                "proj.biases": ("F16", [256, 8]),
+            },
+        )
+
+        summary = self.reader.summarize_dir(self.temp_dir)
+
+        self.assertEqual(summary.parameter_count, 256 * 512)
+        self.assertEqual(summary.quantization, "4bit")
+        self.assertGreater(summary.bits_per_weight, 4.0)
+        self.assertLess(summary.bits_per_weight, 5.0)
+
+    def test_summarize_mlx_configured_bits(self):
+        """Test that config.json quantization overrides inference."""
+        write_safetensors(
+            self.temp_dir / "model.safetensors",
+            {"proj.weight": ("U32", [256, 128]), "proj.scales": ("F16", [256, 8])},
+        )
+
+        summary = self.reader.summarize_dir(self.temp_dir, {"bits": 8, "group_size": 64})
+
+        self.assertEqual(summary.parameter_count, 256 * 512)
+        self.assertEqual(summary.quantization, "8bit")
+
+    def test_summarize_empty_dir(self):
+        """Test that a directory without shards yields no summary."""
+        self.assertIsNone(self.reader.summarize_dir(self.temp_dir))
+
+    def test_header_cache_hit(self):
+        """Test that unchanged shards are served from the persisted cache."""
+        path = self.temp_dir / "model.safetensors"
+        write_safetensors(path, {"a.weight": ("F16", [4, 4])})
+        self.reader.summarize_dir(self.temp_dir)
+        self.assertTrue(self.cache_file.exists())
+
+        fresh = SafetensorsReader(HeaderCache("headers.json", path=self.cache_file))
+        with patch("cortex.model_headers.read_safetensors_header") as mock_read:
+            summary = fresh.summarize_dir(self.temp_dir)
+
+        mock_read.assert_not_called()
+        self.assertEqual(summary.parameter_count, 16)
+
+    def test_header_cache_invalidated_by_mtime(self):
+        """Test that a rewritten shard is parsed again."""
+        path = self.temp_dir / "model.safetensors"
+        write_safetensors(path, {"a.weight": ("F16", [4, 4])})
+        self.reader.summarize_dir(self.temp_dir)
+
+        write_safetensors(path, {"a.weight": ("F16", [8, 4])})
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        summary = self.reader.summarize_dir(self.temp_dir)
+
+        self.assertEqual(summary.parameter_count, 32)
+
+
+class TestReadGGUFHeader(unittest.TestCase):
+    """Test the GGUF header parser and reader cache."""
+
+    def setUp(self):
+        """Create a temp directory for GGUF files."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = self.temp_dir / "model.gguf"
+        write_gguf(
+            self.path,
+            LLAMA_GGUF_METADATA,
+            {"token_embd.weight": [64, 1000], "output_norm.weight": [64]},
+        )
+
+    def test_reads_metadata_and_parameter_count(self):
+        """Test metadata parsing and the parameter count from tensor infos."""
+        header = read_gguf_header(self.path)
+
+        self.assertEqual(header["version"], 3)
+        self.assertEqual(header["metadata"]["llama.block_count"], 2)
+        self.assertEqual(header["tensor_count"], 2)
+        self.assertEqual(header["parameter_count"], 64 * 1000 + 64)
+        self.assertEqual(gguf_quantization(header["metadata"]), "Q4_K_M")
+
+    def test_skips_long_arrays(self):
+        """Test that tokenizer vocabularies are skipped, not materialized."""
+        header = read_gguf_header(self.path)
+
+        self.assertNotIn("tokenizer.ggml.tokens", header["metadata"])
+
+    def test_rejects_non_gguf(self):
+        """Test that other files are rejected."""
+        path = self.temp_dir / "other.bin"
+        path.write_bytes(b"GGML" + b"\0" * 32)
+
+        with self.assertRaises(HeaderError):
+            read_gguf_header(path)
+
+    def test_rejects_truncated(self):
+        """Test that a header cut short is rejected."""
+        path = self.temp_dir / "short.gguf"
+        path.write_bytes(self.path.read_bytes()[:100])
+
+        with self.assertRaises(HeaderError):
+            read_gguf_header(path)
+
+    def test_reader_caches_by_digest(self):
+        """Test that a digest-keyed blob is parsed once across readers."""
+        cache_file = self.temp_dir / "gguf.json"
+        reader = GGUFReader(HeaderCache("gguf.json", path=cache_file))
+        reader.read_header(self.path, digest="sha256:abc")
+        reader.save()
+
+        fresh = GGUFReader(HeaderCache("gguf.json", path=cache_file))
+        with patch("cortex.model_headers.read_gguf_header") as mock_read:
+            header = fresh.read_header(self.path, digest="sha256:abc")
+
+        mock_read.assert_not_called()
+        self.assertEqual(header["parameter_count"], 64 * 1000 + 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Tests for model_store.py module.
+"""
+
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+
+from cortex.model_store import ModelStore, eviction_store
+from cortex.providers import ProviderRegistry
+
+from tests.fakes import FakeProvider
+
+GB = 1024**3
+
+
+class StoredProvider(FakeProvider):
+    """Fake provider with downloaded models of given sizes."""
+
+    def __init__(self, name, sizes):
+        super().__init__(name, [])
+        self.sizes = dict(sizes)
+        self.deleted = []
+
+    async def local_models(self):
+        return list(self.sizes)
+
+    def model_disk_bytes(self, model_id):
+        return self.sizes[model_id]
+
+    async def delete_model(self, model_id):
+        self.deleted.append(model_id)
+        return self.sizes.pop(model_id, None) is not None
+
+
+class TestModelStore(unittest.TestCase):
+    """Test LRU planning and eviction."""
+
+    def setUp(self):
+        """Three MLX and two Ollama models, used from oldest to newest as listed."""
+        self.mlx = StoredProvider("mlx", {"org/a": 10 * GB, "org/b": 20 * GB, "org/c": 5 * GB})
+        self.ollama = StoredProvider("ollama", {"x:1": 8 * GB, "y:2": 4 * GB})
+        self.registry = ProviderRegistry()
+        self.registry.register(self.mlx)
+        self.registry.register(self.ollama)
+        now = time.time()
+        order = ["mlx:org/b", "ollama:x:1", "mlx:org/a", "ollama:y:2", "mlx:org/c"]
+        self.last_used = {key: now - 1000 * (len(order) - i) for i, key in enumerate(order)}
+
+    def store(self, **kwargs):
+        return ModelStore(self.registry, last_used=self.last_used, **kwargs)
+
+    def test_inventory_is_least_recently_used_first(self):
+        """Test models are ordered by last use with their sizes."""
+        models = asyncio.run(self.store().inventory())
+
+        self.assertEqual([m.key for m in models], sorted(self.last_used, key=self.last_used.get))
+        self.assertEqual(models[0].size_bytes, 20 * GB)
+
+    def test_plan_evicts_oldest_until_under_quota(self):
+        """Test the least recently used go first, only as many as needed."""
+        store = self.store(quota_bytes=30 * GB)
+
+        plan = store.plan(asyncio.run(store.inventory()))
+
+        self.assertEqual([m.key for m in plan.evict], ["mlx:org/b"])
+        self.assertEqual(plan.needed_bytes, 17 * GB)
+        self.assertTrue(plan.fits)
+
+    def test_current_and_pinned_models_are_never_evicted(self):
+        """Test protected models are skipped even when they are the oldest."""
+        store = self.store(quota_bytes=20 * GB, current="mlx:org/b", pinned=["x:1"])
+
+        plan = store.plan(asyncio.run(store.inventory()))
+
+        self.assertEqual([m.key for m in plan.evict], ["mlx:org/a", "ollama:y:2", "mlx:org/c"])
+        self.assertFalse(plan.fits)
+        protected = {m.key: m.protected for m in plan.models if m.protected}
+        self.assertEqual(protected, {"mlx:org/b": "current", "ollama:x:1": "pinned"})
+
+    def test_untagged_ollama_ids_match_installed_models(self):
+        """Test config and session IDs without a tag name the ``:latest`` model."""
+        self.ollama.sizes = {"llama3.2:latest": 2 * GB, "qwen2.5:7b": 5 * GB}
+        self.last_used = {"ollama:llama3.2": 100.0, "ollama:qwen2.5:7b": 200.0}
+        store = self.store(quota_bytes=41 * GB, current="ollama:llama3.2", pinned=["mistral"])
+
+        models = asyncio.run(store.inventory())
+        by_key = {m.key: m for m in models}
+
+        self.assertEqual(by_key["ollama:llama3.2:latest"].protected, "current")
+        self.assertEqual(by_key["ollama:llama3.2:latest"].last_used, 100.0)
+        self.assertNotIn("ollama:llama3.2:latest", [m.key for m in store.plan(models).evict])
+        self.assertIn("mistral:latest", store.pinned)
+
+    def test_dry_run_deletes_nothing(self):
+        """Test a dry run plans evictions without deleting."""
+        plan = asyncio.run(self.store(quota_bytes=30 * GB).enforce(dry_run=True))
+
+        self.assertEqual(len(plan.evict), 1)
+        self.assertEqual(self.mlx.deleted, [])
+
+    def test_make_room_for_a_download(self):
+        """Test a download short of disk space evicts enough for itself."""
+        store = self.store()
+
+        plan = asyncio.run(store.make_room(12 * GB, free_bytes=2 * GB))
+
+        self.assertEqual(self.mlx.deleted, ["org/b"])
+        self.assertEqual(plan.freed_bytes, 20 * GB)
+
+    def test_download_that_cannot_fit_evicts_nothing(self):
+        """Test a download too large even after evicting everything deletes nothing."""
+        store = self.store(quota_bytes=50 * GB)
+
+        plan = asyncio.run(store.make_room(200 * GB, free_bytes=500 * GB))
+
+        self.assertFalse(plan.fits)
+        self.assertEqual(len(plan.evict), 5)
+        self.assertEqual(self.mlx.deleted + self.ollama.deleted, [])
+
+    def test_unused_models_fall_back_to_file_times(self):
+        """Test a model with no sessions is dated by its files, not evicted first."""
+        del self.last_used["mlx:org/c"]
+
+        models = asyncio.run(self.store().inventory())
+
+        self.assertEqual(models[-1].key, "mlx:org/c")
+
+    def test_eviction_store_needs_a_quota(self):
+        """Test downloads only evict with a quota set and auto-evict on."""
+        tracker = SimpleNamespace(model_stats={})
+        config = {"storage": {"quota_gb": 50, "pinned": ["x:1"]}}
+
+        self.assertIsNone(eviction_store(self.registry, {"storage": {"quota_gb": None}}))
+        self.assertIsNone(
+            eviction_store(self.registry, {"storage": {"quota_gb": 50, "auto_evict": False}})
+        )
+        store = ModelStore.from_config(self.registry, config, tracker)
+        self.assertEqual(store.quota_bytes, 50 * GB)
+        self.assertEqual(store.pinned, {"x:1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
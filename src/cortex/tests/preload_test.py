@@ -0,0 +1,142 @@
+"""
+Tests for preload.py module.
+"""
+
+import asyncio
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from cortex.preload import Prediction, PreloadScheduler, preload_model
+
+
+def session_at(model, provider, days_ago, hour):
+    """A past session that started ``days_ago`` days ago at ``hour``:00."""
+    day = datetime.now() - timedelta(days=days_ago)
+    start = day.replace(hour=hour, minute=0, second=0, microsecond=0)
+    return SimpleNamespace(model=model, provider=provider, start_time=start.timestamp(), error=None)
+
+
+class TestPreloadScheduler(unittest.TestCase):
+    """Test prediction and hit-rate tracking."""
+
+    def setUp(self):
+        """Use an isolated preload log."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.log_file = self.temp_dir / "preload.json"
+
+    def make_scheduler(self, sessions):
+        """Build a scheduler logging to the temp dir."""
+        return PreloadScheduler(sessions, log_file=self.log_file)
+
+    def test_predicts_by_time_of_day(self):
+        """Test that morning and evening habits are told apart."""
+        sessions = [session_at("llama3:8b", "ollama", d, 9) for d in range(1, 8)]
+        sessions += [session_at("qwen2.5-coder:7b", "ollama", d, 21) for d in range(1, 8)]
+        scheduler = self.make_scheduler(sessions)
+        today = datetime.now()
+
+        morning = scheduler.predict(today.replace(hour=9, minute=15))
+        evening = scheduler.predict(today.replace(hour=20, minute=45))
+
+        self.assertEqual(morning[0].model, "llama3:8b")
+        self.assertGreater(morning[0].probability, 0.9)
+        self.assertEqual(evening[0].model, "qwen2.5-coder:7b")
+
+    def test_recent_sessions_outweigh_old_ones(self):
+        """Test recency decay when two models are used at the same hour."""
+        sessions = [session_at("old-model", "ollama", d, 9) for d in (30, 31, 32)]
+        sessions += [session_at("mlx-community/new", "mlx", d, 9) for d in (1, 2)]
+        scheduler = self.make_scheduler(sessions)
+
+        predictions = scheduler.predict(datetime.now().replace(hour=9))
+
+        self.assertEqual(predictions[0].key, "mlx:mlx-community/new")
+        self.assertAlmostEqual(sum(p.probability for p in predictions), 1.0)
+
+    def test_failed_sessions_ignored(self):
+        """Test that errored sessions don't vote."""
+        failed = session_at("broken", "ollama", 1, 9)
+        failed.error = "load failed"
+
+        self.assertEqual(self.make_scheduler([failed]).predict(), [])
+
+    def test_hit_and_miss_tracking(self):
+        """Test scoring preloads against the sessions that follow them."""
+        scheduler = self.make_scheduler([])
+        prediction = Prediction("ollama", "llama3:8b", 0.8, 1.0)
+
+        self.assertIsNone(scheduler.record_use("ollama", "llama3:8b"))
+
+        scheduler.record_preload(prediction, "keep_alive")
+        self.assertTrue(scheduler.record_use("ollama", "llama3:8b"))
+        # Already scored; a second session in the window doesn't count again
+        self.assertIsNone(scheduler.record_use("ollama", "llama3:8b"))
+
+        scheduler.record_preload(prediction, "keep_alive")
+        self.assertFalse(scheduler.record_use("mlx", "mlx-community/other"))
+
+        stats = scheduler.hit_rate()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_ensemble_use_scores_every_model(self):
+        """Test an ensemble session is a hit if any of its models was preloaded."""
+        scheduler = self.make_scheduler([])
+        scheduler.record_preload(Prediction("ollama", "llama3:8b", 0.8, 1.0), "keep_alive")
+
+        uses = [("mlx", "mlx-community/other"), ("ollama", "llama3:8b")]
+        self.assertTrue(scheduler.record_uses(uses))
+        self.assertEqual(scheduler.hit_rate()["hits"], 1)
+
+    @patch("cortex.preload.psutil")
+    def test_check_resources(self, mock_psutil):
+        """Test the idle and free-RAM conditions."""
+        mock_psutil.virtual_memory.return_value = MagicMock(available=8 * 1024**3)
+
+        mock_psutil.cpu_percent.return_value = 80.0
+        self.assertFalse(PreloadScheduler.check_resources(1.0)[0])
+
+        mock_psutil.cpu_percent.return_value = 5.0
+        self.assertTrue(PreloadScheduler.check_resources(4.0)[0])
+        ok, reason = PreloadScheduler.check_resources(7.0)
+        self.assertFalse(ok)
+        self.assertIn("free RAM", reason)
+
+
+class TestPreloadModel(unittest.TestCase):
+    """Test the per-provider warm-up mechanisms."""
+
+    def test_ollama_keep_alive(self):
+        """Test that Ollama models are loaded via keep_alive."""
+        provider = MagicMock()
+        provider.name = "ollama"
+        provider.start_server = AsyncMock(return_value=True)
+        provider.load_model = AsyncMock(return_value=True)
+
+        method = asyncio.run(preload_model(provider, "llama3:8b", {}))
+
+        self.assertEqual(method, "keep_alive")
+        provider.load_model.assert_awaited_once_with("llama3:8b", "30m")
+
+    def test_mlx_page_cache(self):
+        """Test that local MLX weights are read into the page cache."""
+        model_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, model_dir)
+        (model_dir / "model.safetensors").write_bytes(b"\0" * 4096)
+        provider = MagicMock()
+        provider.name = "mlx"
+        provider.local_model_files.return_value = [model_dir]
+
+        method = asyncio.run(preload_model(provider, "mlx-community/tiny", {}))
+
+        self.assertEqual(method, "page_cache")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for prewarm.py module.
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from cortex.prewarm import Prewarmer, resident_fraction, weight_files
+
+from cortex import prewarm
+
+
+class TestPrewarm(unittest.TestCase):
+    """Test page-cache prewarming."""
+
+    def setUp(self):
+        """Create a model directory with two shards and a tokenizer."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.shard_a = self.temp_dir / "model-00001-of-00002.safetensors"
+        self.shard_b = self.temp_dir / "model-00002-of-00002.safetensors"
+        self.shard_a.write_bytes(b"a" * 300_000)
+        self.shard_b.write_bytes(b"b" * 100_000)
+        (self.temp_dir / "tokenizer.json").write_text("{}")
+
+    def test_weight_files(self):
+        """Test that directories expand to weight files only."""
+        blob = self.temp_dir / "sha256-abc"
+        blob.write_bytes(b"gguf")
+
+        files = weight_files([self.temp_dir, blob])
+
+        self.assertEqual(files, [self.shard_a, self.shard_b, blob])
+
+    def test_warm_reads_every_byte_in_segments(self):
+        """Test parallel segmented reads cover each file exactly once."""
+        updates = []
+
+        with patch("cortex.prewarm.resident_fraction", return_value=0.0):
+            result = Prewarmer(workers=3, segment_size=64 * 1024).warm(
+                [self.temp_dir], progress=lambda done, total: updates.append((done, total))
+            )
+
+        self.assertEqual(result.files_warmed, 2)
+        self.assertEqual(result.bytes_read, 400_000)
+        self.assertEqual(max(updates), (400_000, 400_000))
+        self.assertGreater(result.mb_per_second, 0)
+
+    def test_resident_files_are_skipped(self):
+        """Test that files already in the page cache are not read again."""
+        with patch("cortex.prewarm.resident_fraction", return_value=1.0):
+            result = Prewarmer().warm([self.temp_dir])
+
+        self.assertEqual(result.files_skipped, 2)
+        self.assertEqual(result.bytes_read, 0)
+        self.assertEqual(result.bytes_skipped, 400_000)
+
+    def test_skip_resident_disabled(self):
+        """Test forcing a full read."""
+        with patch("cortex.prewarm.resident_fraction") as mock_resident:
+            result = Prewarmer().warm([self.shard_a], skip_resident=False)
+
+        mock_resident.assert_not_called()
+        self.assertEqual(result.bytes_read, 300_000)
+
+    @unittest.skipIf(prewarm._libc is None, "mincore not available")
+    def test_resident_fraction_after_read(self):
+        """Test mincore reports a just-read file as resident."""
+        self.shard_a.read_bytes()
+
+        fraction = resident_fraction(self.shard_a)
+
+        self.assertIsNotNone(fraction)
+        self.assertGreater(fraction, 0.9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,15 +7,39 @@ than False.
 """
 
 import asyncio
+import json
+import shutil
+import tempfile
+import time
 import unittest
-from unittest.mock import patch
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 from cortex.providers import ModelCapability, ProviderRegistry, ProviderType
-from cortex.providers.anthropic import AnthropicProvider
+from cortex.providers.anthropic import PROBE_CONCURRENCY, AnthropicProvider
+
+from tests.fakes import make_cm, make_response, make_session_class
 
 FAKE_KEY = "sk-ant-REDACTED"
 
 
+def isolate_discovery(test):
+    """Point the discovery cache at a temp file and take the API offline."""
+    temp_dir = Path(tempfile.mkdtemp())
+    test.addCleanup(shutil.rmtree, temp_dir)
+    cache_file = temp_dir / "anthropic_models.json"
+    offline = MagicMock()
+    offline.get = MagicMock(return_value=make_cm(make_response(503)))
+    offline.post = MagicMock(return_value=make_cm(make_response(503)))
+    for patcher in (
+        patch("cortex.providers.anthropic.DISCOVERY_CACHE", cache_file),
+        patch("aiohttp.ClientSession", make_session_class(offline)),
+    ):
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return cache_file
+
+
 class TestAnthropicProvider(unittest.TestCase):
     """Test Anthropic Provider."""
 
@@ -24,6 +48,7 @@ class TestAnthropicProvider(unittest.TestCase):
         env_patcher = patch.dict("os.environ", {"ANTHROPIC_API_KEY": FAKE_KEY})
         env_patcher.start()
         self.addCleanup(env_patcher.stop)
+        isolate_discovery(self)
         self.provider = AnthropicProvider()
 
     def test_initialization(self):
@@ -50,7 +75,7 @@ class TestAnthropicProvider(unittest.TestCase):
         )
 
     def test_fetch_models(self):
-        """Test listing Anthropic models from the known catalog (no HTTP)."""
+        """Test listing Anthropic models from the known catalog when offline."""
         models = asyncio.run(self.provider.fetch_models())
 
         self.assertGreater(len(models), 0)
@@ -105,5 +130,145 @@ class TestAnthropicProvider(unittest.TestCase):
         self.assertEqual(status["endpoint"], "https://api.anthropic.com")
 
 
+class ProbeSession:
+    """Fake session whose listing endpoint is missing and whose probes are timed."""
+
+    def __init__(self, existing):
+        self.existing = set(existing)
+        self.get = MagicMock(return_value=make_cm(make_response(404)))
+        self.probed = []
+        self.urls = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def post(self, url, json=None, **kwargs):
+        session = self
+
+        class Probe:
+            async def __aenter__(self):
+                session.urls.add(url)
+                session.probed.append(json["model"])
+                session.in_flight += 1
+                session.max_in_flight = max(session.max_in_flight, session.in_flight)
+                await asyncio.sleep(0.01)
+                return make_response(200 if json["model"] in session.existing else 404)
+
+            async def __aexit__(self, *exc):
+                session.in_flight -= 1
+                return False
+
+        return Probe()
+
+
+class TestModelDiscovery(unittest.TestCase):
+    """Test model discovery through the listing endpoint, probes and the cache."""
+
+    def setUp(self):
+        """A provider with a fake key and an isolated discovery cache."""
+        env_patcher = patch.dict("os.environ", {"ANTHROPIC_API_KEY": FAKE_KEY})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+        self.cache_file = isolate_discovery(self)
+        self.provider = AnthropicProvider()
+        self.session = MagicMock()
+        self.session.get = MagicMock(
+            side_effect=[
+                make_cm(
+                    make_response(
+                        200,
+                        {
+                            "data": [
+                                {
+                                    "id": "claude-new-5-20261001",
+                                    "display_name": "Claude New 5",
+                                    "created_at": "2026-10-01T00:00:00Z",
+                                    "type": "model",
+                                }
+                            ],
+                            "has_more": True,
+                            "last_id": "claude-new-5-20261001",
+                        },
+                    )
+                ),
+                make_cm(
+                    make_response(
+                        200,
+                        {
+                            "data": [{"id": "claude-3-haiku-20240307", "type": "model"}],
+                            "has_more": False,
+                            "last_id": "claude-3-haiku-20240307",
+                        },
+                    )
+                ),
+            ]
+        )
+
+    def fetch(self, session, **kwargs):
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            return asyncio.run(self.provider.fetch_models(**kwargs))
+
+    def test_models_come_from_the_listing_endpoint(self):
+        """Test every page is listed, with the API's names, and nothing is probed."""
+        models = self.fetch(self.session)
+
+        self.assertEqual(
+            [m.id for m in models], ["claude-new-5-20261001", "claude-3-haiku-20240307"]
+        )
+        self.assertEqual(models[0].name, "Claude New 5")
+        self.assertTrue(models[0].metadata["from_api"])
+        first, second = self.session.get.call_args_list
+        self.assertEqual(first.kwargs["headers"]["x-api-key"], FAKE_KEY)
+        self.assertIn("anthropic-version", first.kwargs["headers"])
+        self.assertEqual(second.kwargs["params"]["after_id"], "claude-new-5-20261001")
+        self.session.post.assert_not_called()
+
+    def test_discovery_is_cached_per_key_for_a_day(self):
+        """Test a second fetch reads the cache until it expires or the key changes."""
+        self.fetch(self.session)
+        self.assertNotIn(FAKE_KEY, self.cache_file.read_text())
+
+        unused = MagicMock()
+        self.assertEqual(len(self.fetch(unused)), 2)
+        unused.get.assert_not_called()
+
+        cache = json.loads(self.cache_file.read_text())
+        for entry in cache.values():
+            entry["fetched_at"] = time.time() - 2 * 24 * 60 * 60
+        self.cache_file.write_text(json.dumps(cache))
+        offline = MagicMock()
+        offline.get = MagicMock(return_value=make_cm(make_response(503)))
+        offline.post = MagicMock(return_value=make_cm(make_response(503)))
+        # Expired but undiscoverable: the old list stands
+        self.assertEqual(len(self.fetch(offline)), 2)
+        offline.get.assert_called()
+
+        self.provider.api_key = "sk-ant-REDACTED"
+        models = self.fetch(offline)
+        self.assertIn("claude-3-opus-20240229", [m.id for m in models])
+
+    def test_probes_run_concurrently_without_completions(self):
+        """Test probing is bounded, free, and only expands IDs that exist."""
+        session = ProbeSession(["claude-sonnet-4", "claude-sonnet-4-20250514"])
+
+        models = self.fetch(session)
+
+        self.assertEqual([m.id for m in models], ["claude-sonnet-4", "claude-sonnet-4-20250514"])
+        self.assertEqual(session.urls, {f"{AnthropicProvider.ANTHROPIC_API}/messages/count_tokens"})
+        self.assertEqual(len(session.probed), 12 + 7)
+        self.assertGreater(session.max_in_flight, 1)
+        self.assertLessEqual(session.max_in_flight, PROBE_CONCURRENCY)
+
+    def test_rejected_key_is_not_probed(self):
+        """Test an unauthorized listing falls back to the catalog without probing."""
+        session = MagicMock()
+        session.get = MagicMock(return_value=make_cm(make_response(401)))
+
+        models = self.fetch(session)
+
+        session.post.assert_not_called()
+        self.assertIn("claude-3-opus-20240229", [m.id for m in models])
+        self.assertFalse(self.cache_file.exists())
+
+
 if __name__ == "__main__":
     unittest.main()
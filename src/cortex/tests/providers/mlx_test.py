@@ -6,20 +6,31 @@ Removed with the API rewrite (features no longer exist on MLXProvider):
   has no chat method.
 - validate_connection() and _parse_model_info() tests: methods were removed.
 - download force flag test: download_model() no longer takes force.
+- mlx_lm convert download tests: files are fetched natively; only
+  quantization still runs mlx_lm.
 """
 
 import asyncio
+import hashlib
+import os
 import shutil
+import signal
 import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import aiohttp
+import psutil
+from cortex.blobstore import BlobStore
+from cortex.model_headers import HeaderCache, SafetensorsReader
 from cortex.providers import ModelCapability, ModelInfo, ProviderType
-from cortex.providers.mlx import MLXProvider
+from cortex.providers.mlx import STOP_TIMEOUT, MLXProvider, parse_generation_stats
+from cortex.readiness import ReadinessResult
+from cortex.verify import Verifier
 
-from tests.fakes import make_cm, make_response, make_session_class
+from tests.fakes import FakeHubServer, make_cm, make_response, make_session_class
+from tests.model_headers_test import write_safetensors
 
 
 def _hub_model(model_id, tags=None, downloads=1000, likes=10):
@@ -35,6 +46,14 @@ class TestMLXProvider(unittest.TestCase):
         self.provider = MLXProvider()
         self.temp_dir = tempfile.mkdtemp()
         self.provider.mlx_path = Path(self.temp_dir) / "mlx"
+        self.provider.pid_file = Path(self.temp_dir) / "mlx_server.pid"
+        self.provider.log_file = Path(self.temp_dir) / "logs" / "mlx_server.log"
+        self.provider.safetensors = SafetensorsReader(
+            HeaderCache("headers.json", path=Path(self.temp_dir) / "headers.json")
+        )
+        self.provider.verifier = Verifier(
+            cache=HeaderCache("digests.json", path=Path(self.temp_dir) / "digests.json")
+        )
         self.addCleanup(shutil.rmtree, self.temp_dir)
 
     def _mock_hub_session(self, list_payload, detail_payload=None):
@@ -147,65 +166,159 @@ class TestMLXProvider(unittest.TestCase):
         )
         self.assertEqual(self.provider._extract_context("plain", {}), 8192)
 
-    def _make_subprocess_mocks(self, returncode=0, stderr=b""):
-        """Build (which, download) process mocks for create_subprocess_exec."""
+    def _download(self, model_id, files, returncode=0):
+        """Download ``files`` as repo ``model_id`` from a local Hub, with mlx_lm mocked."""
         which_proc = MagicMock()
         which_proc.communicate = AsyncMock(return_value=(b"/usr/local/bin/mlx_lm", b""))
         which_proc.returncode = 0
 
-        dl_proc = MagicMock()
-        dl_proc.stdout.readline = AsyncMock(side_effect=[b"Downloading model 3.5 GB\n", b""])
-        dl_proc.stderr.read = AsyncMock(return_value=stderr)
-        dl_proc.wait = AsyncMock(return_value=returncode)
-        dl_proc.returncode = returncode
-        return which_proc, dl_proc
+        convert_proc = MagicMock()
+        convert_proc.communicate = AsyncMock(return_value=(b"", b"Error converting"))
+        convert_proc.returncode = returncode
+        progress = []
+
+        async def exec_side_effect(*cmd, **kwargs):
+            if cmd[0] == "which":
+                return which_proc
+            if returncode == 0:
+                Path(cmd[cmd.index("--mlx-path") + 1]).mkdir(parents=True)
+            return convert_proc
 
-    def test_download_model_success(self):
-        """Test downloading an MLX model successfully."""
-        which_proc, dl_proc = self._make_subprocess_mocks(returncode=0)
+        async def run():
+            async with FakeHubServer({model_id: files}) as server:
+                self.hub = server
+                self.provider.config["hf_endpoint"] = server.url
+                return await self.provider.download_model(model_id, lambda *p: progress.append(p))
 
         with patch(
-            "asyncio.create_subprocess_exec", AsyncMock(side_effect=[which_proc, dl_proc])
+            "asyncio.create_subprocess_exec", AsyncMock(side_effect=exec_side_effect)
         ) as mock_exec:
-            result = asyncio.run(self.provider.download_model("mlx-community/test-model"))
+            result = asyncio.run(run())
+        return result, mock_exec, progress
+
+    def test_download_prequantized_model(self):
+        """Test a quantized repo is fetched natively into place without converting."""
+        files = {"config.json": b'{"quantization": {"bits": 4}}', "model.safetensors": b"w" * 500}
+
+        result, mock_exec, progress = self._download("mlx-community/test-model", files)
 
         self.assertTrue(result)
-        download_cmd = mock_exec.call_args_list[1][0]
-        self.assertIn("convert", download_cmd)
-        self.assertIn("--hf-path", download_cmd)
-        self.assertIn("mlx-community/test-model", download_cmd)
-        # Full-precision models get quantized on download
-        self.assertIn("-q", download_cmd)
+        mock_exec.assert_not_called()
+        model_dir = self.provider.mlx_path / "mlx-community_test-model"
+        self.assertEqual((model_dir / "model.safetensors").read_bytes(), b"w" * 500)
+        self.assertEqual(progress[-1], (529, 529))
+        self.assertFalse((self.provider.mlx_path / ".partial" / model_dir.name).exists())
+
+    def test_download_reuses_the_sizing_listing(self):
+        """Test the download after sizing a repo doesn't list it again."""
+        files = {"config.json": b'{"quantization": {"bits": 4}}', "model.safetensors": b"w" * 500}
+        model_id = "mlx-community/test-model"
+
+        async def run():
+            async with FakeHubServer({model_id: files}) as server:
+                self.provider.config["hf_endpoint"] = server.url
+                size = await self.provider.download_size(model_id)
+                with patch("asyncio.create_subprocess_exec", AsyncMock()):
+                    self.assertTrue(await self.provider.download_model(model_id))
+                return server, size
+
+        server, size = asyncio.run(run())
+
+        self.assertEqual(size, 529)
+        self.assertEqual(server.listings, 1)
+
+    def test_downloaded_model_verifies_against_hub_digests(self):
+        """Test the recorded Hub digests catch a corrupted shard."""
+        files = {"config.json": b'{"quantization": {"bits": 4}}', "model.safetensors": b"w" * 500}
+        self._download("mlx-community/test-model", files)
+
+        self.assertTrue(asyncio.run(self.provider.verify_model("mlx-community/test-model")).ok)
+
+        shard = self.provider.mlx_path / "mlx-community_test-model" / "model.safetensors"
+        shard.write_bytes(b"x" * 500)
+        stat = shard.stat()
+        os.utime(shard, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        result = asyncio.run(self.provider.verify_model("mlx-community/test-model"))
+        self.assertEqual([check.path for check in result.failures], [shard])
+
+    def test_download_links_shards_from_huggingface_cache(self):
+        """Test with the blob store on, shards already in the HF cache aren't fetched."""
+        files = {"config.json": b'{"quantization": {"bits": 4}}', "model.safetensors": b"w" * 500}
+        self.provider.hf_cache_path = Path(self.temp_dir) / "hub"
+        hub_blobs = self.provider.hf_cache_path / "models--mlx-community--test-model" / "blobs"
+        hub_blobs.mkdir(parents=True)
+        shard_blob = hub_blobs / hashlib.sha256(files["model.safetensors"]).hexdigest()
+        shard_blob.write_bytes(files["model.safetensors"])
+        self.provider.blob_store = BlobStore(Path(self.temp_dir) / "blobs")
+
+        result, _, _ = self._download("mlx-community/test-model", files)
 
-    def test_download_model_prequantized_skips_quantization(self):
-        """Test that pre-quantized models are not re-quantized."""
-        which_proc, dl_proc = self._make_subprocess_mocks(returncode=0)
+        self.assertTrue(result)
+        self.assertEqual([r[0] for r in self.hub.ranges], ["config.json"])
+        shard = self.provider.mlx_path / "mlx-community_test-model" / "model.safetensors"
+        self.assertTrue(os.path.samefile(shard, shard_blob))
 
-        with patch(
-            "asyncio.create_subprocess_exec", AsyncMock(side_effect=[which_proc, dl_proc])
-        ) as mock_exec:
-            result = asyncio.run(self.provider.download_model("mlx-community/test-model-4bit"))
+    def test_download_full_precision_model_quantizes_locally(self):
+        """Test full-precision weights are quantized from the downloaded copy."""
+        files = {"config.json": b"{}", "model.safetensors": b"w" * 500}
+
+        result, mock_exec, _ = self._download("org/test-model", files)
 
         self.assertTrue(result)
-        download_cmd = mock_exec.call_args_list[1][0]
-        self.assertNotIn("-q", download_cmd)
+        self.assertTrue((self.provider.mlx_path / "org_test-model").is_dir())
+        self.assertFalse((self.provider.mlx_path / ".partial" / "org_test-model").exists())
+        convert_cmd = mock_exec.call_args_list[1][0]
+        self.assertIn("convert", convert_cmd)
+        self.assertIn("-q", convert_cmd)
+        hf_path = convert_cmd[convert_cmd.index("--hf-path") + 1]
+        self.assertEqual(hf_path, str(self.provider.mlx_path / ".partial" / "org_test-model"))
 
     def test_download_model_failure(self):
-        """Test MLX model download failure."""
-        which_proc, dl_proc = self._make_subprocess_mocks(returncode=1, stderr=b"Error downloading")
+        """Test a failed quantization reports failure and leaves no model behind."""
+        files = {"config.json": b"{}", "model.safetensors": b"w" * 500}
 
-        with patch("asyncio.create_subprocess_exec", AsyncMock(side_effect=[which_proc, dl_proc])):
-            result = asyncio.run(self.provider.download_model("mlx-community/test-model"))
+        result, _, _ = self._download("org/test-model", files, returncode=1)
 
         self.assertFalse(result)
+        self.assertFalse((self.provider.mlx_path / "org_test-model").exists())
+
+    def test_download_missing_repo(self):
+        """Test an unknown repo fails without creating a model directory."""
+
+        async def run():
+            async with FakeHubServer({}) as server:
+                self.provider.config["hf_endpoint"] = server.url
+                return await self.provider.download_model("org/missing")
+
+        self.assertFalse(asyncio.run(run()))
+        self.assertFalse((self.provider.mlx_path / "org_missing").exists())
+
+    def test_delete_model(self):
+        """Test deleting removes the Cortex copy and the HuggingFace cache entry."""
+        self.provider.hf_cache_path = Path(self.temp_dir) / "hub"
+        model_dir = self.provider.mlx_path / "org_model"
+        hub_dir = self.provider.hf_cache_path / "models--org--model"
+        for path in (model_dir, hub_dir):
+            path.mkdir(parents=True)
+            (path / "config.json").write_text("{}")
+
+        self.assertEqual(asyncio.run(self.provider.local_models()), ["org/model"])
+        self.assertTrue(asyncio.run(self.provider.delete_model("org/model")))
+
+        self.assertFalse(model_dir.exists())
+        self.assertFalse(hub_dir.exists())
+        self.assertFalse(asyncio.run(self.provider.delete_model("org/model")))
 
     def test_is_model_available(self):
         """Test local model availability check."""
         model_dir = self.provider.mlx_path / "mlx-community_local-model"
         model_dir.mkdir(parents=True)
+        self.provider.mlx_path.joinpath("mlx-community_empty").mkdir()
+        (model_dir / "config.json").write_text("{}")
 
         self.assertTrue(asyncio.run(self.provider.is_model_available("mlx-community/local-model")))
         self.assertFalse(asyncio.run(self.provider.is_model_available("mlx-community/missing")))
+        self.assertFalse(asyncio.run(self.provider.is_model_available("mlx-community/empty")))
 
     def test_scan_local_models(self):
         """Test scanning locally downloaded models."""
@@ -222,6 +335,44 @@ class TestMLXProvider(unittest.TestCase):
         self.assertEqual(models[0].context_window, 4096)
         self.assertTrue(models[0].metadata["downloaded"])
 
+    def test_scan_local_models_reads_shard_headers(self):
+        """Test that local models are sized from exact safetensors headers."""
+        model_dir = self.provider.mlx_path / "mlx-community_tiny-4bit"
+        model_dir.mkdir(parents=True)
+        (model_dir / "config.json").write_text(
+            '{"num_hidden_layers": 2, "hidden_size": 512, "num_attention_heads": 8, '
+            '"quantization": {"bits": 4, "group_size": 64}}'
+        )
+        (model_dir / "tokenizer.json").write_text("{}" * 1000)
+        write_safetensors(
+            model_dir / "model.safetensors",
+            {"proj.weight": ("U32", [512, 64]), "proj.scales": ("F16", [512, 8])},
+        )
+
+        models = asyncio.run(self.provider._scan_local_models())
+
+        metadata = models[0].metadata
+        self.assertEqual(metadata["parameter_count"], 512 * 512)
+        self.assertEqual(metadata["quantization"], "4bit")
+        self.assertEqual(metadata["architecture"]["parameter_count"], 512 * 512)
+        # Size counts the weights only, not tokenizer/config files
+        self.assertAlmostEqual(
+            models[0].size_gb, (512 * 64 * 4 + 512 * 8 * 2) / (1024**3), places=9
+        )
+
+    def test_local_model_files(self):
+        """Test finding weights in the download dir and the HuggingFace cache."""
+        self.provider.hf_cache_path = Path(self.temp_dir) / "hub"
+        local_dir = self.provider.mlx_path / "mlx-community_tiny"
+        local_dir.mkdir(parents=True)
+        snapshot = self.provider.hf_cache_path / "models--mlx-community--tiny" / "snapshots" / "abc"
+        snapshot.mkdir(parents=True)
+
+        files = self.provider.local_model_files("mlx-community/tiny")
+
+        self.assertEqual(files, [local_dir, snapshot])
+        self.assertEqual(self.provider.local_model_files("mlx-community/other"), [])
+
     def test_get_server_status_stopped(self):
         """Test server status when no server is running."""
         status = asyncio.run(self.provider.get_server_status())
@@ -234,6 +385,85 @@ class TestMLXProvider(unittest.TestCase):
         """Test stopping when no server process exists."""
         self.assertTrue(asyncio.run(self.provider.stop_server()))
 
+    def test_stop_server_from_pid_file(self):
+        """Test stopping a server started by another process via its PID file."""
+        self.provider.pid_file.write_text("4242")
+        process = MagicMock()
+
+        with patch("cortex.providers.mlx.psutil.Process", return_value=process) as mock_process:
+            self.assertTrue(asyncio.run(self.provider.stop_server()))
+
+        mock_process.assert_called_once_with(4242)
+        process.send_signal.assert_called_once_with(signal.SIGTERM)
+        # Returns only once the old server has exited and released its port
+        process.wait.assert_called_once_with(STOP_TIMEOUT)
+        process.kill.assert_not_called()
+        self.assertFalse(self.provider.pid_file.exists())
+
+    def test_stop_server_kills_a_server_ignoring_sigterm(self):
+        """Test a server still running after the grace period is killed."""
+        self.provider.pid_file.write_text("4242")
+        process = MagicMock()
+        process.wait.side_effect = [psutil.TimeoutExpired(STOP_TIMEOUT), None]
+
+        with patch("cortex.providers.mlx.psutil.Process", return_value=process):
+            self.assertTrue(asyncio.run(self.provider.stop_server()))
+
+        process.kill.assert_called_once()
+        self.assertEqual(process.wait.call_count, 2)
+
+    def test_start_server_waits_for_readiness(self):
+        """Test that start_server returns once the server answers, not after a sleep."""
+        process = MagicMock(returncode=None)
+        ready = AsyncMock(return_value=ReadinessResult(True, 0.4, 3))
+
+        spawn = AsyncMock(return_value=process)
+        with patch("asyncio.create_subprocess_exec", spawn):
+            with patch("cortex.providers.mlx.wait_until_ready", ready):
+                started = asyncio.run(self.provider.start_server("mlx-community/tiny"))
+
+        self.assertTrue(started)
+        self.assertEqual(ready.call_args.args[0], "http://localhost:8080/v1/models")
+        # Output goes to the log, which readiness watches, not to an unread pipe
+        self.assertEqual(spawn.call_args.kwargs["stdout"].name, str(self.provider.log_file))
+        self.assertEqual(ready.call_args.kwargs["log_file"], self.provider.log_file)
+
+    def test_start_server_not_ready_stops_process(self):
+        """Test that a server that never becomes ready is cleaned up."""
+        process = MagicMock(returncode=None)
+        process.wait = AsyncMock()
+        not_ready = AsyncMock(return_value=ReadinessResult(False, 120.0, 130, "timed out"))
+
+        spawn = AsyncMock(return_value=process)
+        with patch("asyncio.create_subprocess_exec", spawn):
+            with patch("cortex.providers.mlx.wait_until_ready", not_ready):
+                started = asyncio.run(self.provider.start_server("mlx-community/tiny"))
+
+        self.assertFalse(started)
+        process.terminate.assert_called_once()
+        self.assertIsNone(self.provider.server_process)
+
+
+class TestGenerationStats(unittest.TestCase):
+    """Test parsing mlx_lm.generate's speed summary."""
+
+    def test_parse_generation_stats(self):
+        """Test prompt and generation speeds are read from the output."""
+        output = (
+            "==========\nHello there!\n==========\n"
+            "Prompt: 12 tokens, 95.512 tokens-per-sec\n"
+            "Generation: 100 tokens, 41.2 tokens-per-sec\n"
+            "Peak memory: 4.512 GB\n"
+        )
+
+        stats = parse_generation_stats(output)
+
+        self.assertEqual(stats["prompt_tokens"], 12)
+        self.assertAlmostEqual(stats["prefill_tokens_per_second"], 95.512)
+        self.assertEqual(stats["output_tokens"], 100)
+        self.assertAlmostEqual(stats["decode_tokens_per_second"], 41.2)
+        self.assertEqual(parse_generation_stats("no summary"), {})
+
 
 if __name__ == "__main__":
     unittest.main()
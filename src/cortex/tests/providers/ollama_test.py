@@ -6,14 +6,24 @@ Removed with the API rewrite: chat() test — the provider has no chat method
 """
 
 import asyncio
+import hashlib
+import json
+import shutil
+import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import aiohttp
+from cortex.blobstore import BlobStore
+from cortex.model_headers import GGUFReader, HeaderCache
 from cortex.providers import ModelCapability, ProviderType
-from cortex.providers.ollama import OllamaProvider
+from cortex.providers.ollama import MANIFEST_TIMEOUT, OllamaProvider, PullProgress
+from cortex.readiness import ReadinessResult
+from cortex.verify import Verifier
 
 from tests.fakes import FakeStreamContent, make_cm, make_response, make_session_class
+from tests.model_headers_test import LLAMA_GGUF_METADATA, write_gguf
 
 TAGS_PAYLOAD = {
     "models": [
@@ -56,7 +66,37 @@ class TestOllamaProvider(unittest.TestCase):
 
     def setUp(self):
         """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
         self.provider = OllamaProvider()
+        self.provider.models_path = self.temp_dir / "models"
+        self.provider.gguf = GGUFReader(HeaderCache("gguf.json", path=self.temp_dir / "gguf.json"))
+        self.provider.verifier = Verifier(
+            cache=HeaderCache("digests.json", path=self.temp_dir / "digests.json")
+        )
+
+    def _install_model(self, namespace, name, tag, digest="sha256:" + "ab" * 32):
+        """Lay out a manifest and GGUF blob the way `ollama pull` does."""
+        blobs = self.provider.models_path / "blobs"
+        blobs.mkdir(parents=True, exist_ok=True)
+        blob = blobs / digest.replace(":", "-")
+        write_gguf(blob, LLAMA_GGUF_METADATA, {"token_embd.weight": [64, 1000]})
+
+        manifest_dir = self.provider.models_path / "manifests" / "registry.ollama.ai"
+        manifest_dir = manifest_dir / namespace / name
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "schemaVersion": 2,
+            "layers": [
+                {
+                    "mediaType": "application/vnd.ollama.image.model",
+                    "digest": digest,
+                    "size": blob.stat().st_size,
+                },
+                {"mediaType": "application/vnd.ollama.image.template", "digest": "x", "size": 10},
+            ],
+        }
+        (manifest_dir / tag).write_text(json.dumps(manifest))
 
     def test_initialization(self):
         """Test Ollama provider initialization."""
@@ -94,6 +134,29 @@ class TestOllamaProvider(unittest.TestCase):
         # Code models are detected from the name
         self.assertIn(ModelCapability.CODE, models[1].capabilities)
 
+    def test_fetch_models_records_architecture(self):
+        """Test that /api/show layer shapes feed the KV-cache-aware RAM estimate."""
+        show_payload = dict(SHOW_PAYLOAD)
+        show_payload["model_info"] = {
+            "general.architecture": "llama",
+            "llama.block_count": 32,
+            "llama.embedding_length": 4096,
+            "llama.attention.head_count": 32,
+            "llama.attention.head_count_kv": 32,
+            "llama.context_length": 4096,
+        }
+        session = MagicMock()
+        session.get = MagicMock(return_value=make_cm(make_response(200, TAGS_PAYLOAD)))
+        session.post = MagicMock(return_value=make_cm(make_response(200, show_payload)))
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            models = asyncio.run(self.provider.fetch_models())
+
+        architecture = models[0].metadata["architecture"]
+        self.assertEqual(architecture["num_layers"], 32)
+        # 3.6GB weights + 2GB f16 KV cache at 4K context + runtime overhead
+        self.assertGreater(models[0].ram_gb, 3.6 + 2.0)
+
     def test_fetch_models_fallback_when_offline(self):
         """Test the minimal fallback list when the Ollama API is unavailable."""
         session = MagicMock()
@@ -108,6 +171,57 @@ class TestOllamaProvider(unittest.TestCase):
             self.assertEqual(model.provider, "ollama")
             self.assertFalse(model.online)
 
+    def test_fetch_models_offline_reads_local_library(self):
+        """Test that installed models are listed from disk when the server is down."""
+        self._install_model("library", "llama3", "8b")
+        self._install_model("someone", "coder", "latest", digest="sha256:" + "cd" * 32)
+        session = MagicMock()
+        session.get = MagicMock(side_effect=aiohttp.ClientConnectionError("Connection refused"))
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            models = asyncio.run(self.provider.fetch_models())
+
+        by_id = {m.id: m for m in models}
+        self.assertEqual(set(by_id), {"llama3:8b", "someone/coder:latest"})
+        llama = by_id["llama3:8b"]
+        self.assertEqual(llama.context_window, 4096)
+        self.assertEqual(llama.metadata["quantization"], "Q4_K_M")
+        self.assertEqual(llama.metadata["parameter_count"], 64 * 1000)
+        self.assertEqual(llama.metadata["architecture"]["num_kv_heads"], 2)
+        self.assertIn(ModelCapability.CODE, by_id["someone/coder:latest"].capabilities)
+
+    def test_local_library_skips_missing_blob(self):
+        """Test that a manifest whose blob is gone is ignored."""
+        self._install_model("library", "llama3", "8b")
+        for blob in (self.provider.models_path / "blobs").iterdir():
+            blob.unlink()
+
+        self.assertEqual(asyncio.run(self.provider._scan_local_models()), [])
+
+    def test_local_model_files(self):
+        """Test resolving a model name to its weight blobs."""
+        self._install_model("library", "llama3", "8b")
+
+        files = self.provider.local_model_files("llama3:8b")
+
+        self.assertEqual([f.name for f in files], ["sha256-" + "ab" * 32])
+        self.assertEqual(self.provider.local_model_files("llama3"), [])
+
+    def test_verify_model_against_manifest_digests(self):
+        """Test blobs are checked against the digests their manifest names."""
+        self._install_model("library", "llama3", "8b")
+        blob = next((self.provider.models_path / "blobs").iterdir())
+        digest = "sha256:" + hashlib.sha256(blob.read_bytes()).hexdigest()
+        self._install_model("library", "llama3", "8b", digest=digest)
+
+        result = asyncio.run(self.provider.verify_model("llama3:8b"))
+
+        failures = {check.path.name: check for check in result.failures}
+        # The placeholder template layer has no blob; the model blob matches
+        self.assertEqual(list(failures), ["x"])
+        self.assertEqual(failures["x"].error, "missing")
+        self.assertEqual(len(result.files), 2)
+
     def test_download_model_success(self):
         """Test downloading an Ollama model via the pull API."""
         response = make_response(200)
@@ -151,7 +265,84 @@ class TestOllamaProvider(unittest.TestCase):
             )
 
         self.assertTrue(result)
-        self.assertEqual(progress_calls, [(50, 100)])
+        self.assertEqual(progress_calls, [(50, 100), (100, 100)])
+
+    def test_concurrent_pulls_share_one_session(self):
+        """Test pulls running at once use one session, aggregated per model."""
+
+        class SlowStream(FakeStreamContent):
+            async def __anext__(self):
+                await asyncio.sleep(0.01)
+                return await super().__anext__()
+
+        def pull(url, **kwargs):
+            response = make_response(200)
+            lines = [
+                {"status": "pulling a", "digest": "sha256:a", "total": 100, "completed": 100},
+                {"status": "pulling b", "digest": "sha256:b", "total": 50, "completed": 10},
+                {"status": "pulling b", "digest": "sha256:b", "total": 50, "completed": 50},
+                {"status": "success"},
+            ]
+            response.content = SlowStream(json.dumps(line).encode() for line in lines)
+            return make_cm(response)
+
+        session = MagicMock()
+        session.post = MagicMock(side_effect=pull)
+        session_class = make_session_class(session)
+        progress = {"x:1": [], "y:1": []}
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    self.provider.download_model(m, lambda *p, m=m: progress[m].append(p))
+                    for m in progress
+                )
+            )
+
+        with patch("aiohttp.ClientSession", session_class):
+            self.assertEqual(asyncio.run(run()), [True, True])
+
+        self.assertEqual(session_class.call_count, 1)
+        self.assertEqual(self.provider._pull_users, 0)
+        for calls in progress.values():
+            self.assertEqual(calls[-1], (150, 150))
+            done = [c for c, _ in calls]
+            self.assertEqual(done, sorted(done))
+
+    def test_pull_starting_while_the_last_session_closes(self):
+        """Test a pull that opens a session while the previous one closes keeps it."""
+
+        class SlowClosingSession:
+            def __init__(self, **kwargs):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                await asyncio.sleep(0.02)
+                return False
+
+        async def run():
+            first = self.provider._pull_session()
+            old = await first.__aenter__()
+            closing = asyncio.create_task(first.__aexit__(None, None, None))
+            await asyncio.sleep(0)
+            async with self.provider._pull_session() as second:
+                # The first pull finishes closing its session meanwhile
+                await asyncio.sleep(0.05)
+                async with self.provider._pull_session() as third:
+                    sessions = (old, second, third)
+            await closing
+            return sessions
+
+        with patch("aiohttp.ClientSession", SlowClosingSession):
+            old, second, third = asyncio.run(run())
+
+        self.assertIsNot(second, old)
+        self.assertIs(third, second)
+        self.assertIsNone(self.provider._pull_client)
+        self.assertEqual(self.provider._pull_users, 0)
 
     def test_download_model_http_error(self):
         """Test download failure on non-200 response."""
@@ -175,6 +366,80 @@ class TestOllamaProvider(unittest.TestCase):
 
         self.assertFalse(result)
 
+    def test_download_links_stored_layers_before_pulling(self):
+        """Test layers the blob store holds are in place before Ollama pulls."""
+        store = BlobStore(self.temp_dir / "blobs")
+        stored = self.temp_dir / "elsewhere" / "weights.gguf"
+        stored.parent.mkdir()
+        stored.write_bytes(b"weights")
+        digest = hashlib.sha256(b"weights").hexdigest()
+        store.add(stored, digest)
+        self.provider.blob_store = store
+        manifest = {"layers": [{"digest": f"sha256:{digest}", "size": 7}]}
+        response = make_response(200)
+        response.content = FakeStreamContent([b'{"status": "success"}'])
+        session = MagicMock()
+        session.get = MagicMock(return_value=make_cm(make_response(200, manifest)))
+        session.post = MagicMock(return_value=make_cm(response))
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            self.assertTrue(asyncio.run(self.provider.download_model("llama3:8b")))
+
+        blob = self.provider.models_path / "blobs" / f"sha256-{digest}"
+        self.assertTrue(blob.samefile(stored))
+
+    def test_delete_model_from_disk_keeps_shared_blobs(self):
+        """Test without a server, deleting a tag removes only blobs no other tag uses."""
+        self._install_model("library", "llama3", "8b")
+        self._install_model("library", "llama3", "latest")
+        self._install_model("someone", "coder", "latest", digest="sha256:" + "cd" * 32)
+        blobs = self.provider.models_path / "blobs"
+        session = MagicMock()
+        session.delete = MagicMock(side_effect=aiohttp.ClientConnectionError())
+
+        self.assertEqual(
+            sorted(asyncio.run(self.provider.local_models())),
+            ["llama3:8b", "llama3:latest", "someone/coder:latest"],
+        )
+        self.assertEqual(self.provider.model_disk_bytes("llama3:8b"), 0)
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            self.assertTrue(asyncio.run(self.provider.delete_model("llama3:8b")))
+            self.assertTrue((blobs / ("sha256-" + "ab" * 32)).exists())
+            self.assertTrue(asyncio.run(self.provider.delete_model("llama3:latest")))
+
+        self.assertFalse((blobs / ("sha256-" + "ab" * 32)).exists())
+        self.assertTrue((blobs / ("sha256-" + "cd" * 32)).exists())
+        self.assertEqual(asyncio.run(self.provider.local_models()), ["someone/coder:latest"])
+
+    def test_download_size_from_registry_manifest(self):
+        """Test a model's download size sums its registry manifest's layers."""
+        manifest = {"config": {"size": 500}, "layers": [{"size": 4000}, {"size": 100}]}
+        session = MagicMock()
+        session.get = MagicMock(return_value=make_cm(make_response(200, manifest)))
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            size = asyncio.run(self.provider.download_size("llama3:8b"))
+
+        self.assertEqual(size, 4600)
+        self.assertTrue(session.get.call_args[0][0].endswith("/v2/library/llama3/manifests/8b"))
+
+    def test_pull_fetches_manifest_with_a_bounded_timeout(self):
+        """Test the manifest lookup can't stall a pull, and skips other registries."""
+        response = make_response(200)
+        response.content = FakeStreamContent([b'{"status": "success"}'])
+        session = MagicMock()
+        session.get = MagicMock(return_value=make_cm(make_response(200, {"layers": []})))
+        session.post = MagicMock(return_value=make_cm(response))
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            self.assertTrue(asyncio.run(self.provider.download_model("llama3:8b")))
+            timeout = session.get.call_args.kwargs["timeout"]
+            self.assertEqual(timeout.total, MANIFEST_TIMEOUT)
+
+            session.get.reset_mock()
+            self.assertTrue(asyncio.run(self.provider.download_model("hf.co/org/repo:Q4_K_M")))
+            session.get.assert_not_called()
+
     def test_is_model_available(self):
         """Test local model availability via the tags API."""
         session = MagicMock()
@@ -186,6 +451,20 @@ class TestOllamaProvider(unittest.TestCase):
             self.assertTrue(asyncio.run(self.provider.is_model_available("llama2:latest")))
             self.assertFalse(asyncio.run(self.provider.is_model_available("missing:latest")))
 
+    def test_load_model_keep_alive(self):
+        """Test loading a model without generating via the generate API."""
+        session = MagicMock()
+        session.post = MagicMock(return_value=make_cm(make_response(200, {"done": True})))
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            self.assertTrue(asyncio.run(self.provider.load_model("llama2:latest", "30m")))
+
+        url = session.post.call_args.args[0]
+        self.assertEqual(url, "http://localhost:11434/api/generate")
+        self.assertEqual(
+            session.post.call_args.kwargs["json"], {"model": "llama2:latest", "keep_alive": "30m"}
+        )
+
     def test_get_server_status_running(self):
         """Test server status when Ollama is running."""
         session = MagicMock()
@@ -211,6 +490,74 @@ class TestOllamaProvider(unittest.TestCase):
         self.assertFalse(status["running"])
         self.assertEqual(status["models"], [])
 
+    def test_start_server_not_ready_stops_process(self):
+        """Test a server that never becomes ready is stopped and its PID file removed."""
+        session = MagicMock()
+        session.get = MagicMock(side_effect=aiohttp.ClientConnectionError("Connection refused"))
+        process = MagicMock(pid=4321)
+        process.poll.return_value = None
+        not_ready = AsyncMock(return_value=ReadinessResult(False, 60.0, 70, "timed out"))
+        pid_file = self.temp_dir / "config/cortex/ollama_server.pid"
+
+        self.provider.prewarm = AsyncMock()
+
+        with patch("aiohttp.ClientSession", make_session_class(session)):
+            with patch("cortex.providers.ollama.DOTFILES", self.temp_dir):
+                with patch("cortex.providers.ollama.subprocess.Popen", return_value=process):
+                    with patch("cortex.providers.ollama.wait_until_ready", not_ready):
+                        started = asyncio.run(self.provider.start_server("llama2:latest"))
+
+        self.assertFalse(started)
+        process.terminate.assert_called_once()
+        process.wait.assert_called_once()
+        self.assertFalse(pid_file.exists())
+
+
+class TestPullProgress(unittest.TestCase):
+    """Test aggregation and throttling of pull progress."""
+
+    def setUp(self):
+        """A progress tracker on a hand-driven clock."""
+        self.now = 0.0
+        self.progress = PullProgress(
+            {"sha256:a": 1000, "sha256:b": 3000}, interval=1.0, clock=lambda: self.now
+        )
+
+    def status(self, digest, completed, total):
+        return {"status": "pulling", "digest": digest, "total": total, "completed": completed}
+
+    def test_layers_add_up_and_never_go_backward(self):
+        """Test a new layer starting at zero doesn't reset progress."""
+        self.progress.update(self.status("sha256:a", 1000, 1000))
+        self.progress.update(self.status("sha256:b", 0, 3000))
+        self.progress.update(self.status("sha256:a", 400, 1000))  # Stale retry report
+
+        self.assertEqual(self.progress.completed_bytes, 1000)
+        self.assertEqual(self.progress.total_bytes, 4000)
+
+    def test_reports_are_throttled(self):
+        """Test reports come at most once per interval, plus on finished layers."""
+        due = []
+        for completed in (100, 200, 300):
+            self.now += 0.2
+            due.append(self.progress.update(self.status("sha256:b", completed, 3000)))
+        self.now += 1.0
+        due.append(self.progress.update(self.status("sha256:b", 400, 3000)))
+        self.now += 0.1
+        due.append(self.progress.update(self.status("sha256:a", 1000, 1000)))
+
+        self.assertEqual(due, [True, False, False, True, True])
+
+    def test_rate_and_eta(self):
+        """Test the smoothed rate and time left follow the byte counts."""
+        self.progress.update(self.status("sha256:b", 0, 3000))
+        self.now = 1.0
+        self.progress.update(self.status("sha256:b", 1000, 3000))
+
+        self.assertEqual(self.progress.rate, 1000)
+        self.assertEqual(self.progress.eta, 3.0)
+        self.assertIsNone(PullProgress().eta)
+
 
 if __name__ == "__main__":
     unittest.main()
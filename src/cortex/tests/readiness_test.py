@@ -0,0 +1,139 @@
+"""
+Tests for readiness.py module.
+"""
+
+import asyncio
+import shutil
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiohttp import web
+from cortex.readiness import _LogWatcher, wait_until_ready
+
+
+def free_port():
+    """Return a port nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def serve(port, status=200):
+    """Start a local HTTP server answering every GET with ``status``."""
+
+    async def handler(request):
+        return web.json_response({"models": []}, status=status)
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+class TestWaitUntilReady(unittest.TestCase):
+    """Test readiness polling against a real local server."""
+
+    def setUp(self):
+        """Pick a free port."""
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}/api/tags"
+
+    def test_ready_immediately(self):
+        """Test that a running server is reported ready on the first probe."""
+
+        async def run():
+            runner = await serve(self.port)
+            try:
+                return await wait_until_ready(self.url, timeout=5)
+            finally:
+                await runner.cleanup()
+
+        result = asyncio.run(run())
+
+        self.assertTrue(result)
+        self.assertEqual(result.attempts, 1)
+
+    def test_ready_once_server_comes_up(self):
+        """Test that polling returns shortly after a slow server binds its port."""
+
+        async def run():
+            async def late_start():
+                await asyncio.sleep(0.3)
+                return await serve(self.port)
+
+            starter = asyncio.create_task(late_start())
+            result = await wait_until_ready(self.url, timeout=5)
+            await (await starter).cleanup()
+            return result
+
+        result = asyncio.run(run())
+
+        self.assertTrue(result.ready)
+        self.assertGreater(result.attempts, 1)
+        self.assertGreaterEqual(result.elapsed, 0.3)
+        self.assertLess(result.elapsed, 2.0)
+
+    def test_not_found_counts_as_ready(self):
+        """Test that any non-5xx answer means the server accepts requests."""
+
+        async def run():
+            runner = await serve(self.port, status=404)
+            try:
+                return await wait_until_ready(self.url, timeout=5)
+            finally:
+                await runner.cleanup()
+
+        self.assertTrue(asyncio.run(run()))
+
+    def test_deadline(self):
+        """Test that a server that never answers times out."""
+        result = asyncio.run(wait_until_ready(self.url, timeout=0.3))
+
+        self.assertFalse(result)
+        self.assertIn("not ready", result.reason)
+        self.assertLess(result.elapsed, 1.5)
+
+    def test_process_exit_stops_waiting(self):
+        """Test that a dead server process ends the wait immediately."""
+        result = asyncio.run(wait_until_ready(self.url, timeout=30, is_alive=lambda: False))
+
+        self.assertFalse(result)
+        self.assertEqual(result.reason, "server process exited")
+        self.assertEqual(result.attempts, 1)
+
+
+class TestLogWatcher(unittest.TestCase):
+    """Test ready-line detection in server logs."""
+
+    def setUp(self):
+        """Create a log file with output from a previous run."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.log_file = self.temp_dir / "server.log"
+        self.log_file.write_text("Listening on 127.0.0.1:11434 (old run)\n")
+
+    def test_ignores_earlier_output(self):
+        """Test that ready lines from previous runs are not matched."""
+        watcher = _LogWatcher(self.log_file, r"Listening on")
+
+        self.assertFalse(watcher.check())
+
+    def test_matches_complete_new_line(self):
+        """Test that a ready line is matched once it is fully written."""
+        watcher = _LogWatcher(self.log_file, r"Listening on")
+
+        with open(self.log_file, "a") as f:
+            f.write("loading...\nListening on 127.0")
+        self.assertFalse(watcher.check())
+
+        with open(self.log_file, "a") as f:
+            f.write(".0.1:11434\n")
+        self.assertTrue(watcher.check())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Tests for scheduler.py module.
+"""
+
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from cortex.memory import BASE_OVERHEAD_GB
+from cortex.scheduler import MemoryBudgetScheduler
+
+from tests.fakes import FakeProvider, make_model
+
+
+class TestMemoryBudgetScheduler(unittest.TestCase):
+    """Test RAM-budgeted admission of local runs."""
+
+    def run_all(self, scheduler, footprints, hold=0.05):
+        """Run one fake job per (model, ram) pair and return start/end events in order."""
+        events = []
+
+        async def job(model_id, ram_gb):
+            async with scheduler.reserve(model_id, ram_gb):
+                events.append(("start", model_id))
+                await asyncio.sleep(hold)
+                events.append(("end", model_id))
+
+        async def main():
+            await asyncio.gather(*(job(m, r) for m, r in footprints))
+
+        asyncio.run(main())
+        return events
+
+    def test_runs_concurrently_when_models_fit(self):
+        """Test that models fitting together all start at once."""
+        scheduler = MemoryBudgetScheduler(budget_gb=12)
+
+        events = self.run_all(scheduler, [("a", 4), ("b", 4), ("c", 4)])
+
+        self.assertEqual([e[0] for e in events[:3]], ["start"] * 3)
+        self.assertEqual(scheduler.max_concurrency, 3)
+        self.assertEqual(scheduler.peak_gb, 12)
+
+    def test_never_exceeds_budget(self):
+        """Test that three 8GB models on a 12GB budget run one at a time, in order."""
+        scheduler = MemoryBudgetScheduler(budget_gb=12)
+
+        events = self.run_all(scheduler, [("a", 8), ("b", 8), ("c", 8)])
+
+        self.assertEqual(
+            events,
+            [
+                ("start", "a"),
+                ("end", "a"),
+                ("start", "b"),
+                ("end", "b"),
+                ("start", "c"),
+                ("end", "c"),
+            ],
+        )
+        self.assertEqual(scheduler.max_concurrency, 1)
+        self.assertLessEqual(scheduler.peak_gb, 12)
+        self.assertEqual(scheduler.in_use_gb, 0)
+
+    def test_fifo_admission_does_not_starve_large_models(self):
+        """Test that small models don't jump ahead of a queued large one."""
+        scheduler = MemoryBudgetScheduler(budget_gb=10)
+
+        events = self.run_all(scheduler, [("small-1", 4), ("large", 8), ("small-2", 4)])
+
+        self.assertLess(events.index(("start", "large")), events.index(("start", "small-2")))
+
+    def test_oversized_and_unknown_models_run_alone(self):
+        """Test that a model bigger than the budget, or of unknown size, still runs by itself."""
+        scheduler = MemoryBudgetScheduler(budget_gb=6)
+
+        events = self.run_all(scheduler, [("huge", 20), ("unknown", None), ("small", 2)])
+
+        self.assertEqual(scheduler.max_concurrency, 1)
+        self.assertEqual([e for e in events if e[0] == "start"][0], ("start", "huge"))
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test that cancelling a queued run doesn't block those behind it."""
+        scheduler = MemoryBudgetScheduler(budget_gb=8)
+
+        async def main():
+            started = []
+
+            async def job(model_id, ram_gb, hold):
+                async with scheduler.reserve(model_id, ram_gb):
+                    started.append(model_id)
+                    await asyncio.sleep(hold)
+
+            first = asyncio.ensure_future(job("first", 8, 0.1))
+            await asyncio.sleep(0.01)
+            doomed = asyncio.ensure_future(job("doomed", 8, 0))
+            last = asyncio.ensure_future(job("last", 2, 0))
+            await asyncio.sleep(0.01)
+            doomed.cancel()
+            await asyncio.gather(first, last)
+            return started
+
+        self.assertEqual(asyncio.run(main()), ["first", "last"])
+
+    @patch("cortex.scheduler.psutil")
+    def test_budget_from_available_memory(self, mock_psutil):
+        """Test the budget leaves headroom for the rest of the system."""
+        mock_psutil.virtual_memory.return_value = MagicMock(available=16 * 1024**3)
+
+        self.assertEqual(MemoryBudgetScheduler.from_available_memory(2.0).budget_gb, 14.0)
+
+
+class TestEstimateFootprint(unittest.TestCase):
+    """Test BaseProvider.estimate_footprint_gb."""
+
+    def setUp(self):
+        """Create a local model directory."""
+        self.model_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.model_dir)
+
+    def make_provider(self, files, models=None):
+        """A provider whose local files are ``files``."""
+        provider = FakeProvider("mlx", models or [])
+        provider.local_model_files = lambda model_id: files
+        return provider
+
+    def test_footprint_from_weights_on_disk(self):
+        """Test that on-disk weights plus config.json drive the estimate."""
+        (self.model_dir / "model.safetensors").write_bytes(b"\0" * 1024**2)
+        config = {"num_hidden_layers": 2, "hidden_size": 64, "num_attention_heads": 4}
+        (self.model_dir / "config.json").write_text(json.dumps(config))
+        provider = self.make_provider([self.model_dir])
+
+        footprint = provider.estimate_footprint_gb("org/model")
+
+        # The architecture path adds KV cache and fixed runtime overhead
+        architecture_free = provider.estimate_ram_usage(1 / 1024)
+        self.assertGreater(footprint, BASE_OVERHEAD_GB)
+        self.assertGreater(footprint, architecture_free)
+
+    def test_duplicate_snapshots_counted_once(self):
+        """Test that the same shard in two locations isn't double counted."""
+        other = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, other)
+        for directory in (self.model_dir, other):
+            (directory / "model.safetensors").write_bytes(b"\0" * 1024**2)
+
+        one = self.make_provider([self.model_dir]).estimate_footprint_gb("m")
+        both = self.make_provider([self.model_dir, other]).estimate_footprint_gb("m")
+
+        self.assertEqual(one, both)
+
+    def test_footprint_falls_back_to_model_info(self):
+        """Test the cached ModelInfo estimate, and None when nothing is known."""
+        provider = self.make_provider([])
+        provider.models_cache = [make_model("org/model", "mlx", ram_gb=6.0)]
+
+        self.assertAlmostEqual(provider.estimate_footprint_gb("org/model"), 6.0)
+        self.assertIsNone(provider.estimate_footprint_gb("org/other"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -347,6 +347,20 @@ class TestStatisticsTracker(unittest.TestCase):
         # 6 words / 0.75 = 8, 26 chars / 4 = 6 -> max is 8
         self.assertEqual(estimate, 8)
 
+    def test_throughput_summary(self):
+        """Test measured speeds are summarized per model as medians."""
+        stats = StatisticsTracker(self.stats_dir)
+        for speed in (40.0, 44.0, 10.0):
+            stats.record_throughput("qwen:7b", "ollama", speed, 900.0, 512, source="bench")
+        stats.record_throughput("qwen:7b", "ollama", 0.0)
+
+        summary = StatisticsTracker(self.stats_dir).throughput_summary()["ollama:qwen:7b"]
+
+        self.assertEqual(summary["decode_tokens_per_second"], 40.0)
+        self.assertEqual(summary["prefill_tokens_per_second"], 900.0)
+        self.assertEqual(summary["context_tokens"], 512)
+        self.assertEqual(summary["samples"], 3)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,12 @@
 Tests for system_utils.py module.
 """
 
+import asyncio
+import random
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from cortex.providers import ModelCapability, ModelInfo
@@ -13,6 +18,9 @@ from cortex.system_utils import (
     SystemInfo,
     SystemType,
 )
+from cortex.throughput import SpeedPrediction
+
+from tests.fakes import make_model
 
 
 class TestSystemDetector(unittest.TestCase):
@@ -100,6 +108,123 @@ class TestSystemDetector(unittest.TestCase):
 
         self.assertEqual(tier, PerformanceTier.MINIMAL)
 
+    @patch("subprocess.run")
+    @patch.object(SystemDetector, "_get_memory_info")
+    def test_gpu_info_reuses_known_ram(self, mock_memory, mock_run):
+        """Test that GPU detection does not sample memory a second time."""
+        mock_run.return_value = MagicMock(stdout="Chip: Apple M2 Pro")
+
+        gpu_info = SystemDetector._get_gpu_info(SystemType.MACOS_APPLE_SILICON, ram_gb=32.0)
+
+        mock_memory.assert_not_called()
+        self.assertEqual(gpu_info["name"], "Apple M2 Pro")
+        self.assertEqual(gpu_info["memory_gb"], 24.0)
+
+
+STATIC_PROFILE = {
+    "os_type": "macos_apple_silicon",
+    "cpu_model": "Apple M1 Max",
+    "cpu_cores": 10,
+    "ram_gb": 64.0,
+    "gpu_info": "Apple M1 Max",
+    "gpu_memory_gb": 48.0,
+    "has_neural_engine": True,
+    "has_cuda": False,
+    "has_metal": True,
+    "platform_details": {},
+}
+
+
+class TestSystemDetectorCache(unittest.TestCase):
+    """Test the on-disk hardware profile cache."""
+
+    def setUp(self):
+        """Point the cache at a temp file and reset the in-process memo."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+        cache_patcher = patch.object(
+            SystemDetector, "CACHE_FILE", Path(self.temp_dir) / "hardware.json"
+        )
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+        SystemDetector._profile_memo = None
+        self.addCleanup(setattr, SystemDetector, "_profile_memo", None)
+
+        self.memory = {"ram_gb": 64.0, "available_gb": 30.0, "total_bytes": 68719476736}
+        memory_patcher = patch.object(
+            SystemDetector, "_get_memory_info", side_effect=lambda: dict(self.memory)
+        )
+        memory_patcher.start()
+        self.addCleanup(memory_patcher.stop)
+
+        self.fingerprint = "abc"
+        fingerprint_patcher = patch.object(
+            SystemDetector, "_hardware_fingerprint", side_effect=lambda total: self.fingerprint
+        )
+        fingerprint_patcher.start()
+        self.addCleanup(fingerprint_patcher.stop)
+
+        probe_patcher = patch.object(
+            SystemDetector, "_probe_static_profile", return_value=dict(STATIC_PROFILE)
+        )
+        self.mock_probe = probe_patcher.start()
+        self.addCleanup(probe_patcher.stop)
+
+    def test_cold_run_probes_and_persists(self):
+        """Test that the first detection probes hardware and writes the cache."""
+        info = SystemDetector.detect_system()
+
+        self.mock_probe.assert_called_once_with(64.0)
+        self.assertTrue(SystemDetector.CACHE_FILE.exists())
+        self.assertEqual(info.os_type, SystemType.MACOS_APPLE_SILICON)
+        self.assertEqual(info.performance_tier, PerformanceTier.ULTRA)
+
+    def test_warm_run_skips_probes(self):
+        """Test that a cached profile is reused from disk by a new process."""
+        SystemDetector.detect_system()
+        SystemDetector._profile_memo = None  # simulate a fresh process
+
+        SystemDetector.detect_system()
+
+        self.assertEqual(self.mock_probe.call_count, 1)
+
+    def test_available_ram_refreshed_every_call(self):
+        """Test that dynamic memory figures are never served from the cache."""
+        SystemDetector.detect_system()
+        self.memory["available_gb"] = 12.5
+
+        info = SystemDetector.detect_system()
+
+        self.assertEqual(info.ram_available_gb, 12.5)
+        self.assertEqual(self.mock_probe.call_count, 1)
+
+    def test_fingerprint_change_invalidates(self):
+        """Test that a reboot or hardware change triggers a re-probe."""
+        SystemDetector.detect_system()
+        self.fingerprint = "rebooted"
+
+        SystemDetector.detect_system()
+
+        self.assertEqual(self.mock_probe.call_count, 2)
+
+    def test_corrupt_cache_reprobes(self):
+        """Test that an unreadable cache file is ignored."""
+        SystemDetector.CACHE_FILE.write_text("{not json")
+
+        info = SystemDetector.detect_system()
+
+        self.mock_probe.assert_called_once()
+        self.assertEqual(info.cpu_model, "Apple M1 Max")
+
+    def test_detect_system_async(self):
+        """Test the non-blocking variant returns the same profile."""
+        info = asyncio.run(SystemDetector.detect_system_async())
+
+        self.assertEqual(info.cpu_cores, 10)
+        self.assertEqual(info.ram_available_gb, 30.0)
+
 
 class TestModelRecommender(unittest.TestCase):
     """Test ModelRecommender class."""
@@ -225,6 +350,37 @@ class TestModelRecommender(unittest.TestCase):
         for model in recommendations:
             self.assertIn(ModelCapability.CODE, model.capabilities)
 
+    def test_recommend_models_by_measured_speed(self):
+        """Test measurements rank local models by speed and describe it."""
+        measurements = {
+            "ollama:ollama/tiny-model": {"decode_tokens_per_second": 90.0, "samples": 4},
+            "mlx:mlx-community/medium-model": {"decode_tokens_per_second": 4.0, "samples": 2},
+        }
+
+        recommendations = ModelRecommender.recommend_models(
+            self.system_info, self.models, max_recommendations=5, measurements=measurements
+        )
+
+        local = [m for m in recommendations if not m.online]
+        self.assertEqual(local[0].id, "ollama/tiny-model")
+        self.assertEqual(local[0].metadata["speed"], "≈90 tok/s at 8k context (measured)")
+        self.assertTrue(local[1].metadata["speed_measured"])
+
+    def test_recommend_unmeasured_models_from_fitted_speed(self):
+        """Test unmeasured models get a speed from the efficiency fitted on measured ones."""
+        # 7GB measured at 40 tok/s on 400GB/s: efficiency 0.7
+        measurements = {
+            "mlx:mlx-community/medium-model": {"decode_tokens_per_second": 40.0, "samples": 1},
+        }
+
+        recommendations = ModelRecommender.recommend_models(
+            self.system_info, self.models, max_recommendations=5, measurements=measurements
+        )
+
+        tiny = next(m for m in recommendations if m.id == "ollama/tiny-model")
+        self.assertAlmostEqual(tiny.metadata["predicted_tokens_per_second"], 40.0 * 7 / 1.5)
+        self.assertFalse(tiny.metadata["speed_measured"])
+
     def test_fitness_score_calculation(self):
         """Test fitness score calculation."""
         model = self.models[1]  # Medium model
@@ -251,6 +407,19 @@ class TestModelRecommender(unittest.TestCase):
         # MLX should score higher on Apple Silicon (30 point bonus)
         self.assertGreater(mlx_score, ollama_score)
 
+    def test_fitness_score_keeps_ram_penalty_with_speed(self):
+        """Test a known speed doesn't hide a model that nearly fills RAM."""
+        speed = SpeedPrediction(30.0, 8192, True)
+        roomy = make_model("roomy", "mlx", ram_gb=50.0)
+        cramped = make_model("cramped", "mlx", ram_gb=60.0)
+
+        scores = [
+            ModelRecommender._calculate_fitness_score(model, self.system_info, speed=speed)
+            for model in (roomy, cramped)
+        ]
+
+        self.assertEqual(scores[0] - scores[1], 20)
+
     def test_ensure_diversity(self):
         """Test that recommendations have diversity."""
         # Create models from same provider
@@ -276,6 +445,39 @@ class TestModelRecommender(unittest.TestCase):
         # Should include diverse sizes even if from same provider
         self.assertLessEqual(len(recommendations), 3)
 
+    def test_ensure_diversity_picks_each_provider_and_size(self):
+        """Test every provider's best and three size classes make the cut."""
+        models = [make_model(f"mlx-{i}", "mlx", ram_gb=3.0 + i * 0.1) for i in range(6)] + [
+            make_model("ollama-big", "ollama", ram_gb=24.0),
+            make_model("hf-tiny", "hf", 1.0),
+        ]
+        for i, model in enumerate(models):
+            model.metadata["fitness_score"] = 100.0 - i
+
+        recommendations = ModelRecommender._ensure_diversity(models, max_count=4)
+
+        self.assertEqual(
+            [m.id for m in recommendations], ["mlx-0", "mlx-1", "ollama-big", "hf-tiny"]
+        )
+
+    def test_recommendations_are_deterministic(self):
+        """Test input order and fitness ties don't change the result."""
+        models = [make_model(f"model-{i}", "ollama", ram_gb=4.0) for i in range(20)]
+        models += [make_model(f"cloud-{i}", "openai", online=True) for i in range(10)]
+        for model in models[20:]:
+            model.score = 100.0
+
+        first = ModelRecommender.recommend_models(self.system_info, models, max_recommendations=6)
+        random.Random(3).shuffle(models)
+        second = ModelRecommender.recommend_models(self.system_info, models, max_recommendations=6)
+
+        self.assertEqual([m.id for m in first], [m.id for m in second])
+        # Online models take at most half the slots, whatever their position
+        self.assertEqual(
+            [m.id for m in first],
+            ["cloud-0", "cloud-1", "cloud-2", "model-0", "model-1", "model-10"],
+        )
+
     def test_categorize_size(self):
         """Test model size categorization."""
         self.assertEqual(ModelRecommender._categorize_size(0.5), "tiny")
@@ -0,0 +1,130 @@
+"""
+Tests for telemetry.py module.
+
+Process trees are real subprocesses so psutil sampling is exercised end to
+end; only Ollama's ``/api/ps`` is faked.
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import psutil
+from cortex.telemetry import TelemetrySampler
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(60)"]
+# A parent that runs a CPU-bound child, like a server with a model runner
+SERVER_WITH_RUNNER = [
+    sys.executable,
+    "-c",
+    "import subprocess, sys; "
+    "subprocess.run([sys.executable, '-c', 'while True: pass']); "
+    "# telemetry-test-server",
+]
+
+
+class TestTelemetrySampler(unittest.TestCase):
+    """Test process-tree sampling and the ring buffer."""
+
+    def setUp(self):
+        """Use an isolated PID directory."""
+        self.pid_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.pid_dir)
+        self.sampler = TelemetrySampler(history=3, pid_dir=self.pid_dir)
+
+    def spawn(self, command):
+        """Start a process tree that is torn down after the test."""
+        process = subprocess.Popen(command)
+
+        def kill_tree():
+            try:
+                children = psutil.Process(process.pid).children(recursive=True)
+            except psutil.NoSuchProcess:
+                children = []
+            for child in children:
+                child.kill()
+            process.kill()
+            process.wait()
+
+        self.addCleanup(kill_tree)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if command is SLEEPER or psutil.Process(process.pid).children():
+                break
+            time.sleep(0.05)
+        return process
+
+    def test_sample_tree_sums_children(self):
+        """Test that the runner's memory and CPU count toward its server."""
+        server = self.spawn(SERVER_WITH_RUNNER)
+
+        self.sampler.sample_tree(server.pid)
+        time.sleep(0.3)
+        sample = self.sampler.sample_tree(server.pid)
+
+        self.assertEqual(sample.processes, 2)
+        self.assertGreater(sample.rss_bytes, psutil.Process(server.pid).memory_info().rss)
+        self.assertGreater(sample.cpu_percent, 20)
+        self.assertGreaterEqual(sample.threads, 2)
+        self.assertGreaterEqual(sample.uptime_seconds, 0)
+        if os.name == "posix":
+            self.assertGreater(sample.open_fds, 0)
+
+    def test_sample_tree_of_missing_process(self):
+        """Test that an exited server yields no sample."""
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+
+        self.assertIsNone(self.sampler.sample_tree(process.pid))
+
+    def test_server_pid_from_pid_file_or_command_line(self):
+        """Test PID discovery from the PID file, falling back to a process scan."""
+        sleeper = self.spawn(SLEEPER)
+        (self.pid_dir / "mlx_server.pid").write_text(str(sleeper.pid))
+        self.assertEqual(self.sampler.server_pid("mlx"), sleeper.pid)
+
+        server = self.spawn(SERVER_WITH_RUNNER)
+        (self.pid_dir / "ollama_server.pid").write_text("not a pid")
+        with patch.dict("cortex.telemetry.SERVER_COMMANDS", {"ollama": "# telemetry-test-server"}):
+            self.assertEqual(self.sampler.server_pid("ollama"), server.pid)
+
+    def test_ring_buffer_and_loaded_models(self):
+        """Test history is bounded and Ollama's resident models are attached."""
+        server = self.spawn(SLEEPER)
+        (self.pid_dir / "ollama_server.pid").write_text(str(server.pid))
+        ollama = MagicMock()
+        ollama.list_loaded_models = AsyncMock(
+            return_value=[
+                {
+                    "name": "llama3:8b",
+                    "size": 6 * 1024**3,
+                    "size_vram": 5 * 1024**3,
+                    "expires_at": "2026-01-01T12:00:00Z",
+                }
+            ]
+        )
+
+        async def run():
+            for _ in range(5):
+                await self.sampler.sample(providers=("mlx", "ollama"), ollama=ollama)
+
+        asyncio.run(run())
+
+        self.assertEqual(len(self.sampler.history["ollama"]), 3)
+        self.assertFalse(self.sampler.latest("mlx").running)
+        latest = self.sampler.latest("ollama").to_dict()
+        self.assertTrue(latest["running"])
+        self.assertEqual(latest["loaded_models"][0]["vram_bytes"], 5 * 1024**3)
+        low, high = self.sampler.rss_range("ollama")
+        self.assertLessEqual(low, high)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for throughput.py module.
+"""
+
+import unittest
+from dataclasses import replace
+
+from cortex.system_utils import SystemType
+from cortex.throughput import (
+    CPU_BANDWIDTH_GBPS,
+    ThroughputModel,
+    gb_per_token,
+    memory_bandwidth_gbps,
+    quantization_bits,
+    weights_gb,
+)
+
+from tests.fakes import make_model, make_system_info
+
+# Llama-3-8B shapes: 32 layers, 8 KV heads of 128 dims
+LLAMA_8B = {
+    "num_layers": 32,
+    "hidden_size": 4096,
+    "num_attention_heads": 32,
+    "num_kv_heads": 8,
+    "head_dim": 128,
+    "max_context": 131072,
+}
+
+
+class TestHardwareAndWeights(unittest.TestCase):
+    """Test bandwidth lookup and bytes read per token."""
+
+    def test_bandwidth_by_chip(self):
+        """Test the most specific chip name wins, with fallbacks by platform."""
+        info = make_system_info()
+
+        self.assertEqual(memory_bandwidth_gbps(info), 400.0)
+        self.assertEqual(
+            memory_bandwidth_gbps(replace(info, cpu_model="Apple M3", gpu_info="")), 100.0
+        )
+        linux = replace(info, os_type=SystemType.LINUX, cpu_model="AMD EPYC", gpu_info="None")
+        self.assertEqual(memory_bandwidth_gbps(linux), CPU_BANDWIDTH_GBPS)
+
+    def test_quantization_bits(self):
+        """Test MLX, GGUF and float labels."""
+        self.assertEqual(quantization_bits("4bit"), 4.0)
+        self.assertEqual(quantization_bits("Q4_K_M"), 4.5)
+        self.assertEqual(quantization_bits("Q8_0"), 8.5)
+        self.assertEqual(quantization_bits("BF16"), 16.0)
+        self.assertIsNone(quantization_bits("mystery"))
+
+    def test_weights_from_parameters_and_quantization(self):
+        """Test params x bits is used when the size on disk is unknown."""
+        model = make_model("org/model", "mlx")
+        model.size_gb = 0
+        model.metadata = {"parameter_count": 8 * 1024**3, "quantization": "4bit"}
+
+        self.assertAlmostEqual(weights_gb(model), 4.0)
+
+    def test_kv_cache_grows_bytes_per_token(self):
+        """Test longer contexts read more per token when the architecture is known."""
+        model = make_model("org/llama", "mlx", ram_gb=6.0)
+        model.metadata["architecture"] = LLAMA_8B
+
+        short = gb_per_token(model, 1024)
+        long = gb_per_token(model, 32768)
+
+        # 128KB of f16 KV per token: 4GB more at 32K
+        self.assertAlmostEqual(long - short, 31 * 1024 * 128 / 1024**2, places=3)
+        self.assertEqual(gb_per_token(model), weights_gb(model))
+
+
+class TestThroughputModel(unittest.TestCase):
+    """Test fitting and predicting decode speed."""
+
+    def setUp(self):
+        """An M1 Max (400 GB/s) with a 4GB and an 8GB model."""
+        self.info = make_system_info()
+        self.small = make_model("small", "ollama", ram_gb=4.8)  # 4GB of weights
+        self.large = make_model("large", "ollama", ram_gb=9.6)  # 8GB of weights
+
+    def test_unmeasured_prediction_uses_default_efficiency(self):
+        """Test speed is bandwidth over bytes per token."""
+        prediction = ThroughputModel(self.info).predict(self.small, 8192)
+
+        self.assertAlmostEqual(prediction.tokens_per_second, 0.6 * 400 / 4.0)
+        self.assertFalse(prediction.measured)
+        self.assertEqual(prediction.describe(), "≈60 tok/s at 8k context (estimated)")
+
+    def test_fit_calibrates_unmeasured_models(self):
+        """Test one measurement sets the efficiency used for every other model."""
+        measurements = {"ollama:small": {"decode_tokens_per_second": 80.0, "samples": 3}}
+
+        model = ThroughputModel.fit(self.info, [self.small, self.large], measurements)
+
+        self.assertAlmostEqual(model.efficiency, 0.8)
+        self.assertAlmostEqual(model.predict(self.large, 8192).tokens_per_second, 40.0)
+        measured = model.predict(self.small, 8192)
+        self.assertTrue(measured.measured)
+        self.assertEqual(measured.tokens_per_second, 80.0)
+
+    def test_measurement_rescaled_to_target_context(self):
+        """Test a short-prompt measurement predicts slower decode at long context."""
+        self.small.metadata["architecture"] = LLAMA_8B
+        measurements = {"ollama:small": {"decode_tokens_per_second": 80.0, "context_tokens": 512}}
+
+        prediction = ThroughputModel(self.info, measurements).predict(self.small, 32768)
+
+        self.assertLess(prediction.tokens_per_second, 80.0)
+        self.assertGreater(prediction.tokens_per_second, 40.0)
+
+    def test_online_and_unknown_models_have_no_prediction(self):
+        """Test cloud models and models of unknown size are left to the heuristics."""
+        model = ThroughputModel(self.info)
+        unknown = make_model("unknown", "mlx")
+        unknown.size_gb = 0
+
+        self.assertIsNone(model.predict(make_model("gpt-4o", "openai", online=True), 8192))
+        self.assertIsNone(model.predict(unknown, 8192))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Tests for variants.py module.
+"""
+
+import unittest
+
+from cortex.system_utils import ModelRecommender
+from cortex.variants import (
+    choose_variant,
+    collapse_variants,
+    group_variants,
+    normalize_name,
+    variant_bits,
+)
+
+from tests.fakes import make_model, make_system_info
+
+
+def weights(model_id, provider, size_gb, **metadata):
+    """A local model of ``size_gb`` weights on disk."""
+    model = make_model(model_id, provider, ram_gb=size_gb * 1.2)
+    model.metadata.update(metadata)
+    return model
+
+
+class TestNormalization(unittest.TestCase):
+    """Test base names and bit widths read from variant names."""
+
+    def test_normalize_name(self):
+        """Test quantization, format and date markers are stripped."""
+        cases = {
+            "mlx-community/Llama-3.2-3B-Instruct-4bit": "llama-3.2-3b-instruct",
+            "mlx-community/Llama-3.2-3B-Instruct-bf16": "llama-3.2-3b-instruct",
+            "mlx-community/Mistral-7B-Instruct-v0.3-4-bit": "mistral-7b-instruct-v0.3",
+            "mlx-community/Qwen3-30B-A3B-Instruct-2507-8bit": "qwen3-30b-a3b-instruct",
+            "mlx-community/gemma-2-9b-it-8bit-DWQ": "gemma-2-9b-it",
+            "llama3:8b-instruct-q4_K_M": "llama3:8b-instruct",
+            "llama3:8b-instruct-fp16": "llama3:8b-instruct",
+            "qwen2.5-coder:32b": "qwen2.5-coder:32b",
+            "llama3:latest": "llama3",
+        }
+        for model_id, expected in cases.items():
+            self.assertEqual(normalize_name(model_id), expected, model_id)
+
+    def test_bits_prefer_header_data(self):
+        """Test the quantization from weight headers wins over the name."""
+        self.assertEqual(variant_bits(weights("org/model-8bit", "mlx", 8)), 8)
+        self.assertEqual(variant_bits(weights("llama3:8b-q4_K_M", "ollama", 5)), 4.5)
+        self.assertEqual(variant_bits(weights("org/model", "mlx", 5, quantization="6bit")), 6)
+        self.assertIsNone(variant_bits(weights("org/model", "mlx", 16)))
+
+
+class TestGrouping(unittest.TestCase):
+    """Test which models count as variants of one another."""
+
+    def test_variants_group_by_provider_and_name(self):
+        """Test quantizations group; other sizes, providers and cloud models don't."""
+        models = [
+            weights("mlx-community/Llama-3.2-3B-Instruct-4bit", "mlx", 1.8),
+            weights("mlx-community/Llama-3.2-3B-Instruct-8bit", "mlx", 3.4),
+            weights("mlx-community/Llama-3.2-1B-Instruct-4bit", "mlx", 0.7),
+            weights("llama3.2:3b-instruct-q4_K_M", "ollama", 2.0),
+            make_model("gpt-4o", "openai", online=True),
+            make_model("gpt-4o-2024-08-06", "openai", online=True),
+        ]
+
+        groups = group_variants(models)
+
+        self.assertEqual([len(g.variants) for g in groups], [2, 1, 1, 1, 1])
+        self.assertEqual(groups[0].base_name, "llama-3.2-3b-instruct")
+
+    def test_parameter_counts_split_same_names(self):
+        """Test header parameter counts split lookalikes and unknowns join a lone group."""
+        models = [
+            weights("a/model-4bit", "mlx", 4, parameter_count=7_000_000_000),
+            weights("b/model-8bit", "mlx", 8, parameter_count=7_100_000_000),
+            weights("c/model-4bit", "mlx", 7, parameter_count=13_000_000_000),
+            weights("d/other-4bit", "mlx", 4, parameter_count=7_000_000_000),
+            weights("e/other-bf16", "mlx", 14),
+        ]
+
+        groups = group_variants(models)
+
+        self.assertEqual(
+            [[m.id for m in g.variants] for g in groups],
+            [["a/model-4bit", "b/model-8bit"], ["c/model-4bit"], ["d/other-4bit", "e/other-bf16"]],
+        )
+
+
+class TestChooseVariant(unittest.TestCase):
+    """Test the best variant for an M1 Max with 30GB free (400 GB/s)."""
+
+    def setUp(self):
+        """An 8B model at three precisions."""
+        self.system_info = make_system_info()
+        self.bf16 = weights("mlx-community/Llama-3.1-8B-Instruct-bf16", "mlx", 16)
+        self.q8 = weights("mlx-community/Llama-3.1-8B-Instruct-8bit", "mlx", 8.5)
+        self.q4 = weights("mlx-community/Llama-3.1-8B-Instruct-4bit", "mlx", 4.5)
+        self.group = group_variants([self.bf16, self.q8, self.q4])[0]
+
+    def test_highest_quality_at_interactive_speed(self):
+        """Test 8-bit beats bf16, which decodes below reading speed."""
+        self.assertIs(choose_variant(self.group, self.system_info), self.q8)
+
+    def test_smallest_when_nothing_fits(self):
+        """Test a machine too small for every variant gets the smallest."""
+        self.system_info.ram_available_gb = 2.0
+
+        self.assertIs(choose_variant(self.group, self.system_info), self.q4)
+
+    def test_collapse_annotates_siblings(self):
+        """Test the chosen variant lists the others and recommendations dedupe."""
+        collapsed = collapse_variants([self.bf16, self.q8, self.q4], self.system_info)
+
+        self.assertEqual(collapsed, [self.q8])
+        self.assertEqual(self.q8.metadata["base_model"], "llama-3.1-8b-instruct")
+        self.assertEqual(self.q8.metadata["variants"][0], self.q8.id)
+        self.assertEqual(len(self.q8.metadata["variants"]), 3)
+
+        recommendations = ModelRecommender.recommend_models(
+            self.system_info, [self.bf16, self.q8, self.q4]
+        )
+        self.assertEqual(recommendations, [self.q8])
+
+
+if __name__ == "__main__":
+    unittest.main()
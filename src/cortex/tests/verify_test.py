@@ -0,0 +1,106 @@
+"""
+Tests for verify.py module.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from cortex.model_headers import HeaderCache
+from cortex.verify import (
+    ExpectedFile,
+    Verifier,
+    read_manifest,
+    sha256_file,
+    write_manifest,
+)
+
+
+class TestVerifier(unittest.TestCase):
+    """Test hashing, comparison and the digest cache."""
+
+    def setUp(self):
+        """Two shards and a verifier with an isolated digest cache."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.cache_path = self.temp_dir / "digests.json"
+        self.shards = {}
+        for name, size in (("a.safetensors", 300_000), ("b.safetensors", 5_000)):
+            path = self.temp_dir / name
+            path.write_bytes(os.urandom(size))
+            self.shards[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def verifier(self):
+        return Verifier(workers=2, cache=HeaderCache("digests.json", path=self.cache_path))
+
+    def expected(self):
+        return [
+            ExpectedFile(path, digest, path.stat().st_size) for path, digest in self.shards.items()
+        ]
+
+    def test_sha256_file(self):
+        """Test small reads give the same digest as hashing the whole file."""
+        path, digest = next(iter(self.shards.items()))
+
+        self.assertEqual(sha256_file(path, read_size=4096), digest)
+
+    def test_matching_files_pass(self):
+        """Test intact files verify and report their hashing throughput."""
+        progress = []
+
+        result = self.verifier().verify(self.expected(), lambda *p: progress.append(p))
+
+        self.assertTrue(result.ok)
+        self.assertEqual(result.bytes_hashed, 305_000)
+        self.assertEqual(progress[-1], (305_000, 305_000))
+        self.assertGreater(result.gb_per_second, 0)
+
+    def test_corrupt_missing_and_truncated_files_fail(self):
+        """Test each kind of damage is reported per file."""
+        expected = self.expected()
+        expected[0].sha256 = "0" * 64
+        expected[1].size += 1
+        expected.append(ExpectedFile(self.temp_dir / "c.safetensors", "f" * 64, 10))
+
+        result = self.verifier().verify(expected)
+
+        self.assertFalse(result.ok)
+        failures = {check.path.name: check for check in result.failures}
+        self.assertEqual(failures["a.safetensors"].actual, self.shards[expected[0].path])
+        self.assertIn("expected 5001", failures["b.safetensors"].error)
+        self.assertEqual(failures["c.safetensors"].error, "missing")
+
+    def test_unchanged_files_are_not_hashed_again(self):
+        """Test a second pass reads digests from the cache until a file changes."""
+        self.verifier().verify(self.expected())
+
+        again = self.verifier().verify(self.expected())
+        self.assertTrue(again.ok)
+        self.assertEqual(again.bytes_hashed, 0)
+        self.assertTrue(all(check.cached for check in again.files))
+
+        path = next(iter(self.shards))
+        stat = path.stat()
+        path.write_bytes(b"x" * stat.st_size)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        changed = self.verifier().verify(self.expected())
+        self.assertEqual([check.path for check in changed.failures], [path])
+
+    def test_nothing_to_check_is_not_ok(self):
+        """Test an empty pass doesn't count as verified."""
+        self.assertFalse(self.verifier().verify([]).ok)
+
+    def test_manifest_round_trip(self):
+        """Test manifests store paths relative to the model directory."""
+        write_manifest(self.temp_dir, self.expected(), "org/model")
+
+        expected = sorted(self.expected(), key=lambda f: f.path)
+        self.assertEqual(read_manifest(self.temp_dir), expected)
+        self.assertEqual(read_manifest(self.temp_dir / "missing"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+"""
+Tests for watchdog.py module.
+
+Memory readings are faked; the MLX cases run real subprocesses so process
+lookup, CPU accounting and termination are exercised for real.
+"""
+
+import asyncio
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import psutil
+from cortex.health import HealthMonitor
+from cortex.watchdog import MemoryWatchdog
+
+GB = 1024**3
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(60)"]
+
+# Stands in for an on-demand proxy: runs a backend and outlives it
+PROXY = [
+    sys.executable,
+    "-c",
+    f"import subprocess, time; subprocess.run({SLEEPER!r}); time.sleep(60)",
+]
+
+
+def loaded_model(name, size_gb, expires_at="2026-01-01T12:00:00Z"):
+    """An entry as returned by Ollama's /api/ps."""
+    return {"name": name, "size": int(size_gb * GB), "expires_at": expires_at}
+
+
+class WatchdogTestCase(unittest.TestCase):
+    """Shared fixtures for watchdog tests."""
+
+    def setUp(self):
+        """Fake memory readings that unloads can change."""
+        self.memory = SimpleNamespace(percent=50.0, available=16 * GB)
+        self.swap = SimpleNamespace(percent=0.0, sin=0, sout=0)
+        for target, value in (
+            ("psutil.virtual_memory", self.memory),
+            ("psutil.swap_memory", self.swap),
+        ):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+    def set_pressure(self, percent, available_gb):
+        """Change what psutil.virtual_memory() reports."""
+        self.memory.percent = percent
+        self.memory.available = int(available_gb * GB)
+
+    def make_ollama(self, loaded):
+        """A provider whose unloads free the model's memory."""
+        ollama = MagicMock()
+        ollama.list_loaded_models = AsyncMock(return_value=loaded)
+
+        async def unload(name):
+            size = next(m["size"] for m in loaded if m["name"] == name)
+            self.set_pressure(self.memory.percent - 20, self.memory.available / GB + size / GB)
+            return True
+
+        ollama.unload_model = AsyncMock(side_effect=unload)
+        return ollama
+
+    @staticmethod
+    def backdate(dog, seconds):
+        """Pretend every tracked model was last used ``seconds`` ago."""
+        dog._ollama_activity = {
+            name: (expires_at, last - seconds)
+            for name, (expires_at, last) in dog._ollama_activity.items()
+        }
+        if dog._mlx_activity:
+            pid, cpu, last = dog._mlx_activity
+            dog._mlx_activity = (pid, cpu, last - seconds)
+
+
+class TestMemoryWatchdog(WatchdogTestCase):
+    """Test idle tracking and unloading of Ollama models under memory pressure."""
+
+    def test_no_pressure_no_action(self):
+        """Test that nothing is unloaded while memory is fine."""
+        ollama = self.make_ollama([loaded_model("llama3:8b", 5)])
+        dog = MemoryWatchdog(HealthMonitor(), ollama=ollama, idle_seconds=0)
+
+        self.assertEqual(asyncio.run(dog.check_once()), [])
+        ollama.unload_model.assert_not_awaited()
+
+    def test_idle_models_unloaded_largest_first(self):
+        """Test unloading stops once the largest idle model relieves pressure."""
+        ollama = self.make_ollama([loaded_model("phi3:mini", 2), loaded_model("llama3:70b", 40)])
+        dog = MemoryWatchdog(HealthMonitor(), ollama=ollama, idle_seconds=60)
+        asyncio.run(dog.check_once())
+        self.backdate(dog, 120)
+
+        self.set_pressure(96.0, 1)
+        actions = asyncio.run(dog.check_once())
+
+        self.assertEqual([a.model for a in actions], ["llama3:70b"])
+        ollama.unload_model.assert_awaited_once_with("llama3:70b")
+        self.assertEqual(actions[0].freed_bytes, 40 * GB)
+        self.assertIn("1.0GB -> 41.0GB", actions[0].describe())
+
+    def test_recently_used_model_kept(self):
+        """Test that a model whose keep-alive moved is treated as in use."""
+        ollama = self.make_ollama([loaded_model("llama3:8b", 5)])
+        dog = MemoryWatchdog(HealthMonitor(), ollama=ollama, idle_seconds=60)
+        asyncio.run(dog.check_once())
+        self.backdate(dog, 120)
+
+        ollama.list_loaded_models.return_value = [
+            loaded_model("llama3:8b", 5, expires_at="2026-01-01T12:05:00Z")
+        ]
+        self.set_pressure(96.0, 1)
+
+        self.assertEqual(asyncio.run(dog.check_once()), [])
+        ollama.unload_model.assert_not_awaited()
+
+    def test_canary_nudge_is_not_use(self):
+        """Test an expiry moved by a second, as a health canary moves it, stays idle."""
+        ollama = self.make_ollama([loaded_model("llama3:8b", 5)])
+        dog = MemoryWatchdog(HealthMonitor(), ollama=ollama, idle_seconds=60)
+        asyncio.run(dog.check_once())
+        self.backdate(dog, 120)
+
+        ollama.list_loaded_models.return_value = [
+            loaded_model("llama3:8b", 5, expires_at="2026-01-01T12:00:01.123456789Z")
+        ]
+        self.set_pressure(96.0, 1)
+
+        self.assertEqual(len(asyncio.run(dog.check_once())), 1)
+        ollama.unload_model.assert_awaited_once_with("llama3:8b")
+
+    def test_first_seen_model_kept(self):
+        """Test that a model is not unloaded before it has been watched."""
+        ollama = self.make_ollama([loaded_model("llama3:8b", 5)])
+        dog = MemoryWatchdog(HealthMonitor(), ollama=ollama, idle_seconds=60)
+        self.set_pressure(96.0, 1)
+
+        self.assertEqual(asyncio.run(dog.check_once()), [])
+
+
+class TestMLXWatchdog(WatchdogTestCase):
+    """Test stopping idle MLX servers, run against real processes."""
+
+    def spawn(self, command):
+        """Start a process that is cleaned up after the test."""
+        process = subprocess.Popen(command)
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        return process
+
+    def make_mlx(self, pid):
+        """A provider stand-in with a PID file."""
+        pid_file = self.temp_dir / "mlx_server.pid"
+        pid_file.write_text(str(pid))
+        return SimpleNamespace(pid_file=pid_file, stop_server=AsyncMock(return_value=True))
+
+    def test_idle_server_stopped(self):
+        """Test that a plain MLX server is stopped through the provider."""
+        server = self.spawn(SLEEPER)
+        mlx = self.make_mlx(server.pid)
+        dog = MemoryWatchdog(
+            HealthMonitor(), mlx=mlx, idle_seconds=60, server_status={"model": "mlx-community/q"}
+        )
+        asyncio.run(dog.check_once())
+        self.backdate(dog, 120)
+
+        self.set_pressure(96.0, 1)
+        with patch("cortex.watchdog.RECLAIM_TIMEOUT", 0.1):
+            actions = asyncio.run(dog.check_once())
+
+        mlx.stop_server.assert_awaited_once()
+        self.assertEqual(actions[0].provider, "mlx")
+        self.assertEqual(actions[0].model, "mlx-community/q")
+        self.assertGreater(actions[0].resident_bytes, 0)
+
+    def test_on_demand_backend_stopped_proxy_kept(self):
+        """Test that only the on-demand backend is stopped so it can restart lazily."""
+        proxy = self.spawn(PROXY)
+        deadline = time.monotonic() + 5
+        while not psutil.Process(proxy.pid).children() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        backend = psutil.Process(proxy.pid).children()[0]
+
+        mlx = self.make_mlx(proxy.pid)
+        dog = MemoryWatchdog(
+            HealthMonitor(),
+            mlx=mlx,
+            idle_seconds=60,
+            server_status={"provider": "mlx", "on_demand": True, "model": "mlx-community/q"},
+        )
+        asyncio.run(dog.check_once())
+        self.backdate(dog, 120)
+
+        self.set_pressure(96.0, 1)
+        with patch("cortex.watchdog.RECLAIM_TIMEOUT", 0.1):
+            actions = asyncio.run(dog.check_once())
+
+        self.assertEqual(len(actions), 1)
+        mlx.stop_server.assert_not_awaited()
+        self.assertFalse(backend.is_running() and backend.status() != psutil.STATUS_ZOMBIE)
+        self.assertIsNone(proxy.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()